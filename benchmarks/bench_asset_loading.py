@@ -0,0 +1,79 @@
+"""
+Measures the time to first frame with assets loaded before the first frame and with
+assets loaded in the background by the AssetLoader.
+
+Each run starts from nothing (context, shaders, meshes, textures, scene) and renders frames
+the way GraphicsEngine.render does until all assets are uploaded. It reports the time to the
+first frame, the time until the last placeholder is swapped out and the longest frame while
+loading. The cat mesh is measured with a cold and a warm mesh cache, kept in a temporary
+directory. The last frame of both modes is checked to be identical.
+
+Usage: python -m benchmarks.bench_asset_loading [width height]
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import create_app
+from src.mesh_cache import MeshCache
+from src.scene import Scene
+from src.srgb import BACKGROUND_COLOR
+from src.vbo import CatVBO
+
+
+def run(win_size, async_assets):
+    """
+    Starts a headless engine and renders until every asset is loaded.
+    Returns:
+        tuple: The time to first frame and to fully loaded in milliseconds, the longest
+               frame in milliseconds, the number of frames and the last frame's pixels.
+    """
+    start = time.perf_counter()
+    app = create_app(win_size, async_assets)
+    app.scene = Scene(app)
+
+    frames, longest, first_frame = 0, 0, None
+    while True:
+        frame_start = time.perf_counter()
+        if app.assets is not None:
+            app.assets.update()
+        app.fbo.clear(color=BACKGROUND_COLOR)
+        app.frame_ubo.update()
+        app.scene.render()
+        app.stats.end_frame()
+        app.ctx.finish()
+        now = time.perf_counter()
+        frames += 1
+        longest = max(longest, now - frame_start)
+        first_frame = first_frame or now - start
+        if app.assets is None or not app.assets.busy:
+            break
+        time.sleep(0.001)
+
+    loaded = time.perf_counter() - start
+    pixels = np.frombuffer(app.fbo.read(), dtype='u1')
+    if app.assets is not None:
+        app.assets.destroy()
+    app.mesh.destroy()
+    return first_frame * 1000, loaded * 1000, longest * 1000, frames, pixels
+
+
+def main(width=1600, height=900):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # fills the mesh cache and the file system cache
+        CatVBO.cache = MeshCache(cache_dir)
+        run((width, height), False)
+        for cache in ('cold', 'warm'):
+            pixels = {}
+            for async_assets in (False, True):
+                CatVBO.cache = MeshCache(tempfile.mkdtemp(dir=cache_dir) if cache == 'cold' else cache_dir)
+                first, loaded, longest, frames, pixels[async_assets] = run((width, height), async_assets)
+                print(f'{cache} cache, {"async" if async_assets else "sync "}: first frame {first:7.1f} ms, '
+                      f'fully loaded {loaded:7.1f} ms after {frames:3d} frames, longest frame {longest:6.1f} ms')
+            print(f'{cache} cache: identical final frames: {np.array_equal(pixels[False], pixels[True])}')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,63 @@
+"""
+Measures the draw-call reduction of frustum culling on a 100k-object scene.
+
+Objects are spread over a 1000 x 1000 area around the camera. For a sweep of camera
+headings the script reports the number of objects submitted with and without culling,
+the BVH query time, the time of a vectorized brute-force test over all boxes for
+comparison, and the cost of moving 1% of the objects incrementally.
+
+Usage: python -m benchmarks.bench_culling [N]
+"""
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.bounding_volume import AABB
+from src.bvh import BVH
+from src.camera import Camera
+from src.frustum import Frustum
+
+
+def main(n=100_000, headings=8):
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(-500, 500, (n, 3)).astype('f4')
+    centers[:, 1] = rng.uniform(-5, 5, n)
+    half_sizes = rng.uniform(0.5, 2, (n, 1)).astype('f4')
+    mins, maxs = centers - half_sizes, centers + half_sizes
+
+    start = time.perf_counter()
+    bvh = BVH()
+    bvh.build([(i, AABB(mins[i], maxs[i])) for i in range(n)])
+    print(f'BVH build for {n} objects: {(time.perf_counter() - start) * 1000:.0f} ms')
+
+    camera = Camera(SimpleNamespace(WIN_SIZE=(1600, 900), delta_time=0))
+    print(f'{"yaw":>5} {"draws":>8} {"culled %":>9} {"bvh ms":>8} {"brute ms":>9}')
+    for yaw in np.linspace(0, 360, headings, endpoint=False):
+        camera.yaw = float(yaw)
+        camera.update_camera_vectors()
+        camera.m_view = camera.get_view_matrix()
+        frustum = Frustum.from_camera(camera)
+
+        start = time.perf_counter()
+        visible = bvh.query(frustum)
+        bvh_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        frustum.cull_aabbs(mins, maxs)
+        brute_ms = (time.perf_counter() - start) * 1000
+
+        print(f'{yaw:>5.0f} {len(visible):>8} {100 * (1 - len(visible) / n):>8.2f}% '
+              f'{bvh_ms:>8.2f} {brute_ms:>9.2f}')
+
+    moving = rng.choice(n, n // 100, replace=False)
+    offsets = rng.uniform(-1, 1, (len(moving), 3)).astype('f4')
+    start = time.perf_counter()
+    reinserted = sum(bvh.update(int(i), AABB(mins[i] + d, maxs[i] + d)) for i, d in zip(moving, offsets))
+    print(f'Incremental update of {len(moving)} moved objects: '
+          f'{(time.perf_counter() - start) * 1000:.1f} ms ({reinserted} reinserted)')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
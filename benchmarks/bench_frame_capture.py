@@ -0,0 +1,75 @@
+"""
+Compares the frame time of capturing every frame of the scene to files with a synchronous
+framebuffer read against the pixel pack buffer ring of FrameCapture, at 1600x900.
+
+Usage: python -m benchmarks.bench_frame_capture [FRAMES]
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pygame as pg
+
+from src.frame_capture import FrameCapture
+from src.scene import Scene
+from src.srgb import BACKGROUND_COLOR
+from .common import create_app
+
+
+def time_capture(app, capture, frames):
+    """
+    Returns the average wall-clock time in milliseconds of a frame of the scene followed by
+    capture(), including the writes still pending after the last frame.
+    """
+
+    app.scene.render()
+    app.ctx.finish()
+    start = time.perf_counter()
+    for _ in range(frames):
+        app.fbo.clear(color=BACKGROUND_COLOR)
+        app.frame_ubo.update()
+        app.scene.render()
+        app.stats.end_frame()
+        capture()
+    app.ctx.finish()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main(frames=30):
+    app = create_app()
+    app.scene = Scene(app)
+    width, height = app.WIN_SIZE
+
+    def write_sync(directory, format):
+        def capture():
+            capture.frame += 1
+            image = np.frombuffer(app.fbo.read(components=3), dtype='u1').reshape(height, width, 3)[::-1]
+            path = f'{directory}/frame_{capture.frame:05d}.{format}'
+            if format == 'raw':
+                with open(path, 'wb') as file:
+                    file.write(image.tobytes())
+            else:
+                pg.image.save(pg.image.frombuffer(image.tobytes(), (width, height), 'RGB'), path)
+        capture.frame = 0
+        return capture
+
+    print(f'{width}x{height}, {frames} frames, ms per frame')
+    print(f'{"render only":<28} {time_capture(app, lambda: None, frames):>8.2f}')
+    print(f'{"synchronous read":<28} {time_capture(app, lambda: app.fbo.read(components=3), frames):>8.2f}')
+    for format in ('raw', 'png'):
+        with tempfile.TemporaryDirectory() as directory:
+            sync = time_capture(app, write_sync(directory, format), frames)
+        with tempfile.TemporaryDirectory() as directory:
+            ring = FrameCapture(app, directory, format=format)
+            start = time.perf_counter()
+            ring_ms = time_capture(app, ring.capture, frames)
+            ring.destroy()
+            # include the frames still in the ring and in the writer queue at the end
+            drained = (time.perf_counter() - start) * 1000 / frames
+        print(f'{"synchronous " + format:<28} {sync:>8.2f}')
+        print(f'{"PBO ring " + format:<28} {ring_ms:>8.2f}  ({drained:.2f} until all written)')
+
+
+if __name__ == '__main__':
+    main(*[int(n) for n in sys.argv[1:]])
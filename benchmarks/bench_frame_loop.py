@@ -0,0 +1,84 @@
+"""
+Compares the variable-step main loop (one update per frame scaled by the frame time, capped
+with pygame's clock) against the fixed-rate update loop with the different frame pacing
+policies, on a synthetic frame: a 4 ms render with a 100 ms hitch every second and a 0.5 ms
+update, both spinning on the CPU like real work.
+
+For each loop it reports the frame and update rates, the largest simulation step (a large
+step is a visible jump), the jitter of the frame intervals and the CPU use of the process.
+
+Usage: python -m benchmarks.bench_frame_loop [SECONDS]
+"""
+import sys
+import time
+
+import numpy as np
+import pygame as pg
+
+from src.frame_loop import FixedTimestep, FramePacer
+
+RENDER_TIME, HITCH_TIME, UPDATE_TIME = 0.004, 0.1, 0.0005
+
+
+def work(duration):
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+def render(frame):
+    work(HITCH_TIME if frame % 60 == 59 else RENDER_TIME)
+
+
+def run_variable(seconds):
+    clock = pg.time.Clock()
+    steps, frame_ends, delta_time = [], [], 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        work(UPDATE_TIME)
+        steps.append(delta_time)
+        render(len(frame_ends))
+        delta_time = clock.tick(60)
+        frame_ends.append(time.perf_counter())
+    return frame_ends, steps
+
+
+def run_fixed(seconds, fps_limit, policy, tick_rate=60):
+    timestep, pacer = FixedTimestep(tick_rate), FramePacer(fps_limit, policy)
+    steps, frame_ends = [], []
+    last = time.perf_counter()
+    end = last + seconds
+    while time.perf_counter() < end:
+        now = time.perf_counter()
+        for _ in range(timestep.advance(now - last)):
+            work(UPDATE_TIME)
+            steps.append(timestep.step * 1000)
+        last = now
+        render(len(frame_ends))
+        pacer.wait()
+        frame_ends.append(time.perf_counter())
+    return frame_ends, steps
+
+
+def main(seconds=5.0):
+    pg.init()
+    loops = [('variable step, clock.tick(60)', lambda: run_variable(seconds))]
+    for policy in FramePacer.POLICIES:
+        loops.append((f'fixed 60 Hz, 60 fps {policy}', lambda policy=policy: run_fixed(seconds, 60, policy)))
+    loops.append(('fixed 60 Hz, uncapped', lambda: run_fixed(seconds, 0, 'hybrid')))
+    loops.append(('fixed 30 Hz, uncapped', lambda: run_fixed(seconds, 0, 'hybrid', tick_rate=30)))
+
+    print(f'{"loop":<32} {"fps":>6} {"updates/s":>10} {"max step ms":>12} {"jitter ms":>10} {"cpu":>6}')
+    for name, run in loops:
+        start, cpu = time.perf_counter(), time.process_time()
+        frame_ends, steps = run()
+        wall, cpu = time.perf_counter() - start, time.process_time() - cpu
+        intervals = np.diff(frame_ends) * 1000
+        # jitter of the regular frames, leaving the hitches and the frames right after them out
+        regular = intervals[intervals < np.percentile(intervals, 95)]
+        print(f'{name:<32} {len(frame_ends) / wall:>6.0f} {len(steps) / wall:>10.1f} {max(steps):>12.1f} '
+              f'{regular.std():>10.2f} {cpu / wall:>6.0%}')
+
+
+if __name__ == '__main__':
+    main(*[float(n) for n in sys.argv[1:]])
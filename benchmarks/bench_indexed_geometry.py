@@ -0,0 +1,32 @@
+"""
+Reports the vertex counts and buffer sizes of the mesh VBOs before and after indexing.
+
+"Unrolled" is the non-indexed layout the VBOs used to upload (three vertices per triangle),
+"indexed" is the unique interleaved vertices plus the index buffer.
+
+Usage: python -m benchmarks.bench_indexed_geometry
+"""
+import time
+
+from src.vbo import BaseVBO
+from .common import create_app
+
+
+def main():
+    app = create_app((64, 64))
+    print(f'{"mesh":>6} {"unrolled verts":>15} {"unique verts":>13} {"unrolled KiB":>13} '
+          f'{"indexed KiB":>12} {"saved":>6} {"dedup ms":>9}')
+    for name, vbo in app.mesh.vao.vbo.vbos.items():
+        unrolled = vbo.get_vertex_data()
+        start = time.perf_counter()
+        BaseVBO.get_indexed_data(unrolled)
+        dedup_ms = (time.perf_counter() - start) * 1000
+
+        unrolled_size = unrolled.nbytes
+        indexed_size = vbo.vbo.size + vbo.ibo.size
+        print(f'{name:>6} {vbo.index_count:>15} {vbo.vertex_count:>13} {unrolled_size / 1024:>13.1f} '
+              f'{indexed_size / 1024:>12.1f} {1 - indexed_size / unrolled_size:>6.0%} {dedup_ms:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
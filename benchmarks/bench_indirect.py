@@ -0,0 +1,88 @@
+"""
+Compares drawing many separately transformed models through the render queue, one draw call
+per model, against the indirect renderer, one multi-draw call per texture over the merged
+geometry pool, with the commands culled on the CPU or by the compute shader.
+
+The scene is a grid of cubes and cats using three textures, seen from the looping spline of
+camera_paths/benchmark.json, so part of the models is outside the frustum in every frame.
+For each mode it reports the mean CPU time of the frame submission, the mean frame time
+including the GPU, and the draw calls per frame; the frames of the three modes are also
+compared pixel by pixel.
+
+Usage: python -m benchmarks.bench_indirect [OBJECTS] [FRAMES]
+"""
+import sys
+import time
+
+import numpy as np
+
+from main import GraphicsEngine
+from src.camera_path import CameraPath
+from src.model import Cat, Cube
+from src.scene import Scene
+from src.texture import Texture
+
+CAMERA_PATH = 'camera_paths/benchmark.json'
+
+
+class MixedScene(Scene):
+    """
+    A scene of `count` models on a grid, every 32nd one a cat and the others cubes.
+    """
+
+    def __init__(self, app, count):
+        self.count = count
+        super().__init__(app)
+
+    def load(self):
+        side = int(np.ceil(np.sqrt(self.count)))
+        for i in range(self.count):
+            pos = (2 * (i % side) - side, 0, 2 * (i // side) - side)
+            if i % 32 == 31:
+                self.add_object(Cat(self.app, texture_id=i % 3, pos=pos, rotation=(-90, 0, -90),
+                                    scale=(0.05, 0.05, 0.05)))
+            else:
+                self.add_object(Cube(self.app, texture_id=i % 3, pos=pos, scale=(0.5, 0.5, 0.5)))
+
+
+def run(count, frames, indirect, fps=15, warmup=3):
+    app = GraphicsEngine((640, 360), headless=True, camera_path=CameraPath.load(CAMERA_PATH),
+                         scene=lambda app: MixedScene(app, count), indirect=indirect)
+    app.assets.finish()
+    for frame in range(warmup):
+        app.step(frame / fps, 1000 / fps)
+    app.ctx.finish()
+
+    submit = total = 0
+    images = []
+    for frame in range(warmup, warmup + frames):
+        start = time.perf_counter()
+        app.step(frame / fps, 1000 / fps)
+        submitted = time.perf_counter()
+        app.ctx.finish()
+        submit += submitted - start
+        total += time.perf_counter() - start
+        images.append(app.read_frame())
+    draw_calls = app.stats.last_frame['draw_calls']
+    app.destroy()
+    return submit * 1000 / frames, total * 1000 / frames, draw_calls, images
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    Texture.ANISOTROPY = 1.0
+
+    print(f'{count} models, {frames} frames\n')
+    print(f'{"mode":<14} {"submit ms":>10} {"frame ms":>10} {"draw calls":>11} {"max diff":>9}')
+    reference = None
+    for mode in (None, 'cpu', 'gpu'):
+        submit_ms, frame_ms, draw_calls, images = run(count, frames, mode)
+        reference = reference or images
+        diff = max(int(np.abs(a.astype(int) - b.astype(int)).max()) for a, b in zip(reference, images))
+        name = 'render queue' if mode is None else f'indirect {mode}'
+        print(f'{name:<14} {submit_ms:>10.2f} {frame_ms:>10.2f} {draw_calls:>11} {diff:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Compares the frame time of per-object cubes against a single InstancedCube.
+
+Usage: python -m benchmarks.bench_instancing [N ...]
+"""
+import sys
+
+import numpy as np
+
+from src.model import Cube, InstancedCube
+from .common import create_app, time_frames
+
+
+def grid_positions(n):
+    """
+    Returns n positions laid out on a square floor grid with the same spacing as Scene.load.
+    """
+
+    side = int(np.ceil(np.sqrt(n)))
+    return [(3 * (i % side) - 1.5 * side, -3, -3 * (i // side)) for i in range(n)]
+
+
+def main(counts=(400, 10_000, 100_000)):
+    app = create_app()
+    print(f'{"N":>8} {"per-object submit/frame ms":>28} {"instanced submit/frame ms":>27}')
+    for n in counts:
+        positions = grid_positions(n)
+        frames = 5 if n > 10_000 else 20
+
+        cubes = [Cube(app, texture_id=1, pos=pos) for pos in positions]
+
+        def render_per_object():
+            for cube in cubes:
+                cube.render()
+
+        per_object = time_frames(app, render_per_object, frames=frames)
+
+        floor = InstancedCube(app, texture_id=1, positions=positions)
+        instanced = time_frames(app, floor.render, frames=frames)
+        floor.vao.release()
+        floor.instance_vbo.destroy()
+
+        print(f'{n:>8} {per_object[0]:>13.2f} / {per_object[1]:>12.2f} {instanced[0]:>12.2f} / {instanced[1]:>12.2f}')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or (400, 10_000, 100_000))
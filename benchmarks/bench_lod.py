@@ -0,0 +1,78 @@
+"""
+Compares drawing a crowd of cats with their full mesh against drawing them with the levels of
+detail generated by vertex clustering, picked each frame from their projected size.
+
+The cats are scattered over a field stretching from 5 to 95 units in front of the camera,
+which slowly moves forward along the field, so most cats are far away and a few switch levels
+in every frame. For each mode it reports the triangles drawn per frame, the mean frame time
+including the GPU and the level switches per frame.
+
+Usage: python -m benchmarks.bench_lod [CATS] [FRAMES]
+"""
+import sys
+import time
+
+import numpy as np
+
+from main import GraphicsEngine
+from src.camera_path import CameraPath
+from src.model import Cat
+from src.scene import Scene
+from src.texture import Texture
+
+# Moving 10 units forward, looking down the field
+CAMERA_PATH = CameraPath([(0.0, (0, 2, 0), -90, -2), (10.0, (0, 2, -10), -90, -2)])
+
+
+class CatField(Scene):
+    """
+    A scene of `count` cats at random positions between 5 and 95 units in front of the origin.
+    """
+
+    def __init__(self, app, count):
+        self.count = count
+        super().__init__(app)
+
+    def load(self):
+        rng = np.random.default_rng(0)
+        depths = rng.uniform(5, 95, self.count)
+        for i, depth in enumerate(depths):
+            pos = (rng.uniform(-0.5, 0.5) * depth, 0, -depth)
+            self.add_object(Cat(self.app, texture_id=i % 3, pos=pos, rotation=(-90, 0, rng.uniform(0, 360)),
+                                scale=(0.05, 0.05, 0.05)))
+
+
+def run(count, frames, lod, fps=15, warmup=3):
+    app = GraphicsEngine((640, 360), headless=True, camera_path=CAMERA_PATH,
+                         scene=lambda app: CatField(app, count), lod=lod)
+    app.assets.finish()
+    for frame in range(warmup):
+        app.step(frame / fps, 1000 / fps)
+    app.ctx.finish()
+
+    total = triangles = switches = 0
+    for frame in range(warmup, warmup + frames):
+        start = time.perf_counter()
+        app.step(frame / fps, 1000 / fps)
+        app.ctx.finish()
+        total += time.perf_counter() - start
+        triangles += app.stats.last_frame['triangles']
+        switches += app.stats.last_frame['lod_switches']
+    app.destroy()
+    return triangles / frames, total * 1000 / frames, switches / frames
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    Texture.ANISOTROPY = 1.0
+
+    print(f'{count} cats, {frames} frames\n')
+    print(f'{"mode":<10} {"triangles":>12} {"frame ms":>10} {"switches":>9}')
+    for lod in (False, True):
+        triangles, frame_ms, switches = run(count, frames, lod)
+        print(f'{"lod" if lod else "full":<10} {triangles:>12.0f} {frame_ms:>10.2f} {switches:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
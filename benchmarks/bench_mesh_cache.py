@@ -0,0 +1,45 @@
+"""
+Measures the cat VBO creation time with a cold and a warm mesh cache.
+
+The cold run parses the OBJ file, indexes it and writes the cache file; the warm runs
+memory-map the cache file and upload it. A temporary cache directory is used, so the
+cache of the engine is left untouched.
+
+Usage: python -m benchmarks.bench_mesh_cache [warm runs]
+"""
+import sys
+import tempfile
+import time
+
+import moderngl as mgl
+
+from src.mesh_cache import MeshCache
+from src.vbo import CatVBO
+
+
+def main(warm_runs=5):
+    ctx = mgl.create_standalone_context(require=330, backend='egl')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        CatVBO.cache = MeshCache(cache_dir)
+
+        start = time.perf_counter()
+        vbo = CatVBO(ctx)
+        ctx.finish()
+        cold = (time.perf_counter() - start) * 1000
+        vbo.destroy()
+
+        warm = []
+        for _ in range(warm_runs):
+            start = time.perf_counter()
+            vbo = CatVBO(ctx)
+            ctx.finish()
+            warm.append((time.perf_counter() - start) * 1000)
+            vbo.destroy()
+
+    print(f'cat: {vbo.vertex_count} vertices, {vbo.index_count} indices')
+    print(f'cold cache: {cold:8.1f} ms')
+    print(f'warm cache: {min(warm):8.1f} ms (best of {warm_runs}), {cold / min(warm):.0f}x faster')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
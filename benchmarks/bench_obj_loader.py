@@ -0,0 +1,74 @@
+"""
+Compares the OBJ parsing time of ObjLoader and pywavefront on synthetic meshes.
+
+Two 1M-triangle grids are written to a temporary directory: one made of quads, which both
+loaders triangulate, and one made of triangles. Both use the v/vt/vn index format of the
+cat model. The outputs of the two loaders are checked to be identical.
+
+Usage: python -m benchmarks.bench_obj_loader [triangles]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pywavefront
+
+from src.obj_loader import ObjLoader
+
+
+def write_grid(path, triangles, quads):
+    """
+    Writes a grid of about `triangles` triangles, as quads or triangles, to an OBJ file.
+    """
+    side = int(np.sqrt(triangles / 2))
+    u, v = np.meshgrid(np.linspace(0, 1, side + 1), np.linspace(0, 1, side + 1))
+    u, v = u.ravel(), v.ravel()
+    heights = 0.1 * np.sin(u * 20) * np.cos(v * 20)
+
+    cells = np.arange(side * side)
+    a = cells // side * (side + 1) + cells % side + 1
+    corners = np.stack([a, a + 1, a + side + 2, a + side + 1], axis=1)
+    if not quads:
+        corners = np.concatenate([corners[:, :3], corners[:, [0, 2, 3]]])
+    faces = np.repeat(corners, 3, axis=1)
+
+    with open(path, 'w') as file:
+        file.write('mtllib grid.mtl\n')
+        np.savetxt(file, np.stack([u, heights, v], axis=1), fmt='v %.6f %.6f %.6f')
+        np.savetxt(file, np.stack([u, v], axis=1), fmt='vt %.6f %.6f')
+        np.savetxt(file, np.tile([0.0, 1.0, 0.0], (len(u), 1)), fmt='vn %.4f %.4f %.4f')
+        file.write('usemtl Grid\n')
+        np.savetxt(file, faces, fmt='f ' + ' '.join(['%d/%d/%d'] * corners.shape[1]))
+    with open(os.path.join(os.path.dirname(path), 'grid.mtl'), 'w') as file:
+        file.write('newmtl Grid\nmap_Kd grid.png\n')
+    return len(corners) * (corners.shape[1] - 2)
+
+
+def main(triangles=1_000_000):
+    logging.getLogger('pywavefront').setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for quads in (True, False):
+            path = os.path.join(temp_dir, 'grid.obj')
+            count = write_grid(path, triangles, quads)
+            size = os.path.getsize(path) / 2 ** 20
+
+            start = time.perf_counter()
+            reference = pywavefront.Wavefront(path).materials['Grid']
+            reference = np.array(reference.vertices, dtype='f4')
+            pywavefront_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            vertices = ObjLoader(path).materials['Grid'].vertices
+            loader_time = time.perf_counter() - start
+
+            same = np.array_equal(reference.view('u4'), vertices.view('u4'))
+            print(f'{"quads" if quads else "triangles":9s} {count:8d} triangles, {size:5.1f} MB: '
+                  f'pywavefront {pywavefront_time:6.2f} s, ObjLoader {loader_time:5.2f} s '
+                  f'({pywavefront_time / loader_time:4.1f}x), identical: {same}')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,85 @@
+"""
+Compares frustum culling alone against frustum and occlusion culling on an occluder-heavy
+scene.
+
+A row of wide walls with narrow gaps stands between the camera and a field of high-poly cats,
+so most cats are inside the frustum but hidden. The camera strafes along the walls, so cats
+keep appearing through the gaps and disappearing again. For each mode it reports the objects
+occluded per frame, the draw calls and triangles drawn unconditionally, and the median frame
+time including the GPU. With occlusion culling, the cats behind the walls are only tested with
+their bounding box and drawn conditionally, which the GPU skips while the box is hidden.
+
+Usage: python -m benchmarks.bench_occlusion [CATS] [FRAMES]
+"""
+import sys
+import time
+
+import numpy as np
+
+from main import GraphicsEngine
+from src.camera_path import CameraPath
+from src.model import Cat, Cube
+from src.scene import Scene
+from src.texture import Texture
+
+# Strafing 8 units to the right, 6 units in front of the walls
+CAMERA_PATH = CameraPath([(0.0, (-4, 0, 6), -90, 0), (8.0, (4, 0, 6), -90, 0)])
+
+
+class WalledField(Scene):
+    """
+    A scene of five 7 x 6 walls with 1-unit gaps along z = 0, and `count` cats at random
+    positions between 3 and 40 units behind them.
+    """
+
+    def __init__(self, app, count):
+        self.count = count
+        super().__init__(app)
+
+    def load(self):
+        for x in range(-16, 17, 8):
+            self.add_object(Cube(self.app, texture_id=0, pos=(x, 1, 0), scale=(3.5, 3, 0.5)))
+        rng = np.random.default_rng(0)
+        for i in range(self.count):
+            depth = rng.uniform(3, 40)
+            pos = (rng.uniform(-0.6, 0.6) * depth, -1.5, -depth)
+            self.add_object(Cat(self.app, texture_id=1 + i % 2, pos=pos, rotation=(-90, 0, rng.uniform(0, 360)),
+                                scale=(0.04, 0.04, 0.04)))
+
+
+def run(count, frames, occlusion, fps=15, warmup=3):
+    app = GraphicsEngine((1280, 720), headless=True, camera_path=CAMERA_PATH,
+                         scene=lambda app: WalledField(app, count), occlusion=occlusion)
+    app.assets.finish()
+    for frame in range(warmup):
+        app.step(frame / fps, 1000 / fps)
+    app.ctx.finish()
+
+    times, counters = [], dict.fromkeys(('objects_occluded', 'draw_calls', 'triangles'), 0)
+    for frame in range(warmup, warmup + frames):
+        start = time.perf_counter()
+        app.step(frame / fps, 1000 / fps)
+        app.ctx.finish()
+        times.append(time.perf_counter() - start)
+        for name in counters:
+            counters[name] += app.stats.last_frame[name]
+    app.destroy()
+    return {name: total / frames for name, total in counters.items()}, float(np.median(times)) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    Texture.ANISOTROPY = 1.0
+
+    print(f'{count} cats behind 5 walls, {frames} frames at 1280x720\n')
+    print(f'{"culling":<18} {"occluded":>9} {"draw calls":>11} {"triangles":>11} {"frame ms":>10}')
+    for occlusion in (False, True):
+        counters, frame_ms = run(count, frames, occlusion)
+        name = 'frustum+occlusion' if occlusion else 'frustum'
+        print(f'{name:<18} {counters["objects_occluded"]:>9.1f} {counters["draw_calls"]:>11.1f} '
+              f'{counters["triangles"]:>11.0f} {frame_ms:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
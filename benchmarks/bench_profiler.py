@@ -0,0 +1,46 @@
+"""
+Measures the overhead of the frame profiler on the CPU submission time of per-object cubes
+drawn through a RenderQueue, with the profiler disabled and enabled, and the cost of a
+single scope.
+
+Usage: python -m benchmarks.bench_profiler [N]
+"""
+import sys
+import timeit
+
+from src.model import Cube
+from src.render_queue import RenderQueue
+from .bench_instancing import grid_positions
+from .common import create_app, time_frames
+
+
+def main(n=10_000):
+    app = create_app()
+    cubes = [Cube(app, texture_id=1, pos=pos) for pos in grid_positions(n)]
+    queue = RenderQueue(app)
+    profiler = app.profiler
+
+    def render():
+        profiler.begin_frame()
+        with profiler.gpu_scope('frame'):
+            with profiler.scope('draw'):
+                queue.render(cubes)
+        profiler.end_frame(app.stats.counters)
+
+    count = 1_000_000
+    for enabled in (False, True):
+        profiler.enabled = enabled
+        submit, frame = time_frames(app, render, frames=20)
+
+        def enter_scope():
+            with profiler.scope('scope'):
+                pass
+
+        scope_ns = timeit.timeit(enter_scope, number=count) * 1e9 / count
+        profiler.scopes.clear()
+        label = 'enabled' if enabled else 'disabled'
+        print(f'{label:<9} {n} cubes submit/frame {submit:8.2f} / {frame:8.2f} ms, scope {scope_ns:6.0f} ns')
+
+
+if __name__ == '__main__':
+    main(*[int(n) for n in sys.argv[1:]])
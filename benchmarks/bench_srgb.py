@@ -0,0 +1,137 @@
+"""
+Compares the fill rate of the former shader-side gamma correction against the sRGB pipeline.
+
+Before, the fragment shader decoded every texel with pow(color, 2.2) and encoded every output
+with pow(color, 1 / 2.2), reading an RGB8 texture and writing an RGB8 framebuffer. Now the
+texture is GL_SRGB8, the framebuffer is sRGB with GL_FRAMEBUFFER_SRGB enabled, and the
+conversions are done by the texture and blending units. The former fragment shader is rebuilt
+here from the current one.
+
+Each frame draws a textured, lit cube stretched over the whole framebuffer several times with
+depth testing and face culling off, so every pixel is shaded LAYERS times and the frame time
+is dominated by fragment work. It reports the median frame time and the shaded pixels per
+second at each resolution.
+
+Usage: python -m benchmarks.bench_srgb [FRAMES] [LAYERS]
+"""
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+import glm
+import moderngl as mgl
+import numpy as np
+
+from src.srgb import BACKGROUND_COLOR, GL_FRAMEBUFFER_SRGB, create_framebuffer
+from src.texture import Texture
+from .common import create_app
+
+SIZES = {'1600x900': (1600, 900), '4K': (3840, 2160)}
+
+# The main() of the fragment shader before the change, for the baseline
+SHADER_GAMMA_MAIN = """void main() {
+    float gamma = 2.2;
+    vec3 color = texture(u_texture_0, uv_0).rgb;
+    color = pow(color, vec3(gamma));
+
+    color = getLight(color);
+
+    color = pow(color, 1 / vec3(gamma));
+    fragColor = vec4(color, 1.0);
+}"""
+
+
+def get_shader_gamma_program(ctx):
+    """
+    Compiles the default program with its fragment shader main() replaced by the former one.
+    """
+
+    with open('shaders/default.vert') as file:
+        vertex_shader = file.read()
+    with open('shaders/default.frag') as file:
+        fragment_shader = re.sub(r'void main\(\) \{.*\}', lambda _: SHADER_GAMMA_MAIN, file.read(), flags=re.S)
+    program = ctx.program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+    program['Frame'].binding = 0
+    return program
+
+
+def get_linear_texture(ctx, texture):
+    """
+    Returns a plain RGB8 copy of an sRGB texture, with its mipmaps built from the sRGB bytes
+    as the former textures were.
+    """
+
+    copy = ctx.texture(texture.size, components=3, data=texture.read())
+    copy.filter = (mgl.LINEAR_MIPMAP_LINEAR, mgl.LINEAR)
+    copy.build_mipmaps()
+    return copy
+
+
+def measure(app, fbo, draw, frames, warmup=2):
+    """
+    Returns the median time in milliseconds of a frame drawn by draw() into fbo.
+    """
+
+    fbo.use()
+    times = []
+    for frame in range(warmup + frames):
+        start = time.perf_counter()
+        fbo.clear(color=BACKGROUND_COLOR)
+        draw()
+        app.ctx.finish()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times[warmup:])) * 1000
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    layers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    Texture.ANISOTROPY = 1.0
+    app = create_app((320, 180))
+    ctx = app.ctx
+    ctx.disable(mgl.DEPTH_TEST | mgl.CULL_FACE)
+
+    # identity camera: the cube, flattened along z, covers the clip space; both its large faces
+    # are drawn, so each draw shades every pixel twice
+    camera = SimpleNamespace(m_proj=glm.mat4(), m_view=glm.mat4(), view_position=glm.vec3(0, 0, 3))
+    app.frame_ubo.update(camera)
+    m_model = glm.scale(glm.mat4(), glm.vec3(1, 1, 0.5))
+    srgb_texture = app.mesh.texture.textures[1]
+    linear_texture = get_linear_texture(ctx, srgb_texture)
+    vbo = app.mesh.vao.get_vbo('cube')
+
+    def get_draw(program, texture):
+        vao = ctx.vertex_array(program, [(vbo.vbo, vbo.format, *vbo.attribs)], index_buffer=vbo.ibo,
+                               index_element_size=vbo.index_element_size, skip_errors=True)
+        program['m_model'].write(m_model)
+        program['m_normal'].write(glm.transpose(glm.inverse(glm.mat3(m_model))))
+
+        def draw():
+            texture.use()
+            for _ in range(layers // 2):
+                vao.render()
+        return draw
+
+    shader_gamma = get_draw(get_shader_gamma_program(ctx), linear_texture)
+    srgb = get_draw(app.mesh.vao.program.programs['default'], srgb_texture)
+
+    print(f'{frames} frames, every pixel shaded {layers // 2 * 2} times\n')
+    print(f'{"size":<10} {"pipeline":<14} {"frame ms":>10} {"Mpix/s":>8}')
+    for name, size in SIZES.items():
+        pixels = size[0] * size[1] * (layers // 2 * 2)
+        fbo = ctx.simple_framebuffer(size)
+        ctx.disable_direct(GL_FRAMEBUFFER_SRGB)
+        frame_ms = measure(app, fbo, shader_gamma, frames)
+        print(f'{name:<10} {"shader pow()":<14} {frame_ms:>10.2f} {pixels / frame_ms / 1000:>8.1f}')
+        fbo.release()
+
+        fbo = create_framebuffer(ctx, size)
+        ctx.enable_direct(GL_FRAMEBUFFER_SRGB)
+        frame_ms = measure(app, fbo, srgb, frames)
+        print(f'{name:<10} {"sRGB formats":<14} {frame_ms:>10.2f} {pixels / frame_ms / 1000:>8.1f}')
+        fbo.release()
+
+
+if __name__ == '__main__':
+    main()
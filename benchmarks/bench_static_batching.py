@@ -0,0 +1,110 @@
+"""
+Compares the per-object drawing of static models against static batching.
+
+The scene is the instanced floor of the default scene and COUNT static cubes standing on it,
+with the three cube textures, all flagged static. The camera follows the looping spline of
+camera_paths/benchmark.json. For each path it reports the draw calls, the median frame time
+including the GPU and the GPU memory of the engine's buffers and textures (see
+benchmarks.suite), which grows with static batching since every cube gets its own copy of the
+mesh. For static batching, it also reports the time to bake again and upload the part of the
+batch of one cube that moves, against the time to rebuild all batches.
+
+Usage: python -m benchmarks.bench_static_batching [COUNT] [FRAMES]
+"""
+import sys
+import time
+
+import numpy as np
+
+from main import GraphicsEngine
+from src.camera_path import CameraPath
+from src.model import Cube, InstancedCube
+from src.scene import Scene
+from src.texture import Texture
+from .suite import CAMERA_PATH, get_gpu_memory
+
+
+class StaticCity(Scene):
+    """
+    A scene of the 20 x 20 floor of the default scene and `count` static cubes of random sizes
+    on a grid above it.
+    """
+
+    def __init__(self, app, count):
+        self.count = count
+        super().__init__(app)
+
+    def load(self):
+        n, s = 30, 3
+        floor = [(x, -s, z) for x in range(-n, n, s) for z in range(-n, n, s)]
+        self.add_object(InstancedCube(self.app, texture_id=1, positions=floor, static=True))
+        rng = np.random.default_rng(0)
+        side = int(np.ceil(np.sqrt(self.count)))
+        for i in range(self.count):
+            x, z = i % side, i // side
+            height = rng.uniform(0.5, 3)
+            self.add_object(Cube(self.app, texture_id=i % 3, pos=(60 * x / side - 30, height - 2, 60 * z / side - 30),
+                                 scale=(0.5, height, 0.5), static=True))
+
+
+def median_ms(function, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def run(count, frames, static_batching, fps=15, warmup=3):
+    app = GraphicsEngine((1280, 720), headless=True, camera_path=CameraPath.load(CAMERA_PATH),
+                         scene=lambda app: StaticCity(app, count), static_batching=static_batching)
+    app.assets.finish()
+    for frame in range(warmup):
+        app.step(frame / fps, 1000 / fps)
+    app.ctx.finish()
+
+    times, draw_calls = [], 0
+    for frame in range(warmup, warmup + frames):
+        start = time.perf_counter()
+        app.step(frame / fps, 1000 / fps)
+        app.ctx.finish()
+        times.append(time.perf_counter() - start)
+        draw_calls += app.stats.last_frame['draw_calls']
+    result = {'draw_calls': draw_calls / frames, 'frame_ms': float(np.median(times)) * 1000,
+              'gpu_mb': get_gpu_memory(app) / 2 ** 20}
+
+    batcher = app.scene.static_batcher
+    if batcher is not None:
+        cube = batcher.objects[-1]
+
+        def move():
+            cube.pos = cube.pos + (0, 0.01, 0)
+            batcher.update()
+            app.ctx.finish()
+
+        def rebuild():
+            batcher.rebuild = True
+            batcher.update()
+            app.ctx.finish()
+        result['move_ms'], result['rebuild_ms'] = median_ms(move), median_ms(rebuild)
+    app.destroy()
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    Texture.ANISOTROPY = 1.0
+
+    print(f'{count} static cubes on the instanced floor, {frames} frames at 1280x720\n')
+    print(f'{"path":<16} {"draw calls":>11} {"frame ms":>10} {"GPU MB":>8}')
+    for static_batching in (False, True):
+        result = run(count, frames, static_batching)
+        name = 'static batches' if static_batching else 'per object'
+        print(f'{name:<16} {result["draw_calls"]:>11.1f} {result["frame_ms"]:>10.2f} {result["gpu_mb"]:>8.2f}')
+    print(f'\none cube moved: {result["move_ms"]:.3f} ms, all batches rebuilt: {result["rebuild_ms"]:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
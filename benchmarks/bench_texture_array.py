@@ -0,0 +1,56 @@
+"""
+Compares the frame time of a floor of cubes with mixed textures drawn as per-object cubes
+sorted by a RenderQueue, as one InstancedCube per texture, and as a single InstancedCube
+sampling a texture array.
+
+Usage: python -m benchmarks.bench_texture_array [N ...]
+"""
+import sys
+
+from src.model import Cube, InstancedCube
+from src.render_queue import RenderQueue
+from .bench_instancing import grid_positions
+from .common import create_app, time_frames
+
+TEXTURE_IDS = (0, 1, 2, 3)
+
+
+def main(counts=(400, 10_000, 100_000)):
+    app = create_app()
+    # build the texture array once, outside of the timed frames
+    app.mesh.texture.get_texture_array(TEXTURE_IDS)
+    print(f'{"N":>8} {"per-object submit/frame ms":>28} {"per-texture submit/frame ms":>29} '
+          f'{"array submit/frame ms":>23}')
+    for n in counts:
+        positions = grid_positions(n)
+        texture_ids = [TEXTURE_IDS[i % len(TEXTURE_IDS)] for i in range(n)]
+        frames = 5 if n > 10_000 else 20
+
+        cubes = [Cube(app, texture_id=texture_id, pos=pos) for pos, texture_id in zip(positions, texture_ids)]
+        queue = RenderQueue(app)
+        per_object = time_frames(app, lambda: queue.render(cubes), frames=frames)
+
+        groups = [InstancedCube(app, texture_id=texture_id,
+                                positions=positions[i::len(TEXTURE_IDS)])
+                  for i, texture_id in enumerate(TEXTURE_IDS)]
+
+        def render_per_texture():
+            for group in groups:
+                group.render()
+
+        per_texture = time_frames(app, render_per_texture, frames=frames)
+
+        floor = InstancedCube(app, positions=positions, texture_ids=texture_ids)
+        array = time_frames(app, floor.render, frames=frames)
+
+        for group in groups + [floor]:
+            group.vao.release()
+            group.instance_vbo.destroy()
+        floor.layer_vbo.destroy()
+
+        print(f'{n:>8} {per_object[0]:>13.2f} / {per_object[1]:>12.2f} {per_texture[0]:>14.2f} / '
+              f'{per_texture[1]:>12.2f} {array[0]:>10.2f} / {array[1]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or (400, 10_000, 100_000))
@@ -0,0 +1,97 @@
+"""
+Measures the texture initialization time without the texture cache, on a first run filling
+it and on a later run uploading the cached mip levels.
+
+Two sets are measured: the four textures of the engine and 200 synthetic 512x512 JPEG
+images written to a temporary directory. Without the cache, each image is decoded, flipped,
+uploaded and mipmapped by the GPU, like the engine did before the cache existed. The cached
+textures are checked to hold the same texels as the uncached ones on every level.
+
+Usage: python -m benchmarks.bench_texture_cache [synthetic textures]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import moderngl as mgl
+import numpy as np
+import pygame as pg
+
+from src.texture import Texture
+from src.texture_cache import TextureCache
+
+
+class NoCache:
+    """
+    A texture cache that never hits and never stores, i.e. the engine without the cache.
+    """
+
+    def load(self, path):
+        return None
+
+    def store(self, path, arrays, **metadata):
+        return None
+
+
+def write_synthetic(directory, count, size=512):
+    """
+    Writes `count` different JPEG images of size x size pixels.
+    """
+    rng = np.random.default_rng(0)
+    x, y = np.meshgrid(np.arange(size), np.arange(size), indexing='ij')
+    paths = []
+    for i in range(count):
+        base = rng.integers(0, 256, 3)
+        pixels = np.stack([(x * (i + 1) + base[0]) % 256, (y * 3 + base[1]) % 256,
+                           ((x ^ y) + base[2]) % 256], axis=2).astype('u1')
+        path = os.path.join(directory, f'synthetic_{i:03d}.jpg')
+        pg.image.save(pg.surfarray.make_surface(pixels), path)
+        paths.append(path)
+    return paths
+
+
+def load_all(texture, paths):
+    """
+    Creates the textures of all the paths and returns them with the elapsed time in ms.
+    """
+    start = time.perf_counter()
+    textures = [texture.get_texture(path) for path in paths]
+    texture.ctx.finish()
+    return textures, (time.perf_counter() - start) * 1000
+
+
+def main(count=200):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pg.init()
+    pg.display.set_mode((1, 1))
+    ctx = mgl.create_standalone_context(require=330, backend='egl')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        texture = Texture.__new__(Texture)
+        texture.ctx = ctx
+        sets = {'engine': ['textures/img.jpg', 'textures/img_1.jpg', 'textures/img_2.jpg',
+                           'objects/cat/cat_diffuse.jpg'],
+                f'{count} synthetic': write_synthetic(temp_dir, count)}
+
+        for name, paths in sets.items():
+            texture.cache = NoCache()
+            load_all(texture, paths[:1])
+            reference, uncached = load_all(texture, paths)
+            texture.cache = TextureCache(os.path.join(temp_dir, name.replace(' ', '_')))
+            _, first_run = load_all(texture, paths)
+            cached_textures, cached = load_all(texture, paths)
+
+            same = all(a.read(level=level) == b.read(level=level)
+                       for a, b in zip(reference, cached_textures)
+                       for level in range(Texture.get_level_count(a.size)))
+            size = sum(os.path.getsize(texture.cache.get_cache_path(path)) for path in paths) / 2 ** 20
+            print(f'{name:14s}: no cache {uncached:7.1f} ms, first run {first_run:7.1f} ms, '
+                  f'cached {cached:7.1f} ms ({uncached / cached:4.1f}x), cache {size:6.1f} MB, '
+                  f'identical: {same}')
+            for gl_texture in reference + cached_textures:
+                gl_texture.release()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
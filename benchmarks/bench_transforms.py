@@ -0,0 +1,47 @@
+"""
+Compares per-object glm model matrices with the vectorized TransformStore.
+
+Every frame all N objects move: the per-object path assigns each Transform a new position
+and rebuilds its matrix with glm, the batch path writes the position array and rebuilds
+all matrices in one TransformStore.update() call.
+
+Usage: python -m benchmarks.bench_transforms [N ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from src.transform import Transform
+from src.transform_store import TransformStore
+
+
+def main(counts=(1_000, 10_000, 100_000), frames=5):
+    print(f'{"N":>8} {"per-object ms":>14} {"vectorized ms":>14} {"speedup":>8}')
+    rng = np.random.default_rng(0)
+    for n in counts:
+        positions = rng.uniform(-100, 100, (n, 3)).astype('f4')
+        rotations = rng.uniform(-3, 3, (n, 3)).astype('f4')
+
+        transforms = [Transform(tuple(p), tuple(r)) for p, r in zip(positions, rotations)]
+        start = time.perf_counter()
+        for frame in range(frames):
+            for transform, pos in zip(transforms, positions + frame):
+                transform.pos = pos
+                transform.rebuild()
+        per_object = (time.perf_counter() - start) * 1000 / frames
+
+        store = TransformStore(capacity=n)
+        store.extend(positions, rotations)
+        start = time.perf_counter()
+        for frame in range(frames):
+            store.positions[:n] = positions + frame
+            store.mark_dirty(slice(0, n))
+            store.update()
+        vectorized = (time.perf_counter() - start) * 1000 / frames
+
+        print(f'{n:>8} {per_object:>14.2f} {vectorized:>14.2f} {per_object / vectorized:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or (1_000, 10_000, 100_000))
@@ -0,0 +1,104 @@
+"""
+Measures how the update stage scales with its number of worker threads on a scene of animated
+instances: every frame, each instance bobs and spins, its model matrix is rebuilt, it is culled
+against the camera frustum and sorted front to back before the visible ones are drawn.
+
+With 0 workers the command list of a frame is built on the main thread before it is drawn;
+with workers, the list of frame N+1 is built while the main thread draws frame N, and the
+chunks of instances are processed in parallel. For each worker count the script reports the
+mean frame time, the time the main thread waited for the command list to be ready and the
+time the main thread spent submitting it. The overlap needs free cores: on a single-core
+machine the workers only add switching overhead.
+
+Usage: python -m benchmarks.bench_update_stage [INSTANCES] [FRAMES] [WORKERS ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from main import GraphicsEngine
+from src.camera_path import CameraPath
+from src.model import InstancedCube
+from src.scene import Scene
+from src.texture import Texture
+
+CAMERA_PATH = 'camera_paths/benchmark.json'
+
+
+def wave(positions):
+    """
+    Returns an animation bobbing each instance up and down and spinning it around the y axis,
+    with a phase depending on its position.
+    """
+
+    base = np.asarray(positions, dtype='f4')
+    phase = (base[:, 0] + base[:, 2]) * 0.25
+
+    def animate(instances, start, stop, time):
+        instances.positions[start:stop, 1] = base[start:stop, 1] + np.sin(time * 2 + phase[start:stop])
+        instances.rotations[start:stop, 1] = time + phase[start:stop]
+    return animate
+
+
+class AnimatedScene(Scene):
+    """
+    A scene made of a single group of `count` animated cubes laid out on a square grid.
+    """
+
+    def __init__(self, app, count):
+        self.count = count
+        super().__init__(app)
+
+    def load(self):
+        side = int(np.ceil(np.sqrt(self.count)))
+        positions = [(1.5 * (i % side - side / 2), 0, 1.5 * (i // side - side / 2)) for i in range(self.count)]
+        self.add_animated_object(InstancedCube(self.app, texture_id=1, positions=positions,
+                                               scales=[(0.5, 0.5, 0.5)] * self.count,
+                                               animation=wave(positions)))
+
+
+def run(count, frames, workers, fps=30, warmup=3):
+    app = GraphicsEngine((320, 180), headless=True, camera_path=CameraPath.load(CAMERA_PATH),
+                         scene=lambda app: AnimatedScene(app, count), update_workers=workers)
+    app.profiler.enabled = True
+    app.assets.finish()
+    for frame in range(warmup):
+        app.step(frame / fps, 1000 / fps)
+    app.ctx.finish()
+
+    app.profiler.frames.clear()
+    start = time.perf_counter()
+    for frame in range(warmup, warmup + frames):
+        app.step(frame / fps, 1000 / fps)
+    app.ctx.finish()
+    frame_ms = (time.perf_counter() - start) * 1000 / frames
+
+    def scope_ms(name):
+        return np.mean([sum(duration for scope, _, duration, _ in record['scopes'] if scope == name)
+                        for record in app.profiler.frames]) / 1e6
+
+    culled = app.stats.last_frame['objects_culled']
+    result = frame_ms, scope_ms('scene.update_stage.wait'), scope_ms('scene.submit'), culled
+    app.destroy()
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    workers = [int(n) for n in sys.argv[3:]] or sorted({0, 1, 2, 4, os.cpu_count()})
+    Texture.ANISOTROPY = 1.0
+
+    print(f'{count} animated instances, {frames} frames, {os.cpu_count()} CPU core(s)\n')
+    print(f'{"workers":>8} {"frame ms":>10} {"wait ms":>10} {"submit ms":>10} {"culled":>8} {"speedup":>8}')
+    reference = None
+    for n in workers:
+        frame_ms, wait_ms, submit_ms, culled = run(count, frames, n)
+        reference = reference or frame_ms
+        print(f'{n:>8} {frame_ms:>10.2f} {wait_ms:>10.2f} {submit_ms:>10.2f} {culled:>8} {reference / frame_ms:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Measures the vertex-bound throughput of the model transformations, before and after moving
+the normal matrix and the view-projection product out of the vertex shaders.
+
+The high-poly cat mesh is drawn many times into a small framebuffer, so that the frame time
+is dominated by vertex shading rather than by fragments. The same instances are drawn with
+each vertex shader: the former ones, which evaluated transpose(inverse(m_model)) and
+m_proj * m_view * m_model for every vertex (rebuilt here from the current shaders), the
+per-object shader reading a CPU normal matrix, the instanced shader reading per-instance
+normal matrices and its uniform-scale variant.
+For each it reports the median frame time, including the GPU, and the triangles per second,
+first with the full pipeline, then with the rasterizer discarding the primitives, which
+isolates the vertex shading from the triangle setup that dominates on a software rasterizer.
+
+Usage: python -m benchmarks.bench_vertex_transform [CATS] [FRAMES]
+"""
+import re
+import sys
+import time
+
+import glm
+import moderngl as mgl
+import numpy as np
+
+from src.srgb import BACKGROUND_COLOR
+from src.texture import Texture
+from src.transform_store import TransformStore
+from src.vbo import InstanceVBO, NormalVBO
+from .common import create_app
+
+# The main() of the vertex shaders before the change, for the baseline
+PER_VERTEX_MAIN = {
+    'default': """void main() {
+    uv_0 = in_texcoord_0;
+    fragPos = vec3(m_model * vec4(in_position, 1.0));
+    normal = mat3(transpose(inverse(m_model))) * normalize(in_normal);
+    gl_Position = m_proj * m_view * m_model * vec4(in_position, 1.0);
+}""",
+    'instanced': """void main() {
+    uv_0 = in_texcoord_0;
+    fragPos = vec3(in_model * vec4(in_position, 1.0));
+    normal = mat3(transpose(inverse(in_model))) * normalize(in_normal);
+    gl_Position = m_proj * m_view * in_model * vec4(in_position, 1.0);
+}""",
+}
+
+
+def get_per_vertex_program(app, name):
+    """
+    Compiles a vertex shader of the engine with its main() replaced by the former one.
+    """
+
+    with open(f'shaders/{name}.vert') as file:
+        source = re.sub(r'void main\(\) \{.*\}', lambda _: PER_VERTEX_MAIN[name], file.read(), flags=re.S)
+    source = source.replace('#version 330 core', '#version 330 core\n#define UNIFORM_SCALE', 1)
+    with open('shaders/default.frag') as file:
+        program = app.ctx.program(vertex_shader=source, fragment_shader=file.read())
+    program['Frame'].binding = 0
+    return program
+
+
+def measure(app, draw, frames, warmup=3):
+    """
+    Returns the median time in milliseconds of a frame drawn by draw(), including the GPU.
+    """
+
+    for _ in range(warmup):
+        draw()
+    app.ctx.finish()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        app.fbo.clear(color=BACKGROUND_COLOR)
+        draw()
+        app.ctx.finish()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    Texture.ANISOTROPY = 1.0
+    app = create_app((320, 180))
+    app.frame_ubo.update()
+    app.mesh.texture.textures[0].use()
+    vbo = app.mesh.vao.get_vbo('cat')
+    mesh = (vbo.vbo, vbo.format, *vbo.attribs)
+    programs = app.mesh.vao.program.programs
+
+    # cats on a 20-wide grid 30 to 60 units in front of the camera, slightly stretched along y
+    store = TransformStore(count)
+    store.extend([(2 * (i % 20) - 20, -3, -30 - 2 * (i // 20)) for i in range(count)],
+                 [(-np.pi / 2, 0, i) for i in range(count)], [(0.05, 0.06, 0.05)] * count)
+    store.update()
+    matrices, normals = store.matrices[:count], store.normals[:count]
+    m_models = [glm.mat4.from_bytes(matrix.tobytes()) for matrix in matrices]
+    m_normals = [glm.mat3.from_bytes(normal.tobytes()) for normal in normals]
+    instance_vbo, normal_vbo = InstanceVBO(app.ctx, matrices), NormalVBO(app.ctx, normals)
+    instances = (instance_vbo.vbo, instance_vbo.format, *instance_vbo.attribs)
+
+    def per_object(program):
+        vao = app.ctx.vertex_array(program, [mesh], index_buffer=vbo.ibo,
+                                   index_element_size=vbo.index_element_size, skip_errors=True)
+
+        def draw():
+            for m_model, m_normal in zip(m_models, m_normals):
+                program['m_model'].write(m_model)
+                if 'm_normal' in program:
+                    program['m_normal'].write(m_normal)
+                vao.render()
+        return draw
+
+    def instanced(program, buffers):
+        vao = app.ctx.vertex_array(program, [mesh, instances, *buffers], index_buffer=vbo.ibo,
+                                   index_element_size=vbo.index_element_size, skip_errors=True)
+        return lambda: vao.render(instances=count)
+
+    modes = [
+        ('per-object, per-vertex inverse', per_object(get_per_vertex_program(app, 'default'))),
+        ('per-object, CPU normal matrix', per_object(programs['default'])),
+        ('instanced, per-vertex inverse', instanced(get_per_vertex_program(app, 'instanced'), [])),
+        ('instanced, normal matrices', instanced(programs['instanced'],
+                                                 [(normal_vbo.vbo, normal_vbo.format, *normal_vbo.attribs)])),
+        ('instanced, uniform scale', instanced(programs['instanced_uniform_scale'], [])),
+    ]
+
+    triangles = count * app.mesh.vao.vaos['cat'].vertices // 3
+    print(f'{count} cats, {triangles} triangles per frame, {frames} frames\n')
+    print(f'{"vertex shader":<32} {"frame ms":>10} {"Mtri/s":>8} {"discard ms":>11} {"Mtri/s":>8}')
+    for name, draw in modes:
+        frame_ms = measure(app, draw, frames)
+        app.ctx.enable(mgl.RASTERIZER_DISCARD)
+        discard_ms = measure(app, draw, frames)
+        app.ctx.disable(mgl.RASTERIZER_DISCARD)
+        print(f'{name:<32} {frame_ms:>10.2f} {triangles / frame_ms / 1000:>8.1f} '
+              f'{discard_ms:>11.2f} {triangles / discard_ms / 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The benchmarks run without a window: pygame uses its dummy video driver (the texture
+loader still needs a display surface to convert images) and ModernGL renders into an
+offscreen framebuffer of a standalone context. On a GPU-less Linux box the EGL backend
+falls back to Mesa's llvmpipe software rasterizer.
+
+Run the scripts from the repository root, e.g. ``python -m benchmarks.bench_instancing``.
+"""
+import os
+import time
+from types import SimpleNamespace
+
+import moderngl as mgl
+import pygame as pg
+
+from src.camera import Camera
+from src.light import Light
+from src.mesh import Mesh
+from src.asset_loader import AssetLoader
+from src.profiler import Profiler
+from src.render_stats import RenderStats
+from src.srgb import BACKGROUND_COLOR, create_framebuffer, enable_srgb
+from src.transform_store import TransformStore
+from src.uniform_buffer import FrameUBO
+
+
+def create_app(win_size=(1600, 900), async_assets=False):
+    """
+    Creates a headless stand-in for GraphicsEngine with the attributes the models expect.
+    Args:
+        win_size (tuple): The size of the offscreen framebuffer.
+        async_assets (bool): Whether the mesh loads its assets with an AssetLoader, stored as
+                             `assets`, instead of before returning.
+    Returns:
+        SimpleNamespace: An object with ctx, fbo, WIN_SIZE, time, delta_time, stats,
+                         profiler (disabled), transforms, light, camera, frame_ubo and mesh.
+    """
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pg.init()
+    pg.display.set_mode((1, 1))
+
+    app = SimpleNamespace(WIN_SIZE=win_size, time=0, delta_time=0,
+                          stats=RenderStats(), transforms=TransformStore())
+    app.ctx = mgl.create_standalone_context(require=330, backend='egl')
+    app.fbo = create_framebuffer(app.ctx, win_size)
+    app.fbo.use()
+    app.profiler = Profiler(app.ctx)
+    app.ctx.enable(mgl.DEPTH_TEST | mgl.CULL_FACE)
+    enable_srgb(app.ctx)
+
+    app.light = Light()
+    app.camera = Camera(app)
+    app.frame_ubo = FrameUBO(app)
+    app.assets = AssetLoader(app) if async_assets else None
+    app.mesh = Mesh(app, loader=app.assets)
+    return app
+
+
+def time_frames(app, render, frames=20, warmup=3):
+    """
+    Measures the average CPU submission time and wall-clock time of a frame.
+    Each frame clears the framebuffer, uploads the per-frame uniform block, calls render()
+    and waits for the GPU to finish.
+    The submission time only covers render(), i.e. the Python and driver cost of issuing
+    the draws, while the frame time also includes the GPU work.
+    Args:
+        app (SimpleNamespace): The headless application created by create_app().
+        render (callable): The function drawing one frame.
+        frames (int): The number of measured frames.
+        warmup (int): The number of frames rendered before measuring.
+    Returns:
+        tuple: The average (submission, frame) times in milliseconds.
+    """
+
+    for _ in range(warmup):
+        app.fbo.clear(color=BACKGROUND_COLOR)
+        app.frame_ubo.update()
+        render()
+        app.stats.end_frame()
+        app.ctx.finish()
+
+    submit = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        app.fbo.clear(color=BACKGROUND_COLOR)
+        t0 = time.perf_counter()
+        app.frame_ubo.update()
+        render()
+        app.stats.end_frame()
+        submit += time.perf_counter() - t0
+        app.ctx.finish()
+    total = time.perf_counter() - start
+    return submit * 1000 / frames, total * 1000 / frames
@@ -0,0 +1,245 @@
+"""
+Reproducible benchmark suite of the render loop.
+
+Every scenario runs in a fresh process: a headless GraphicsEngine is started with a
+parametrised scene, the camera follows the looping spline of camera_paths/benchmark.json and
+the frames are rendered at a fixed time step, so two runs draw exactly the same frames.
+For each scenario the suite reports the mean, median and 99th percentile frame time, the
+startup time (engine creation until the first frame with all assets loaded is finished), the
+peak resident set size of the process and the GPU memory allocated by the engine.
+
+Mesa's llvmpipe implements anisotropic filtering in software, and frames showing textured
+surfaces at grazing angles then take seconds instead of a fraction of a second; on such
+machines, run the suite with --anisotropy 1 to measure the rest of the pipeline.
+
+The results are written as JSON and can be compared against a stored baseline; any metric
+worse than the baseline by more than the threshold is reported as a regression and makes the
+command exit with status 1, e.g.:
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.1
+
+Usage: python -m benchmarks.suite [--scenarios NAME ...] [--frames N] [--size WxH] [--anisotropy LEVEL]
+                                  [--output FILE] [--baseline FILE] [--threshold RATIO]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from src.camera_path import CameraPath
+from src.model import Cat, Cube, InstancedCube
+from src.scene import Scene
+from src.texture import Texture
+
+CAMERA_PATH = 'camera_paths/benchmark.json'
+
+# floor: cubes per side of the instanced floor, objects: number of separately drawn models,
+# mesh: their mesh, 'cube' (12 triangles) or 'cat' (the OBJ model)
+SCENARIOS = {
+    'default_scene': None,
+    'floor_64': {'floor': 64, 'objects': 0, 'mesh': 'cube'},
+    'cubes_1000': {'floor': 20, 'objects': 1000, 'mesh': 'cube'},
+    'cats_100': {'floor': 20, 'objects': 100, 'mesh': 'cat'},
+}
+
+METRICS = ('frame_ms_mean', 'frame_ms_p50', 'frame_ms_p99', 'startup_ms', 'peak_rss_mb', 'gpu_memory_mb')
+
+
+class BenchmarkScene(Scene):
+    """
+    A scene made of an instanced floor of floor x floor cubes and of `objects` models drawn one
+    by one, laid out on a grid above the floor.
+    """
+
+    def __init__(self, app, floor=20, objects=0, mesh='cube'):
+        self.floor, self.object_count, self.mesh = floor, objects, mesh
+        super().__init__(app)
+
+    def load(self):
+        app, s = self.app, 3
+        half = self.floor * s / 2
+        floor = [(x * s - half, -s, z * s - half) for x in range(self.floor) for z in range(self.floor)]
+        self.add_object(InstancedCube(app, texture_id=1, positions=floor))
+
+        side = int(np.ceil(np.sqrt(self.object_count))) if self.object_count else 0
+        for i in range(self.object_count):
+            pos = (2 * (i % side) - side, 1, 2 * (i // side) - side)
+            if self.mesh == 'cat':
+                self.add_object(Cat(app, texture_id=3, pos=pos, rotation=(-90, 0, -90), scale=(0.05, 0.05, 0.05)))
+            else:
+                self.add_object(Cube(app, texture_id=i % 3, pos=pos, scale=(0.5, 0.5, 0.5)))
+
+
+def get_texture_memory(texture, layers=1):
+    size = texture.width * texture.height * texture.components * layers
+    # a full mipmap chain adds a third of the base level
+    return size * 4 // 3
+
+
+def get_gpu_memory(app):
+    """
+    Returns the GPU memory in bytes allocated by the engine for its vertex, index, instance and
+    uniform buffers, its textures and its framebuffer. OpenGL has no portable query of the
+    memory in use, so the sizes of the engine's own resources are added up.
+    """
+
+    buffers = [app.frame_ubo.ubo]
+    for vbo in app.mesh.vao.vbo.vbos.values():
+        if vbo.ready:
+            buffers += [vbo.vbo, vbo.ibo]
+    batcher = app.scene.static_batcher
+    objects = app.scene.objects + (batcher.objects if batcher is not None else [])
+    for obj in objects:
+        for name in ('instance_vbo', 'layer_vbo'):
+            if getattr(obj, name, None) is not None:
+                buffers.append(getattr(obj, name).vbo)
+    total = sum(buffer.size for buffer in buffers if buffer is not None)
+    if batcher is not None:
+        total += batcher.nbytes
+
+    texture = app.mesh.texture
+    total += sum(get_texture_memory(t) for t in texture.textures.values())
+    total += sum(get_texture_memory(t, t.layers) for t in texture.texture_arrays.values())
+    # RGBA color and 24-bit depth with stencil
+    total += app.WIN_SIZE[0] * app.WIN_SIZE[1] * 8
+    return total
+
+
+def run_scenario(name, frames=120, fps=15, size=(1600, 900), warmup=5, anisotropy=None):
+    """
+    Runs one scenario in the current process and returns its metrics.
+    Args:
+        name (str): The name of the scenario in SCENARIOS.
+        frames (int): The number of measured frames.
+        fps (float): The frame rate of the fixed time step along the camera path.
+        size (tuple): The size of the offscreen framebuffer.
+        warmup (int): The number of frames rendered before measuring.
+        anisotropy (float): The anisotropic filtering level of the textures, or None for the
+                            engine's.
+    Returns:
+        dict: The value of every metric of METRICS.
+    """
+
+    from main import GraphicsEngine
+
+    if anisotropy is not None:
+        Texture.ANISOTROPY = anisotropy
+    params = SCENARIOS[name]
+    scene = Scene if params is None else lambda app: BenchmarkScene(app, **params)
+    start = time.perf_counter()
+    app = GraphicsEngine(size, headless=True, camera_path=CameraPath.load(CAMERA_PATH), scene=scene)
+    app.assets.finish()
+    app.step(0, 1000 / fps)
+    app.ctx.finish()
+    startup = time.perf_counter() - start
+
+    frame_times = []
+    for frame in range(1, warmup + frames + 1):
+        start = time.perf_counter()
+        app.step(frame / fps, 1000 / fps)
+        app.ctx.finish()
+        if frame > warmup:
+            frame_times.append((time.perf_counter() - start) * 1000)
+
+    frame_times = np.array(frame_times)
+    result = {'frame_ms_mean': frame_times.mean(), 'frame_ms_p50': np.percentile(frame_times, 50),
+              'frame_ms_p99': np.percentile(frame_times, 99), 'startup_ms': startup * 1000,
+              # ru_maxrss is in kilobytes on Linux
+              'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+              'gpu_memory_mb': get_gpu_memory(app) / 2 ** 20}
+    app.destroy()
+    return {metric: round(float(value), 3) for metric, value in result.items()}
+
+
+def run_suite(names, frames, size, anisotropy=None):
+    """
+    Runs every scenario in its own process, so that the startup time and peak memory of one do
+    not depend on the scenarios run before it.
+    Returns:
+        dict: The metrics of each scenario.
+    """
+
+    results = {}
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    for name in names:
+        command = [sys.executable, '-m', 'benchmarks.suite', '--run', name,
+                   '--frames', str(frames), '--size', f'{size[0]}x{size[1]}']
+        if anisotropy is not None:
+            command += ['--anisotropy', str(anisotropy)]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results[name] = json.loads(output.strip().splitlines()[-1])
+        print(f'{name:<16}' + ' '.join(f'{metric}={value:.2f}' for metric, value in results[name].items()))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline. All the metrics are lower-is-better.
+    Args:
+        results (dict): The metrics of each scenario.
+        baseline (dict): The metrics of each scenario in the baseline.
+        threshold (float): The relative increase above which a metric is a regression.
+    Returns:
+        list: The (scenario, metric, baseline value, value, relative change) regressions.
+    """
+
+    regressions = []
+    print(f'\n{"scenario":<16} {"metric":<14} {"baseline":>10} {"current":>10} {"change":>8}')
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(name, {}).get(metric)
+            if not reference:
+                continue
+            change = value / reference - 1
+            flag = ' REGRESSION' if change > threshold else ''
+            print(f'{name:<16} {metric:<14} {reference:>10.2f} {value:>10.2f} {change:>+8.1%}{flag}')
+            if flag:
+                regressions.append((name, metric, reference, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the render loop benchmark suite.')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--size', default='1600x900')
+    parser.add_argument('--anisotropy', type=float, help="the textures' anisotropic filtering level")
+    parser.add_argument('--output', help='the JSON file the results are written to')
+    parser.add_argument('--baseline', help='a JSON results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='the relative increase of a metric reported as a regression')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = tuple(int(n) for n in args.size.split('x'))
+
+    if args.run:
+        # child process of run_suite: print the metrics of one scenario as the last line
+        print(json.dumps(run_scenario(args.run, args.frames, size=size, anisotropy=args.anisotropy)))
+        return
+
+    results = run_suite(args.scenarios, args.frames, size, args.anisotropy)
+    if args.output:
+        report = {'meta': {'frames': args.frames, 'size': args.size,
+                           'anisotropy': args.anisotropy or Texture.ANISOTROPY, 'python': platform.python_version(),
+                           'machine': platform.machine(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+                  'results': results}
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        print(f'\n{len(regressions)} regression(s) above {args.threshold:.0%}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,26 @@
+import argparse
+import os
+import time
 import pygame as pg
 import moderngl as mgl
+import numpy as np
 import sys
 from src.model import *
 from src.camera import Camera
 from src.light import Light
 from src.mesh import Mesh
 from src.scene import Scene
+from src.render_stats import RenderStats
+from src.transform_store import TransformStore
+from src.uniform_buffer import FrameUBO
+from src.asset_loader import AssetLoader
+from src.camera_path import CameraPath
+from src.frame_capture import FrameCapture
+from src.profiler import Profiler
+from src.frame_loop import FixedTimestep, FramePacer
+from src.geometry_pool import IndirectRenderer
+from src.lod import LOD_GRIDS
+from src.srgb import BACKGROUND_COLOR, create_framebuffer, enable_srgb
 
 class GraphicsEngine:
     """
@@ -13,9 +28,15 @@ class GraphicsEngine:
     Attributes:
     -----------
     WIN_SIZE : tuple
-        The size of the window.
+        The size of the window, or of the offscreen framebuffer when headless.
+    headless : bool
+        Whether the engine renders offscreen, without a window or input devices.
     ctx : mgl.Context
-        The ModernGL context.
+        The ModernGL context, a standalone EGL context when headless.
+    fbo : mgl.Framebuffer
+        The framebuffer rendered to: the window's default framebuffer, or an offscreen
+        color and depth framebuffer when headless. Both are sRGB, with the sRGB encoding of
+        the writes enabled.
     clock : pg.time.Clock
         The Pygame clock object.a
     time : float
@@ -26,53 +47,167 @@ class GraphicsEngine:
         The light object in the scene.
     camera : Camera
         The camera object in the scene.
+    stats : RenderStats
+        The per-frame rendering counters (draw calls, culled objects, matrices rebuilt, uploads
+        skipped, state changes, uniform writes, triangles).
+    profiler : Profiler
+        The frame profiler timing the CPU sections and GPU passes of each frame, disabled
+        unless a profile path is given.
+    profile : str
+        The file the profiler dumps its frames to when the engine is destroyed, or None.
+    transforms : TransformStore
+        The store holding the transforms of all models, rebuilt in one vectorized pass per frame.
+    frame_ubo : FrameUBO
+        The uniform buffer holding the per-frame camera and light state.
+    assets : AssetLoader
+        The loader reading the meshes and textures on worker threads and uploading them over
+        the first frames, while the scene draws placeholders.
     mesh : Mesh
         The mesh object in the scene.
     scene : Scene
         The scene object.
+    capture : FrameCapture
+        The capture writing every rendered frame to files in the background, or None.
+    update_workers : int
+        The number of worker threads of the scene's update stage, None for one per CPU core.
+    indirect : str
+        The culling of the objects drawn with indirect multi-draw calls, 'cpu' or 'gpu', or
+        None to draw every object through the render queue.
+    lod : bool
+        Whether simplified levels of detail of the meshes are generated and drawn for the
+        models far from the camera.
+    depth_prepass : bool
+        Whether the depth of the render queue's objects is drawn before they are shaded.
+    front_to_back : bool
+        Whether the render queue draws its objects front to back rather than by render state.
+    overdraw : str
+        'count' to report the fragments shaded per frame, 'view' to also show them as a heat
+        map instead of the shaded scene, or None.
+    occlusion : bool
+        Whether the objects hidden behind others are skipped with occlusion queries.
+    static_batching : bool
+        Whether the static objects of the scene are merged into one batch per texture.
     Methods:
     --------
-    __init__(win_size=(1600, 900)):
-        Initializes the graphics engine with the given window size.
+    __init__(win_size=(1600, 900), headless=False, camera_path=None, capture=None, capture_format='png',
+             profile=None, scene=Scene, vsync=False, update_workers=None, indirect=None, lod=False,
+             depth_prepass=False, front_to_back=False, overdraw=None, occlusion=False, static_batching=False):
+        Initializes the graphics engine with the given window size, with a window or offscreen,
+        optionally capturing every frame to the given directory and profiling every frame.
+        The scene is built by calling `scene` with the engine. With vsync, the buffer swaps
+        wait for the display refresh. With `indirect`, the scene draws its models with
+        indirect multi-draw calls, which needs an OpenGL 4.3 context. With `lod`, the models
+        switch to simplified meshes as their size on the screen decreases. With `depth_prepass`,
+        `front_to_back` and `overdraw`, the scene draws a depth pre-pass, sorts its render
+        queue by depth first and measures or shows its overdraw. With `occlusion`, the objects
+        hidden behind others are culled with occlusion queries. With `static_batching`, the static
+        objects are drawn merged into one batch per texture.
     check_events():
         Checks for Pygame events and handles quitting the application.
     render():
         Clears the frame buffer and renders the scene.
+    read_frame():
+        Reads the last rendered frame back into a NumPy array.
+    save_frame(path, frame=None):
+        Saves a frame, by default the last rendered one, to an image file.
+    capture_frames(count, fps=60):
+        Renders frames at a fixed time step and yields them as NumPy arrays.
+    render_frames(count, fps=60):
+        Renders frames at a fixed time step.
+    step(time, delta_time):
+        Renders one frame at the given time.
     get_time():
         Updates the current time in seconds.
-    run():
+    destroy():
+        Releases the loader, meshes, textures and buffers of the engine.
+    update(delta_time):
+        Advances the simulation by one step.
+    run(tick_rate=None, fps_limit=60, pacing='hybrid'):
         The main loop of the graphics engine.
+    run_fixed(tick_rate, fps_limit, pacing):
+        The main loop with fixed-rate updates and interpolated rendering.
     """
-    def __init__(self, win_size=(1600, 900)):
-        # Init pygame modules
-        pg.init()
+    def __init__(self, win_size=(1600, 900), headless=False, camera_path=None, capture=None, capture_format='png',
+                 profile=None, scene=Scene, vsync=False, update_workers=None, indirect=None, lod=False,
+                 depth_prepass=False, front_to_back=False, overdraw=None, occlusion=False, static_batching=False):
         self.WIN_SIZE = win_size
+        self.headless = headless
 
-        # Configure OpenGL attributes
-        # Set OpenGL 3.3 core profile
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
-        pg.display.set_mode(self.WIN_SIZE, flags=pg.OPENGL | pg.DOUBLEBUF)
+        if headless:
+            # No window: pygame only decodes images, and the scene is drawn into an offscreen
+            # framebuffer of a standalone context (Mesa's llvmpipe on a GPU-less Linux box)
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+            pg.init()
+            self.ctx = mgl.create_standalone_context(require=330, backend='egl')
+            self.fbo = create_framebuffer(self.ctx, self.WIN_SIZE)
+            self.fbo.use()
+        else:
+            # Init pygame modules
+            pg.init()
 
-        pg.event.set_grab(True) # grab the mouse
-        pg.mouse.set_visible(False) # hide the mouse cursor
+            # Configure OpenGL attributes
+            # Set OpenGL 3.3 core profile, or 4.3 for indirect multi-draw
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 4 if indirect else 3)
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
+            # sRGB default framebuffer, encoding the linear shader outputs
+            pg.display.gl_set_attribute(pg.GL_FRAMEBUFFER_SRGB_CAPABLE, 1)
+            pg.display.set_mode(self.WIN_SIZE, flags=pg.OPENGL | pg.DOUBLEBUF, vsync=int(vsync))
 
-        # Detect and use existing OpenGL context
-        self.ctx = mgl.create_context()
+            pg.event.set_grab(True) # grab the mouse
+            pg.mouse.set_visible(False) # hide the mouse cursor
+
+            # Detect and use existing OpenGL context
+            self.ctx = mgl.create_context()
+            self.fbo = self.ctx.screen
         self.ctx.enable(mgl.DEPTH_TEST | mgl.CULL_FACE) # enable depth test and culling of back faces
+        enable_srgb(self.ctx)
 
         self.clock = pg.time.Clock()
         self.time = 0
         self.delta_time = 0
 
+        self.stats = RenderStats()
+        self.profile = profile
+        self.profiler = Profiler(self.ctx, enabled=profile is not None)
+        self.transforms = TransformStore()
+
         self.light = Light()
 
         self.camera = Camera(self)
+        self.camera.path = camera_path
+
+        self.frame_ubo = FrameUBO(self)
 
-        self.mesh = Mesh(self)
+        self.assets = AssetLoader(self)
 
-        self.scene = Scene(self)
+        self.lod = lod
+        self.mesh = Mesh(self, loader=self.assets, lod_grids=LOD_GRIDS if lod else ())
+
+        self.update_workers = update_workers
+        self.scene = scene(self)
+        self.static_batching = static_batching
+        if static_batching:
+            self.scene.enable_static_batching()
+        self.indirect = indirect
+        if indirect is not None:
+            self.scene.enable_indirect(indirect)
+        if lod:
+            self.scene.enable_lod()
+        self.depth_prepass = depth_prepass
+        if depth_prepass:
+            self.scene.enable_depth_prepass()
+        self.front_to_back = front_to_back
+        if front_to_back:
+            self.scene.render_queue.front_to_back = self.scene.render_queue.sort_each_frame = True
+        self.overdraw = overdraw
+        if overdraw is not None:
+            self.scene.enable_overdraw(view=overdraw == 'view')
+        self.occlusion = occlusion
+        if occlusion:
+            self.scene.enable_occlusion_culling()
+
+        self.capture = None if capture is None else FrameCapture(self, capture, format=capture_format)
     
     def check_events(self):
         """
@@ -89,7 +224,7 @@ class GraphicsEngine:
 
         for event in pg.event.get():
             if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
-                self.mesh.destroy()
+                self.destroy()
                 pg.quit()
                 sys.exit()
 
@@ -97,17 +232,108 @@ class GraphicsEngine:
         """
         Render the current scene.
         This method performs the following steps:
-        1. Clears the frame buffer with a specified color.
-        2. Renders the scene.
-        3. Swaps the display buffers to update the screen with the rendered content.
+        1. Uploads the assets loaded in the background, within the per-frame budget.
+        2. Clears the frame buffer with a specified color.
+        3. Uploads the per-frame camera and light uniform block, for the camera the scene
+           renders the frame with.
+        4. Renders the scene.
+        5. Publishes the frame's rendering counters.
+        6. Queues the capture of the frame, when frames are captured.
+        7. Swaps the display buffers to update the screen with the rendered content, unless
+           the engine is headless.
         """
 
-        # clear frame buffer
-        self.ctx.clear(color=(0.08, 0.16, 0.18))
-        # render scene
-        self.scene.render()
+        profiler = self.profiler
+        with profiler.scope('assets.update'):
+            self.assets.update()
+        with profiler.gpu_scope('frame'):
+            # clear frame buffer
+            self.ctx.clear(color=BACKGROUND_COLOR)
+            # upload camera and light state once for all objects
+            with profiler.scope('frame_ubo.update'):
+                camera = self.scene.begin_frame()
+                self.frame_ubo.update(camera)
+            # render scene
+            with profiler.scope('scene.render'):
+                self.scene.render(camera)
+        self.stats.end_frame()
+        if self.capture is not None:
+            with profiler.scope('capture'):
+                self.capture.capture()
         # swap buffers
-        pg.display.flip()
+        if not self.headless:
+            with profiler.scope('flip'):
+                pg.display.flip()
+
+    def read_frame(self):
+        """
+        Reads the color buffer of the last rendered frame back to the CPU.
+        The read waits for the GPU to finish the frame.
+        Returns:
+            np.ndarray: A (height, width, 3) uint8 RGB array, top row first.
+        """
+
+        data = self.fbo.read(components=3)
+        return np.frombuffer(data, dtype='u1').reshape(self.WIN_SIZE[1], self.WIN_SIZE[0], 3)[::-1]
+
+    def save_frame(self, path, frame=None):
+        """
+        Saves a frame to an image file, in any format pygame can write (e.g. .png, .bmp, .tga, .jpg).
+        Args:
+            path (str): The path of the image file.
+            frame (np.ndarray, optional): A frame returned by read_frame. Defaults to reading
+                                          back the last rendered frame.
+        """
+
+        if frame is None:
+            frame = self.read_frame()
+        pg.image.save(pg.image.frombuffer(np.ascontiguousarray(frame).tobytes(), self.WIN_SIZE, 'RGB'), path)
+
+    def capture_frames(self, count, fps=60):
+        """
+        Renders frames at a fixed time step, independent of the wall clock, and yields each
+        of them once rendered, so that headless runs with a scripted camera path produce the
+        same images every time. All the assets are loaded before the first frame.
+        Args:
+            count (int): The number of frames to render.
+            fps (float): The frame rate the time step is derived from.
+        Yields:
+            np.ndarray: The (height, width, 3) RGB array of each frame.
+        """
+
+        self.assets.finish()
+        for frame in range(count):
+            self.step(frame / fps, 1000 / fps)
+            yield self.read_frame()
+
+    def render_frames(self, count, fps=60):
+        """
+        Renders frames at a fixed time step like capture_frames, without reading them back.
+        With a capture, the frames are written to files in the background.
+        Args:
+            count (int): The number of frames to render.
+            fps (float): The frame rate the time step is derived from.
+        """
+
+        self.assets.finish()
+        for frame in range(count):
+            self.step(frame / fps, 1000 / fps)
+
+    def step(self, time, delta_time):
+        """
+        Renders one frame at the given time, instead of the wall-clock time of run().
+        Args:
+            time (float): The time of the frame in seconds.
+            delta_time (float): The time elapsed since the previous frame in milliseconds.
+        """
+
+        self.time, self.delta_time = time, delta_time
+        self.profiler.begin_frame()
+        with self.profiler.scope('camera.update'):
+            self.camera.update()
+        with self.profiler.scope('render'):
+            self.render()
+        self.profiler.end_frame(self.stats.last_frame)
 
     def get_time(self):
         """
@@ -119,25 +345,151 @@ class GraphicsEngine:
 
         self.time = pg.time.get_ticks() * 0.001
 
-    def run(self):
+    def destroy(self):
+        """
+        Stops the asset loader and the update stage, writes the frames still being captured and
+        the profile, and releases the meshes, textures and uniform buffers.
+        """
+
+        if self.profile is not None:
+            self.profiler.dump(self.profile)
+        if self.capture is not None:
+            self.capture.destroy()
+        if self.scene.update_stage is not None:
+            self.scene.update_stage.destroy()
+        if self.scene.indirect is not None:
+            self.scene.indirect.destroy()
+        if self.scene.static_batcher is not None:
+            self.scene.static_batcher.destroy()
+        self.assets.destroy()
+        self.mesh.destroy()
+        self.frame_ubo.destroy()
+
+    def update(self, delta_time):
+        """
+        Advances the simulation by one step, i.e. moves the camera.
+        Args:
+            delta_time (float): The duration of the step in milliseconds.
+        """
+
+        self.delta_time = delta_time
+        self.camera.update()
+
+    def run(self, tick_rate=None, fps_limit=60, pacing='hybrid'):
         """
         Runs the main loop of the application.
-        This method continuously executes the following steps:
+        Without a tick rate, this method continuously executes the following steps:
         1. Retrieves the current time.
         2. Checks for and processes any events.
         3. Updates the camera state.
         4. Renders the current frame.
         5. Regulates the frame rate to 60 frames per second.
+        With a tick rate, the simulation is decoupled from the frame rate (see run_fixed).
         This loop runs indefinitely until the application is terminated.
+        Args:
+            tick_rate (float, optional): The number of simulation updates per second.
+            fps_limit (float): The maximum frame rate of the fixed-rate loop, 0 for uncapped
+                               (e.g. with vsync).
+            pacing (str): The FramePacer policy of the fixed-rate loop.
         """
 
+        if tick_rate is not None:
+            return self.run_fixed(tick_rate, fps_limit, pacing)
+        profiler = self.profiler
         while True:
+            profiler.begin_frame()
             self.get_time()
-            self.check_events()
-            self.camera.update()
-            self.render()
-            self.delta_time = self.clock.tick(60)
+            with profiler.scope('events'):
+                self.check_events()
+            with profiler.scope('camera.update'):
+                self.camera.update()
+            with profiler.scope('render'):
+                self.render()
+            with profiler.scope('tick'):
+                self.delta_time = self.clock.tick(60)
+            profiler.end_frame(self.stats.last_frame)
+
+    def run_fixed(self, tick_rate, fps_limit, pacing):
+        """
+        Runs the main loop with the simulation updated at a fixed rate, independent of the frame rate.
+        Each frame, the elapsed wall-clock time is fed to a FixedTimestep accumulator and the
+        whole update steps it holds are run, each advancing the simulation by the same amount.
+        The frame is then rendered with the camera interpolated between its last two updates,
+        so frames rendered faster than the updates still move smoothly, and a slow frame is
+        followed by several steps of the same size instead of one large jump. Finally a
+        FramePacer waits for the end of the frame slot, unless the frame rate is uncapped.
+        Args:
+            tick_rate (float): The number of simulation updates per second.
+            fps_limit (float): The maximum frame rate, 0 for uncapped.
+            pacing (str): The FramePacer policy, 'sleep', 'busy' or 'hybrid'.
+        """
+
+        timestep = FixedTimestep(tick_rate)
+        pacer = FramePacer(fps_limit, pacing)
+        profiler = self.profiler
+        last = time.perf_counter()
+        while True:
+            profiler.begin_frame()
+            now = time.perf_counter()
+            steps = timestep.advance(now - last)
+            last = now
+            with profiler.scope('events'):
+                self.check_events()
+            with profiler.scope('update'):
+                for _ in range(steps):
+                    self.time += timestep.step
+                    self.update(timestep.step * 1000)
+            self.camera.interpolate(timestep.alpha)
+            with profiler.scope('render'):
+                self.render()
+            with profiler.scope('pacing'):
+                pacer.wait()
+            profiler.end_frame(self.stats.last_frame)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Render the scene in a window, or offscreen into image files.')
+    parser.add_argument('--headless', action='store_true', help='render offscreen, without a window')
+    parser.add_argument('--size', default='1600x900', help='the frame size, e.g. 1600x900')
+    parser.add_argument('--camera-path', help='a JSON camera path script replacing the mouse and keyboard')
+    parser.add_argument('--frames', type=int, default=60, help='the number of frames rendered when headless')
+    parser.add_argument('--fps', type=float, default=60, help='the frame rate of the headless time step')
+    parser.add_argument('--output', help='the directory every rendered frame is saved to')
+    parser.add_argument('--format', default='png', help="the file format of the saved frames, e.g. png or raw")
+    parser.add_argument('--profile', help='profile the frames into a .json, .csv or .trace.json (Chrome trace) file')
+    parser.add_argument('--tick-rate', type=float, help='update the simulation at this fixed rate, independent of the frame rate '
+                        '(not with --headless)')
+    parser.add_argument('--fps-limit', type=float, help='the maximum frame rate with --tick-rate, 0 for uncapped (default: 60)')
+    parser.add_argument('--pacing', choices=FramePacer.POLICIES, help='how frames wait for their slot (default: hybrid)')
+    parser.add_argument('--vsync', action='store_true', help='synchronize the buffer swaps with the display')
+    parser.add_argument('--indirect', choices=IndirectRenderer.CULLING,
+                        help='draw the models with indirect multi-draw calls, culled on the cpu or the gpu')
+    parser.add_argument('--lod', action='store_true', help='draw simplified meshes for the models far from the camera')
+    parser.add_argument('--depth-prepass', action='store_true', help='draw the depth of the models before shading them')
+    parser.add_argument('--front-to-back', action='store_true', help='draw the models front to back rather than by state')
+    parser.add_argument('--overdraw', choices=('count', 'view'),
+                        help='count the fragments shaded per frame, or show them as a heat map')
+    parser.add_argument('--occlusion', action='store_true', help='skip the models hidden behind others with occlusion queries')
+    parser.add_argument('--static-batching', action='store_true', help='merge the static models into one batch per texture')
+    args = parser.parse_args()
+    if args.headless and (args.tick_rate, args.fps_limit, args.pacing) != (None, None, None):
+        parser.error('--tick-rate, --fps-limit and --pacing drive the windowed loop and cannot be used with '
+                     '--headless, which renders at the fixed --fps time step')
+    if args.tick_rate is None and (args.fps_limit, args.pacing) != (None, None):
+        parser.error('--fps-limit and --pacing require --tick-rate')
+    args.fps_limit = 60 if args.fps_limit is None else args.fps_limit
+    args.pacing = args.pacing or 'hybrid'
+    return args
+
 
 if __name__ == '__main__':
-    app = GraphicsEngine()
-    app.run()
\ No newline at end of file
+    args = parse_args()
+    camera_path = CameraPath.load(args.camera_path) if args.camera_path else None
+    app = GraphicsEngine(tuple(int(n) for n in args.size.split('x')), args.headless, camera_path,
+                         args.output, args.format, args.profile, vsync=args.vsync, indirect=args.indirect,
+                         lod=args.lod, depth_prepass=args.depth_prepass, front_to_back=args.front_to_back,
+                         overdraw=args.overdraw, occlusion=args.occlusion, static_batching=args.static_batching)
+    if not args.headless:
+        app.run(args.tick_rate, args.fps_limit, args.pacing)
+    else:
+        app.render_frames(args.frames, args.fps)
+    app.destroy()
\ No newline at end of file
@@ -5,6 +5,7 @@
 /*
 
     This fragment shader is responsible for calculating the final color of each pixel.
+    With TEXTURE_ARRAY defined, it samples the layer of a texture array chosen per instance.
 
     Outputs:
     - fragColor: The final color output of the fragment shader.
@@ -13,6 +14,7 @@
     - uv_0: The texture coordinates for the fragment.
     - normal: The normal vector at the fragment position.
     - fragPos: The position of the fragment in world space.
+    - layer: The layer of the texture array, constant over the instance (TEXTURE_ARRAY only).
 
     Structures:
     - Light: A structure representing a light source with the following properties:
@@ -22,15 +24,20 @@
         - Is: Specular light intensity.
 
     Uniforms:
-    - light: An instance of the Light structure representing the light source.
-    - u_texture_0: A sampler for the texture to be applied to the fragment.
-    - camPos: The position of the camera in world space.
+    - Frame: The per-frame uniform block shared with the vertex shader, providing:
+        - light: An instance of the Light structure representing the light source.
+        - camPos: The position of the camera in world space.
+    - u_texture_0: A sampler for the texture to be applied to the fragment, or with
+      TEXTURE_ARRAY for the texture array whose layers are applied to the fragments.
 */
 layout (location = 0) out vec4 fragColor;
 
 in vec2 uv_0;
 in vec3 normal;
 in vec3 fragPos;
+#ifdef TEXTURE_ARRAY
+flat in float layer;
+#endif
 
 struct Light {
     vec3 position;
@@ -39,9 +46,19 @@ struct Light {
     vec3 Is;
 };
 
-uniform Light light;
+layout (std140) uniform Frame {
+    mat4 m_proj;
+    mat4 m_view;
+    vec3 camPos;
+    Light light;
+    mat4 m_view_proj;
+};
+
+#ifdef TEXTURE_ARRAY
+uniform sampler2DArray u_texture_0;
+#else
 uniform sampler2D u_texture_0;
-uniform vec3 camPos;
+#endif
 
 
 /**
@@ -77,29 +94,29 @@ vec3 getLight(vec3 color) {
 }
 
 /*
-    Fragment shader for applying gamma correction and lighting effects.
+    Fragment shader applying lighting effects to the texture color.
 
-    This shader performs the following operations:
-    1. Applies gamma correction to the texture color.
-    2. Applies lighting effects using the getLight function.
-    3. Re-applies inverse gamma correction to the final color.
+    The lighting is computed in linear space without any gamma correction in the shader:
+    the texture is stored in an sRGB format, and the texture array in linear half floats, so
+    the texture unit returns linear colors, and the framebuffer is sRGB, so the blending stage
+    encodes the output back to sRGB (see src/srgb.py).
     
     Uniforms:
-    - u_texture_0: The input texture.
+    - u_texture_0: The input texture, or texture array.
 
     Inputs:
     - uv_0: The texture coordinates.
+    - layer: The layer of the texture array (TEXTURE_ARRAY only).
 
     Outputs:
     - fragColor: The final color output of the fragment shader.
 */
 void main() {
-    float gamma = 2.2;
+#ifdef TEXTURE_ARRAY
+    vec3 color = texture(u_texture_0, vec3(uv_0, layer)).rgb;
+#else
     vec3 color = texture(u_texture_0, uv_0).rgb;
-    color = pow(color, vec3(gamma));
-
+#endif
     color = getLight(color);
-
-    color = pow(color, 1 / vec3(gamma));
     fragColor = vec4(color, 1.0);
 }
\ No newline at end of file
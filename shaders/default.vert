@@ -8,15 +8,36 @@ out vec2 uv_0;
 out vec3 normal;
 out vec3 fragPos;
 
-uniform mat4 m_proj;
-uniform mat4 m_view;
+struct Light {
+    vec3 position;
+    vec3 Ia;
+    vec3 Id;
+    vec3 Is;
+};
+
+layout (std140) uniform Frame {
+    mat4 m_proj;
+    mat4 m_view;
+    vec3 camPos;
+    Light light;
+    mat4 m_view_proj;
+};
+
+#ifndef STATIC_BATCH
 uniform mat4 m_model;
+uniform mat3 m_normal;
+#endif
+
+invariant gl_Position;
 
 /*
  * Vertex Shader
  * 
  * This shader is responsible for transforming vertex positions, normals, and texture coordinates
  * from model space to clip space. It also computes the fragment position and normal in world space.
+ * The matrices that are constant over a draw are computed on the CPU: the normal matrix once per
+ * transform change, the view-projection matrix once per frame, so no matrix product or inverse is
+ * evaluated per vertex.
  * 
  * Attributes:
  * - in_position: The position of the vertex in model space.
@@ -25,8 +46,11 @@ uniform mat4 m_model;
  * 
  * Uniforms:
  * - m_model: The model matrix that transforms vertices from model space to world space.
- * - m_view: The view matrix that transforms vertices from world space to view space.
- * - m_proj: The projection matrix that transforms vertices from view space to clip space.
+ * - m_normal: The normal matrix, transpose(inverse(mat3(m_model))).
+ *   Both are left out with STATIC_BATCH, where the vertices of a static batch are already in
+ *   world space, with their normals transformed (see StaticBatch).
+ * - Frame: The per-frame uniform block (camera matrices and position, light), filled once per frame:
+ *   - m_view_proj: The product m_proj * m_view, transforming vertices from world space to clip space.
  * 
  * Varyings:
  * - uv_0: The texture coordinates passed to the fragment shader.
@@ -34,11 +58,18 @@ uniform mat4 m_model;
  * - normal: The normal vector of the fragment in world space.
  * 
  * Outputs:
- * - gl_Position: The position of the vertex in clip space.
+ * - gl_Position: The position of the vertex in clip space, invariant so that it matches the depth
+ *   pre-pass (depth.vert) exactly.
  */
 void main() {
     uv_0 = in_texcoord_0;
-    fragPos = vec3(m_model * vec4(in_position, 1.0));
-    normal = mat3(transpose(inverse(m_model))) * normalize(in_normal);
-    gl_Position = m_proj * m_view * m_model * vec4(in_position, 1.0);
+#ifdef STATIC_BATCH
+    vec4 worldPos = vec4(in_position, 1.0);
+    normal = in_normal;
+#else
+    vec4 worldPos = m_model * vec4(in_position, 1.0);
+    normal = m_normal * normalize(in_normal);
+#endif
+    fragPos = worldPos.xyz;
+    gl_Position = m_view_proj * worldPos;
 }
\ No newline at end of file
@@ -0,0 +1,21 @@
+#version 330 core
+
+/*
+
+    The fragment shader of the depth pre-pass and of the overdraw view.
+
+    During the pre-pass the color writes are masked and only the depth of the fragments is
+    kept. In the overdraw view the fragments are blended additively, so every fragment that
+    passes the depth test adds one step of OVERDRAW_STEP to its pixel: the more often a pixel
+    is shaded, the brighter it gets, from dark brown to orange and light yellow.
+
+    Outputs:
+    - fragColor: The overdraw step of the fragment.
+*/
+layout (location = 0) out vec4 fragColor;
+
+const vec3 OVERDRAW_STEP = vec3(0.04, 0.012, 0.004);
+
+void main() {
+    fragColor = vec4(OVERDRAW_STEP, 1.0);
+}
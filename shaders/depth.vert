@@ -0,0 +1,56 @@
+#version 330 core
+
+layout (location = 2) in vec3 in_position;
+#ifdef INSTANCED
+layout (location = 3) in mat4 in_model;
+#endif
+
+struct Light {
+    vec3 position;
+    vec3 Ia;
+    vec3 Id;
+    vec3 Is;
+};
+
+layout (std140) uniform Frame {
+    mat4 m_proj;
+    mat4 m_view;
+    vec3 camPos;
+    Light light;
+    mat4 m_view_proj;
+};
+
+#ifndef INSTANCED
+uniform mat4 m_model;
+#endif
+
+invariant gl_Position;
+
+/*
+ * Depth Vertex Shader
+ * 
+ * The position-only vertex shader of the depth pre-pass. It reads the position attribute of the
+ * existing mesh buffers, and with INSTANCED defined the per-instance model matrix, and computes
+ * gl_Position with the same expression as the color vertex shaders. gl_Position is declared
+ * invariant here and in those shaders, so the depths of the two passes are bit-identical and
+ * the color pass can test them with an equality.
+ * 
+ * Attributes:
+ * - in_position: The position of the vertex in model space.
+ * - in_model: The per-instance model matrix (locations 3 to 6, divisor 1), with INSTANCED.
+ * 
+ * Uniforms:
+ * - m_model: The model matrix, without INSTANCED.
+ * - Frame: The per-frame uniform block, providing m_view_proj.
+ * 
+ * Outputs:
+ * - gl_Position: The position of the vertex in clip space.
+ */
+void main() {
+#ifdef INSTANCED
+    vec4 worldPos = in_model * vec4(in_position, 1.0);
+#else
+    vec4 worldPos = m_model * vec4(in_position, 1.0);
+#endif
+    gl_Position = m_view_proj * worldPos;
+}
@@ -0,0 +1,73 @@
+#version 330 core
+
+layout (location = 0) in vec2 in_texcoord_0;
+layout (location = 1) in vec3 in_normal;
+layout (location = 2) in vec3 in_position;
+layout (location = 3) in mat4 in_model;
+#ifndef UNIFORM_SCALE
+layout (location = 7) in mat3 in_normal_matrix;
+#endif
+
+out vec2 uv_0;
+out vec3 normal;
+out vec3 fragPos;
+
+struct Light {
+    vec3 position;
+    vec3 Ia;
+    vec3 Id;
+    vec3 Is;
+};
+
+layout (std140) uniform Frame {
+    mat4 m_proj;
+    mat4 m_view;
+    vec3 camPos;
+    Light light;
+    mat4 m_view_proj;
+};
+
+invariant gl_Position;
+
+/*
+ * Instanced Vertex Shader
+ * 
+ * Same transformations as the default vertex shader, except that the model and normal matrices
+ * are read from per-instance attributes instead of uniforms, so a whole group of objects sharing
+ * one mesh and one texture can be drawn with a single instanced draw call.
+ * It is paired with the default fragment shader.
+ * 
+ * Attributes:
+ * - in_position: The position of the vertex in model space.
+ * - in_texcoord_0: The texture coordinates of the vertex.
+ * - in_normal: The normal vector of the vertex in model space.
+ * - in_model: The per-instance model matrix (locations 3 to 6, divisor 1).
+ * - in_normal_matrix: The per-instance normal matrix computed on the CPU (locations 7 to 9,
+ *   divisor 1). With UNIFORM_SCALE defined, for instances whose scale is the same along every
+ *   axis, it is not read: mat3(in_model) then only differs from it by a factor, which the
+ *   normalization in the fragment shader removes.
+ * 
+ * Uniforms:
+ * - Frame: The per-frame uniform block (camera matrices and position, light), filled once per frame:
+ *   - m_view_proj: The product m_proj * m_view, transforming vertices from world space to clip space.
+ * 
+ * Varyings:
+ * - uv_0: The texture coordinates passed to the fragment shader.
+ * - fragPos: The position of the fragment in world space.
+ * - normal: The normal vector of the fragment in world space.
+ * 
+ * Outputs:
+ * - gl_Position: The position of the vertex in clip space, invariant so that it matches the depth
+ *   pre-pass (depth.vert) exactly.
+ */
+void main() {
+    uv_0 = in_texcoord_0;
+    vec4 worldPos = in_model * vec4(in_position, 1.0);
+    fragPos = worldPos.xyz;
+#ifdef UNIFORM_SCALE
+    normal = mat3(in_model) * normalize(in_normal);
+#else
+    normal = in_normal_matrix * normalize(in_normal);
+#endif
+    gl_Position = m_view_proj * worldPos;
+}
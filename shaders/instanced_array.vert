@@ -0,0 +1,76 @@
+#version 330 core
+
+layout (location = 0) in vec2 in_texcoord_0;
+layout (location = 1) in vec3 in_normal;
+layout (location = 2) in vec3 in_position;
+layout (location = 3) in mat4 in_model;
+layout (location = 7) in float in_layer;
+#ifndef UNIFORM_SCALE
+layout (location = 8) in mat3 in_normal_matrix;
+#endif
+
+out vec2 uv_0;
+flat out float layer;
+out vec3 normal;
+out vec3 fragPos;
+
+struct Light {
+    vec3 position;
+    vec3 Ia;
+    vec3 Id;
+    vec3 Is;
+};
+
+layout (std140) uniform Frame {
+    mat4 m_proj;
+    mat4 m_view;
+    vec3 camPos;
+    Light light;
+    mat4 m_view_proj;
+};
+
+invariant gl_Position;
+
+/*
+ * Instanced Texture Array Vertex Shader
+ * 
+ * Same as the instanced vertex shader, with a second per-instance attribute selecting the
+ * layer of a texture array, so a group of objects sharing one mesh but not one texture can
+ * be drawn with a single instanced draw call.
+ * It is paired with the texture array fragment shader.
+ * 
+ * Attributes:
+ * - in_position: The position of the vertex in model space.
+ * - in_texcoord_0: The texture coordinates of the vertex.
+ * - in_normal: The normal vector of the vertex in model space.
+ * - in_model: The per-instance model matrix (locations 3 to 6, divisor 1).
+ * - in_layer: The per-instance layer of the texture array (location 7, divisor 1).
+ * - in_normal_matrix: The per-instance normal matrix (locations 8 to 10, divisor 1), not read
+ *   with UNIFORM_SCALE defined, like in the instanced vertex shader.
+ * 
+ * Uniforms:
+ * - Frame: The per-frame uniform block (camera matrices and position, light), filled once per frame:
+ *   - m_view_proj: The product m_proj * m_view, transforming vertices from world space to clip space.
+ * 
+ * Varyings:
+ * - uv_0: The texture coordinates passed to the fragment shader.
+ * - layer: The texture array layer passed to the fragment shader, constant over the instance.
+ * - fragPos: The position of the fragment in world space.
+ * - normal: The normal vector of the fragment in world space.
+ * 
+ * Outputs:
+ * - gl_Position: The position of the vertex in clip space, invariant so that it matches the depth
+ *   pre-pass (depth.vert) exactly.
+ */
+void main() {
+    uv_0 = in_texcoord_0;
+    layer = in_layer;
+    vec4 worldPos = in_model * vec4(in_position, 1.0);
+    fragPos = worldPos.xyz;
+#ifdef UNIFORM_SCALE
+    normal = mat3(in_model) * normalize(in_normal);
+#else
+    normal = in_normal_matrix * normalize(in_normal);
+#endif
+    gl_Position = m_view_proj * worldPos;
+}
@@ -0,0 +1,152 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AssetLoader:
+    """
+    A class used to load assets in the background and upload them to the GPU over several frames.
+    Each asset is loaded in two steps: a read function running on a thread pool, which does the
+    file reading, decoding and vertex packing, and an upload function running on the GL thread,
+    which only creates the buffers and textures from the read data. The uploads are done by
+    update(), called once per frame, until the per-frame upload budget is spent, so that loading
+    many assets does not stall a single frame. Until its upload, the resources of an asset are
+    replaced by placeholders (see Mesh). Work following an upload that does not need the GL
+    thread, like writing a cache file, can be handed back to the thread pool with submit().
+    Attributes
+    ----------
+    app : object
+        The application instance, whose RenderStats receive the 'assets_uploaded' counter.
+    executor : ThreadPoolExecutor
+        The thread pool running the read functions.
+    pending : deque
+        The (future, upload) pairs of the assets not uploaded yet, in request order.
+    tasks : list
+        The futures of the functions run by submit() whose result was not checked yet.
+    upload_budget : float
+        The time in seconds update() may spend uploading per frame. At least one asset is
+        uploaded per frame when one is ready, whatever its cost.
+    version : int
+        The number of assets uploaded so far, used by the scene to notice the swaps.
+    Methods
+    -------
+    load(read, upload):
+        Schedules the read of an asset on the thread pool and its upload on the GL thread.
+    submit(function, *args, **kwargs):
+        Runs a function on the thread pool, without an upload.
+    check_tasks(wait=False):
+        Raises the errors of the functions run by submit() that finished.
+    update():
+        Uploads the assets that finished reading, within the per-frame budget.
+    finish():
+        Waits for all the assets and uploads them.
+    destroy():
+        Cancels the reads that did not start and shuts the thread pool down.
+    """
+
+    def __init__(self, app, workers=4, upload_budget_ms=4.0):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asset-loader')
+        self.pending = deque()
+        self.tasks = []
+        self.upload_budget = upload_budget_ms / 1000
+        self.version = 0
+
+    @property
+    def busy(self):
+        return bool(self.pending)
+
+    def load(self, read, upload):
+        """
+        Schedules the loading of an asset.
+        Args:
+            read (callable): The function returning the CPU-side data of the asset. It runs on
+                             the thread pool, so it must not use the OpenGL context.
+            upload (callable): The function called on the GL thread with the data returned by
+                               `read`, creating the GPU resources.
+        Returns:
+            Future: The future of the read.
+        """
+
+        future = self.executor.submit(read)
+        self.pending.append((future, upload))
+        return future
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Runs a function on the thread pool, e.g. to write the data read back from the GPU by an
+        upload to a cache file off the GL thread. Its errors are raised again by update() or
+        finish(), on the GL thread.
+        Args:
+            function (callable): The function, which must not use the OpenGL context.
+            *args, **kwargs: The arguments of the function.
+        Returns:
+            Future: The future of the call.
+        """
+
+        future = self.executor.submit(function, *args, **kwargs)
+        self.tasks.append(future)
+        return future
+
+    def check_tasks(self, wait=False):
+        """
+        Raises the errors of the finished functions run by submit() and forgets them.
+        Args:
+            wait (bool): Whether to wait for the running ones too.
+        """
+
+        tasks, self.tasks = self.tasks, []
+        for future in tasks:
+            if wait or future.done():
+                future.result()
+            else:
+                self.tasks.append(future)
+
+    def update(self):
+        """
+        Uploads the assets whose read finished, in request order, until the per-frame upload
+        budget is spent. Errors raised by a read, or by a function run by submit(), are raised
+        again here, on the GL thread.
+        Returns:
+            int: The number of assets uploaded.
+        """
+
+        self.check_tasks()
+        start = time.perf_counter()
+        uploaded = 0
+        for item in list(self.pending):
+            future, upload = item
+            if not future.done():
+                continue
+            self.pending.remove(item)
+            upload(future.result())
+            uploaded += 1
+            if time.perf_counter() - start >= self.upload_budget:
+                break
+
+        self.version += uploaded
+        self.app.stats.add('assets_uploaded', uploaded)
+        return uploaded
+
+    def finish(self):
+        """
+        Waits for all the scheduled reads and uploads every asset, regardless of the budget,
+        then waits for the functions run by submit(), including those of the uploads.
+        """
+
+        while self.pending:
+            future, upload = self.pending.popleft()
+            upload(future.result())
+            self.version += 1
+            self.app.stats.add('assets_uploaded')
+        self.check_tasks(wait=True)
+
+    def destroy(self):
+        """
+        Cancels the reads that did not start yet and shuts the thread pool down without
+        waiting for the running ones.
+        """
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
+        self.tasks.clear()
@@ -0,0 +1,103 @@
+import glm
+import numpy as np
+
+
+class AABB:
+    """
+    An axis-aligned bounding box.
+    Attributes:
+        min (glm.vec3): The minimum corner of the box.
+        max (glm.vec3): The maximum corner of the box.
+    Methods:
+        from_points(points):
+            Builds the box enclosing an array of points.
+        center():
+            Returns the center of the box.
+        extents():
+            Returns the half size of the box along each axis.
+        radius():
+            Returns the radius of the bounding sphere of the box.
+        area():
+            Returns the surface area of the box.
+        union(other):
+            Returns the box enclosing this box and another one.
+        contains(other):
+            Checks whether another box lies inside this one.
+        expanded(margin):
+            Returns the box grown by a margin on every side.
+        transformed(m_model):
+            Returns the box enclosing this box after a transformation.
+        distance2(point):
+            Returns the squared distance from a point to the box.
+    """
+
+    __slots__ = ('min', 'max')
+
+    def __init__(self, min_corner, max_corner):
+        self.min = glm.vec3(min_corner)
+        self.max = glm.vec3(max_corner)
+
+    def __repr__(self):
+        return f'AABB({tuple(self.min)}, {tuple(self.max)})'
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Builds the box enclosing a set of points.
+        Args:
+            points (np.ndarray): An array of shape (N, 3).
+        Returns:
+            AABB: The enclosing box.
+        """
+
+        points = np.asarray(points, dtype='f4').reshape(-1, 3)
+        return cls(points.min(axis=0).tolist(), points.max(axis=0).tolist())
+
+    def center(self):
+        return (self.min + self.max) * 0.5
+
+    def extents(self):
+        return (self.max - self.min) * 0.5
+
+    def radius(self):
+        return glm.length(self.extents())
+
+    def area(self):
+        d = self.max - self.min
+        return 2 * (d.x * d.y + d.y * d.z + d.z * d.x)
+
+    def union(self, other):
+        return AABB(glm.min(self.min, other.min), glm.max(self.max, other.max))
+
+    def contains(self, other):
+        return (self.min.x <= other.min.x and self.min.y <= other.min.y and self.min.z <= other.min.z and
+                self.max.x >= other.max.x and self.max.y >= other.max.y and self.max.z >= other.max.z)
+
+    def expanded(self, margin):
+        return AABB(self.min - margin, self.max + margin)
+
+    def distance2(self, point):
+        """
+        Returns the squared distance from a point to the closest point of the box, 0 for a
+        point inside it.
+        """
+
+        point = glm.vec3(point)
+        return glm.length2(glm.max(glm.max(self.min - point, point - self.max), glm.vec3(0)))
+
+    def transformed(self, m_model):
+        """
+        Returns the axis-aligned box enclosing this box after a transformation.
+        The center is transformed as a point and the extents by the absolute value of the
+        upper 3x3 matrix, which gives the tightest axis-aligned box around the transformed
+        box without transforming its eight corners.
+        Args:
+            m_model (glm.mat4): The transformation matrix.
+        Returns:
+            AABB: The transformed box.
+        """
+
+        center = glm.vec3(m_model * glm.vec4(self.center(), 1.0))
+        m_abs = glm.mat3(*[glm.abs(column) for column in glm.mat3(m_model)])
+        extents = m_abs * self.extents()
+        return AABB(center - extents, center + extents)
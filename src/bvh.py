@@ -0,0 +1,229 @@
+import numpy as np
+from .frustum import OUTSIDE, INSIDE
+
+
+class BVHNode:
+    """
+    A node of the bounding-volume hierarchy. Leaves hold one object, inner nodes two children.
+    """
+
+    __slots__ = ('aabb', 'parent', 'left', 'right', 'obj')
+
+    def __init__(self, aabb, obj=None):
+        self.aabb = aabb
+        self.parent = None
+        self.left = None
+        self.right = None
+        self.obj = obj
+
+    @property
+    def is_leaf(self):
+        return self.left is None
+
+
+class BVH:
+    """
+    A dynamic bounding-volume hierarchy of axis-aligned boxes used to cull scene objects.
+    Leaves store a box slightly larger than the object (by `margin`), so small movements
+    only need a containment check, and larger ones remove and reinsert a single leaf and
+    refit its ancestors, without rebuilding the tree. Insertions descend towards the child
+    whose surface area grows the least.
+    Attributes:
+        margin (float): The amount by which leaf boxes are enlarged on every side.
+        root (BVHNode): The root node, or None if the hierarchy is empty.
+        leaves (dict): The leaf node of each object.
+    Methods:
+        build(items):
+            Rebuilds the hierarchy top-down from (object, AABB) pairs.
+        insert(obj, aabb):
+            Adds an object to the hierarchy.
+        remove(obj):
+            Removes an object from the hierarchy.
+        update(obj, aabb):
+            Moves an object, reinserting its leaf only if it left its enlarged box.
+        query(frustum):
+            Returns the objects whose boxes are not outside a frustum.
+    """
+
+    def __init__(self, margin=0.5):
+        self.margin = margin
+        self.root = None
+        self.leaves = {}
+
+    def __len__(self):
+        return len(self.leaves)
+
+    def __contains__(self, obj):
+        return obj in self.leaves
+
+    def build(self, items):
+        """
+        Rebuilds the hierarchy from scratch with a top-down median split along the longest
+        axis of the box centers, which is much faster than inserting objects one by one
+        and gives a well balanced tree for large static scenes.
+        Args:
+            items (list): (object, AABB) pairs.
+        """
+
+        self.leaves = {}
+        if not items:
+            self.root = None
+            return
+
+        leaves = []
+        for obj, aabb in items:
+            leaf = BVHNode(aabb.expanded(self.margin), obj)
+            self.leaves[obj] = leaf
+            leaves.append(leaf)
+        centers = np.array([tuple(leaf.aabb.center()) for leaf in leaves], dtype='f4')
+        self.root = self.build_node(leaves, centers, np.arange(len(leaves)))
+
+    def build_node(self, leaves, centers, indices):
+        if len(indices) == 1:
+            return leaves[indices[0]]
+
+        points = centers[indices]
+        axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        half = len(indices) // 2
+        order = np.argpartition(points[:, axis], half)
+        node = BVHNode(None)
+        node.left = self.build_node(leaves, centers, indices[order[:half]])
+        node.right = self.build_node(leaves, centers, indices[order[half:]])
+        node.left.parent = node.right.parent = node
+        node.aabb = node.left.aabb.union(node.right.aabb)
+        return node
+
+    def insert(self, obj, aabb):
+        """
+        Adds an object to the hierarchy.
+        Args:
+            obj (object): The object, used as the key of its leaf.
+            aabb (AABB): The world-space box of the object.
+        """
+
+        leaf = BVHNode(aabb.expanded(self.margin), obj)
+        self.leaves[obj] = leaf
+        self.insert_leaf(leaf)
+
+    def remove(self, obj):
+        """
+        Removes an object from the hierarchy.
+        Args:
+            obj (object): The object to remove.
+        """
+
+        self.remove_leaf(self.leaves.pop(obj))
+
+    def update(self, obj, aabb):
+        """
+        Updates the box of an object after it moved.
+        Args:
+            obj (object): The object that moved.
+            aabb (AABB): The new world-space box of the object.
+        Returns:
+            bool: True if the leaf had to be reinserted, False if it still fits its enlarged box.
+        """
+
+        leaf = self.leaves[obj]
+        if leaf.aabb.contains(aabb):
+            return False
+        self.remove_leaf(leaf)
+        leaf.aabb = aabb.expanded(self.margin)
+        self.insert_leaf(leaf)
+        return True
+
+    def insert_leaf(self, leaf):
+        if self.root is None:
+            self.root = leaf
+            return
+
+        # Find the best sibling with the surface area heuristic
+        node = self.root
+        while not node.is_leaf:
+            combined_area = node.aabb.union(leaf.aabb).area()
+            cost = 2 * combined_area
+            inheritance = 2 * (combined_area - node.aabb.area())
+
+            def descent_cost(child):
+                grown = child.aabb.union(leaf.aabb).area()
+                return grown + inheritance - (0 if child.is_leaf else child.aabb.area())
+
+            cost_left, cost_right = descent_cost(node.left), descent_cost(node.right)
+            if cost < cost_left and cost < cost_right:
+                break
+            node = node.left if cost_left < cost_right else node.right
+
+        sibling = node
+        parent = BVHNode(sibling.aabb.union(leaf.aabb))
+        parent.parent = sibling.parent
+        if sibling.parent is None:
+            self.root = parent
+        elif sibling.parent.left is sibling:
+            sibling.parent.left = parent
+        else:
+            sibling.parent.right = parent
+        parent.left, parent.right = sibling, leaf
+        sibling.parent = leaf.parent = parent
+        self.refit(parent.parent)
+
+    def remove_leaf(self, leaf):
+        if leaf is self.root:
+            self.root = None
+            return
+
+        parent = leaf.parent
+        sibling = parent.right if parent.left is leaf else parent.left
+        grandparent = parent.parent
+        sibling.parent = grandparent
+        if grandparent is None:
+            self.root = sibling
+        else:
+            if grandparent.left is parent:
+                grandparent.left = sibling
+            else:
+                grandparent.right = sibling
+            self.refit(grandparent)
+        leaf.parent = None
+
+    def refit(self, node):
+        while node is not None:
+            node.aabb = node.left.aabb.union(node.right.aabb)
+            node = node.parent
+
+    def query(self, frustum):
+        """
+        Collects the objects whose boxes are not fully outside a frustum.
+        Subtrees fully outside the frustum are skipped and subtrees fully inside it are
+        accepted without testing their children.
+        Args:
+            frustum (Frustum): The view frustum.
+        Returns:
+            list: The potentially visible objects.
+        """
+
+        visible = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            result = frustum.test_aabb(node.aabb)
+            if result == OUTSIDE:
+                continue
+            if result == INSIDE:
+                self.collect(node, visible)
+            elif node.is_leaf:
+                visible.append(node.obj)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+        return visible
+
+    @staticmethod
+    def collect(node, objects):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.is_leaf:
+                objects.append(node.obj)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
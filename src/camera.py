@@ -33,6 +33,15 @@ class Camera:
         The view matrix of the camera.
     m_proj : glm.mat4
         The projection matrix of the camera.
+    path : CameraPath
+        The scripted path followed by the camera instead of the mouse and keyboard, or None.
+    previous : tuple
+        The position, yaw and pitch of the camera before its last update, interpolated with
+        the current ones when the simulation runs at a fixed rate.
+    view_position : glm.vec3
+        The position the view matrix looks from: the interpolated position between two fixed-rate
+        updates, the position otherwise. It is the camera position of the rendered frame, used
+        for lighting, levels of detail and depth sorting.
     Methods
     -------
     rotate():
@@ -41,6 +50,10 @@ class Camera:
         Updates the camera's direction vectors based on yaw and pitch.
     update():
         Updates the camera's position, rotation, and view matrix.
+    interpolate(alpha):
+        Sets the view matrix to a pose between the previous and the current one.
+    follow_path():
+        Moves and rotates the camera to its pose on the scripted path at the current time.
     move():
         Moves the camera based on keyboard input.
     get_view_matrix():
@@ -58,6 +71,9 @@ class Camera:
         self.forward = glm.vec3(0, 0, -1)
         self.yaw = yaw
         self.pitch = pitch
+        self.path = None
+        self.previous = (glm.vec3(self.position), self.yaw, self.pitch)
+        self.view_position = glm.vec3(self.position)
         # view matrix
         self.m_view = self.get_view_matrix()
         # projection matrix
@@ -109,17 +125,52 @@ class Camera:
         """
         Updates the camera's position, orientation, and view matrix.
         This method performs the following steps:
-        1. Moves the camera based on input or predefined logic.
-        2. Rotates the camera based on input or predefined logic.
-        3. Updates the camera's direction vectors (e.g., front, up, right).
-        4. Recalculates the view matrix based on the updated position and orientation.
+        1. Saves the current pose as the previous one, for interpolate().
+        2. Moves the camera based on keyboard input, or along its scripted path if it has one.
+        3. Rotates the camera based on mouse movement, or along its scripted path if it has one.
+        4. Updates the camera's direction vectors (e.g., front, up, right).
+        5. Recalculates the view matrix based on the updated position and orientation.
         """
 
-        self.move()
-        self.rotate()
+        self.previous = (glm.vec3(self.position), self.yaw, self.pitch)
+        if self.path is None:
+            self.move()
+            self.rotate()
+        else:
+            self.follow_path()
         self.update_camera_vectors()
+        self.view_position = glm.vec3(self.position)
         self.m_view = self.get_view_matrix()
 
+    def interpolate(self, alpha):
+        """
+        Sets the view matrix and the view position to the pose between the pose before the last
+        update and the current one, so that frames rendered between two fixed-rate updates move
+        smoothly and are lit and sorted from the point they are viewed from. The position, yaw
+        and pitch themselves are left to the simulation.
+        Args:
+            alpha (float): The interpolation factor, 0 for the previous pose and 1 for the current one.
+        """
+
+        position, yaw, pitch = self.previous
+        position = glm.mix(position, self.position, alpha)
+        yaw = glm.radians(yaw + (self.yaw - yaw) * alpha)
+        pitch = glm.radians(pitch + (self.pitch - pitch) * alpha)
+        forward = glm.normalize(glm.vec3(glm.cos(yaw) * glm.cos(pitch), glm.sin(pitch),
+                                         glm.sin(yaw) * glm.cos(pitch)))
+        up = glm.normalize(glm.cross(glm.cross(forward, glm.vec3(0, 1, 0)), forward))
+        self.view_position = position
+        self.m_view = glm.lookAt(position, position + forward, up)
+
+    def follow_path(self):
+        """
+        Sets the camera position, yaw and pitch to the pose of its scripted path at the
+        application's current time, so that a run does not depend on the mouse or keyboard.
+        """
+
+        position, self.yaw, self.pitch = self.path.get_pose(self.app.time)
+        self.position = glm.vec3(position)
+
     def move(self):
         """
         Moves the camera based on keyboard input.
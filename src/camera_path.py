@@ -0,0 +1,106 @@
+import json
+import numpy as np
+
+
+class CameraPath:
+    """
+    A class representing a scripted camera path, replacing the mouse and keyboard controls
+    when the engine runs without a window or when a run has to be repeatable.
+    The path is a list of keyframes giving the camera position, yaw and pitch at a given time;
+    the camera pose in between is interpolated linearly, or along a Catmull-Rom spline passing
+    through the keyframes for smooth fly-throughs.
+    Attributes:
+        times (np.ndarray): The (N,) increasing times of the keyframes, in seconds.
+        positions (np.ndarray): The (N, 3) camera positions of the keyframes.
+        angles (np.ndarray): The (N, 2) camera yaw and pitch of the keyframes, in degrees.
+        loop (bool): Whether the path starts over after its last keyframe instead of holding it.
+        interpolation (str): 'linear' or 'catmull-rom'.
+    Methods:
+        __init__(keyframes, loop=False, interpolation='linear'):
+            Initializes the path from (time, position, yaw, pitch) keyframes.
+        load(path):
+            Creates a camera path from a JSON script.
+        duration:
+            The time of the last keyframe.
+        get_pose(time):
+            Returns the camera position, yaw and pitch at a given time.
+        get_spline_values(time):
+            Evaluates the Catmull-Rom spline through the keyframes at a given time.
+    """
+
+    INTERPOLATIONS = ('linear', 'catmull-rom')
+
+    def __init__(self, keyframes, loop=False, interpolation='linear'):
+        keyframes = sorted(keyframes, key=lambda keyframe: keyframe[0])
+        if not keyframes:
+            raise ValueError('A camera path needs at least one keyframe')
+        self.times = np.array([keyframe[0] for keyframe in keyframes], dtype='f8')
+        self.positions = np.array([keyframe[1] for keyframe in keyframes], dtype='f8').reshape(-1, 3)
+        self.angles = np.array([keyframe[2:4] for keyframe in keyframes], dtype='f8').reshape(-1, 2)
+        self.loop = loop
+        if interpolation not in self.INTERPOLATIONS:
+            raise ValueError(f'Unknown camera path interpolation {interpolation!r}')
+        self.interpolation = interpolation
+
+    @classmethod
+    def load(cls, path):
+        """
+        Creates a camera path from a JSON script of the form
+        {"loop": false, "interpolation": "linear",
+         "keyframes": [{"time": 0, "position": [x, y, z], "yaw": 90, "pitch": 0}, ...]}.
+        The yaw and pitch of a keyframe default to 90 and 0 degrees, the initial camera angles.
+        Args:
+            path (str): The path of the JSON file.
+        Returns:
+            CameraPath: The camera path.
+        """
+
+        with open(path) as file:
+            script = json.load(file)
+        keyframes = [(keyframe['time'], keyframe['position'], keyframe.get('yaw', 90), keyframe.get('pitch', 0))
+                     for keyframe in script['keyframes']]
+        return cls(keyframes, loop=script.get('loop', False), interpolation=script.get('interpolation', 'linear'))
+
+    @property
+    def duration(self):
+        return float(self.times[-1])
+
+    def get_pose(self, time):
+        """
+        Returns the camera pose at the given time, interpolated between the surrounding keyframes.
+        Before the first keyframe the first pose is held, after the last one the last pose is
+        held, or the path starts over when it loops.
+        Args:
+            time (float): The time in seconds.
+        Returns:
+            tuple: The (x, y, z) position and the yaw and pitch in degrees.
+        """
+
+        if self.loop and self.duration > 0:
+            time = time % self.duration
+        if self.interpolation == 'catmull-rom' and len(self.times) > 1:
+            x, y, z, yaw, pitch = self.get_spline_values(time)
+            return (x, y, z), yaw, pitch
+        position = tuple(float(np.interp(time, self.times, self.positions[:, axis])) for axis in range(3))
+        yaw, pitch = (float(np.interp(time, self.times, self.angles[:, axis])) for axis in range(2))
+        return position, yaw, pitch
+
+    def get_spline_values(self, time):
+        """
+        Evaluates the uniform Catmull-Rom spline through the keyframes at the given time. The
+        end keyframes are repeated as the outer control points, so the spline stops at them.
+        Args:
+            time (float): The time in seconds.
+        Returns:
+            list: The x, y, z position, yaw and pitch.
+        """
+
+        last = len(self.times) - 1
+        i = min(max(int(np.searchsorted(self.times, time, side='right')) - 1, 0), last - 1)
+        t0, t1 = self.times[i], self.times[i + 1]
+        u = min(max((time - t0) / (t1 - t0), 0.0), 1.0) if t1 > t0 else 0.0
+        values = np.hstack([self.positions, self.angles])
+        p0, p1, p2, p3 = values[[max(i - 1, 0), i, i + 1, min(i + 2, last)]]
+        result = 0.5 * (2 * p1 + (p2 - p0) * u + (2 * p0 - 5 * p1 + 4 * p2 - p3) * u ** 2
+                        + (3 * p1 - p0 - 3 * p2 + p3) * u ** 3)
+        return result.tolist()
@@ -0,0 +1,161 @@
+import moderngl as mgl
+
+
+class DepthPrepass:
+    """
+    A depth-only pass drawing the objects of the render queue before their color pass.
+    The objects are drawn front to back, by the distance from the camera to their world-space
+    box, with the position-only programs 'depth' and 'depth_instanced', which read the existing
+    mesh and instance buffers, and with the color writes masked. The color pass then tests the
+    depth with '==' and does not write it, so only the nearest fragment of each pixel runs the
+    lighting of the fragment shaders, whatever the order of the color pass, which stays sorted
+    by render state. Both passes compute gl_Position with the same invariant expression, so
+    their depths are identical.
+    The pre-pass pays off when many shaded fragments are hidden: it doubles the vertex work
+    and draw calls of the queue, which are added to the 'draw_calls' and 'triangles' counters.
+    Attributes:
+        app (GraphicsEngine): The application instance providing the context and camera.
+        items (list): The objects of the last pre-pass, front to back.
+    Methods:
+        sort(objects):
+            Returns the objects sorted front to back.
+        render(objects):
+            Draws the objects into the depth buffer only.
+        begin_color_pass():
+            Sets the depth state of the color pass.
+        end_color_pass():
+            Restores the default depth state.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.items = []
+
+    def sort(self, objects):
+        """
+        Returns the objects sorted front to back by the squared distance from the camera to
+        their world-space box, so that large objects the camera is close to, like a floor,
+        come first.
+        Args:
+            objects (list): The objects to sort.
+        Returns:
+            list: The sorted objects.
+        """
+
+        position = self.app.camera.view_position
+        return sorted(objects, key=lambda obj: obj.get_world_aabb().distance2(position))
+
+    def render(self, objects):
+        """
+        Draws the objects front to back into the depth buffer, with the color writes masked.
+        Args:
+            objects (list): The visible objects of the render queue.
+        """
+
+        self.items = self.sort(objects)
+        fbo = self.app.ctx.fbo
+        # the masks of a framebuffer are applied when it is bound
+        fbo.color_mask = False, False, False, False
+        fbo.use()
+        triangles = 0
+        for obj in self.items:
+            obj.draw_depth()
+            triangles += obj.triangle_count
+        fbo.color_mask = True, True, True, True
+        fbo.use()
+
+        stats = self.app.stats
+        stats.add('draw_calls', len(self.items))
+        stats.add('triangles', triangles)
+
+    def begin_color_pass(self):
+        """
+        Sets the depth state of the color pass: only the fragments at the depth laid down by
+        the pre-pass are shaded, and the depth buffer is left untouched.
+        """
+
+        fbo = self.app.ctx.fbo
+        self.app.ctx.depth_func = '=='
+        fbo.depth_mask = False
+        fbo.use()
+
+    def end_color_pass(self):
+        """
+        Restores the default depth state, for the objects drawn outside the render queue.
+        """
+
+        fbo = self.app.ctx.fbo
+        self.app.ctx.depth_func = '<'
+        fbo.depth_mask = True
+        fbo.use()
+
+
+class OverdrawMeter:
+    """
+    Counts the fragments shaded by the color pass of the scene, and optionally draws them as
+    a heat map instead of the shaded colors.
+    An occlusion query counts the samples passing the depth test during the color pass, i.e.
+    the fragments that run the fragment shader on a GPU testing the depth before shading.
+    Divided by the pixels of the frame, this gives how many times each pixel is shaded on
+    average: 1 with a perfect depth pre-pass, more when hidden fragments are shaded before
+    the surface in front of them is drawn. The number is reported to the application's
+    RenderStats as 'fragments_shaded'. Reading the query waits for the GPU to finish the
+    pass, so the meter is meant for measurements rather than for regular frames.
+    In view mode, the scene clears the frame to black and the objects of the render queue are
+    drawn in queue order with the depth programs and additive blending, so every fragment
+    passing the depth test adds one step of brightness to its pixel (see depth.frag).
+    Attributes:
+        app (GraphicsEngine): The application instance providing the context and window size.
+        view (bool): Whether the heat map replaces the color pass of the render queue.
+        query (moderngl.Query): The samples-passed query.
+        fragments (int): The fragments shaded by the last measured pass.
+    Methods:
+        measure(draw, *args):
+            Calls draw(*args) and counts the fragments it shades.
+        get_overdraw():
+            Returns the fragments shaded per pixel by the last measured pass.
+        draw(objects):
+            Draws the heat map of the objects.
+    """
+
+    def __init__(self, app, view=False):
+        self.app = app
+        self.view = view
+        self.query = app.ctx.query(samples=True)
+        self.fragments = 0
+
+    def measure(self, draw, *args):
+        """
+        Calls a draw function inside the samples-passed query and reads the result back.
+        Args:
+            draw (callable): The function drawing the pass.
+            *args: The arguments of the function.
+        """
+
+        with self.query:
+            draw(*args)
+        self.fragments = self.query.samples
+        self.app.stats.add('fragments_shaded', self.fragments)
+
+    def get_overdraw(self):
+        """
+        Returns the average number of fragments shaded per pixel by the last measured pass.
+        """
+
+        width, height = self.app.WIN_SIZE
+        return self.fragments / (width * height)
+
+    def draw(self, objects):
+        """
+        Draws the objects with the depth programs, adding one overdraw step per fragment.
+        Args:
+            objects (list): The visible objects in draw order.
+        """
+
+        ctx = self.app.ctx
+        ctx.enable(mgl.BLEND)
+        ctx.blend_func = mgl.ONE, mgl.ONE
+        for obj in objects:
+            obj.draw_depth()
+        ctx.blend_func = mgl.DEFAULT_BLENDING
+        ctx.disable(mgl.BLEND)
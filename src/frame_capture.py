@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import numpy as np
+import pygame as pg
+
+
+class FrameCapture:
+    """
+    A class used to capture the rendered frames to files without stalling the rendering.
+    A synchronous framebuffer read waits for the GPU to finish the frame before the next one can
+    be submitted. Instead, the frames are read into a ring of pixel pack buffers: the read of
+    frame k goes into buffer k mod N and only queues a copy on the GPU, and the buffer of frame
+    k-N+1, whose copy had N-1 frames to complete, is mapped and handed to a writer thread. The
+    readback, the encoding and the disk writes thus overlap with the rendering of later frames.
+    Attributes
+    ----------
+    app : object
+        The application instance, providing the context, its framebuffer and WIN_SIZE.
+    directory : str
+        The directory the frames are written to.
+    format : str
+        The file format of the frames: 'png' (or any other image format pygame can write)
+        or 'raw' for the bare top-row-first RGB bytes.
+    buffers : list
+        The ring of pixel pack buffers.
+    frame : int
+        The number of frames captured so far.
+    pending : int
+        The index of the oldest frame still in the ring, not handed to the writer yet.
+    queue : queue.Queue
+        The (index, pixels) frames waiting for the writer thread. It is bounded, so a writer
+        falling behind slows the rendering down instead of piling frames up in memory.
+    writer : threading.Thread
+        The thread encoding and writing the frames.
+    error : Exception
+        The exception raised by the writer thread while writing a frame, or None. It is raised
+        on the render thread by the next flush() or finish(); until then, the writer keeps
+        draining the queue without writing, so the render thread never blocks on a full queue.
+    Methods
+    -------
+    capture():
+        Queues the read of the current frame and hands the oldest pending frame to the writer.
+    flush():
+        Maps the buffer of the oldest pending frame and hands its pixels to the writer.
+    raise_error():
+        Raises the error of the writer thread, if any.
+    write_frame(index, pixels):
+        Encodes and writes one frame, on the writer thread.
+    get_path(index):
+        Returns the file path of a frame.
+    finish():
+        Hands the pending frames to the writer and waits for all of them to be written.
+    destroy():
+        Finishes the capture and releases the pixel pack buffers.
+    """
+
+    def __init__(self, app, directory, buffers=3, format='png'):
+        self.app = app
+        self.directory = directory
+        self.format = format
+        frame_size = app.WIN_SIZE[0] * app.WIN_SIZE[1] * 3
+        self.buffers = [app.ctx.buffer(reserve=frame_size) for _ in range(buffers)]
+        self.frame = self.pending = 0
+        self.queue = queue.Queue(maxsize=buffers)
+        self.error = None
+        os.makedirs(directory, exist_ok=True)
+        self.writer = threading.Thread(target=self.run_writer, name='frame-writer', daemon=True)
+        self.writer.start()
+
+    def capture(self):
+        """
+        Queues the copy of the framebuffer into the next pixel pack buffer of the ring. Once
+        the ring is full, the buffer of the oldest frame, whose copy had the time of N-1 frames
+        to complete, is mapped and its pixels are handed to the writer thread.
+        """
+
+        buffer = self.buffers[self.frame % len(self.buffers)]
+        self.app.fbo.read_into(buffer, components=3)
+        self.frame += 1
+        if self.frame - self.pending >= len(self.buffers):
+            self.flush()
+
+    def flush(self):
+        """
+        Maps the pixel pack buffer of the oldest pending frame and queues its pixels for the
+        writer thread, freeing its slot of the ring.
+        Raises:
+            Exception: The error of the writer thread, if writing a frame failed.
+        """
+
+        self.raise_error()
+        pixels = self.buffers[self.pending % len(self.buffers)].read()
+        self.queue.put((self.pending, pixels))
+        self.pending += 1
+
+    def run_writer(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is None:
+                    self.write_frame(*item)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def raise_error(self):
+        """
+        Raises the exception that stopped the writer thread from writing frames, once.
+        """
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def write_frame(self, index, pixels):
+        """
+        Flips a frame to top-row-first order and writes it to its file.
+        Args:
+            index (int): The index of the frame.
+            pixels (bytes): The bottom-row-first RGB pixels read from the framebuffer.
+        """
+
+        width, height = self.app.WIN_SIZE
+        image = np.frombuffer(pixels, dtype='u1').reshape(height, width, 3)[::-1]
+        if self.format == 'raw':
+            with open(self.get_path(index), 'wb') as file:
+                file.write(image.tobytes())
+        else:
+            pg.image.save(pg.image.frombuffer(image.tobytes(), (width, height), 'RGB'), self.get_path(index))
+
+    def get_path(self, index):
+        """
+        Returns the path of the file of a frame.
+        Args:
+            index (int): The index of the frame.
+        Returns:
+            str: The path, e.g. 'frames/frame_00042.png'.
+        """
+
+        return os.path.join(self.directory, f'frame_{index:05d}.{self.format}')
+
+    def finish(self):
+        """
+        Hands the frames still in the ring to the writer thread and waits until every
+        captured frame is written.
+        Raises:
+            Exception: The error of the writer thread, if writing a frame failed.
+        """
+
+        while self.pending < self.frame:
+            self.flush()
+        self.queue.join()
+        self.raise_error()
+
+    def destroy(self):
+        """
+        Writes the pending frames, stops the writer thread and releases the pixel pack buffers.
+        """
+
+        try:
+            self.finish()
+        finally:
+            self.queue.put(None)
+            self.writer.join()
+            for buffer in self.buffers:
+                buffer.release()
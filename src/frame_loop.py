@@ -0,0 +1,103 @@
+import time
+
+
+class FixedTimestep:
+    """
+    A class used to run the simulation at a fixed rate, independent of the frame rate.
+    The wall-clock time of each frame is added to an accumulator, from which whole update steps
+    are consumed; the remainder is the fraction of a step the rendered frame lies past the last
+    update, used to interpolate between the last two simulated states. After a very slow frame,
+    the number of steps is capped and the backlog dropped, so the simulation slows down for
+    a moment instead of spending ever longer frames catching up.
+    Attributes:
+        step (float): The duration of an update step in seconds.
+        max_steps (int): The maximum number of update steps run for one frame.
+        accumulator (float): The time not consumed by update steps yet, in seconds.
+    Methods:
+        advance(elapsed):
+            Adds the time of a frame and returns the number of update steps to run.
+        alpha:
+            The interpolation factor between the previous and the current simulation state.
+    """
+
+    def __init__(self, tick_rate=60, max_steps=5):
+        self.step = 1 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        """
+        Adds the time elapsed since the previous frame to the accumulator and consumes the
+        whole update steps it holds.
+        Args:
+            elapsed (float): The wall-clock time of the frame in seconds.
+        Returns:
+            int: The number of update steps to run before rendering the frame.
+        """
+
+        self.accumulator += elapsed
+        steps = min(int(self.accumulator / self.step), self.max_steps)
+        self.accumulator -= steps * self.step
+        if steps == self.max_steps:
+            # drop the backlog instead of catching up over the next frames
+            self.accumulator = min(self.accumulator, self.step)
+        return steps
+
+    @property
+    def alpha(self):
+        return min(self.accumulator / self.step, 1.0)
+
+
+class FramePacer:
+    """
+    A class used to cap the frame rate, waiting at the end of each frame until its time slot ends.
+    The frame slots are laid out at a fixed interval from the first frame, so that the frame rate
+    does not drift with the sleep granularity; a frame late by more than a whole slot starts a new
+    schedule instead of being followed by a burst of short frames. The policy trades CPU time
+    for precision:
+    - 'sleep' sleeps until the end of the slot, leaving the CPU idle, but wakes up late by the
+      sleep granularity of the OS (about 1 ms on Linux, up to 15 ms on Windows).
+    - 'busy' spins on the clock, waking up on time at the cost of a fully used core.
+    - 'hybrid' sleeps until shortly before the end of the slot and spins for the rest.
+    Attributes:
+        fps_limit (float): The maximum frame rate, or 0 for an uncapped frame rate.
+        policy (str): The waiting policy, 'sleep', 'busy' or 'hybrid'.
+        spin_time (float): The time in seconds the 'hybrid' policy spins before the end of a slot.
+        deadline (float): The end of the current frame slot on the perf_counter clock, or None.
+    Methods:
+        wait():
+            Waits until the end of the current frame slot.
+    """
+
+    POLICIES = ('sleep', 'busy', 'hybrid')
+
+    def __init__(self, fps_limit=60, policy='hybrid', spin_time=0.002):
+        if policy not in self.POLICIES:
+            raise ValueError(f'Unknown frame pacing policy {policy!r}')
+        self.fps_limit = fps_limit
+        self.policy = policy
+        self.spin_time = spin_time
+        self.deadline = None
+
+    def wait(self):
+        """
+        Waits until the end of the current frame slot according to the policy, then starts
+        the next slot. Returns immediately when the frame rate is uncapped.
+        """
+
+        if not self.fps_limit:
+            return
+        interval = 1 / self.fps_limit
+        now = time.perf_counter()
+        if self.deadline is None or now - self.deadline > interval:
+            self.deadline = now + interval
+            return
+
+        if self.policy != 'busy':
+            sleep = self.deadline - now - (self.spin_time if self.policy == 'hybrid' else 0)
+            if sleep > 0:
+                time.sleep(sleep)
+        if self.policy != 'sleep':
+            while time.perf_counter() < self.deadline:
+                pass
+        self.deadline += interval
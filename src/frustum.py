@@ -0,0 +1,99 @@
+import glm
+import numpy as np
+
+OUTSIDE, INTERSECT, INSIDE = 0, 1, 2
+
+
+class Frustum:
+    """
+    A view frustum described by six planes, used to cull objects outside of the camera view.
+    The planes are extracted from a combined projection-view matrix (Gribb-Hartmann method)
+    and normalized, with their normals pointing inside the frustum.
+    Attributes:
+        planes (list): The (a, b, c, d) coefficients of the left, right, bottom, top,
+                       near and far planes; a point p is inside a plane if a*x + b*y + c*z + d >= 0.
+        plane_array (np.ndarray): The same planes as a (6, 4) array for vectorized tests.
+    Methods:
+        from_camera(camera):
+            Builds the frustum of a camera from its projection and view matrices.
+        test_aabb(aabb):
+            Classifies a box as OUTSIDE, INTERSECT or INSIDE the frustum.
+        intersects_sphere(center, radius):
+            Checks whether a sphere is at least partially inside the frustum.
+        cull_aabbs(mins, maxs):
+            Tests many boxes at once and returns a visibility mask.
+    """
+
+    def __init__(self, m_view_proj):
+        rows = [glm.row(m_view_proj, i) for i in range(4)]
+        planes = [rows[3] + rows[0], rows[3] - rows[0],
+                  rows[3] + rows[1], rows[3] - rows[1],
+                  rows[3] + rows[2], rows[3] - rows[2]]
+        self.planes = [tuple(plane / glm.length(glm.vec3(plane))) for plane in planes]
+        self.plane_array = np.array(self.planes, dtype='f4')
+
+    @classmethod
+    def from_camera(cls, camera):
+        """
+        Builds the frustum of a camera.
+        Args:
+            camera (Camera): The camera providing m_proj and m_view.
+        Returns:
+            Frustum: The camera frustum in world space.
+        """
+
+        return cls(camera.m_proj * camera.m_view)
+
+    def test_aabb(self, aabb):
+        """
+        Classifies an axis-aligned box against the frustum.
+        For each plane, the corner of the box furthest along the plane normal (the positive
+        vertex) decides whether the box is outside, and the opposite corner whether it is
+        fully inside.
+        Args:
+            aabb (AABB): The box to test.
+        Returns:
+            int: OUTSIDE, INTERSECT or INSIDE.
+        """
+
+        mn, mx = aabb.min, aabb.max
+        result = INSIDE
+        for a, b, c, d in self.planes:
+            px, nx = (mx.x, mn.x) if a >= 0 else (mn.x, mx.x)
+            py, ny = (mx.y, mn.y) if b >= 0 else (mn.y, mx.y)
+            pz, nz = (mx.z, mn.z) if c >= 0 else (mn.z, mx.z)
+            if a * px + b * py + c * pz + d < 0:
+                return OUTSIDE
+            if a * nx + b * ny + c * nz + d < 0:
+                result = INTERSECT
+        return result
+
+    def intersects_sphere(self, center, radius):
+        """
+        Checks whether a sphere is at least partially inside the frustum.
+        Args:
+            center (glm.vec3): The center of the sphere.
+            radius (float): The radius of the sphere.
+        Returns:
+            bool: False if the sphere is fully behind one of the planes.
+        """
+
+        for a, b, c, d in self.planes:
+            if a * center.x + b * center.y + c * center.z + d < -radius:
+                return False
+        return True
+
+    def cull_aabbs(self, mins, maxs):
+        """
+        Tests many axis-aligned boxes against the frustum in one vectorized pass.
+        Args:
+            mins (np.ndarray): The (N, 3) minimum corners.
+            maxs (np.ndarray): The (N, 3) maximum corners.
+        Returns:
+            np.ndarray: A boolean mask of shape (N,), True for boxes not fully outside.
+        """
+
+        normals, d = self.plane_array[:, :3], self.plane_array[:, 3]
+        positive = np.where(normals[None, :, :] >= 0, maxs[:, None, :], mins[:, None, :])
+        distances = np.einsum('npk,pk->np', positive, normals) + d
+        return (distances >= 0).all(axis=1)
@@ -0,0 +1,354 @@
+from collections import namedtuple
+
+import numpy as np
+from .frustum import Frustum
+from .transform_store import TransformStore
+from .vbo import InstanceVBO, NormalVBO
+
+# The part of the pool buffers holding one mesh
+MeshRange = namedtuple('MeshRange', ['first_index', 'index_count', 'base_vertex'])
+
+
+class GeometryPool:
+    """
+    A class packing the meshes of several VBOs into one vertex buffer and one index buffer, so
+    that different meshes can be drawn by the same VAO and the same multi-draw call.
+    Each mesh is appended behind the previous ones; its indices stay relative to its first
+    vertex and are stored as uint32, and its place in the buffers is a MeshRange, from which the
+    firstIndex and baseVertex fields of an indirect draw command are taken. The buffers grow by
+    doubling, copying their content on the GPU; every reallocation increments `version`, since
+    the VAOs reading the old buffers have to be rebuilt.
+    Attributes:
+        ctx (moderngl.Context): The OpenGL context.
+        format (str): The vertex format shared by the pooled meshes.
+        attribs (list): The vertex attribute names.
+        vbo (moderngl.Buffer): The vertex buffer of all meshes, or None while the pool is empty.
+        ibo (moderngl.Buffer): The uint32 index buffer of all meshes, or None.
+        vertex_count (int): The number of vertices in the pool.
+        index_count (int): The number of indices in the pool.
+        ranges (dict): The MeshRange of each pooled VBO.
+        version (int): Incremented whenever the buffers are reallocated.
+    Methods:
+        get_range(vbo):
+            Returns the range of a VBO's mesh, adding the mesh to the pool first if needed.
+        add(vbo):
+            Appends the mesh of a VBO to the pool.
+        destroy():
+            Releases the buffers.
+    """
+
+    STRIDE = 32
+
+    def __init__(self, ctx, format='2f 3f 3f', attribs=('in_texcoord_0', 'in_normal', 'in_position')):
+        self.ctx = ctx
+        self.format = format
+        self.attribs = list(attribs)
+        self.vbo = self.ibo = None
+        self.vertex_count = self.index_count = 0
+        self.ranges = {}
+        self.version = 0
+
+    def get_range(self, vbo):
+        """
+        Returns the place of a VBO's mesh in the pool.
+        Args:
+            vbo (BaseVBO): A VBO whose buffers are created.
+        Returns:
+            MeshRange: The first index, index count and base vertex of the mesh.
+        """
+
+        mesh_range = self.ranges.get(vbo)
+        if mesh_range is None:
+            mesh_range = self.ranges[vbo] = self.add(vbo)
+        return mesh_range
+
+    def add(self, vbo):
+        """
+        Appends the mesh of a VBO to the pool buffers. The vertices are copied on the GPU, the
+        indices are read back once to be widened to uint32.
+        Args:
+            vbo (BaseVBO): A VBO whose buffers are created, in the pool's vertex format.
+        Returns:
+            MeshRange: The place of the mesh in the pool.
+        """
+
+        indices = np.frombuffer(vbo.ibo.read(), dtype=f'u{vbo.index_element_size}').astype('u4')
+        mesh_range = MeshRange(self.index_count, len(indices), self.vertex_count)
+        self.vbo = self.grow(self.vbo, self.vertex_count * self.STRIDE, vbo.vbo.size)
+        self.ibo = self.grow(self.ibo, self.index_count * 4, indices.nbytes)
+        self.ctx.copy_buffer(self.vbo, vbo.vbo, write_offset=self.vertex_count * self.STRIDE)
+        self.ibo.write(indices, offset=self.index_count * 4)
+        self.vertex_count += vbo.vertex_count
+        self.index_count += len(indices)
+        return mesh_range
+
+    def grow(self, buffer, used, size):
+        """
+        Returns a buffer with room for `size` more bytes after the `used` ones, reallocating
+        and copying the buffer when it is too small.
+        """
+
+        if buffer is not None and used + size <= buffer.size:
+            return buffer
+        new = self.ctx.buffer(reserve=max(used + size, 2 * (buffer.size if buffer is not None else 0)))
+        if buffer is not None:
+            self.ctx.copy_buffer(new, buffer, size=used)
+            buffer.release()
+        self.version += 1
+        return new
+
+    def destroy(self):
+        """
+        Releases the vertex and index buffers.
+        """
+
+        if self.vbo is not None:
+            self.vbo.release()
+            self.ibo.release()
+
+
+class IndirectRenderer:
+    """
+    A class drawing many models of different meshes with a handful of indirect multi-draw calls.
+    The meshes of the models are packed into a GeometryPool, their model matrices into one
+    instance buffer, and each model gets a DrawElementsIndirect command (count, instanceCount,
+    firstIndex, baseVertex, baseInstance) whose base instance is its row in the instance buffer.
+    The commands are sorted by texture, and each run of commands sharing a texture is submitted
+    with a single render_indirect call of the 'instanced' program, whatever the number of models
+    and meshes in it. While every model is scaled uniformly, the program is its uniform-scale
+    variant and no normal matrices are uploaded.
+    The instance count of a command decides whether its model is drawn. With 'cpu' culling it is
+    written from the objects that passed the scene's frustum culling; with 'gpu' culling a
+    compute shader (shaders/cull.comp) tests the world-space bounding sphere of every model
+    against the frustum and writes the commands drawn, without any per-object work on the CPU.
+    Multi-draw indirect needs OpenGL 4.3. The models' update() is not called: their model
+    matrices are read from the application's TransformStore. The mesh of a model is the one of
+    its level of detail, so the commands are rebuilt when a model switches levels.
+    Attributes:
+        app (GraphicsEngine): The application instance.
+        culling (str): 'cpu' or 'gpu'.
+        pool (GeometryPool): The merged geometry of the drawn meshes.
+        objects (list): The drawn models, in command order.
+        rows (np.ndarray): The TransformStore row of each model.
+        commands (np.ndarray): The (N, 5) uint32 commands of all models.
+        groups (list): The (texture, first command, command count) runs drawn by one call.
+        program (moderngl.Program): The instanced program drawing the models.
+        instance_vbo (InstanceVBO): The model matrix of each model.
+        normal_vbo (NormalVBO): The normal matrix of each model, or None when all are scaled
+                                uniformly.
+        command_buffer (moderngl.Buffer): The commands of all models.
+        visible_buffer (moderngl.Buffer): The commands written by the culling shader, or None.
+        bounds_buffer (moderngl.Buffer): The world-space bounding spheres, or None.
+        vao (moderngl.VertexArray): The VAO of the pool and instance buffers, or None.
+        versions (np.ndarray): The transform versions of the uploaded matrices.
+        dirty (bool): Whether the commands must be rebuilt before the next frame.
+    Methods:
+        invalidate():
+            Requests a rebuild of the commands.
+        build(objects):
+            Builds the commands and buffers of the indirect-drawable objects.
+        update_instances():
+            Uploads the model and normal matrices, and bounding spheres, of the models that moved.
+        cull(visible, camera):
+            Sets the instance count of every command.
+        render(objects, camera, visible=None):
+            Draws the objects with one indirect call per texture.
+        destroy():
+            Releases the buffers.
+    """
+
+    VERSION = 430
+    CULLING = ('cpu', 'gpu')
+
+    def __init__(self, app, culling='gpu'):
+        if culling not in self.CULLING:
+            raise ValueError(f'Unknown indirect culling {culling!r}')
+        if app.ctx.version_code < self.VERSION:
+            raise RuntimeError('Indirect multi-draw needs an OpenGL 4.3 context')
+        self.app = app
+        self.culling = culling
+        self.pool = GeometryPool(app.ctx)
+        self.program = None
+        self.compute = None
+        if culling == 'gpu':
+            with open('shaders/cull.comp') as file:
+                self.compute = app.ctx.compute_shader(file.read())
+        self.objects, self.groups = [], []
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.commands = np.zeros((0, 5), dtype='u4')
+        self.instance_vbo = self.normal_vbo = None
+        self.command_buffer = self.visible_buffer = self.bounds_buffer = None
+        self.vao = None
+        self.vao_version = None
+        self.versions = None
+        self.dirty = True
+
+    def invalidate(self):
+        """
+        Requests a rebuild of the commands before the next frame, e.g. after an object was
+        added to the scene or its mesh was loaded.
+        """
+
+        self.dirty = True
+
+    def build(self, objects):
+        """
+        Builds the commands of the objects drawn indirectly, sorted by texture then by mesh,
+        and (re)creates the buffers and the VAO, with the uniform-scale variant of the program
+        when no model needs its normal matrix.
+        Args:
+            objects (list): The objects of the scene; those whose `indirect` flag is set are drawn.
+        """
+
+        ctx, vao = self.app.ctx, self.app.mesh.vao
+        objects = [obj for obj in objects if obj.indirect]
+        ranges = {obj: self.pool.get_range(vao.get_vbo(vao.get_lod_name(obj.vao_name, obj.lod)))
+                  for obj in objects}
+        texture_ids = {}
+        objects.sort(key=lambda obj: (texture_ids.setdefault(id(obj.texture), len(texture_ids)),
+                                      ranges[obj].first_index))
+        self.objects = objects
+        self.rows = np.array([obj.transform.index for obj in objects], dtype=np.int64)
+
+        self.commands = np.zeros((len(objects), 5), dtype='u4')
+        self.groups = []
+        for i, obj in enumerate(objects):
+            mesh_range = ranges[obj]
+            self.commands[i] = (mesh_range.index_count, 1, mesh_range.first_index, mesh_range.base_vertex, i)
+            if self.groups and self.groups[-1][0] is obj.texture:
+                texture, first, count = self.groups[-1]
+                self.groups[-1] = (texture, first, count + 1)
+            else:
+                self.groups.append((obj.texture, i, 1))
+
+        self.destroy_buffers()
+        store = self.app.transforms
+        self.instance_vbo = InstanceVBO(ctx, store.matrices[self.rows])
+        buffers = [(self.pool.vbo, self.pool.format, *self.pool.attribs),
+                   (self.instance_vbo.vbo, self.instance_vbo.format, *self.instance_vbo.attribs)]
+        programs = vao.program.programs
+        if TransformStore.is_uniform_scale(store.scales[self.rows]):
+            self.normal_vbo = None
+            self.program = programs['instanced_uniform_scale']
+        else:
+            self.normal_vbo = NormalVBO(ctx, store.normals[self.rows])
+            buffers.append((self.normal_vbo.vbo, self.normal_vbo.format, *self.normal_vbo.attribs))
+            self.program = programs['instanced']
+        self.command_buffer = ctx.buffer(self.commands if len(objects) else b'\0' * 20)
+        if self.compute is not None:
+            self.visible_buffer = ctx.buffer(reserve=max(self.commands.nbytes, 20))
+            self.bounds_buffer = ctx.buffer(reserve=max(len(objects) * 16, 16))
+        self.vao = ctx.vertex_array(self.program, buffers, index_buffer=self.pool.ibo, index_element_size=4,
+                                    skip_errors=True)
+        self.vao_version = self.pool.version
+        self.versions = None
+        self.dirty = False
+
+    def update_instances(self):
+        """
+        Uploads the model and normal matrices when a transform changed since the last upload
+        and, with GPU culling, the world-space bounding spheres of the models, computed in one
+        vectorized pass from the mesh bounding boxes and the matrices. A model given a
+        non-uniform scale makes the renderer rebuild its VAO with normal matrices.
+        """
+
+        store = self.app.transforms
+        versions = store.versions[self.rows]
+        if self.versions is not None and np.array_equal(versions, self.versions):
+            self.app.stats.add('uploads_skipped')
+            return
+        if self.normal_vbo is None and not TransformStore.is_uniform_scale(store.scales[self.rows]):
+            self.build(self.objects)
+        self.versions = versions
+        matrices = store.matrices[self.rows]
+        self.instance_vbo.write(matrices)
+        if self.normal_vbo is not None:
+            self.normal_vbo.write(store.normals[self.rows])
+        if self.bounds_buffer is None:
+            return
+
+        vao = self.app.mesh.vao
+        boxes = [vao.get_vbo(obj.vao_name).aabb for obj in self.objects]
+        centers = np.array([box.center() for box in boxes], dtype='f4').reshape(-1, 3)
+        radii = np.array([box.radius() for box in boxes], dtype='f4')
+        # rows of the column-major matrices are the columns of the model matrices
+        linear, translation = matrices[:, :3, :3], matrices[:, 3, :3]
+        spheres = np.empty((len(self.objects), 4), dtype='f4')
+        spheres[:, :3] = np.einsum('nj,njk->nk', centers, linear) + translation
+        spheres[:, 3] = radii * np.sqrt((linear ** 2).sum(axis=2).max(axis=1))
+        self.bounds_buffer.write(spheres)
+
+    def cull(self, visible, camera):
+        """
+        Sets the instance count of each command to 1 for a visible model and 0 otherwise.
+        Args:
+            visible (set): The objects that passed the scene's culling, or None for all;
+                           ignored with GPU culling, which tests the frustum itself.
+            camera (Camera): The camera, or camera state, whose frustum the GPU culling tests.
+        Returns:
+            moderngl.Buffer: The buffer of the commands to draw.
+        """
+
+        if self.compute is None:
+            if visible is not None:
+                self.commands[:, 1] = np.fromiter((obj in visible for obj in self.objects),
+                                                  dtype='u4', count=len(self.objects))
+                self.command_buffer.write(self.commands)
+            return self.command_buffer
+
+        frustum = Frustum.from_camera(camera)
+        self.compute['planes'].write(frustum.plane_array.tobytes())
+        self.compute['count'] = len(self.objects)
+        self.command_buffer.bind_to_storage_buffer(0)
+        self.visible_buffer.bind_to_storage_buffer(1)
+        self.bounds_buffer.bind_to_storage_buffer(2)
+        self.compute.run(group_x=(len(self.objects) + 63) // 64)
+        self.app.ctx.memory_barrier()
+        return self.visible_buffer
+
+    def render(self, objects, camera, visible=None):
+        """
+        Draws the indirect-drawable objects with one render_indirect call per texture.
+        The calls are reported to the application's RenderStats as 'draw_calls' and
+        'texture_binds', and the triangles of the commands as 'triangles' (with GPU culling,
+        the culled models are not known on the CPU and are counted too).
+        Args:
+            objects (list): The objects of the scene.
+            camera (Camera): The camera, or camera state, the frame is rendered with.
+            visible (set, optional): The objects that passed culling. Defaults to all objects.
+        """
+
+        if self.dirty or self.vao_version != self.pool.version:
+            self.build(objects)
+        if not self.objects:
+            return
+
+        self.update_instances()
+        commands = self.cull(visible, camera)
+        for texture, first, count in self.groups:
+            texture.use()
+            self.vao.render_indirect(commands, count=count, first=first)
+
+        drawn = self.commands[:, 1] if self.compute is None else 1
+        stats = self.app.stats
+        stats.add('draw_calls', len(self.groups))
+        stats.add('texture_binds', len(self.groups))
+        stats.add('triangles', int((self.commands[:, 0] * drawn).sum()) // 3)
+
+    def destroy_buffers(self):
+        for buffer in (self.command_buffer, self.visible_buffer, self.bounds_buffer, self.vao):
+            if buffer is not None:
+                buffer.release()
+        for vbo in (self.instance_vbo, self.normal_vbo):
+            if vbo is not None:
+                vbo.destroy()
+
+    def destroy(self):
+        """
+        Releases the buffers, the VAO, the geometry pool and the culling shader.
+        """
+
+        self.destroy_buffers()
+        self.pool.destroy()
+        if self.compute is not None:
+            self.compute.release()
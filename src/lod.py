@@ -0,0 +1,168 @@
+import numpy as np
+from .camera import FOV
+
+# The number of clustering cells along the longest side of a mesh for each simplified level
+LOD_GRIDS = (48, 24, 12)
+# The projected diameters, in pixels, below which a model switches to level 1, 2 and 3
+LOD_SIZES = (240, 100, 40)
+
+
+def simplify_mesh(vertices, indices, grid, stride=8):
+    """
+    Simplifies an indexed '2f 3f 3f' mesh by vertex clustering.
+    The bounding box of the mesh is divided into cubic cells, `grid` cells along its longest
+    side, and all the vertices of a cell whose normals point along the same major axis
+    direction are merged into one vertex, averaging their attributes. Splitting the cells by
+    normal direction keeps the two sides of thin parts and of sharp edges apart. Triangles
+    whose corners fall into fewer than three clusters collapse and are dropped, as are the
+    copies of triangles that became identical.
+    Args:
+        vertices (np.ndarray): The (N, stride) float32 unique vertices.
+        indices (np.ndarray): The triangle indices.
+        grid (int): The number of cells along the longest side of the bounding box.
+        stride (int): The number of floats per vertex.
+    Returns:
+        tuple: The (M, stride) float32 merged vertices and the uint16 or uint32 index array.
+    """
+
+    vertices = np.asarray(vertices, dtype='f4').reshape(-1, stride)
+    positions, normals = vertices[:, 5:8], vertices[:, 2:5]
+    low = positions.min(axis=0)
+    cell_size = max(float((positions.max(axis=0) - low).max()) / grid, 1e-12)
+    cells = np.minimum((positions - low) / cell_size, grid).astype(np.int64)
+    axis = np.abs(normals).argmax(axis=1)
+    direction = 2 * axis + (normals[np.arange(len(normals)), axis] < 0)
+    keys = ((cells[:, 0] * (grid + 1) + cells[:, 1]) * (grid + 1) + cells[:, 2]) * 6 + direction
+    _, clusters = np.unique(keys, return_inverse=True)
+    clusters = clusters.ravel()
+
+    triangles = clusters[np.asarray(indices, dtype=np.int64)].reshape(-1, 3)
+    a, b, c = triangles.T
+    triangles = triangles[(a != b) & (b != c) & (a != c)]
+    # rotate each triangle to start at its smallest index, keeping its winding, to find copies
+    first = triangles.argmin(axis=1)
+    triangles = triangles[np.arange(len(triangles))[:, None], (first[:, None] + np.arange(3)) % 3]
+    triangles = np.unique(triangles, axis=0)
+
+    used, remap = np.unique(triangles, return_inverse=True)
+    counts = np.bincount(clusters)[used]
+    merged = np.empty((len(used), stride), dtype='f4')
+    for column in range(stride):
+        merged[:, column] = np.bincount(clusters, weights=vertices[:, column])[used] / counts
+    lengths = np.linalg.norm(merged[:, 2:5], axis=1, keepdims=True)
+    merged[:, 2:5] /= np.maximum(lengths, 1e-12)
+    dtype = 'u2' if len(merged) <= 0xFFFF else 'u4'
+    return merged, remap.ravel().astype(dtype)
+
+
+class LodSelector:
+    """
+    A class choosing the level of detail of each model from its projected size on the screen.
+    The projected size is the diameter in pixels of the model's bounding sphere seen from the
+    camera, computed for all models at once from the TransformStore. A model uses level i when
+    its size is below LOD_SIZES[i - 1] but not below the next threshold. To avoid popping
+    back and forth when a model hovers around a threshold, the thresholds are widened by the
+    hysteresis ratio: a model only switches to a coarser level once it is `hysteresis` smaller
+    than the threshold, and back to a finer level once it is `hysteresis` larger.
+    Attributes:
+        app (GraphicsEngine): The application instance providing the camera and WIN_SIZE.
+        sizes (np.ndarray): The projected diameters in pixels below which the levels 1, 2...
+                            are used, decreasing.
+        hysteresis (float): The relative margin around the thresholds.
+        objects (list): The models having several levels of detail.
+        dirty (bool): Whether the list of models must be rebuilt.
+    Methods:
+        invalidate():
+            Requests a rebuild of the list of models.
+        get_projected_sizes(objects, camera):
+            Returns the projected diameter in pixels of each model.
+        select_levels(sizes, levels):
+            Returns the new level of each model.
+        update(objects, camera):
+            Switches the models whose projected size crossed a threshold.
+    """
+
+    def __init__(self, app, sizes=LOD_SIZES, hysteresis=0.2):
+        self.app = app
+        self.sizes = np.asarray(sizes, dtype='f4')
+        self.hysteresis = hysteresis
+        self.objects = []
+        self.dirty = True
+
+    def invalidate(self):
+        """
+        Requests a rebuild of the list of models before the next update, e.g. after an object
+        was added or a mesh and its levels of detail were loaded.
+        """
+
+        self.dirty = True
+
+    def get_projected_sizes(self, objects, camera):
+        """
+        Computes the diameter in pixels of the bounding sphere of each model on the screen,
+        2 * r / (d * tan(fov / 2)) times half the screen height for a sphere of radius r at a
+        distance d of the camera. Spheres around the camera are given an infinite size.
+        Args:
+            objects (list): The models.
+            camera (Camera): The camera, or camera state, the frame is rendered with.
+        Returns:
+            np.ndarray: The (N,) projected diameters.
+        """
+
+        store = self.app.transforms
+        rows = np.array([obj.transform.index for obj in objects], dtype=np.int64)
+        centers = np.array([obj.aabb.center() for obj in objects], dtype='f4').reshape(-1, 3)
+        radii = np.array([obj.aabb.radius() for obj in objects], dtype='f4')
+        matrices = store.matrices[rows]
+        # rows of the column-major matrices are the columns of the model matrices
+        linear, translation = matrices[:, :3, :3], matrices[:, 3, :3]
+        centers = np.einsum('nj,njk->nk', centers, linear) + translation
+        radii = radii * np.sqrt((linear ** 2).sum(axis=2).max(axis=1))
+
+        distances = np.linalg.norm(centers - np.array(camera.view_position, dtype='f4'), axis=1)
+        scale = self.app.WIN_SIZE[1] / np.tan(np.radians(FOV) / 2)
+        with np.errstate(divide='ignore'):
+            return np.where(distances > radii, radii * scale / distances, np.inf)
+
+    def select_levels(self, sizes, levels):
+        """
+        Picks the level of each model with hysteresis.
+        Args:
+            sizes (np.ndarray): The projected diameters in pixels.
+            levels (np.ndarray): The current levels.
+        Returns:
+            np.ndarray: The new levels: the current level when the size lies within the widened
+                        thresholds, the closest level allowed by them otherwise.
+        """
+
+        thresholds = self.sizes[None, :]
+        coarsest = (sizes[:, None] < thresholds * (1 + self.hysteresis)).sum(axis=1)
+        finest = (sizes[:, None] < thresholds * (1 - self.hysteresis)).sum(axis=1)
+        return np.clip(levels, finest, coarsest)
+
+    def update(self, objects, camera):
+        """
+        Computes the projected size of every model with levels of detail and switches those
+        whose size left the band of their current level.
+        The switches are reported to the application's RenderStats as 'lod_switches'.
+        Args:
+            objects (list): The objects of the scene.
+            camera (Camera): The camera, or camera state, the frame is rendered with.
+        Returns:
+            bool: Whether a model switched, i.e. whether the draw order is out of date.
+        """
+
+        if self.dirty:
+            self.objects = [obj for obj in objects if obj.lod_levels > 1]
+            self.dirty = False
+        if not self.objects:
+            return False
+
+        levels = np.array([obj.lod for obj in self.objects])
+        counts = np.array([obj.lod_levels for obj in self.objects])
+        selected = np.minimum(self.select_levels(self.get_projected_sizes(self.objects, camera), levels), counts - 1)
+        changed = np.flatnonzero(selected != levels)
+        for i in changed:
+            self.objects[i].set_lod(int(selected[i]))
+        self.app.stats.add('lod_switches', len(changed))
+        return len(changed) > 0
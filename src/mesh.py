@@ -7,19 +7,34 @@ class Mesh:
     Mesh class represents a 3D mesh object in the OpenGL graphic engine.
     Attributes:
         app (App): The application instance that contains the OpenGL context.
+        loader (AssetLoader): The loader reading the assets in the background, or None when
+                              they are loaded before the first frame.
         vao (VAO): The Vertex Array Object associated with the mesh.
         texture (Texture): The texture associated with the mesh.
+        version (int): The number of assets swapped in for their placeholders so far.
     Methods:
-        __init__(app):
-            Initializes the Mesh object with the given application context.
+        __init__(app, loader=None, lod_grids=()):
+            Initializes the Mesh object with the given application context. With a loader,
+            the VAOs and textures start as placeholders and are swapped as the assets load.
+            With LOD grids, simplified levels of detail of the loaded meshes are generated.
         destroy():
             Destroys the VAO and texture associated with the mesh to free up resources.
     """
 
-    def __init__(self, app):
+    def __init__(self, app, loader=None, lod_grids=()):
         self.app = app
-        self.vao = VAO(app.ctx)
-        self.texture = Texture(app.ctx)
+        self.loader = loader
+        lod_args = {'lod_grids': lod_grids} if lod_grids else {}
+        if loader is None:
+            self.vao = VAO(app.ctx, **lod_args)
+            self.texture = Texture(app.ctx)
+        else:
+            self.vao = VAO(app.ctx, loader, **lod_args)
+            self.texture = Texture(app.ctx, loader)
+
+    @property
+    def version(self):
+        return self.loader.version if self.loader is not None else 0
 
     def destroy(self):
         """
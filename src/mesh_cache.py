@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CACHE_DIR = 'cache/meshes'
+
+
+class MeshCache:
+    """
+    A binary cache of processed mesh data, so that source files are only parsed once.
+    Each source file maps to one cache file named after its path. The file starts with a small
+    header followed by the raw arrays, each aligned to 64 bytes:
+        8 bytes     magic b'MESHC001'
+        4 bytes     little-endian length of the JSON header
+        JSON        source path, mtime, size and SHA-256 of the source file, vertex format,
+                    attribute names, material reference and the dtype/shape/offset of each array
+        arrays      raw array data
+    Loading memory-maps the arrays (np.memmap, read-only) instead of reading them, so they can
+    be handed to ctx.buffer without an extra copy. An entry is valid when the source file still
+    has the recorded size and mtime; if only the mtime changed, the content hash decides, and
+    the new mtime is written to the header of a matching entry so the file is not hashed again.
+    Attributes:
+        cache_dir (str): The directory holding the cache files.
+    Methods:
+        get_cache_path(source_path):
+            Returns the cache file path of a source file.
+        load(source_path):
+            Returns the cached entry of a source file, or None if missing or stale.
+        store(source_path, arrays, **metadata):
+            Writes the arrays and metadata of a source file to the cache.
+        write_mtime(cache_path, header, header_size, mtime_ns):
+            Records a new source mtime in the header of a cache file.
+        file_hash(path):
+            Returns the SHA-256 of a file.
+    """
+
+    MAGIC = b'MESHC001'
+    EXTENSION = '.mesh'
+    ALIGNMENT = 64
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def get_cache_path(self, source_path):
+        """
+        Returns the cache file path of a source file, derived from its absolute path.
+        """
+
+        source_path = os.path.abspath(source_path)
+        key = hashlib.sha1(source_path.encode()).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.cache_dir, f'{name}-{key}{self.EXTENSION}')
+
+    @staticmethod
+    def file_hash(path):
+        """
+        Returns the hexadecimal SHA-256 digest of a file, read in 1 MiB chunks.
+        """
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def read_header(self, cache_path):
+        with open(cache_path, 'rb') as file:
+            if file.read(len(self.MAGIC)) != self.MAGIC:
+                return None, 0
+            header_size = int.from_bytes(file.read(4), 'little')
+            header = json.loads(file.read(header_size))
+        return header, len(self.MAGIC) + 4 + header_size
+
+    def load(self, source_path):
+        """
+        Loads the cached entry of a source file.
+        Args:
+            source_path (str): The path of the source file, e.g. an OBJ model.
+        Returns:
+            dict: The header metadata with an 'arrays' dict of read-only memory-mapped arrays,
+                  or None if the file is not cached or the cache entry is stale.
+        """
+
+        cache_path = self.get_cache_path(source_path)
+        if not os.path.exists(cache_path):
+            return None
+        header, header_end = self.read_header(cache_path)
+        if header is None:
+            return None
+
+        stat = os.stat(source_path)
+        if stat.st_size != header['size']:
+            return None
+        if stat.st_mtime_ns != header['mtime_ns']:
+            if self.file_hash(source_path) != header['sha256']:
+                return None
+            self.write_mtime(cache_path, header, header_end - len(self.MAGIC) - 4, stat.st_mtime_ns)
+
+        header['arrays'] = {
+            name: np.memmap(cache_path, dtype=spec['dtype'], mode='r',
+                            offset=spec['offset'], shape=tuple(spec['shape']))
+            for name, spec in header['arrays'].items()}
+        return header
+
+    def write_mtime(self, cache_path, header, header_size, mtime_ns):
+        """
+        Rewrites the header of a cache file in place with a new source mtime, after the content
+        hash showed that the source only was touched. The header is padded with spaces when
+        stored, so the new one fits in the same bytes unless its mtime has more digits than
+        the padding, in which case the header is left as is.
+        Args:
+            cache_path (str): The path of the cache file.
+            header (dict): The header read from the file.
+            header_size (int): The size in bytes of the header in the file.
+            mtime_ns (int): The new mtime of the source file.
+        """
+
+        header['mtime_ns'] = mtime_ns
+        header_bytes = json.dumps(header).encode()
+        if len(header_bytes) > header_size:
+            return
+        with open(cache_path, 'r+b') as file:
+            file.seek(len(self.MAGIC) + 4)
+            file.write(header_bytes.ljust(header_size))
+
+    def store(self, source_path, arrays, **metadata):
+        """
+        Writes processed data of a source file to the cache, replacing any previous entry.
+        The file is written under a temporary name and renamed, so a concurrent reader never
+        sees a partial entry.
+        Args:
+            source_path (str): The path of the source file.
+            arrays (dict): The NumPy arrays to store, by name.
+            **metadata: JSON-serializable values stored in the header (format, attribs, material...).
+        Returns:
+            str: The path of the cache file.
+        """
+
+        stat = os.stat(source_path)
+        header = dict(metadata, source=os.path.abspath(source_path), size=stat.st_size,
+                      mtime_ns=stat.st_mtime_ns, sha256=self.file_hash(source_path))
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+        # the header size depends on the offsets, so reserve room for the offset digits first
+        specs = {name: {'dtype': array.dtype.str, 'shape': array.shape, 'offset': 0}
+                 for name, array in arrays.items()}
+        header['arrays'] = specs
+        prefix = len(self.MAGIC) + 4 + len(json.dumps(header)) + 32 * len(arrays)
+        offset = prefix
+        for name, array in arrays.items():
+            offset = -(-offset // self.ALIGNMENT) * self.ALIGNMENT
+            specs[name]['offset'] = offset
+            offset += array.nbytes
+        header_bytes = json.dumps(header).encode().ljust(prefix - len(self.MAGIC) - 4)
+
+        cache_path = self.get_cache_path(source_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(self.MAGIC)
+            file.write(len(header_bytes).to_bytes(4, 'little'))
+            file.write(header_bytes)
+            for name, array in arrays.items():
+                file.write(b'\0' * (specs[name]['offset'] - file.tell()))
+                file.write(array.data)
+        os.replace(temp_path, cache_path)
+        return cache_path
@@ -1,6 +1,10 @@
 import numpy as np
 import glm
 import pygame as pg
+from .bounding_volume import AABB
+from .transform import Transform
+from .transform_store import TransformStore
+from .vbo import InstanceVBO, LayerVBO, NormalVBO
 
 
 class BaseModel:
@@ -10,70 +14,248 @@ class BaseModel:
         app (object): The application instance.
         vao_name (str): The name of the Vertex Array Object (VAO).
         texture_id (int): The ID of the texture to be used.
-        pos (tuple): The position of the model in 3D space (default is (0, 0, 0)).
-        rotation (tuple): The rotation of the model in degrees for each axis (default is (0, 0, 0)).
-        scale (tuple): The scale of the model in each axis (default is (1, 1, 1)).
-        m_model (glm.mat4): The model matrix.
+        transform (Transform): The transform component caching the model matrix, a view over one
+                               row of the application's TransformStore (app.transforms).
+        aabb (AABB): The model-space bounding box of the mesh.
+        pos (glm.vec3): The position of the model in 3D space (default is (0, 0, 0)).
+        rotation (glm.vec3): The rotation of the model in radians for each axis. The constructor
+                             takes degrees (default is (0, 0, 0)).
+        scale (glm.vec3): The scale of the model in each axis (default is (1, 1, 1)).
+        m_model (glm.mat4): The model matrix, only recomputed after the transform changed.
         vao (object): The VAO associated with the model.
         program (object): The shader program associated with the VAO.
+        depth_vao (object): The position-only VAO of the depth pre-pass drawing the same mesh,
+                            or None until the first pre-pass.
         camera (object): The camera instance from the application.
+        indirect (bool): Whether the model can be drawn by an IndirectRenderer, which reads its
+                         model matrix from the TransformStore instead of calling update().
+        lod (int): The level of detail drawn, 0 for the full mesh.
+        lod_levels (int): The number of levels of detail of the model's mesh.
+        static (bool): Whether the model does not move, so that a scene with static batching
+                       merges it with the other static models of its texture (see
+                       StaticBatcher). Moving it anyway rewrites its part of the batch.
     Methods:
         update():
             Updates the model's state. This method should be overridden by subclasses.
         get_model_matrix():
-            Computes and returns the model matrix based on position, rotation, and scale.
+            Returns the model matrix based on position, rotation, and scale.
+        write_model_matrix():
+            Uploads the model and normal matrices, skipping the rebuild and the upload when they
+            are not needed.
+        get_world_aabb():
+            Returns the world-space bounding box of the model.
+        get_instance_transforms():
+            Returns the model and normal matrices of the model as store rows.
+        set_lod(level):
+            Switches the model to a level of detail of its mesh.
+        on_assets_loaded():
+            Replaces the placeholder VAO, bounding box and texture with the loaded ones.
+        get_depth_vao():
+            Returns the position-only VAO of the depth pre-pass.
+        draw():
+            Issues the draw call using the associated VAO.
+        draw_depth():
+            Draws the model into the depth buffer only, with the position-only program.
         render():
-            Updates the model and renders it using the associated VAO.
+            Binds the texture, updates the model and draws it.
     """
 
-    def __init__(self, app, vao_name, texture_id, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+    indirect = True
+
+    def __init__(self, app, vao_name, texture_id, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1),
+                 static=False):
         self.app = app
-        self.pos = pos
-        self.rotation = glm.vec3([glm.radians(i) for i in rotation])
-        self.scale = scale
-        self.m_model = self.get_model_matrix()
+        self.static = static
+        self.transform = Transform(pos, glm.vec3([glm.radians(i) for i in rotation]), scale,
+                                   store=app.transforms)
         self.texture_id = texture_id
+        self.vao_name = vao_name
+        self.aabb = app.mesh.vao.get_vbo(vao_name).aabb
+        self.world_aabb = None
+        self.world_aabb_version = None
+        self.lod = 0
         self.vao = app.mesh.vao.vaos[vao_name]
         self.program = self.vao.program
+        self.depth_vao = None
         self.camera = self.app.camera
 
+    @property
+    def pos(self):
+        return self.transform.pos
+
+    @pos.setter
+    def pos(self, value):
+        self.transform.pos = value
+
+    @property
+    def rotation(self):
+        return self.transform.rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        self.transform.rotation = value
+
+    @property
+    def scale(self):
+        return self.transform.scale
+
+    @scale.setter
+    def scale(self, value):
+        self.transform.scale = value
+
+    @property
+    def m_model(self):
+        return self.transform.m_model
+
+    @property
+    def triangle_count(self):
+        return self.vao.vertices // 3
+
+    @property
+    def lod_levels(self):
+        return self.app.mesh.vao.get_lod_count(self.vao_name)
+
     def update(self):
         pass
 
     def get_model_matrix(self):
         """
-        Generates and returns the model matrix for the object.
+        Returns the model matrix for the object.
         The model matrix is computed by applying translation, rotation, 
         and scaling transformations in that order. The transformations 
         are applied based on the object's position, rotation, and scale 
-        attributes.
+        attributes. The matrix is cached by the transform and only
+        recomputed after one of them changed.
         Returns:
             glm.mat4: The resulting model matrix after applying the 
                   transformations.
         """
 
-        m_model = glm.mat4()
+        return self.transform.m_model
+
+    def write_model_matrix(self):
+        """
+        Writes the model matrix and its normal matrix to the shader program, doing as little
+        work as possible. Both are computed on the CPU once per transform change rather than
+        per vertex. The matrix is only rebuilt when the transform is dirty, and the upload is
+        skipped when the program's `m_model` uniform already holds this version of the matrix,
+        which happens when no other object wrote to the same program since the last upload.
+        Both cases are reported to the application's RenderStats as 'matrices_rebuilt'
+        and 'uploads_skipped', and actual uploads as 'uniform_writes'.
+        """
+
+        transform = self.transform
+        if transform.dirty:
+            transform.rebuild()
+            self.app.stats.add('matrices_rebuilt')
+
+        owner = (transform, transform.version)
+        if getattr(self.program, 'm_model_owner', None) == owner:
+            self.app.stats.add('uploads_skipped')
+            return
+        self.program['m_model'].write(transform.m_model)
+        self.program['m_normal'].write(transform.m_normal)
+        self.program.m_model_owner = owner
+        self.app.stats.add('uniform_writes')
+
+    def get_world_aabb(self):
+        """
+        Returns the world-space bounding box of the model, i.e. the box enclosing the mesh
+        bounding box after the model transformation. It is cached until the transform changes.
+        Returns:
+            AABB: The world-space bounding box.
+        """
+
+        if self.world_aabb_version != self.transform.version:
+            self.world_aabb = self.aabb.transformed(self.m_model)
+            self.world_aabb_version = self.transform.version
+        return self.world_aabb
+
+    def get_instance_transforms(self):
+        """
+        Returns the model matrix and normal matrix of the model, rebuilt first if the transform
+        is dirty, in the column-major layout of the TransformStore.
+        Returns:
+            tuple: The (1, 4, 4) model matrix and (1, 3, 3) normal matrix arrays.
+        """
+
+        transform = self.transform
+        if transform.dirty:
+            transform.rebuild()
+        store, index = transform.store, transform.index
+        return store.matrices[index:index + 1], store.normals[index:index + 1]
+
+    def set_lod(self, level):
+        """
+        Switches the model to a level of detail of its mesh. The bounding box stays the one of
+        the full mesh, which encloses the simplified ones.
+        Args:
+            level (int): The level of detail, 0 for the full mesh.
+        """
 
-        m_model = glm.translate(m_model, self.pos)
+        self.lod = level
+        vao = self.app.mesh.vao
+        self.vao = vao.vaos[vao.get_lod_name(self.vao_name, level)]
+        self.depth_vao = None
 
-        m_model = glm.rotate(m_model, self.rotation.x, glm.vec3(1, 0, 0))
-        m_model = glm.rotate(m_model, self.rotation.y, glm.vec3(0, 1, 0))
-        m_model = glm.rotate(m_model, self.rotation.z, glm.vec3(0, 0, 1))
+    def on_assets_loaded(self):
+        """
+        Picks up the current VAO, at the model's level of detail, bounding box and texture of
+        the model from the application's mesh. While an AssetLoader is loading them, the mesh
+        hands out placeholders; the scene calls this method after each swap, and the cached
+        world-space box is dropped since the bounding box of the mesh may have changed.
+        """
 
-        m_model = glm.scale(m_model, self.scale)
-        return m_model
+        mesh = self.app.mesh
+        self.vao = mesh.vao.vaos[mesh.vao.get_lod_name(self.vao_name, self.lod)]
+        self.program = self.vao.program
+        self.depth_vao = None
+        self.aabb = mesh.vao.get_vbo(self.vao_name).aabb
+        self.world_aabb_version = None
+        self.texture = mesh.texture.textures[self.texture_id]
+
+    def get_depth_vao(self):
+        """
+        Returns the position-only VAO drawing the same mesh, at the same level of detail, as the
+        model's VAO, created on first use.
+        """
+
+        if self.depth_vao is None:
+            vao = self.app.mesh.vao
+            self.depth_vao = vao.get_depth_vao(vao.get_lod_name(self.vao_name, self.lod))
+        return self.depth_vao
+
+    def draw(self):
+        """
+        Issues the draw call of the model with the state bound by the caller.
+        """
+
+        self.vao.render()
+
+    def draw_depth(self):
+        """
+        Draws the model with the position-only program of the depth pre-pass, which is shared
+        by all models, so the model matrix is written before every draw.
+        """
+
+        vao = self.get_depth_vao()
+        vao.program['m_model'].write(self.transform.m_model)
+        self.app.stats.add('uniform_writes')
+        vao.render()
 
     def render(self):
         """
-        Renders the model by updating its state and invoking the render method
-        of the Vertex Array Object (VAO).
-        This method first calls the `update` method to ensure the model's state
-        is current, and then it calls the `render` method of the VAO to draw
-        the model.
+        Renders the model on its own by binding its texture, updating its state and
+        drawing it.
+        This method first binds the model's texture to unit 0, then calls the `update`
+        method to ensure the model's uniforms are current, and then it calls the `draw`
+        method to issue the draw call. Scenes render through a RenderQueue instead, which
+        skips the texture binds that would not change any state.
         """
 
+        self.texture.use()
         self.update()
-        self.vao.render()
+        self.draw()
 
 
 class Cube(BaseModel):
@@ -89,62 +271,49 @@ class Cube(BaseModel):
         texture (Texture): The texture object associated with the cube.
         program (Program): The shader program used for rendering the cube.
     Methods:
-        __init__(app, vao_name='cube', texture_id=0, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+        __init__(app, vao_name='cube', texture_id=0, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1),
+                 static=False):
             Initializes the Cube instance with the given parameters and calls the on_init method.
         on_init():
             Initializes the cube's texture and shader program uniforms.
         update():
-            Updates the cube's texture and shader program uniforms based on the current camera position and view.
+            Updates the cube's model matrix uniform.
     """
 
-    def __init__(self, app, vao_name='cube', texture_id=0, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
-        super().__init__(app, vao_name, texture_id, pos, rotation, scale)
+    def __init__(self, app, vao_name='cube', texture_id=0, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1),
+                 static=False):
+        super().__init__(app, vao_name, texture_id, pos, rotation, scale, static)
         self.on_init()
 
     def on_init(self):
         """
         Initializes the model by setting up the texture, shader program, and 
-        various transformation and lighting matrices.
+        model matrix.
         This method performs the following actions:
         - Retrieves the texture associated with the model and binds it to the shader program.
-        - Sets the projection, view, and model matrices in the shader program.
-        - Sets the light properties (position, ambient, diffuse, and specular intensities) in the shader program.
+        - Sets the model matrix in the shader program.
+        The projection and view matrices and the light properties are not written here:
+        they live in the per-frame `Frame` uniform block filled by FrameUBO.
         Attributes:
         - self.texture: The texture object associated with the model.
         - self.program: The shader program used for rendering.
-        - self.camera: The camera object providing projection and view matrices.
         - self.m_model: The model matrix for the object.
-        - self.app.light: The light object providing lighting properties.
         """
 
         self.texture = self.app.mesh.texture.textures[self.texture_id]
         self.program['u_texture_0'] = 0
         self.texture.use()
 
-        self.program['m_proj'].write(self.camera.m_proj)
-        self.program['m_view'].write(self.camera.m_view)
-        self.program['m_model'].write(self.m_model)
-
-        self.program['light.position'].write(self.app.light.position)
-        self.program['light.Ia'].write(self.app.light.Ia)
-        self.program['light.Id'].write(self.app.light.Id)
-        self.program['light.Is'].write(self.app.light.Is)
+        self.write_model_matrix()
 
     def update(self):
         """
-        Updates the model's state by applying the current texture and writing
-        the camera position, view matrix, and model matrix to the shader program.
-        This method performs the following steps:
-        1. Uses the current texture.
-        2. Writes the camera's position to the shader program.
-        3. Writes the camera's view matrix to the shader program.
-        4. Writes the model's transformation matrix to the shader program.
+        Updates the model's state by writing the model matrix to the shader program,
+        if it changed. The texture is bound by the caller (render() or the RenderQueue),
+        and the camera position and view matrix come from the per-frame `Frame` uniform block.
         """
 
-        self.texture.use()
-        self.program['camPos'].write(self.camera.position)
-        self.program['m_view'].write(self.camera.m_view)
-        self.program['m_model'].write(self.m_model)
+        self.write_model_matrix()
 
 
 class Cat(BaseModel):
@@ -160,54 +329,313 @@ class Cat(BaseModel):
         texture (Texture): The texture object associated with the cat model.
         program (Program): The shader program used for rendering the cat model.
     Methods:
-        __init__(app, vao_name='cat', texture_id='cat', pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+        __init__(app, vao_name='cat', texture_id='cat', pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1),
+                 static=False):
             Initializes the Cat model with the given parameters and calls the on_init method.
         on_init():
             Initializes the texture and shader program uniforms for the cat model.
         update():
-            Updates the texture and shader program uniforms for the cat model.
+            Updates the model matrix uniform of the cat model.
     """
 
-    def __init__(self, app, vao_name='cat', texture_id='cat', pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
-        super().__init__(app, vao_name, texture_id, pos, rotation, scale)
+    def __init__(self, app, vao_name='cat', texture_id='cat', pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1),
+                 static=False):
+        super().__init__(app, vao_name, texture_id, pos, rotation, scale, static)
         self.on_init()
 
     def on_init(self):
         """
-        Initializes the model by setting up the texture, shader program, and lighting.
+        Initializes the model by setting up the texture and shader program.
         This method performs the following tasks:
         - Retrieves the texture from the application's mesh texture list using the texture ID.
         - Sets the texture unit for the shader program.
         - Uses the texture.
-        - Writes the projection, view, and model matrices to the shader program.
-        - Writes the light's position and intensity (ambient, diffuse, and specular) to the shader program.
+        - Writes the model matrix to the shader program.
+        The camera and light uniforms live in the per-frame `Frame` uniform block.
         """
 
         self.texture = self.app.mesh.texture.textures[self.texture_id]
         self.program['u_texture_0'] = 0
         self.texture.use()
 
-        self.program['m_proj'].write(self.camera.m_proj)
-        self.program['m_view'].write(self.camera.m_view)
-        self.program['m_model'].write(self.m_model)
-
-        self.program['light.position'].write(self.app.light.position)
-        self.program['light.Ia'].write(self.app.light.Ia)
-        self.program['light.Id'].write(self.app.light.Id)
-        self.program['light.Is'].write(self.app.light.Is)
+        self.write_model_matrix()
 
     def update(self):
         """
-        Updates the model's state by applying the current texture and writing
-        the camera position, view matrix, and model matrix to the shader program.
-        This method performs the following steps:
-        1. Activates the texture associated with the model.
-        2. Writes the camera's position to the shader program.
-        3. Writes the camera's view matrix to the shader program.
-        4. Writes the model's transformation matrix to the shader program.
+        Updates the model's state by writing the model matrix to the shader program,
+        if it changed. The texture is bound by the caller (render() or the RenderQueue).
+        """
+
+        self.write_model_matrix()
+
+
+class InstancedCube(BaseModel):
+    """
+    A class representing a group of cubes that share one mesh and are drawn with a single
+    instanced draw call. The instances share one texture, or, when per-instance texture IDs
+    are given, each samples its own layer of a texture array packing those textures.
+    Attributes:
+        app (App): The application instance.
+        vao_name (str): The name of the mesh VBO drawn for every instance.
+        texture_id (int): The ID of the texture shared by all instances.
+        texture_ids (tuple): The texture ID of each instance, or None when they share texture_id.
+        layer_ids (list): The texture IDs packed in the texture array, in layer order, or None.
+        layers (np.ndarray): The texture array layer of each instance, or None.
+        layer_vbo (LayerVBO): The buffer holding the texture array layer of each instance, or None.
+        animation (callable): The function moving the instances on the scene's UpdateStage, or
+                              None. It is called as animation(instances, start, stop, time) on
+                              worker threads and edits the rows start:stop of the store arrays.
+                              It must keep the scales uniform if they were at construction.
+        instances (TransformStore): The transforms of the instances. `instances[i]` is a Transform
+                          view over one instance; assigning it a new position, rotation or
+                          scale re-uploads its matrix on the next frame. Many instances can be
+                          moved at once by editing the store arrays and calling mark_dirty().
+                          Any change invalidates the group transform, whose version tracks
+                          the group bounds. The number of instances is fixed at construction.
+        matrices (np.ndarray): The (N, 4, 4) column-major instance matrices of the store.
+        normals (np.ndarray): The (N, 3, 3) column-major instance normal matrices of the store.
+        instance_vbo (InstanceVBO): The buffer holding one model matrix per instance.
+        normal_vbo (NormalVBO): The buffer holding one normal matrix per instance, or None while
+                                every instance is scaled uniformly and the uniform-scale variant
+                                of the instanced program is drawn.
+        vao (VertexArray): The instanced VAO drawing the mesh once per instance.
+        texture (Texture): The texture object, or texture array, shared by all instances.
+        program (Program): The instanced shader program.
+    Methods:
+        __init__(app, vao_name='cube', texture_id=0, positions=(), rotations=None, scales=None,
+                 texture_ids=None, animation=None, static=False):
+            Initializes the instance buffers and the instanced VAO, then calls the on_init method.
+        get_texture():
+            Returns the texture, or texture array, bound for the instances.
+        rebuild_instance_matrices():
+            Rebuilds the matrices of the instances that changed.
+        enable_normal_matrices():
+            Switches to per-instance normal matrices once an instance is scaled non-uniformly.
+        update_instance_matrices():
+            Rebuilds and uploads the matrices of the instances that changed.
+        get_world_aabb():
+            Returns the world-space bounding box enclosing all instances.
+        get_instance_transforms():
+            Returns the model and normal matrices of all instances.
+        on_assets_loaded():
+            Rebuilds the instanced VAO when its mesh was loaded and picks up the loaded texture.
+        on_init():
+            Initializes the texture and shader program uniforms.
+        update():
+            Uploads the changed instance matrices.
+        get_depth_vao():
+            Returns the instanced position-only VAO of the depth pre-pass.
+        draw():
+            Draws all instances in one call.
+        draw_depth():
+            Draws all instances into the depth buffer only, in one call.
+    """
+
+    indirect = False
+
+    def __init__(self, app, vao_name='cube', texture_id=0, positions=(), rotations=None, scales=None,
+                 texture_ids=None, animation=None, static=False):
+        super().__init__(app, vao_name, texture_id, static=static)
+        self.instances = TransformStore(capacity=max(len(positions), 1))
+        self.instances.extend(positions, None if rotations is None else np.radians(rotations), scales)
+        self.instances.update()
+        self.instances.on_change = self.on_instance_change
+        self.pending_upload = None
+
+        self.instance_vbo = InstanceVBO(app.ctx, self.matrices)
+        self.normal_vbo = None
+        if not TransformStore.is_uniform_scale(self.instances.scales[:self.instances.count]):
+            self.normal_vbo = NormalVBO(app.ctx, self.normals)
+        self.texture_ids = self.layer_ids = self.layers = self.layer_vbo = None
+        if texture_ids is not None:
+            self.texture_ids = tuple(texture_ids)
+            self.layer_ids = sorted(set(self.texture_ids))
+            self.layers = np.array([self.layer_ids.index(i) for i in self.texture_ids], dtype='f4')
+            self.layer_vbo = LayerVBO(app.ctx, self.layers)
+        self.animation = animation
+        self.vao = app.mesh.vao.get_instanced_vao(vao_name, self.instance_vbo, self.layer_vbo, self.normal_vbo)
+        self.program = self.vao.program
+        self.on_init()
+
+    @property
+    def matrices(self):
+        return self.instances.matrices[:self.instances.count]
+
+    @property
+    def normals(self):
+        return self.instances.normals[:self.instances.count]
+
+    @property
+    def triangle_count(self):
+        return self.vao.vertices // 3 * self.instance_vbo.count
+
+    @property
+    def lod_levels(self):
+        # the instances share the full mesh of the group
+        return 1
+
+    def on_instance_change(self, index):
+        self.transform.invalidate()
+
+    def rebuild_instance_matrices(self):
+        """
+        Rebuilds the matrices of the instances whose transform changed, in one vectorized
+        pass of the store, and records the range of the instance buffer that has to be uploaded.
+        """
+
+        dirty = np.flatnonzero(self.instances.dirty[:self.instances.count])
+        if len(dirty) == 0:
+            return
+
+        self.app.stats.add('matrices_rebuilt', self.instances.update())
+        if self.normal_vbo is None and not TransformStore.is_uniform_scale(self.instances.scales[dirty]):
+            self.enable_normal_matrices()
+        first, last = int(dirty[0]), int(dirty[-1]) + 1
+        if self.pending_upload is not None:
+            first, last = min(first, self.pending_upload[0]), max(last, self.pending_upload[1])
+        self.pending_upload = (first, last)
+
+    def enable_normal_matrices(self):
+        """
+        Uploads the normal matrix of every instance and rebuilds the VAO with the instanced
+        program reading them, after an instance was given a non-uniform scale.
+        """
+
+        self.normal_vbo = NormalVBO(self.app.ctx, self.normals)
+        self.vao.release()
+        self.vao = self.app.mesh.vao.get_instanced_vao(self.vao_name, self.instance_vbo, self.layer_vbo,
+                                                       self.normal_vbo)
+        self.program = self.vao.program
+        self.program['u_texture_0'] = 0
+
+    def update_instance_matrices(self):
+        """
+        Rebuilds the matrices of the instances whose transform changed since the last frame and
+        uploads the range of the instance buffer, and normal buffer, covering them. When no instance
+        changed, neither the matrices nor the buffer are touched.
+        The work is reported to the application's RenderStats as 'matrices_rebuilt'
+        and 'uploads_skipped'.
+        """
+
+        self.rebuild_instance_matrices()
+        if self.pending_upload is None:
+            self.app.stats.add('uploads_skipped')
+            return
+
+        self.instance_vbo.write_range(self.matrices, *self.pending_upload)
+        if self.normal_vbo is not None:
+            self.normal_vbo.write_range(self.normals, *self.pending_upload)
+        self.pending_upload = None
+
+    def get_world_aabb(self):
+        """
+        Returns the world-space box enclosing the mesh bounding box of every instance,
+        computed in one vectorized pass over the instance matrices. It is cached until
+        one of the instances changes.
+        Returns:
+            AABB: The world-space bounding box of the group.
+        """
+
+        if self.world_aabb_version != self.transform.version:
+            self.rebuild_instance_matrices()
+            # rows of the column-major matrices are the columns of the model matrices
+            linear, translation = self.matrices[:, :3, :3], self.matrices[:, 3, :3]
+            center = np.array(self.aabb.center(), dtype='f4')
+            extents = np.array(self.aabb.extents(), dtype='f4')
+            centers = center @ linear + translation
+            half_sizes = extents @ np.abs(linear)
+            self.world_aabb = AABB((centers - half_sizes).min(axis=0).tolist(),
+                                   (centers + half_sizes).max(axis=0).tolist())
+            self.world_aabb_version = self.transform.version
+        return self.world_aabb
+
+    def get_instance_transforms(self):
+        """
+        Returns the model and normal matrices of all instances, rebuilding the ones that
+        changed first.
+        Returns:
+            tuple: The (N, 4, 4) model matrices and (N, 3, 3) normal matrices.
         """
 
+        self.rebuild_instance_matrices()
+        return self.matrices, self.normals
+
+    def on_assets_loaded(self):
+        """
+        Picks up the loaded texture, and rebuilds the instanced VAO when the mesh VBO it was
+        built from was a placeholder that has since been replaced.
+        """
+
+        mesh = self.app.mesh
+        vbo = mesh.vao.get_vbo(self.vao_name)
+        if vbo.aabb is not self.aabb:
+            self.vao.release()
+            self.vao = mesh.vao.get_instanced_vao(self.vao_name, self.instance_vbo, self.layer_vbo,
+                                                  self.normal_vbo)
+            self.program = self.vao.program
+            if self.depth_vao is not None:
+                self.depth_vao.release()
+                self.depth_vao = None
+            self.aabb = vbo.aabb
+            self.world_aabb_version = None
+        self.texture = self.get_texture()
+
+    def get_texture(self):
+        """
+        Returns the texture bound for the instances: the texture array packing the textures
+        of the instances when they have their own texture IDs, the shared texture otherwise.
+        Returns:
+            The texture or texture array object.
+        """
+
+        texture = self.app.mesh.texture
+        if self.layer_ids is None:
+            return texture.textures[self.texture_id]
+        return texture.get_texture_array(self.layer_ids)
+
+    def on_init(self):
+        """
+        Initializes the model by setting up the texture and the shader program.
+        The model matrices live in the instance buffer and the camera and light
+        uniforms in the per-frame `Frame` uniform block.
+        """
+
+        self.texture = self.get_texture()
+        self.program['u_texture_0'] = 0
         self.texture.use()
-        self.program['camPos'].write(self.camera.position)
-        self.program['m_view'].write(self.camera.m_view)
-        self.program['m_model'].write(self.m_model)
+
+    def update(self):
+        """
+        Uploads the instance matrices that changed. No uniform is written per object:
+        the camera state comes from the per-frame `Frame` uniform block.
+        """
+
+        self.update_instance_matrices()
+
+    def get_depth_vao(self):
+        """
+        Returns the instanced VAO drawing the mesh of the group with the position-only
+        'depth_instanced' program, from the same instance buffer, created on first use.
+        """
+
+        if self.depth_vao is None:
+            self.depth_vao = self.app.mesh.vao.get_instanced_vao(self.vao_name, self.instance_vbo, depth=True)
+        return self.depth_vao
+
+    def draw(self):
+        """
+        Draws all instances with a single instanced draw call.
+        """
+
+        self.vao.render(instances=self.instance_vbo.count)
+
+    def draw_depth(self):
+        """
+        Draws all instances with a single instanced draw call of the depth pre-pass. The
+        instance matrices that changed are uploaded first, so that the color pass, whose
+        update() then finds nothing to upload, draws the same positions.
+        """
+
+        if self.pending_upload is not None or self.instances.dirty[:self.instances.count].any():
+            self.update_instance_matrices()
+        self.get_depth_vao().render(instances=self.instance_vbo.count)
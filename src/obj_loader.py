@@ -0,0 +1,393 @@
+from pathlib import Path
+import numpy as np
+
+
+KEYWORDS = (b'v', b'vt', b'vn', b'f', b'usemtl', b'mtllib')
+V, VT, VN, F, USEMTL, MTLLIB = range(1, len(KEYWORDS) + 1)
+
+TEXTURE_OPTIONS = {'-blendu': 1, '-blendv': 1, '-bm': 1, '-boost': 1, '-cc': 1, '-clamp': 1,
+                   '-imfchan': 1, '-mm': 2, '-o': 3, '-s': 3, '-t': 3, '-texres': 1}
+
+
+class ObjTokens:
+    """
+    A class used to split the bytes of an OBJ file into whitespace separated tokens with
+    NumPy, without creating a Python object per line or per value.
+    Attributes
+    ----------
+    buffer : np.ndarray
+        The uint8 bytes of the file, ending with a newline. Bytes up to 32 are whitespace.
+    starts : np.ndarray
+        The offset of the first byte of each token.
+    ends : np.ndarray
+        The offset of the first byte after each token.
+    line : np.ndarray
+        The line index of each token.
+    rank : np.ndarray
+        The position of each token in its line, 0 being the keyword.
+    line_ends : np.ndarray
+        The offset of the newline ending each line.
+    line_types : np.ndarray
+        The keyword code of each line (V, VT, VN, F, USEMTL, MTLLIB), 0 for other lines.
+    line_sizes : np.ndarray
+        The number of tokens of each line, keyword included.
+    byte_types : np.ndarray
+        The keyword code of the line of each byte, 0 for the bytes of the keywords.
+    Methods
+    -------
+    get_token(index):
+        Returns a token as a string.
+    get_rest_of_line(line):
+        Returns the text of a line after its keyword.
+    get_text(select):
+        Returns the selected tokens joined by whitespace, ready for np.fromstring.
+    get_line_text(line_type):
+        Returns the lines of a type without their keyword, ready for np.fromstring.
+    get_values(line_type, count, dtype):
+        Returns the first values of all the lines of a type as a 2D array.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = np.append(buffer, np.uint8(10))
+        solid = self.buffer > 32
+        changes = np.flatnonzero(solid[1:] != solid[:-1]) + 1
+        if solid[0]:
+            changes = np.concatenate([[0], changes])
+        self.starts, self.ends = changes[0::2], changes[1::2]
+
+        self.line_ends = np.flatnonzero(self.buffer == 10)
+        bounds = np.searchsorted(self.starts, self.line_ends)
+        line_firsts = np.concatenate([[0], bounds[:-1]])
+        self.line_sizes = bounds - line_firsts
+        self.line = np.repeat(np.arange(len(self.line_ends)), self.line_sizes)
+        self.rank = np.arange(len(self.starts)) - np.repeat(line_firsts, self.line_sizes)
+        first = line_firsts[self.line_sizes > 0]
+
+        width = max(len(keyword) for keyword in KEYWORDS)
+        lengths = self.ends[first] - self.starts[first]
+        offsets = np.arange(width)
+        chars = self.buffer[np.minimum(self.starts[first, None] + offsets, len(self.buffer) - 1)]
+        chars[offsets >= lengths[:, None]] = 0
+        words = np.ascontiguousarray(chars).view(f'S{width}').ravel()
+        self.line_types = np.zeros(len(self.line_ends), dtype='i1')
+        for code, keyword in enumerate(KEYWORDS, 1):
+            self.line_types[self.line[first[words == keyword]]] = code
+
+        self.byte_types = np.repeat(self.line_types, np.diff(self.line_ends, prepend=-1))
+        for offset in range(width):
+            self.byte_types[self.starts[first[lengths > offset]] + offset] = 0
+
+    def get_token(self, index):
+        """
+        Returns a token as a string.
+        Args:
+            index (int): The index of the token.
+        Returns:
+            str: The decoded token.
+        """
+
+        return self.buffer[self.starts[index]:self.ends[index]].tobytes().decode()
+
+    def get_rest_of_line(self, line):
+        """
+        Returns the text of a line after its keyword, e.g. the material name of a usemtl line.
+        Args:
+            line (int): The index of the line.
+        Returns:
+            str: The stripped text following the keyword.
+        """
+
+        keyword = np.searchsorted(self.line, line)
+        text = self.buffer[self.ends[keyword]:self.line_ends[line]].tobytes()
+        return text.decode().strip()
+
+    def get_text(self, select):
+        """
+        Returns the selected tokens joined by whitespace.
+        The bytes of each selected token and the whitespace byte following it are kept
+        with a single boolean mask over the buffer, so the original line breaks are preserved.
+        Args:
+            select (np.ndarray): The boolean mask of the tokens to keep.
+        Returns:
+            np.ndarray: The uint8 bytes of the selected tokens.
+        """
+
+        marks = np.zeros(len(self.buffer) + 1, dtype='i1')
+        marks[self.starts[select]] = 1
+        marks[self.ends[select]] = -1
+        keep = np.cumsum(marks[:-1], dtype='i1').view(bool)
+        keep[self.ends[select]] = True
+        return self.buffer[keep]
+
+    def get_line_text(self, line_type):
+        """
+        Returns the lines of a type without their keyword.
+        This is the fast path of get_text, for when every token of the lines is wanted.
+        Args:
+            line_type (int): The keyword code of the lines.
+        Returns:
+            np.ndarray: The uint8 bytes of the lines.
+        """
+
+        return self.buffer[self.byte_types == line_type]
+
+    def get_values(self, line_type, count, dtype='f8'):
+        """
+        Returns the first values of all the lines of a type, the keyword excluded.
+        Args:
+            line_type (int): The keyword code of the lines.
+            count (int): The number of values read from each line.
+            dtype (str): The NumPy type the values are parsed as.
+        Returns:
+            np.ndarray: An (N, count) array of values.
+        Raises:
+            ValueError: If a line has fewer than `count` values or a value does not parse.
+        """
+
+        sizes = self.line_sizes[self.line_types == line_type]
+        if np.all(sizes == count + 1):
+            text = self.get_line_text(line_type)
+        else:
+            text = self.get_text((self.line_types[self.line] == line_type) & (self.rank >= 1) & (self.rank <= count))
+        lines = len(sizes)
+        values = np.fromstring(text.tobytes(), dtype=dtype, sep=' ')
+        if len(values) != lines * count:
+            raise ValueError(f'Expected {count} values on each of the {lines} '
+                             f'"{KEYWORDS[line_type - 1].decode()}" lines')
+        return values.reshape(lines, count)
+
+
+class ObjMaterial:
+    """
+    A class used to represent the triangles of an OBJ file that use the same material.
+    Attributes
+    ----------
+    name : str
+        The name of the material.
+    texture : str
+        The path of the diffuse texture (map_Kd), relative to the working directory, or None.
+    vertex_format : str
+        The interleaved layout of the vertices, e.g. 'T2F_N3F_V3F'.
+    vertices : np.ndarray
+        The flat float32 vertex data, three vertices per triangle.
+    """
+
+    def __init__(self, name, texture=None):
+        self.name = name
+        self.texture = texture
+        self.vertex_format = ''
+        self.vertices = np.empty(0, dtype='f4')
+
+
+class ObjLoader:
+    """
+    A class used to load Wavefront OBJ and MTL files with bulk NumPy parsing.
+    The file is tokenized once (see ObjTokens), the v/vt/vn records are parsed with a single
+    np.fromstring call per record type, and the f records are triangulated and grouped by
+    material with array operations. The output matches pywavefront's: polygons are split
+    into (v1, v2, v3), (v4, v1, v3), (v5, v1, v4)... and each material holds its
+    triangles in file order as interleaved T2F/C3F/N3F/V3F float32 data.
+    Attributes
+    ----------
+    path : Path
+        The path of the OBJ file.
+    materials : dict
+        The materials by name, in the order pywavefront creates them: the materials of the
+        MTL libraries first, then a default material for faces preceding any usemtl.
+    mtllibs : list
+        The names of the MTL libraries referenced by the OBJ file.
+    positions : np.ndarray
+        The (N, 3) float32 vertex positions.
+    colors : np.ndarray
+        The (N, 3) float32 vertex colors, or None when the vertices have no color.
+    tex_coords : np.ndarray
+        The (N, 2) float32 texture coordinates.
+    normals : np.ndarray
+        The (N, 3) float32 normals.
+    Methods
+    -------
+    load():
+        Parses the OBJ file and its MTL libraries into the materials.
+    load_materials(path):
+        Parses an MTL file and adds its materials.
+    get_texture_name(value):
+        Returns the file name of a texture statement, without its options.
+    get_material_ids(tokens, face_lines):
+        Returns the index of the material of each face in `materials`.
+    get_triangles(corners):
+        Returns the corner indices of the triangles of the polygons.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.materials = {}
+        self.mtllibs = []
+        self.positions = None
+        self.colors = None
+        self.tex_coords = None
+        self.normals = None
+        self.load()
+
+    def load(self):
+        """
+        Parses the OBJ file and its MTL libraries.
+        The vertex attributes are parsed as float64 and then rounded to float32, exactly like
+        converting pywavefront's Python floats. Negative (relative) indices are resolved
+        against the number of records preceding each face.
+        Raises:
+            ValueError: If the faces mix index formats or reference an unknown material.
+        """
+
+        tokens = ObjTokens(np.fromfile(self.path, dtype='u1'))
+        types = tokens.line_types
+
+        for line in np.flatnonzero(types == MTLLIB):
+            name = tokens.get_rest_of_line(line)
+            self.load_materials(self.path.parent / name)
+            self.mtllibs.append(name)
+
+        v_sizes = tokens.line_sizes[types == V]
+        has_colors = len(v_sizes) > 0 and bool(np.all(v_sizes == 7))
+        positions = tokens.get_values(V, 6 if has_colors else 3)
+        self.positions = positions[:, :3].astype('f4')
+        self.colors = positions[:, 3:].astype('f4') if has_colors else None
+        self.tex_coords = tokens.get_values(VT, 2).astype('f4')
+        self.normals = tokens.get_values(VN, 3).astype('f4')
+
+        face_lines = np.flatnonzero(types == F)
+        if not np.any(tokens.line_sizes[face_lines] > 1):
+            return
+        first_corner = tokens.get_token(np.argmax((types[tokens.line] == F) & (tokens.rank >= 1)))
+        parts = first_corner.split('/')
+        has_vt = len(parts) == 2 or (len(parts) == 3 and parts[1] != '')
+        has_vn = len(parts) == 3
+        fields = [V] + [VT] * has_vt + [VN] * has_vn
+
+        corners = tokens.line_sizes[face_lines] - 1
+        text = tokens.get_line_text(F)
+        text[text == ord('/')] = 32
+        indices = np.fromstring(text.tobytes(), dtype='i8', sep=' ')
+        if len(indices) != corners.sum() * len(fields):
+            raise ValueError(f'All the faces must use the "{first_corner}" index format')
+        indices = indices.reshape(-1, len(fields))
+        indices -= 1
+        for field, line_type in enumerate(fields):
+            relative = np.flatnonzero(indices[:, field] < 0)
+            if len(relative):
+                preceding = np.repeat(np.cumsum(types == line_type)[face_lines], corners)
+                indices[relative, field] += preceding[relative] + 1
+
+        columns = [(self.positions, 0)]
+        if has_vn:
+            columns.insert(0, (self.normals, len(fields) - 1))
+        if has_colors:
+            columns.insert(0, (self.colors, 0))
+        if has_vt:
+            columns.insert(0, (self.tex_coords, 1))
+        vertex_format = '_'.join(name for name, enabled in (
+            ('T2F', has_vt), ('C3F', has_colors), ('N3F', has_vn), ('V3F', True)) if enabled)
+
+        triangles = self.get_triangles(corners)
+        material_ids = np.repeat(self.get_material_ids(tokens, face_lines), np.maximum(corners - 2, 0))
+        for material_id, material in enumerate(self.materials.values()):
+            selected = indices[triangles[material_ids == material_id].ravel()]
+            if not len(selected):
+                continue
+            vertices = np.empty((len(selected), sum(array.shape[1] for array, _ in columns)), dtype='f4')
+            offset = 0
+            for array, field in columns:
+                vertices[:, offset:offset + array.shape[1]] = array[selected[:, field]]
+                offset += array.shape[1]
+            material.vertex_format = vertex_format
+            material.vertices = vertices.ravel()
+
+    def load_materials(self, path):
+        """
+        Parses an MTL file and adds its materials, keeping their name and diffuse texture.
+        Args:
+            path (Path): The path of the MTL file.
+        """
+
+        material = None
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                values = line.split()
+                if not values:
+                    continue
+                if values[0] == 'newmtl':
+                    material = ObjMaterial(values[1])
+                    self.materials[material.name] = material
+                elif values[0] == 'map_Kd' and material is not None:
+                    value = line[line.find(' ') + 1:].strip()
+                    material.texture = str(Path(path.parent, self.get_texture_name(value)))
+
+    @staticmethod
+    def get_texture_name(value):
+        """
+        Returns the file name of a texture statement, skipping options such as '-bm 0.5'.
+        Args:
+            value (str): The text following the texture keyword.
+        Returns:
+            str: The file name of the texture.
+        """
+
+        values = value.split()
+        while values and values[0] in TEXTURE_OPTIONS:
+            count = TEXTURE_OPTIONS[values.pop(0)]
+            for _ in range(count):
+                if not values:
+                    break
+                if count == 3 and not values[0].lstrip('-').replace('.', '', 1).isdigit():
+                    break
+                values.pop(0)
+        return ' '.join(values) or 'default'
+
+    def get_material_ids(self, tokens, face_lines):
+        """
+        Returns the material of each face: the one named by the last usemtl line preceding it,
+        or a default material created like pywavefront does when no usemtl precedes it.
+        Args:
+            tokens (ObjTokens): The tokens of the OBJ file.
+            face_lines (np.ndarray): The line index of each face.
+        Returns:
+            np.ndarray: The index of the material of each face in `materials`.
+        Raises:
+            ValueError: If a usemtl line references a material missing from the MTL libraries.
+        """
+
+        usemtl_lines = np.flatnonzero(tokens.line_types == USEMTL)
+        positions = np.searchsorted(usemtl_lines, face_lines) - 1
+        default_id = -1
+        if positions[0] < 0:
+            default_id = len(self.materials)
+            name = f'default{default_id}'
+            self.materials[name] = ObjMaterial(name)
+
+        names = list(self.materials)
+        ids = []
+        for line in usemtl_lines:
+            name = tokens.get_rest_of_line(line)
+            if name not in self.materials:
+                raise ValueError(f'Unknown material: {name}')
+            ids.append(names.index(name))
+        return np.array(ids + [default_id], dtype='i8')[positions]
+
+    @staticmethod
+    def get_triangles(corners):
+        """
+        Returns the corner indices of the triangles of the polygons.
+        A polygon with corners v1..vn is split into (v1, v2, v3) followed by (vj, v1, vj-1)
+        for j > 3, the order pywavefront emits its vertices in.
+        Args:
+            corners (np.ndarray): The number of corners of each polygon.
+        Returns:
+            np.ndarray: A (T, 3) array of indices into the concatenated polygon corners.
+        """
+
+        counts = np.maximum(corners - 2, 0)
+        first_corner = np.repeat(np.cumsum(corners) - corners, counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        first = local == 0
+        triangles = np.stack([np.where(first, 0, local + 2), np.where(first, 1, 0),
+                              np.where(first, 2, local + 1)], axis=1)
+        return triangles + first_corner[:, None]
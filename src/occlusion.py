@@ -0,0 +1,162 @@
+import glm
+import moderngl as mgl
+from .camera import NEAR
+
+
+class OcclusionCuller:
+    """
+    A hardware occlusion-culling stage for the objects of the render queue, with one frame of
+    latency, so the CPU never waits for the GPU within a frame.
+    Every object passing frustum culling gets a samples-passed query each frame, and the results
+    are read at the start of the next frame:
+    - The objects whose last query passed are drawn as usual by the render queue, with their
+      draw call inside their query, which tells whether they are still visible.
+    - The others are retested cheaply once the visible objects have laid down the depth
+      buffer: their world-space box is drawn inside their query with the position-only
+      'depth' program and the color and depth writes masked. The object itself is then drawn
+      with conditional rendering on that query, so the GPU skips it while the box is hidden
+      and draws it in the very frame it comes out, without popping in one frame late.
+    The depth the boxes are tested against is the one of the objects visible in the previous
+    frame, redrawn from the current camera. Boxes the camera is in, or too close to the near
+    plane to be tested reliably, count as visible. Objects drawn by the indirect renderer and
+    the update stage are not tested.
+    The objects not drawn unconditionally in a frame are reported to the application's
+    RenderStats as 'objects_occluded', and the boxes tested as 'occlusion_tests'.
+    Attributes:
+        app (GraphicsEngine): The application instance providing the context, camera and stats.
+        queries (dict): The query of each object tested so far.
+        hidden (set): The objects whose last query did not pass.
+        pending (list): The objects queried in the current frame, read at the next one.
+        occluded (list): The objects retested with their box in the current frame.
+        box_vao (moderngl.VertexArray): The position-only cube VAO drawing the boxes.
+        box_aabb (AABB): The model-space box of the cube mesh.
+    Methods:
+        get_query(obj):
+            Returns the query of an object.
+        read_results():
+            Reads the queries issued in the previous frame.
+        begin_frame(objects, visible):
+            Splits the visible objects into the ones drawn and the ones retested.
+        draw(obj):
+            Draws an object inside its query.
+        get_box_matrix(aabb):
+            Returns the model matrix drawing the cube mesh over a world-space box.
+        test():
+            Draws the boxes of the retested objects and their conditional draw calls.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.queries = {}
+        self.hidden = set()
+        self.pending = []
+        self.occluded = []
+        self.box_vao = app.mesh.vao.get_depth_vao('cube')
+        self.box_aabb = app.mesh.vao.get_vbo('cube').aabb
+
+    def get_query(self, obj):
+        """
+        Returns the samples-passed query of an object, created on its first test.
+        """
+
+        query = self.queries.get(obj)
+        if query is None:
+            query = self.queries[obj] = self.app.ctx.query(samples=True)
+        return query
+
+    def read_results(self):
+        """
+        Reads the queries issued in the previous frame, which the GPU has finished by now in
+        practice, and updates the set of hidden objects.
+        """
+
+        for obj in self.pending:
+            if self.queries[obj].samples:
+                self.hidden.discard(obj)
+            else:
+                self.hidden.add(obj)
+        self.pending = []
+
+    def begin_frame(self, objects, visible):
+        """
+        Reads the results of the previous frame and splits the objects passing frustum
+        culling into the ones drawn and the ones retested with their box.
+        Args:
+            objects (list): The objects of the render queue.
+            visible (set): The objects that passed frustum culling.
+        Returns:
+            set: The objects the render queue draws.
+        """
+
+        self.read_results()
+        position = self.app.camera.view_position
+        drawn = set()
+        self.occluded = []
+        for obj in objects:
+            if obj not in visible:
+                continue
+            if obj in self.hidden and obj.get_world_aabb().expanded(2 * NEAR).distance2(position) > 0:
+                self.occluded.append(obj)
+            else:
+                drawn.add(obj)
+        self.app.stats.add('objects_occluded', len(self.occluded))
+        return drawn
+
+    def draw(self, obj):
+        """
+        Draws an object inside its query; the render queue calls it in place of obj.draw().
+        """
+
+        with self.get_query(obj):
+            obj.draw()
+        self.pending.append(obj)
+
+    def get_box_matrix(self, aabb):
+        """
+        Returns the model matrix mapping the box of the cube mesh onto a world-space box.
+        Args:
+            aabb (AABB): The world-space box.
+        Returns:
+            glm.mat4: The model matrix.
+        """
+
+        scale = aabb.extents() / self.box_aabb.extents()
+        m_model = glm.translate(glm.mat4(), aabb.center())
+        m_model = glm.scale(m_model, scale)
+        return glm.translate(m_model, -self.box_aabb.center())
+
+    def test(self):
+        """
+        Draws the boxes of the objects retested in this frame inside their queries, without
+        writing color or depth and without culling faces, then issues the draw call of each
+        object conditioned on its query.
+        """
+
+        if not self.occluded:
+            return
+        ctx, fbo = self.app.ctx, self.app.ctx.fbo
+        program = self.box_vao.program
+        # the masks of a framebuffer are applied when it is bound
+        fbo.color_mask = False, False, False, False
+        fbo.depth_mask = False
+        fbo.use()
+        ctx.disable(mgl.CULL_FACE)
+        for obj in self.occluded:
+            program['m_model'].write(self.get_box_matrix(obj.get_world_aabb()))
+            with self.get_query(obj):
+                self.box_vao.render()
+        ctx.enable(mgl.CULL_FACE)
+        fbo.depth_mask = True
+        fbo.color_mask = True, True, True, True
+        fbo.use()
+
+        for obj in self.occluded:
+            obj.texture.use()
+            obj.update()
+            with self.queries[obj].crender:
+                obj.draw()
+        self.pending.extend(self.occluded)
+
+        stats = self.app.stats
+        stats.add('occlusion_tests', len(self.occluded))
+        stats.add('draw_calls', len(self.occluded))
@@ -0,0 +1,292 @@
+import csv
+import json
+import time
+from collections import deque
+
+
+class NullScope:
+    """
+    The scope returned while the profiler is disabled, entering and leaving it does nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SCOPE = NullScope()
+
+
+class CpuScope:
+    """
+    A named section of CPU time, measured with perf_counter_ns and recorded in the frame
+    being profiled with its nesting depth.
+    """
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        profiler = self.profiler
+        profiler.depth -= 1
+        profiler.scopes.append((self.name, self.start, end - self.start, profiler.depth))
+        return False
+
+
+class GpuScope:
+    """
+    A named section of GPU time, measured with a timer query around the draws it contains.
+    """
+
+    __slots__ = ('profiler', 'name', 'query')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.query = profiler.free_queries.pop() if profiler.free_queries else profiler.ctx.query(time=True)
+        self.query.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.query.__exit__(*exc_info)
+        self.profiler.queries.append((self.name, self.query))
+        return False
+
+
+class Profiler:
+    """
+    A frame profiler recording named CPU scopes, GPU timer queries and the rendering counters
+    of every frame in a rolling ring buffer.
+    Scopes are used as context managers and may be nested:
+
+        with app.profiler.scope('scene.render'):
+            ...
+
+    While the profiler is disabled, scope() and gpu_scope() return a shared object whose
+    enter and exit do nothing, so the instrumentation left in the engine costs one attribute
+    check per scope. GPU scopes are timed with GL_TIME_ELAPSED queries, which cannot be
+    nested, and their results are read one frame late so that the CPU does not wait for the
+    GPU to finish the frame.
+    Attributes:
+        ctx (moderngl.Context): The context creating the timer queries.
+        enabled (bool): Whether scopes are recorded.
+        frames (deque): The records of the last `capacity` frames, oldest first. A record is a
+                        dict with the frame 'index', its 'start' time and 'duration' in
+                        nanoseconds, its 'scopes' as (name, start, duration, depth) tuples in
+                        completion order, the 'totals' of the time accumulated per name with
+                        add_time(), the 'gpu' time per scope name in nanoseconds and the
+                        RenderStats 'counters' of the frame.
+        scopes (list): The CPU scopes completed in the current frame.
+        totals (dict): The time accumulated per name in the current frame.
+        queries (list): The (name, query) GPU scopes completed in the current frame.
+        pending_queries (list): The (record, name, query) GPU scopes of the previous frame,
+                                whose results are read at the end of the current frame.
+        free_queries (list): The timer queries whose results were read, ready to be reused.
+        depth (int): The nesting depth of the current CPU scope.
+    Methods:
+        scope(name):
+            Returns a context manager timing a CPU section.
+        gpu_scope(name):
+            Returns a context manager timing the GPU work of a render pass.
+        add_time(name, ns):
+            Accumulates time measured outside of a scope, e.g. over the objects of a loop.
+        begin_frame():
+            Starts recording a frame.
+        end_frame(counters=None):
+            Stores the record of the frame in the ring buffer.
+        dump(path):
+            Writes the recorded frames to a file, in the format given by its extension.
+        dump_json(path), dump_csv(path), dump_chrome_trace(path):
+            Writes the recorded frames to a file.
+    """
+
+    def __init__(self, ctx, capacity=600, enabled=False):
+        self.ctx = ctx
+        self.enabled = enabled
+        self.frames = deque(maxlen=capacity)
+        self.frame_index = 0
+        self.frame_start = 0
+        self.scopes = []
+        self.totals = {}
+        self.queries = []
+        self.free_queries = []
+        self.pending_queries = []
+        self.depth = 0
+
+    def scope(self, name):
+        """
+        Returns a context manager recording the CPU time spent in it under the given name.
+        Args:
+            name (str): The name of the section, e.g. 'scene.render'.
+        Returns:
+            The scope, or a no-op scope while the profiler is disabled.
+        """
+
+        if not self.enabled:
+            return NULL_SCOPE
+        return CpuScope(self, name)
+
+    def gpu_scope(self, name):
+        """
+        Returns a context manager recording the GPU time of the commands issued in it.
+        GPU scopes must not be nested.
+        Args:
+            name (str): The name of the render pass, e.g. 'scene'.
+        Returns:
+            The scope, or a no-op scope while the profiler is disabled.
+        """
+
+        if not self.enabled:
+            return NULL_SCOPE
+        return GpuScope(self, name)
+
+    def add_time(self, name, ns):
+        """
+        Adds time measured by the caller to the total of a name in the current frame, for
+        sections too small or too many to be scoped one by one.
+        Args:
+            name (str): The name of the total, e.g. 'objects.update'.
+            ns (int): The time to add, in nanoseconds.
+        """
+
+        self.totals[name] = self.totals.get(name, 0) + ns
+
+    def begin_frame(self):
+        """
+        Starts the record of a new frame.
+        """
+
+        if self.enabled:
+            self.frame_start = time.perf_counter_ns()
+
+    def end_frame(self, counters=None):
+        """
+        Ends the record of the current frame and appends it to the ring buffer. The GPU times of
+        the previous frame are read back here and added to its record.
+        Args:
+            counters (dict, optional): The rendering counters of the frame, e.g. the frame
+                                       returned by RenderStats.end_frame().
+        """
+
+        if not self.enabled and not self.pending_queries:
+            return
+
+        # the frame ends before waiting for the GPU results of the previous one
+        end = time.perf_counter_ns()
+        for record, name, query in self.pending_queries:
+            record['gpu'][name] = record['gpu'].get(name, 0) + query.elapsed
+            self.free_queries.append(query)
+        self.pending_queries = []
+        if not self.enabled:
+            return
+
+        record = {'index': self.frame_index, 'start': self.frame_start,
+                  'duration': end - self.frame_start,
+                  'scopes': self.scopes, 'totals': self.totals, 'gpu': {},
+                  'counters': dict(counters or {})}
+        self.frames.append(record)
+        self.pending_queries = [(record, name, query) for name, query in self.queries]
+        self.frame_index += 1
+        self.scopes, self.totals, self.queries = [], {}, []
+
+    def dump(self, path):
+        """
+        Writes the recorded frames to a file: a CSV table for a '.csv' file, a Chrome trace for
+        a '.trace.json' file and the raw frame records as JSON otherwise.
+        Args:
+            path (str): The path of the file.
+        """
+
+        if path.endswith('.csv'):
+            self.dump_csv(path)
+        elif path.endswith('.trace.json'):
+            self.dump_chrome_trace(path)
+        else:
+            self.dump_json(path)
+
+    def dump_json(self, path):
+        """
+        Writes the recorded frames to a JSON file, as a list of frame records.
+        Args:
+            path (str): The path of the file.
+        """
+
+        frames = [dict(record, scopes=[{'name': name, 'start': start, 'duration': duration, 'depth': depth}
+                                       for name, start, duration, depth in record['scopes']])
+                  for record in self.frames]
+        with open(path, 'w') as file:
+            json.dump(frames, file, indent=1)
+
+    def dump_csv(self, path):
+        """
+        Writes the recorded frames to a CSV file, one row per frame and one column per scope,
+        total, GPU scope and counter. The times are in milliseconds, and scopes entered
+        several times in a frame are summed.
+        Args:
+            path (str): The path of the file.
+        """
+
+        rows = []
+        for record in self.frames:
+            row = {'frame': record['index'], 'frame_ms': record['duration'] / 1e6}
+            for name, _, duration, _ in record['scopes']:
+                row[f'{name}_ms'] = row.get(f'{name}_ms', 0) + duration / 1e6
+            row.update({f'{name}_ms': ns / 1e6 for name, ns in record['totals'].items()})
+            row.update({f'gpu.{name}_ms': ns / 1e6 for name, ns in record['gpu'].items()})
+            row.update(record['counters'])
+            rows.append(row)
+
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def dump_chrome_trace(self, path):
+        """
+        Writes the recorded frames in the Chrome trace event format, viewable in
+        chrome://tracing or Perfetto. CPU scopes become complete events on the main thread,
+        GPU scopes are laid out one after another on a separate GPU track from the start of
+        their frame, and the totals and counters become counter tracks.
+        Args:
+            path (str): The path of the file.
+        """
+
+        events = []
+        for record in self.frames:
+            frame_start = record['start'] / 1000
+            events.append({'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1, 'ts': frame_start,
+                           'dur': record['duration'] / 1000, 'args': {'index': record['index']}})
+            for name, start, duration, _ in record['scopes']:
+                events.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                               'ts': start / 1000, 'dur': duration / 1000})
+            gpu_start = frame_start
+            for name, ns in record['gpu'].items():
+                events.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 2, 'ts': gpu_start, 'dur': ns / 1000})
+                gpu_start += ns / 1000
+            if record['totals']:
+                events.append({'name': 'totals (ms)', 'ph': 'C', 'pid': 1, 'ts': frame_start,
+                               'args': {name: ns / 1e6 for name, ns in record['totals'].items()}})
+            if record['counters']:
+                events.append({'name': 'counters', 'ph': 'C', 'pid': 1, 'ts': frame_start,
+                               'args': record['counters']})
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 1, 'args': {'name': 'CPU'}})
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 2, 'args': {'name': 'GPU'}})
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
@@ -0,0 +1,166 @@
+import time
+import glm
+
+
+class RenderQueue:
+    """
+    A render-queue stage between the Scene and its models.
+    The queue orders the objects by a sort key built from their render state
+    (program, VAO, texture) followed by their distance to the camera, so objects sharing
+    state are drawn back to back. While drawing, it remembers the bound program and texture
+    and only rebinds the texture when it actually changes.
+    The order is rebuilt when the scene changes (see invalidate()), or every frame when
+    `sort_each_frame` is set, so that the depth part of the key follows the camera.
+    With `front_to_back`, the depth comes first in the key instead, so the objects are drawn
+    strictly front to back and hidden fragments fail the depth test before being shaded,
+    at the cost of more state changes.
+    Attributes:
+        app (GraphicsEngine): The application instance providing the camera and stats.
+        sort_each_frame (bool): Whether to rebuild the order every frame.
+        front_to_back (bool): Whether the objects are sorted by depth before render state.
+        items (list): The objects in draw order.
+        dirty (bool): Whether the order must be rebuilt before the next frame.
+        state_ids (dict): The small integers identifying the GL objects in the sort keys, keyed
+                          by the GL objects themselves and cleared by invalidate().
+    Methods:
+        invalidate():
+            Requests a rebuild of the draw order.
+        get_sort_key(obj):
+            Returns the (program, VAO, texture, depth) sort key of an object.
+        build(objects):
+            Rebuilds the draw order from the given objects.
+        get_items(objects, visible=None):
+            Returns the visible objects in draw order.
+        render(objects, visible=None, draw=None):
+            Draws the visible objects without redundant state changes.
+    """
+
+    def __init__(self, app, sort_each_frame=False, front_to_back=False):
+        self.app = app
+        self.sort_each_frame = sort_each_frame
+        self.front_to_back = front_to_back
+        self.items = []
+        self.dirty = True
+        self.state_ids = {}
+
+    def invalidate(self):
+        """
+        Requests a rebuild of the draw order before the next frame, e.g. after an object
+        was added to the scene or changed its program, VAO or texture. The IDs of the GL
+        objects are assigned again, so that released objects are not kept.
+        """
+
+        self.dirty = True
+        self.state_ids.clear()
+
+    def get_state_id(self, state):
+        """
+        Returns a small integer identifying a GL object, assigned in order of first use.
+        The object itself is the key, rather than its id(), which a new object may reuse once
+        the old one is released.
+        """
+
+        return self.state_ids.setdefault(state, len(self.state_ids))
+
+    def get_sort_key(self, obj):
+        """
+        Builds the sort key of an object.
+        Args:
+            obj (BaseModel): The object to sort.
+        Returns:
+            tuple: (program, VAO, texture, depth) where the first three entries identify the
+                   GL objects and depth is the squared distance from the camera to the object,
+                   so objects sharing state are sorted front to back; (depth, program, VAO,
+                   texture) with `front_to_back`.
+        """
+
+        depth = glm.length2(obj.pos - self.app.camera.view_position)
+        state = (self.get_state_id(obj.program), self.get_state_id(obj.vao), self.get_state_id(obj.texture))
+        if self.front_to_back:
+            return (depth, *state)
+        return (*state, depth)
+
+    def build(self, objects):
+        """
+        Rebuilds the draw order of the given objects.
+        Args:
+            objects (list): The objects of the scene.
+        """
+
+        self.items = sorted(objects, key=self.get_sort_key)
+        self.dirty = False
+
+    def get_items(self, objects, visible=None):
+        """
+        Returns the visible objects in draw order, rebuilding the order first if needed.
+        Args:
+            objects (list): The objects of the scene.
+            visible (set, optional): The objects that passed culling. Defaults to all objects.
+        Returns:
+            list: The visible objects in queue order.
+        """
+
+        if self.dirty or self.sort_each_frame:
+            self.build(objects)
+        if visible is None:
+            return self.items
+        return [obj for obj in self.items if obj in visible]
+
+    def render(self, objects, visible=None, draw=None):
+        """
+        Draws the visible objects in queue order, skipping redundant state changes.
+        The order is kept for all objects, so a change of visibility does not require
+        a rebuild; culled objects are simply skipped.
+        The texture is only bound when it differs from the previous object's texture.
+        Program switches are tracked the same way; ModernGL itself binds the program
+        inside every VertexArray.render call, so for programs the queue can only keep
+        the switches to a minimum by keeping objects of the same program together.
+        The numbers are reported to the application's RenderStats as 'texture_binds',
+        'texture_binds_saved' (compared to binding the texture for every drawn object) and
+        'program_changes', the number of program groups, whose binds are not saved, together
+        with 'draw_calls' and 'triangles'. While the application's profiler is enabled, the
+        time spent in the objects' update() and draw() is added to its 'objects.update' and
+        'objects.draw' totals.
+        Args:
+            objects (list): The objects of the scene.
+            visible (set, optional): The objects that passed culling. Defaults to all objects.
+            draw (callable, optional): A function called with each object to issue its draw
+                                       call, e.g. inside an occlusion query. Defaults to
+                                       the objects' draw().
+        """
+
+        program = texture = None
+        texture_binds = program_changes = draw_calls = triangles = 0
+        profiler = self.app.profiler
+        timed = profiler.enabled
+        update_time = draw_time = 0
+        for obj in self.get_items(objects, visible):
+            if obj.program is not program:
+                program = obj.program
+                program_changes += 1
+            if obj.texture is not texture:
+                texture = obj.texture
+                texture.use()
+                texture_binds += 1
+            if timed:
+                start = time.perf_counter_ns()
+                obj.update()
+                drawn = time.perf_counter_ns()
+                obj.draw() if draw is None else draw(obj)
+                update_time += drawn - start
+                draw_time += time.perf_counter_ns() - drawn
+            else:
+                obj.update()
+                obj.draw() if draw is None else draw(obj)
+            draw_calls += 1
+            triangles += obj.triangle_count
+
+        stats = self.app.stats
+        stats.add('draw_calls', draw_calls)
+        stats.add('texture_binds', texture_binds)
+        stats.add('program_changes', program_changes)
+        stats.add('texture_binds_saved', draw_calls - texture_binds)
+        stats.add('triangles', triangles)
+        if timed:
+            profiler.add_time('objects.update', update_time)
+            profiler.add_time('objects.draw', draw_time)
@@ -0,0 +1,44 @@
+class RenderStats:
+    """
+    Per-frame rendering counters.
+    Counters are incremented by name during a frame and moved to `last_frame` when the frame
+    ends, so the numbers of the last complete frame can be read at any time.
+    Attributes:
+        counters (dict): The counters of the frame being rendered.
+        last_frame (dict): The counters of the last complete frame.
+    Methods:
+        add(name, n=1):
+            Increments a counter of the current frame.
+        end_frame():
+            Publishes the current counters as `last_frame` and resets them.
+    """
+
+    COUNTERS = ('draw_calls', 'objects_culled', 'matrices_rebuilt', 'uploads_skipped',
+                'texture_binds', 'program_changes', 'texture_binds_saved', 'assets_uploaded',
+                'uniform_writes', 'triangles', 'lod_switches', 'fragments_shaded', 'objects_occluded',
+                'occlusion_tests')
+
+    def __init__(self):
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.last_frame = dict(self.counters)
+
+    def add(self, name, n=1):
+        """
+        Increments the named counter of the current frame.
+        Args:
+            name (str): The name of the counter.
+            n (int): The amount to add.
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def end_frame(self):
+        """
+        Publishes the counters of the current frame as `last_frame` and starts a new frame.
+        Returns:
+            dict: The counters of the frame that just ended.
+        """
+
+        self.last_frame = self.counters
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        return self.last_frame
@@ -1,4 +1,13 @@
 from .model import *
+from .render_queue import RenderQueue
+from .bvh import BVH
+from .frustum import Frustum
+from .update_stage import UpdateStage
+from .geometry_pool import IndirectRenderer
+from .lod import LodSelector
+from .depth_prepass import DepthPrepass, OverdrawMeter
+from .occlusion import OcclusionCuller
+from .static_batch import StaticBatcher
 
 
 class Scene:
@@ -10,38 +19,278 @@ class Scene:
         The application instance that the scene belongs to.
     objects : list
         A list to store objects in the scene.
+    render_queue : RenderQueue
+        The queue ordering the objects by render state before they are drawn.
+    bvh : BVH
+        The bounding-volume hierarchy of the objects' world-space boxes, used for frustum culling.
+    moved : set
+        The objects whose transform changed since their box was last updated in the hierarchy.
+    assets_version : int
+        The version of the application's mesh the objects last picked their resources from.
+    animated_objects : list
+        The animated instance groups, updated and drawn by the update stage.
+    update_stage : UpdateStage
+        The stage animating, culling and sorting the animated groups on worker threads, created
+        with the first animated group, or None.
+    commands : CommandList
+        The command list of the update stage submitted in the current frame, or None.
+    indirect : IndirectRenderer
+        The renderer drawing the objects with indirect multi-draw calls over a merged geometry
+        pool, or None when all objects go through the render queue.
+    queued_objects : list
+        The objects drawn by the render queue while the indirect renderer is enabled.
+    lod_selector : LodSelector
+        The selector switching the models between the levels of detail of their mesh by
+        projected size, or None when the full meshes are always drawn.
+    depth_prepass : DepthPrepass
+        The depth-only pass drawn before the color pass of the render queue, or None.
+    overdraw : OverdrawMeter
+        The meter counting, or showing, the fragments shaded by the color pass, or None.
+    occlusion : OcclusionCuller
+        The stage skipping the render queue's objects hidden behind others, or None.
+    static_batcher : StaticBatcher
+        The batcher drawing the static objects merged into one batch per texture, or None when
+        they are drawn like the others.
     Methods
     -------
     __init__(app):
         Initializes the scene with the given application instance.
     add_object(obj):
-        Adds an object to the scene.
+        Adds an object to the scene and to the bounding-volume hierarchy.
+    add_animated_object(obj):
+        Adds an animated instance group updated on the worker threads of the update stage.
+    begin_frame():
+        Starts a frame and returns the camera it is rendered with.
+    enable_indirect(culling='gpu'):
+        Draws the objects that support it with indirect multi-draw calls.
+    enable_lod(**kwargs):
+        Switches the models between levels of detail by projected size.
+    enable_depth_prepass():
+        Draws the depth of the render queue's objects before shading them.
+    enable_overdraw(view=False):
+        Counts the fragments shaded per frame, or shows them as a heat map.
+    enable_occlusion_culling():
+        Skips the objects hidden behind others with occlusion queries.
+    enable_static_batching():
+        Merges the static objects into one batch per texture.
+    update_bounds():
+        Updates the hierarchy with the boxes of the objects that moved.
+    swap_loaded_assets():
+        Hands the assets uploaded since the last frame to the objects.
+    get_visible_objects(camera):
+        Returns the objects inside the camera frustum.
     load():
         Loads the initial objects into the scene.
-    render():
-        Renders all objects in the scene.
+    render(camera=None):
+        Renders all objects in the scene through the render queue.
+    draw_objects(queued, drawn, visible, camera):
+        Draws the color pass of the visible objects.
     """
 
     def __init__(self, app):
         self.app = app
         self.objects = []
+        self.render_queue = RenderQueue(app)
+        self.bvh = BVH()
+        self.moved = set()
+        self.assets_version = app.mesh.version
+        self.animated_objects = []
+        self.update_stage = None
+        self.commands = None
+        self.indirect = None
+        self.queued_objects = []
+        self.lod_selector = None
+        self.depth_prepass = None
+        self.overdraw = None
+        self.occlusion = None
+        self.static_batcher = None
         self.load()
 
     def add_object(self, obj):
         """
         Adds an object to the scene.
+        The object's world-space box is inserted in the bounding-volume hierarchy, and its
+        transform reports to the scene when it moves, so that only the boxes of moved
+        objects are updated. With static batching, static objects are appended to the batch of
+        their texture instead.
         Parameters:
         obj (Object): The object to be added to the scene.
         """
 
+        if obj.static and self.static_batcher is not None:
+            self.static_batcher.add(obj)
+            return
         self.objects.append(obj)
+        self.render_queue.invalidate()
+        if self.lod_selector is not None:
+            self.lod_selector.invalidate()
+        self.bvh.insert(obj, obj.get_world_aabb())
+        obj.transform.on_change = lambda _: self.moved.add(obj)
+
+    def add_animated_object(self, obj):
+        """
+        Adds an animated instance group to the scene. Its instances are animated, culled and
+        sorted by the update stage on worker threads instead of going through the bounding-volume
+        hierarchy and the render queue; the stage is started with the first group, with the
+        application's `update_workers` threads.
+        Parameters:
+        obj (InstancedCube): The group, with an `animation`.
+        """
+
+        if self.update_stage is None:
+            self.update_stage = UpdateStage(self.app, workers=self.app.update_workers)
+        self.animated_objects.append(obj)
+        self.update_stage.add(obj)
+
+    def begin_frame(self):
+        """
+        Starts a frame. With an update stage, this queues the update of the next frame on the
+        worker threads and takes the command list of this one, which was culled and sorted for
+        the camera of the previous frame; the frame is rendered with that camera, so that the
+        culling matches the picture.
+        Returns:
+            The camera, or camera state, whose matrices the frame is rendered with.
+        """
+
+        if self.update_stage is None:
+            return self.app.camera
+        with self.app.profiler.scope('scene.update_stage.wait'):
+            self.commands = self.update_stage.begin_frame(self.app.camera, self.app.time, self.app.delta_time)
+        return self.commands.camera
+
+    def enable_indirect(self, culling='gpu'):
+        """
+        Draws the objects whose `indirect` flag is set with an IndirectRenderer: their meshes
+        are packed into one geometry pool and they are drawn with one indirect multi-draw call
+        per texture, culled on the CPU by the bounding-volume hierarchy or on the GPU by a
+        compute shader. The other objects, e.g. instanced groups, stay in the render queue.
+        Parameters:
+        culling (str): 'cpu' or 'gpu'.
+        """
+
+        self.indirect = IndirectRenderer(self.app, culling)
+        self.render_queue.invalidate()
+
+    def enable_lod(self, **kwargs):
+        """
+        Switches the models between the levels of detail generated for their mesh (see
+        Mesh), picking each frame the level matching their projected size on the screen.
+        Parameters:
+        **kwargs: The thresholds `sizes` and the `hysteresis` of the LodSelector.
+        """
+
+        self.lod_selector = LodSelector(self.app, **kwargs)
+
+    def enable_depth_prepass(self):
+        """
+        Draws the visible objects of the render queue front to back into the depth buffer with
+        a position-only program before their color pass, which then only shades the fragments
+        at the nearest depth of each pixel (see DepthPrepass). The objects drawn by the
+        indirect renderer and the update stage are drawn afterwards with the usual depth test.
+        """
+
+        self.depth_prepass = DepthPrepass(self.app)
+
+    def enable_overdraw(self, view=False):
+        """
+        Counts the fragments shaded by the color pass of the render queue and the indirect
+        renderer in every frame, reported as 'fragments_shaded' (see OverdrawMeter).
+        Parameters:
+        view (bool): Whether to draw the render queue as an overdraw heat map instead of
+                     shading it.
+        """
+
+        if self.occlusion is not None:
+            raise ValueError('The overdraw meter cannot be used with occlusion culling')
+        self.overdraw = OverdrawMeter(self.app, view)
+
+    def enable_occlusion_culling(self):
+        """
+        Tests the objects of the render queue that pass frustum culling with occlusion queries,
+        read one frame later, and only draws the ones hidden in the last frame when their
+        bounding box turns out visible (see OcclusionCuller). The overdraw meter also counts
+        samples with a query, which cannot be nested, so the two cannot be combined.
+        """
+
+        if self.overdraw is not None:
+            raise ValueError('Occlusion culling cannot be used with the overdraw meter')
+        self.occlusion = OcclusionCuller(self.app)
+
+    def enable_static_batching(self):
+        """
+        Takes the objects flagged `static` out of the hierarchy and the render queue and draws
+        them merged, in world space, into one batch per texture (see StaticBatcher), which costs
+        one draw call per texture but a copy of their meshes per object. The static objects
+        added later join the batches.
+        """
+
+        self.static_batcher = StaticBatcher(self.app)
+        static = [obj for obj in self.objects if obj.static]
+        for obj in static:
+            self.objects.remove(obj)
+            self.bvh.remove(obj)
+            self.moved.discard(obj)
+            self.static_batcher.add(obj)
+        self.render_queue.invalidate()
+        if self.lod_selector is not None:
+            self.lod_selector.invalidate()
+
+    def update_bounds(self):
+        """
+        Updates the bounding-volume hierarchy with the new boxes of the objects that moved
+        since the last frame.
+        """
+
+        for obj in self.moved:
+            self.bvh.update(obj, obj.get_world_aabb())
+        self.moved.clear()
+
+    def swap_loaded_assets(self):
+        """
+        Hands the buffers and textures uploaded by the asset loader since the last frame to
+        the objects, which were drawing placeholders. The boxes of the objects are updated in
+        the hierarchy, since a loaded mesh has other bounds than its placeholder, and the
+        render queue is rebuilt for the new VAOs and textures.
+        """
+
+        version = self.app.mesh.version
+        if version == self.assets_version:
+            return
+        self.assets_version = version
+        for obj in self.objects:
+            obj.on_assets_loaded()
+            self.moved.add(obj)
+        for obj in self.animated_objects:
+            obj.on_assets_loaded()
+        if self.static_batcher is not None:
+            self.static_batcher.on_assets_loaded()
+        self.render_queue.invalidate()
+        if self.lod_selector is not None:
+            self.lod_selector.invalidate()
+
+    def get_visible_objects(self, camera):
+        """
+        Returns the objects whose bounding box intersects the camera frustum, extracted
+        from the camera's projection and view matrices.
+        Parameters:
+        camera (Camera): The camera, or camera state, the frame is rendered with.
+        Returns:
+            set: The potentially visible objects.
+        """
+
+        self.update_bounds()
+        frustum = Frustum.from_camera(camera)
+        return set(self.bvh.query(frustum))
 
     def load(self):
         """
         Loads the scene with objects.
-        This method initializes the scene by adding multiple Cube objects in a grid pattern
+        This method initializes the scene by adding a floor of cubes in a grid pattern
         and a single Cat object with specific position, rotation, and scale.
-        The grid of Cube objects is created with the following parameters:
+        The floor shares one mesh and one texture, so it is added as a single InstancedCube drawn
+        with one instanced draw call. The floor and the two platforms never move and are flagged
+        static, so that static batching can merge them.
+        The grid is created with the following parameters:
         - n: The range limit for the grid (default is 30).
         - s: The step size for the grid (default is 3).
         The Cat object is added with the following parameters:
@@ -56,23 +305,103 @@ class Scene:
         app = self.app
 
         n, s = 30, 3
-        for x in range(-n, n, s):
-            for z in range(-n, n, s):
-                self.add_object(Cube(app, texture_id=1, pos=(x, -s, z)))
+        floor = [(x, -s, z) for x in range(-n, n, s) for z in range(-n, n, s)]
+        self.add_object(InstancedCube(app, texture_id=1, positions=floor, static=True))
 
         self.add_object(Cube(app, texture_id=0, pos=(15, 5, 10),
-                        rotation=(0, 0, 0), scale=(4, 1, 4)))
+                        rotation=(0, 0, 0), scale=(4, 1, 4), static=True))
         self.add_object(Cube(app, texture_id=2, pos=(10, 0, 10),
-                        rotation=(-45, 30, 0), scale=(2, 1, 1)))
+                        rotation=(-45, 30, 0), scale=(2, 1, 1), static=True))
         self.add_object(Cat(app, texture_id=3, pos=(0, -2, -10),
                         rotation=(-90, 0, -90), scale=(0.3, 0.3, 0.3)))
 
-    def render(self):
+    def render(self, camera=None):
         """
         Renders all objects in the scene.
-        This method iterates through all objects in the scene and calls their
-        render method to display them.
+        This method first swaps the assets loaded since the last frame in, then rebuilds the model
+        matrices of all moved objects in one vectorized pass of the application's TransformStore,
+        then culls the objects outside the camera frustum with the bounding-volume hierarchy, picks
+        the level of detail of the models when enabled, and hands the visible ones to the render
+        queue, which draws them sorted by program, VAO and texture without redundant state changes,
+        or, for the objects drawn indirectly, to the indirect renderer.
+        With static batching, the batches of the static objects are updated after the transforms and
+        drawn after the render queue.
+        With occlusion culling, the render queue only draws the objects visible in the last frame
+        and the others are retested; with a depth pre-pass, the depth of the render queue's objects
+        is drawn first. Finally, the command list of the update stage taken by begin_frame() is
+        submitted.
+        Parameters:
+        camera (Camera, optional): The camera, or camera state, returned by begin_frame(), which
+                                   the culling, the levels of detail and the static batches use.
+                                   Defaults to the application's camera.
         """
 
-        for obj in self.objects:
-            obj.render()
+        camera = self.app.camera if camera is None else camera
+        profiler = self.app.profiler
+        with profiler.scope('scene.swap_assets'):
+            self.swap_loaded_assets()
+        with profiler.scope('scene.transforms'):
+            self.app.stats.add('matrices_rebuilt', self.app.transforms.update())
+        if self.static_batcher is not None:
+            with profiler.scope('scene.static_batch'):
+                self.static_batcher.update()
+        with profiler.scope('scene.cull'):
+            visible = self.get_visible_objects(camera)
+        self.app.stats.add('objects_culled', len(self.objects) - len(visible))
+        if self.lod_selector is not None:
+            with profiler.scope('scene.lod'):
+                if self.lod_selector.update(self.objects, camera):
+                    self.render_queue.invalidate()
+        with profiler.scope('scene.draw'):
+            if self.indirect is not None and self.render_queue.dirty:
+                self.queued_objects = [obj for obj in self.objects if not obj.indirect]
+                self.indirect.invalidate()
+            queued = self.objects if self.indirect is None else self.queued_objects
+            drawn = visible
+            if self.occlusion is not None:
+                drawn = self.occlusion.begin_frame(queued, visible)
+            if self.overdraw is not None and self.overdraw.view:
+                self.app.ctx.clear()
+            if self.depth_prepass is not None:
+                with profiler.scope('scene.depth_prepass'):
+                    self.depth_prepass.render([obj for obj in queued if obj in drawn])
+            if self.overdraw is None:
+                self.draw_objects(queued, drawn, visible, camera)
+            else:
+                self.overdraw.measure(self.draw_objects, queued, drawn, visible, camera)
+        if self.commands is not None:
+            with profiler.scope('scene.submit'):
+                self.update_stage.submit(self.commands)
+            self.commands = None
+
+    def draw_objects(self, queued, drawn, visible, camera):
+        """
+        Draws the color pass of the visible objects: the objects of the render queue, with the
+        depth test of the color pass after a depth pre-pass, or as an overdraw heat map, then
+        the static batches, whose large models are mostly covered by the others and are drawn
+        with the usual depth test, then the occlusion tests of the queue's objects hidden in the
+        last frame, then the objects of the indirect renderer.
+        Parameters:
+        queued (list): The objects of the render queue.
+        drawn (set): The objects the render queue draws.
+        visible (set): The objects that passed frustum culling.
+        camera (Camera): The camera, or camera state, the frame is rendered with.
+        """
+
+        if self.depth_prepass is not None:
+            self.depth_prepass.begin_color_pass()
+        if self.overdraw is not None and self.overdraw.view:
+            self.overdraw.draw(self.render_queue.get_items(queued, drawn))
+        elif self.occlusion is not None:
+            self.render_queue.render(queued, drawn, draw=self.occlusion.draw)
+        else:
+            self.render_queue.render(queued, drawn)
+        if self.depth_prepass is not None:
+            self.depth_prepass.end_color_pass()
+        if self.static_batcher is not None:
+            self.static_batcher.render(camera)
+        if self.occlusion is not None:
+            with self.app.profiler.scope('scene.occlusion'):
+                self.occlusion.test()
+        if self.indirect is not None:
+            self.indirect.render(self.objects, camera, visible)
@@ -1,3 +1,4 @@
+from .uniform_buffer import FRAME_BINDING
 
 
 class ShaderProgram:
@@ -8,13 +9,24 @@ class ShaderProgram:
         programs: A dictionary that stores shader programs.
     Methods:
         __init__(ctx):
-            Initializes the ShaderProgram with the given OpenGL context and loads the default shader program.
-        get_program(shader_program_name):
+            Initializes the ShaderProgram with the given OpenGL context and loads the default,
+            instanced and instanced texture array shader programs, the latter compiling
+            default.frag with TEXTURE_ARRAY, the last two also in a
+            variant for instances of uniform scale ('instanced_uniform_scale' and
+            'instanced_array_uniform_scale'), which needs no per-instance normal matrix, and
+            the position-only programs of the depth pre-pass ('depth' and 'depth_instanced') and
+            the 'static' variant of the default program drawing the world-space vertices of
+            static batches.
+        get_program(shader_program_name, fragment_shader_name=None, defines=()):
             Loads and compiles the vertex and fragment shaders from files and creates an OpenGL program.
             Args:
                 shader_program_name (str): The name of the shader program to load.
+                fragment_shader_name (str, optional): The name of a shared fragment shader.
+                defines (tuple, optional): The preprocessor macros selecting a shader variant.
             Returns:
                 The compiled shader program.
+        add_defines(source, defines):
+            Returns a shader source with #define lines inserted after its #version directive.
         destroy():
             Releases all shader programs.
     """
@@ -23,8 +35,16 @@ class ShaderProgram:
         self.ctx = ctx
         self.programs = {}
         self.programs['default'] = self.get_program('default')
+        self.programs['instanced'] = self.get_program('instanced', 'default')
+        self.programs['instanced_array'] = self.get_program('instanced_array', 'default', ('TEXTURE_ARRAY',))
+        self.programs['instanced_uniform_scale'] = self.get_program('instanced', 'default', ('UNIFORM_SCALE',))
+        self.programs['instanced_array_uniform_scale'] = self.get_program('instanced_array', 'default',
+                                                                          ('TEXTURE_ARRAY', 'UNIFORM_SCALE'))
+        self.programs['depth'] = self.get_program('depth')
+        self.programs['depth_instanced'] = self.get_program('depth', defines=('INSTANCED',))
+        self.programs['static'] = self.get_program('default', defines=('STATIC_BATCH',))
 
-    def get_program(self, shader_program_name):
+    def get_program(self, shader_program_name, fragment_shader_name=None, defines=()):
         """
         Loads and compiles a shader program from vertex and fragment shader files.
         Args:
@@ -32,20 +52,43 @@ class ShaderProgram:
                                        (without extensions). The method expects 
                                        the files to be located in the 'shaders' 
                                        directory with '.vert' and '.frag' extensions.
+            fragment_shader_name (str, optional): The base name of the fragment shader
+                                       file, for programs that share a fragment shader
+                                       with another program. Defaults to shader_program_name.
+            defines (tuple, optional): The names of the macros defined in both shaders, right
+                                       after their #version directive, e.g. ('UNIFORM_SCALE',).
         Returns:
-            program: The compiled shader program object.
+            program: The compiled shader program object, with its `Frame` uniform block
+                     (if any) bound to FRAME_BINDING.
         """
 
+        fragment_shader_name = fragment_shader_name or shader_program_name
+
         with open(f'shaders/{shader_program_name}.vert') as file:
             vertex_shader = file.read()
 
-        with open(f'shaders/{shader_program_name}.frag') as file:
+        with open(f'shaders/{fragment_shader_name}.frag') as file:
             fragment_shader = file.read()
 
+        if defines:
+            vertex_shader = self.add_defines(vertex_shader, defines)
+            fragment_shader = self.add_defines(fragment_shader, defines)
+
         program = self.ctx.program(
             vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+        if 'Frame' in program:
+            program['Frame'].binding = FRAME_BINDING
         return program
 
+    @staticmethod
+    def add_defines(source, defines):
+        """
+        Inserts a #define line for each macro after the #version directive of a shader source.
+        """
+
+        version, _, body = source.partition('\n')
+        return '\n'.join([version, *(f'#define {name}' for name in defines), body])
+
     def destroy(self):
         """
         Releases all shader programs managed by this instance.
@@ -0,0 +1,52 @@
+import numpy as np
+
+# OpenGL enums that ModernGL does not expose
+GL_SRGB8 = 0x8C41
+GL_SRGB8_ALPHA8 = 0x8C43
+GL_FRAMEBUFFER_SRGB = 0x8DB9
+
+
+def srgb_to_linear(values):
+    """
+    Decodes sRGB-encoded values in [0, 1] with the exact piecewise sRGB transfer function.
+    Args:
+        values (array-like): The sRGB values.
+    Returns:
+        np.ndarray: The linear values, as float32.
+    """
+
+    values = np.asarray(values, dtype='f4')
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4).astype('f4')
+
+
+# The linear value of each 8-bit sRGB value, to decode images without a per-texel pow()
+SRGB_TO_LINEAR = srgb_to_linear(np.arange(256) / 255)
+
+# The background color of the scene, given in sRGB and cleared in linear space
+BACKGROUND_COLOR = tuple(float(c) for c in srgb_to_linear((0.08, 0.16, 0.18)))
+
+
+def create_framebuffer(ctx, size):
+    """
+    Creates an offscreen framebuffer with an sRGB color texture and a depth renderbuffer.
+    Args:
+        ctx (moderngl.Context): The OpenGL context.
+        size (tuple): The (width, height) of the framebuffer.
+    Returns:
+        moderngl.Framebuffer: The framebuffer, whose color reads return sRGB-encoded bytes.
+    """
+
+    color = ctx.texture(size, components=4, internal_format=GL_SRGB8_ALPHA8)
+    return ctx.framebuffer(color_attachments=[color], depth_attachment=ctx.depth_renderbuffer(size))
+
+
+def enable_srgb(ctx):
+    """
+    Enables the sRGB conversion of the framebuffer writes: the shaders output linear colors,
+    and the blending stage encodes them to sRGB when the bound framebuffer is sRGB-capable.
+    Clears are converted too, so clear colors are given in linear space (BACKGROUND_COLOR).
+    Args:
+        ctx (moderngl.Context): The OpenGL context.
+    """
+
+    ctx.enable_direct(GL_FRAMEBUFFER_SRGB)
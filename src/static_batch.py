@@ -0,0 +1,374 @@
+import numpy as np
+from .bounding_volume import AABB
+from .frustum import Frustum, OUTSIDE
+
+
+def bake_vertices(vertices, matrices, normals):
+    """
+    Transforms the vertices of a mesh by many model matrices at once, in world space.
+    Args:
+        vertices (np.ndarray): The (N, 8) '2f 3f 3f' vertices of the mesh.
+        matrices (np.ndarray): The (K, 4, 4) column-major model matrices.
+        normals (np.ndarray): The (K, 3, 3) column-major normal matrices.
+    Returns:
+        np.ndarray: The (K * N, 8) vertices of the K copies of the mesh, with their normals
+                    transformed like default.vert does and their positions in world space.
+    """
+
+    vertices = np.asarray(vertices, dtype='f4')
+    unit = vertices[:, 2:5] / np.linalg.norm(vertices[:, 2:5], axis=1, keepdims=True)
+    baked = np.empty((len(matrices), len(vertices), 8), dtype='f4')
+    baked[:, :, :2] = vertices[:, :2]
+    # rows of the column-major matrices are the columns of the model matrices, so v @ m is m * v
+    baked[:, :, 2:5] = unit @ normals
+    baked[:, :, 5:8] = vertices[:, 5:8] @ matrices[:, :3, :3] + matrices[:, None, 3, :3]
+    return baked.reshape(-1, 8)
+
+
+def bake_indices(indices, vertex_count, copies, base_vertex=0):
+    """
+    Repeats the indices of a mesh for consecutive copies of its vertices.
+    Args:
+        indices (np.ndarray): The indices of the mesh.
+        vertex_count (int): The number of vertices of the mesh.
+        copies (int): The number of copies.
+        base_vertex (int): The first vertex of the first copy.
+    Returns:
+        np.ndarray: The uint32 indices of all copies.
+    """
+
+    offsets = base_vertex + vertex_count * np.arange(copies, dtype='u4')
+    return (np.asarray(indices, dtype='u4')[None, :] + offsets[:, None]).ravel()
+
+
+class StaticBatch:
+    """
+    The merged geometry of the static models sharing a texture, drawn with one draw call of the
+    'static' program, which reads world-space vertices.
+    The world-space vertices and uint32 indices of every model are kept in NumPy arrays and
+    mirrored in a vertex and an index buffer. Each model owns a range of vertices: when it
+    moves, only its range is baked again and uploaded. The buffers grow by doubling, and every
+    reallocation rebuilds the VAO. Models are only appended; a batch losing models is rebuilt.
+    Attributes:
+        ctx (moderngl.Context): The OpenGL context.
+        program (moderngl.Program): The 'static' shader program.
+        texture: The texture shared by the models.
+        ranges (dict): The first vertex and vertex count of each model.
+        vertices (np.ndarray): The (N, 8) world-space vertices.
+        indices (np.ndarray): The uint32 indices.
+        vbo (moderngl.Buffer): The vertex buffer, or None until the first upload.
+        ibo (moderngl.Buffer): The index buffer, or None.
+        vao (moderngl.VertexArray): The VAO drawing the batch, or None.
+        aabb (AABB): The world-space box of the vertices, or None while the batch is empty.
+        radius (float): The radius of the world-space box of its largest model.
+        dirty (tuple): The range of vertices to upload, or None.
+        uploaded_indices (int): The number of indices in the index buffer.
+    Methods:
+        add(obj, vertices, indices):
+            Appends the vertices and indices of a model.
+        write(obj, vertices):
+            Replaces the vertices of a model.
+        upload():
+            Uploads the vertices and indices changed since the last upload.
+        render():
+            Draws the batch.
+        destroy():
+            Releases the buffers.
+    """
+
+    STRIDE = 32
+
+    def __init__(self, ctx, program, texture):
+        self.ctx = ctx
+        self.program = program
+        self.texture = texture
+        self.ranges = {}
+        self.vertices = np.empty((0, 8), dtype='f4')
+        self.indices = np.empty(0, dtype='u4')
+        self.vbo = self.ibo = self.vao = None
+        self.aabb = None
+        self.radius = 0.0
+        self.dirty = None
+        self.uploaded_indices = 0
+
+    @property
+    def index_count(self):
+        return len(self.indices)
+
+    @property
+    def nbytes(self):
+        return sum(buffer.size for buffer in (self.vbo, self.ibo) if buffer is not None)
+
+    def mark_dirty(self, first, last):
+        if self.dirty is not None:
+            first, last = min(first, self.dirty[0]), max(last, self.dirty[1])
+        self.dirty = (first, last)
+
+    def add(self, obj, vertices, indices):
+        """
+        Appends the world-space vertices of a model and its indices, relative to its first vertex.
+        Args:
+            obj (BaseModel): The model.
+            vertices (np.ndarray): The (N, 8) baked vertices.
+            indices (np.ndarray): The indices into them.
+        """
+
+        first = len(self.vertices)
+        self.ranges[obj] = (first, len(vertices))
+        self.vertices = np.concatenate((self.vertices, vertices))
+        self.indices = np.concatenate((self.indices, np.asarray(indices, dtype='u4') + first))
+        self.mark_dirty(first, len(self.vertices))
+
+    def write(self, obj, vertices):
+        """
+        Replaces the vertices of a model that moved, keeping its range.
+        Args:
+            obj (BaseModel): The model.
+            vertices (np.ndarray): Its (N, 8) baked vertices, as many as when it was added.
+        """
+
+        first, count = self.ranges[obj]
+        self.vertices[first:first + count] = vertices
+        self.mark_dirty(first, first + count)
+
+    def grow(self, buffer, size):
+        """
+        Returns a buffer of at least `size` bytes, reallocating it with twice its size when it
+        is too small. A new buffer is empty and has to be written entirely.
+        """
+
+        if buffer is not None and size <= buffer.size:
+            return buffer
+        if buffer is not None:
+            buffer.release()
+        return self.ctx.buffer(reserve=max(size, 2 * (buffer.size if buffer is not None else 0)))
+
+    def upload(self):
+        """
+        Uploads the vertex range marked dirty and the indices appended since the last upload,
+        and updates the bounding box. When a buffer is reallocated, it is written entirely and
+        the VAO is rebuilt.
+        """
+
+        if self.dirty is None:
+            return
+        vbo, ibo = self.vbo, self.ibo
+        self.vbo = self.grow(vbo, self.vertices.nbytes)
+        self.ibo = self.grow(ibo, self.indices.nbytes)
+        first, last = (0, len(self.vertices)) if self.vbo is not vbo else self.dirty
+        self.vbo.write(self.vertices[first:last], offset=first * self.STRIDE)
+        first = 0 if self.ibo is not ibo else self.uploaded_indices
+        if first < len(self.indices):
+            self.ibo.write(self.indices[first:], offset=first * 4)
+        self.uploaded_indices = len(self.indices)
+        if self.vbo is not vbo or self.ibo is not ibo:
+            if self.vao is not None:
+                self.vao.release()
+            self.vao = self.ctx.vertex_array(
+                self.program, [(self.vbo, '2f 3f 3f', 'in_texcoord_0', 'in_normal', 'in_position')],
+                index_buffer=self.ibo, index_element_size=4, skip_errors=True)
+        self.aabb = AABB.from_points(self.vertices[:, 5:8])
+        self.dirty = None
+
+    def render(self):
+        """
+        Draws the indices of all models with one draw call.
+        """
+
+        self.vao.render(vertices=len(self.indices))
+
+    def destroy(self):
+        """
+        Releases the VAO and the buffers.
+        """
+
+        for resource in (self.vao, self.vbo, self.ibo):
+            if resource is not None:
+                resource.release()
+
+
+class StaticBatcher:
+    """
+    A class merging the static models of a scene into one StaticBatch per texture, so the never
+    moving parts of the scene are drawn with a draw call per texture instead of one per model.
+    The vertices of the models' meshes are read back once per mesh and baked in world space
+    with vectorized NumPy: an instanced group contributes one copy of its mesh per instance.
+    All static models use the lighting of the default program, so the batches are grouped by
+    texture only; instanced groups with per-instance textures cannot be batched. The batches
+    are culled as a whole against the camera frustum and draw the full meshes, without levels
+    of detail.
+    Models are baked from the smallest to the largest world-space box and the batches are drawn
+    in the order of their largest model, so large models the others stand on, like a floor,
+    come last and their fragments hidden behind the small ones fail the depth test instead of
+    being shaded and then overwritten.
+    The batches are rebuilt incrementally: a static model that moves anyway has its range of
+    vertices baked again and uploaded on the next update(), models added after the first update
+    are appended, and the batches are only rebuilt from scratch after the assets they were baked
+    from changed.
+    The draws are reported to the application's RenderStats as 'draw_calls', 'texture_binds'
+    and 'triangles'.
+    Attributes:
+        app (GraphicsEngine): The application instance providing the context, mesh and camera.
+        program (moderngl.Program): The 'static' shader program.
+        objects (list): The batched models.
+        batches (dict): The StaticBatch of each texture ID.
+        meshes (dict): The vertices and indices read back from each mesh VBO.
+        moved (set): The batched models whose transform changed since the last update.
+        rebuild (bool): Whether the batches have to be rebuilt on the next update, as they are
+                        before the first one.
+    Methods:
+        add(obj):
+            Adds a static model to the batch of its texture.
+        get_mesh_data(vbo):
+            Returns the vertices and indices of a mesh VBO.
+        bake(obj):
+            Returns the world-space vertices of a model.
+        append(obj):
+            Appends a model to the batch of its texture.
+        on_assets_loaded():
+            Hands the loaded assets to the models and schedules a rebuild.
+        update():
+            Bakes the models that moved and uploads the changes.
+        render(camera):
+            Draws the batches inside the camera frustum.
+        destroy():
+            Releases the batches.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.program = app.mesh.vao.program.programs['static']
+        self.program['u_texture_0'] = 0
+        self.objects = []
+        self.batches = {}
+        self.meshes = {}
+        self.moved = set()
+        self.rebuild = True
+
+    @property
+    def nbytes(self):
+        return sum(batch.nbytes for batch in self.batches.values())
+
+    def add(self, obj):
+        """
+        Adds a static model to the batch of its texture, baked on the next update. The model's
+        transform, and for an instanced group its store of instances, report to the batcher
+        when they change, so that only its part of the batch is baked again.
+        Args:
+            obj (BaseModel): The model.
+        Raises:
+            ValueError: If the model is an instanced group with per-instance textures.
+        """
+
+        if getattr(obj, 'texture_ids', None) is not None:
+            raise ValueError('Instanced groups with per-instance textures cannot be batched')
+        self.objects.append(obj)
+        obj.transform.on_change = lambda _: self.moved.add(obj)
+        instances = getattr(obj, 'instances', None)
+        if instances is not None:
+            on_instance_change = instances.on_change
+
+            def on_change(index):
+                on_instance_change(index)
+                self.moved.add(obj)
+            instances.on_change = on_change
+        if not self.rebuild:
+            self.append(obj)
+
+    def get_mesh_data(self, vbo):
+        """
+        Returns the vertices and indices of a mesh VBO, read back from its buffers on first use.
+        Args:
+            vbo (BaseVBO): The VBO, in the '2f 3f 3f' vertex format.
+        Returns:
+            tuple: The (N, 8) vertices and the indices.
+        """
+
+        data = self.meshes.get(vbo)
+        if data is None:
+            vertices = np.frombuffer(vbo.vbo.read(), dtype='f4').reshape(-1, 8)
+            indices = np.frombuffer(vbo.ibo.read(), dtype=f'u{vbo.index_element_size}')
+            data = self.meshes[vbo] = (vertices, indices)
+        return data
+
+    def bake(self, obj):
+        """
+        Returns the world-space vertices of a model, one copy of its mesh per instance.
+        """
+
+        vertices, _ = self.get_mesh_data(self.app.mesh.vao.get_vbo(obj.vao_name))
+        return bake_vertices(vertices, *obj.get_instance_transforms())
+
+    def append(self, obj):
+        """
+        Appends the baked vertices and indices of a model to the batch of its texture.
+        """
+
+        batch = self.batches.get(obj.texture_id)
+        if batch is None:
+            batch = self.batches[obj.texture_id] = StaticBatch(self.app.ctx, self.program, obj.texture)
+        vertices, indices = self.get_mesh_data(self.app.mesh.vao.get_vbo(obj.vao_name))
+        baked = self.bake(obj)
+        batch.add(obj, baked, bake_indices(indices, len(vertices), len(baked) // len(vertices)))
+        batch.radius = max(batch.radius, obj.get_world_aabb().radius())
+
+    def on_assets_loaded(self):
+        """
+        Hands the assets uploaded by the asset loader to the models and schedules a rebuild of
+        the batches, since a loaded mesh replaces the placeholder its models were baked from.
+        """
+
+        for obj in self.objects:
+            obj.on_assets_loaded()
+        self.rebuild = True
+
+    def update(self):
+        """
+        Rebuilds the batches after the assets changed, or bakes again the vertices of the
+        models that moved since the last update, then uploads the changed ranges.
+        """
+
+        if self.rebuild:
+            self.destroy()
+            self.meshes = {}
+            for obj in sorted(self.objects, key=lambda obj: obj.get_world_aabb().radius()):
+                self.append(obj)
+            self.rebuild = False
+        else:
+            for obj in self.moved:
+                self.batches[obj.texture_id].write(obj, self.bake(obj))
+        self.moved.clear()
+        for batch in self.batches.values():
+            batch.upload()
+
+    def render(self, camera):
+        """
+        Draws each batch intersecting the camera frustum with one draw call, the batch of the
+        largest model last.
+        Args:
+            camera (Camera): The camera, or camera state, the frame is rendered with.
+        """
+
+        frustum = Frustum.from_camera(camera)
+        draws = triangles = 0
+        for batch in sorted(self.batches.values(), key=lambda batch: batch.radius):
+            if batch.aabb is None or frustum.test_aabb(batch.aabb) == OUTSIDE:
+                continue
+            batch.texture.use()
+            batch.render()
+            draws += 1
+            triangles += batch.index_count // 3
+
+        stats = self.app.stats
+        stats.add('draw_calls', draws)
+        stats.add('texture_binds', draws)
+        stats.add('triangles', triangles)
+
+    def destroy(self):
+        """
+        Releases the buffers of the batches.
+        """
+
+        for batch in self.batches.values():
+            batch.destroy()
+        self.batches = {}
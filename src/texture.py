@@ -1,33 +1,80 @@
+from functools import partial
+import numpy as np
 import pygame as pg
 import moderngl as mgl
+from .srgb import GL_SRGB8, SRGB_TO_LINEAR
+from .texture_cache import TextureCache
 
 
 class Texture:
     """
     A class to manage textures in an OpenGL context using Pygame.
+    The images are sRGB-encoded: textures are created in the GL_SRGB8 format, so sampling
+    returns linear colors and the mipmaps are averaged in linear space, and texture arrays,
+    which ModernGL creates in linear formats only, are decoded to linear half floats.
     Attributes
     ----------
     ctx : moderngl.Context
         The OpenGL context.
+    loader : AssetLoader
+        The loader reading the textures in the background and writing the texture cache, or None.
+    ANISOTROPY : float
+        The anisotropic filtering level of the textures.
+    cache : TextureCache
+        The cache of decoded and mipmapped textures, shared by all instances.
+    paths : dict
+        The image file of each texture ID.
     textures : dict
         A dictionary to store loaded textures.
+    placeholder : mgl.Texture
+        The 1x1 grey texture standing in for the textures still loading, or None.
+    texture_arrays : dict
+        The texture arrays built so far, keyed by their texture IDs and layer size.
     Methods
     -------
-    __init__(ctx)
-        Initializes the Texture object with the given OpenGL context and loads predefined textures.
+    __init__(ctx, loader=None)
+        Initializes the Texture object with the given OpenGL context and loads predefined textures,
+        in the background when an AssetLoader is given.
     get_texture(path)
         Loads a texture from the given file path, flips it vertically, and creates an OpenGL texture object.
+    read_texture(path)
+        Returns the mip levels of a texture from the cache, or decodes and flips the image file,
+        without using the OpenGL context.
+    create_texture(image)
+        Creates a mipmapped OpenGL texture from decoded image data.
+    get_texture_array(texture_ids, layer_size=(1024, 1024))
+        Packs the images of several texture IDs into the layers of a single texture array.
+    get_layer_data(image, layer_size)
+        Returns the base level of an image resampled to the layer size of a texture array.
+    get_level_count(size)
+        Returns the number of levels of a full mipmap chain.
+    get_placeholder()
+        Returns the texture used until the real textures are loaded.
+    on_texture_loaded(texture_id, image)
+        Replaces the placeholder of a texture ID with the loaded texture.
     destroy()
-        Releases all loaded textures.
+        Releases all loaded textures and texture arrays.
     """
 
-    def __init__(self, ctx):
+    ANISOTROPY = 32.0
+    cache = TextureCache()
+
+    def __init__(self, ctx, loader=None):
         self.ctx = ctx
+        self.loader = loader
+        self.paths = {0: 'textures/img.jpg',
+                      1: 'textures/img_1.jpg',
+                      2: 'textures/img_2.jpg',
+                      3: 'objects/cat/cat_diffuse.jpg'}
         self.textures = {}
-        self.textures[0] = self.get_texture('textures/img.jpg')
-        self.textures[1] = self.get_texture('textures/img_1.jpg')
-        self.textures[2] = self.get_texture('textures/img_2.jpg')
-        self.textures[3] = self.get_texture('objects/cat/cat_diffuse.jpg')
+        self.placeholder = None
+        self.texture_arrays = {}
+        for texture_id, path in self.paths.items():
+            if loader is None:
+                self.textures[texture_id] = self.get_texture(path)
+            else:
+                self.textures[texture_id] = self.get_placeholder()
+                loader.load(partial(self.read_texture, path), partial(self.on_texture_loaded, texture_id))
 
     def get_texture(self, path):
         """
@@ -37,26 +84,164 @@ class Texture:
         Returns:
             mgl.Texture: The processed texture object.
         The function performs the following steps:
-        1. Loads the texture image from the specified path using pygame.
-        2. Flips the image vertically to correct the y-axis orientation.
-        3. Converts the image to a ModernGL texture object with 3 color components (RGB).
-        4. Sets the texture filtering to use linear mipmap linear filtering.
-        5. Builds mipmaps for the texture.
-        6. Sets the anisotropy level to 32.0 for improved texture quality at oblique viewing angles.
+        1. Loads the flipped texture levels from the texture cache, or loads the texture image
+           from the specified path using pygame and flips it vertically to correct the y-axis
+           orientation.
+        2. Converts the image to a ModernGL texture object with 3 color components (sRGB).
+        3. Sets the texture filtering to use linear mipmap linear filtering.
+        4. Builds mipmaps for the texture, or uploads the cached ones.
+        5. Sets the anisotropy level to ANISOTROPY (32.0) for improved texture quality at oblique viewing angles.
         """
 
-        texture = pg.image.load(path).convert()
+        return self.create_texture(self.read_texture(path))
+
+    def read_texture(self, path):
+        """
+        Returns the flipped RGB mip levels of a texture.
+        On a cache hit, all the levels are memory-mapped from the cache file and nothing is
+        decoded. On a miss, the image is decoded and flipped with pygame and only the base
+        level is returned; create_texture then builds the other levels and fills the cache.
+        No display conversion and no OpenGL call is made, so this can run on an AssetLoader
+        worker thread.
+        Args:
+            path (str): The file path to the texture image.
+        Returns:
+            dict: The image 'path', its (width, height) 'size', the list of its 'levels' and
+                  whether they come from the cache ('cached').
+        """
+
+        entry = self.cache.load(path)
+        if entry is not None and entry['components'] == 3:
+            levels = [entry['arrays'][f'level{i}'] for i in range(entry['levels'])]
+            return {'path': path, 'size': tuple(entry['image_size']), 'levels': levels, 'cached': True}
+
+        image = pg.image.load(path)
         # flip image vertically because the y-axis is inverted in pygame
-        texture = pg.transform.flip(texture, False, True)
-        texture = self.ctx.texture(size=texture.get_size(
-        ), components=3, data=pg.image.tostring(texture, 'RGB'))
+        return {'path': path, 'size': image.get_size(), 'levels': [pg.image.tostring(image, 'RGB', True)],
+                'cached': False}
+
+    def create_texture(self, image):
+        """
+        Creates an sRGB OpenGL texture from decoded image data, with trilinear filtering,
+        mipmaps and 32x anisotropic filtering.
+        When the image comes with its whole mipmap chain, the levels are uploaded one by one.
+        ModernGL only writes to the levels allocated by build_mipmaps(), so it is called on the
+        empty texture first. Otherwise the mipmaps are built from the base level and read back
+        into the texture cache for the next runs. The readback is done here, on the GL thread,
+        but the cache file is written on the thread pool of the loader when there is one.
+        Args:
+            image (dict): The image returned by read_texture.
+        Returns:
+            mgl.Texture: The created texture object.
+        """
+
+        size, levels, cached = image['size'], image['levels'], image['cached']
+        level_count = self.get_level_count(size)
+        texture = self.ctx.texture(size=size, components=3, data=None if cached else levels[0],
+                                   internal_format=GL_SRGB8)
 
         # mimaps
         texture.filter = (mgl.LINEAR_MIPMAP_LINEAR, mgl.LINEAR)
         texture.build_mipmaps()
-        texture.anisotropy = 32.0
+        if cached:
+            for level, data in enumerate(levels):
+                texture.write(data, level=level)
+        else:
+            arrays = {f'level{level}': np.frombuffer(texture.read(level=level), dtype='u1')
+                      for level in range(level_count)}
+            store = partial(self.cache.store, image['path'], arrays, image_size=size, components=3,
+                            levels=level_count)
+            if self.loader is None:
+                store()
+            else:
+                self.loader.submit(store)
+        texture.anisotropy = self.ANISOTROPY
         return texture
 
+    def get_texture_array(self, texture_ids, layer_size=(1024, 1024)):
+        """
+        Packs the images of the given texture IDs into a sampler2DArray texture, layer i
+        holding the image of texture_ids[i], so that models with different textures can be
+        drawn with a single texture bound (see InstancedCube). The images are resampled to a
+        common layer size, since all the layers of an array share their size, and decoded to
+        linear half floats, since ModernGL cannot create sRGB texture arrays. The array is
+        built once per set of IDs and layer size, and released with the other textures.
+        Args:
+            texture_ids (iterable): The texture IDs of the layers, in layer order.
+            layer_size (tuple): The (width, height) of every layer.
+        Returns:
+            mgl.TextureArray: The mipmapped texture array.
+        """
+
+        texture_ids = tuple(texture_ids)
+        key = (texture_ids, tuple(layer_size))
+        if key not in self.texture_arrays:
+            data = b''.join(self.get_layer_data(self.read_texture(self.paths[texture_id]), layer_size)
+                            for texture_id in texture_ids)
+            data = SRGB_TO_LINEAR[np.frombuffer(data, dtype='u1')].astype('f2')
+            texture = self.ctx.texture_array(size=(*layer_size, len(texture_ids)), components=3, data=data,
+                                             dtype='f2')
+            texture.filter = (mgl.LINEAR_MIPMAP_LINEAR, mgl.LINEAR)
+            texture.build_mipmaps()
+            texture.anisotropy = self.ANISOTROPY
+            self.texture_arrays[key] = texture
+        return self.texture_arrays[key]
+
+    @staticmethod
+    def get_layer_data(image, layer_size):
+        """
+        Returns the flipped RGB base level of an image, resampled to the given layer size
+        when it differs from the image size.
+        Args:
+            image (dict): The image returned by read_texture.
+            layer_size (tuple): The (width, height) of the texture array layers.
+        Returns:
+            bytes: The RGB pixels of the layer.
+        """
+
+        size, data = tuple(image['size']), bytes(image['levels'][0])
+        if size == tuple(layer_size):
+            return data
+        surface = pg.image.frombuffer(data, size, 'RGB')
+        return pg.image.tostring(pg.transform.smoothscale(surface, layer_size), 'RGB')
+
+    @staticmethod
+    def get_level_count(size):
+        """
+        Returns the number of levels of a full mipmap chain, down to 1x1.
+        Args:
+            size (tuple): The (width, height) of the base level.
+        Returns:
+            int: The number of mip levels.
+        """
+
+        return max(size).bit_length()
+
+    def get_placeholder(self):
+        """
+        Returns the texture bound in place of the textures that are still loading,
+        a single mid-grey texel created on first use.
+        Returns:
+            mgl.Texture: The placeholder texture.
+        """
+
+        if self.placeholder is None:
+            self.placeholder = self.ctx.texture(size=(1, 1), components=3, data=bytes((128, 128, 128)),
+                                                internal_format=GL_SRGB8)
+        return self.placeholder
+
+    def on_texture_loaded(self, texture_id, image):
+        """
+        Creates the texture of a texture ID from the data read by the AssetLoader and
+        replaces the placeholder with it. Models pick the new texture up when the scene
+        swaps the loaded assets in.
+        Args:
+            texture_id (int): The ID of the texture.
+            image (dict): The image returned by read_texture.
+        """
+
+        self.textures[texture_id] = self.create_texture(image)
+
     def destroy(self):
         """
         Releases all textures managed by this instance.
@@ -66,3 +251,7 @@ class Texture:
 
         for texture in self.textures.values():
             texture.release()
+        for texture in self.texture_arrays.values():
+            texture.release()
+        if self.placeholder is not None:
+            self.placeholder.release()
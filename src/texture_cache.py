@@ -0,0 +1,24 @@
+from .mesh_cache import MeshCache
+
+CACHE_DIR = 'cache/textures'
+
+
+class TextureCache(MeshCache):
+    """
+    A binary cache of decoded textures with their whole mipmap chain, so that images are only
+    decoded, flipped and mipmapped once.
+    The file layout, the validation against the source image and the memory-mapped loading are
+    those of MeshCache. Each entry holds one uint8 array per mip level, 'level0' being the
+    flipped RGB base level, and the header records the base 'image_size', the number of
+    'components' and the number of 'levels'. The levels are read back from the GPU after build_mipmaps() on
+    the first run, so later runs upload exactly the same texels; they are sRGB-encoded and were
+    averaged in linear space (entries of the former linear RGB8 textures have another magic).
+    Attributes:
+        cache_dir (str): The directory holding the cache files.
+    """
+
+    MAGIC = b'TEXC0002'
+    EXTENSION = '.tex'
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        super().__init__(cache_dir)
@@ -0,0 +1,172 @@
+import glm
+import numpy as np
+from .transform_store import TransformStore
+
+
+class Transform:
+    """
+    A transform component caching the model matrix of an object.
+    A transform is a thin view over one row of a TransformStore, which holds the position,
+    rotation and scale of many objects in NumPy arrays and can rebuild all their matrices in one
+    vectorized pass. A transform created without a store gets a private single-row store.
+    The position, rotation and scale are exposed as properties: assigning any of them marks
+    the transform dirty and invalidates the cached model matrix and normal matrix, which are
+    only recomputed when a dirty transform is rebuilt, either by this transform or by the
+    store's update(). The properties return copies, so mutating a returned vector in place
+    does not change the transform; assign it back instead.
+    Attributes:
+        store (TransformStore): The store holding the row of this transform.
+        index (int): The row of this transform in the store.
+        pos (glm.vec3): The position of the object in 3D space.
+        rotation (glm.vec3): The rotation of the object in radians for each axis.
+        scale (glm.vec3): The scale of the object in each axis.
+        dirty (bool): Whether the cached matrices are out of date.
+        version (int): Incremented on every change, so users of the matrix can tell whether
+                       a copy they uploaded earlier is still current.
+        on_change (callable): Optional callback called with the transform when it becomes dirty,
+                              used by owners of many transforms to track the dirty ones.
+        m_model (glm.mat4): The cached model matrix, rebuilt on access if dirty.
+        m_normal (glm.mat3): The cached normal matrix, transpose(inverse(mat3(m_model))).
+    Methods:
+        from_row(store, index, on_change=None):
+            Creates a view over an existing row of a store.
+        invalidate():
+            Marks the cached matrices as out of date.
+        rebuild():
+            Recomputes the model matrix and clears the dirty flag.
+        compose(pos, rotation, scale):
+            Builds a model matrix from explicit transformation components.
+    """
+
+    def __init__(self, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1), on_change=None, store=None):
+        self.store = store if store is not None else TransformStore(capacity=1)
+        self.index = self.store.add(tuple(pos), tuple(rotation), tuple(scale))
+        self.on_change = on_change
+        self._m_model = None
+        self._m_normal = None
+        self._cached_version = None
+
+    @classmethod
+    def from_row(cls, store, index, on_change=None):
+        """
+        Creates a transform viewing an existing row of a store.
+        Args:
+            store (TransformStore): The store.
+            index (int): The row index.
+            on_change (callable, optional): The callback called when the transform changes.
+        Returns:
+            Transform: The view.
+        """
+
+        transform = cls.__new__(cls)
+        transform.store = store
+        transform.index = index
+        transform.on_change = on_change
+        transform._m_model = None
+        transform._m_normal = None
+        transform._cached_version = None
+        return transform
+
+    @property
+    def dirty(self):
+        return bool(self.store.dirty[self.index])
+
+    @property
+    def version(self):
+        return int(self.store.versions[self.index])
+
+    def invalidate(self):
+        """
+        Marks the cached model and normal matrices as out of date.
+        """
+
+        self.store.mark_dirty(self.index)
+        if self.on_change is not None:
+            self.on_change(self)
+
+    @property
+    def pos(self):
+        return glm.vec3(*self.store.positions[self.index])
+
+    @pos.setter
+    def pos(self, value):
+        self.store.positions[self.index] = tuple(value)
+        self.invalidate()
+
+    @property
+    def rotation(self):
+        return glm.vec3(*self.store.rotations[self.index])
+
+    @rotation.setter
+    def rotation(self, value):
+        self.store.rotations[self.index] = tuple(value)
+        self.invalidate()
+
+    @property
+    def scale(self):
+        return glm.vec3(*self.store.scales[self.index])
+
+    @scale.setter
+    def scale(self, value):
+        self.store.scales[self.index] = tuple(value)
+        self.invalidate()
+
+    @property
+    def m_model(self):
+        if self.dirty:
+            return self.rebuild()
+        version = self.store.versions[self.index]
+        if self._cached_version != version:
+            # the store rebuilt the row in a batch: read the matrix back
+            self._m_model = glm.mat4.from_bytes(self.store.matrices[self.index].tobytes())
+            self._m_normal = None
+            self._cached_version = version
+        return self._m_model
+
+    @property
+    def m_normal(self):
+        m_model = self.m_model
+        if self._m_normal is None:
+            self._m_normal = glm.transpose(glm.inverse(glm.mat3(m_model)))
+        return self._m_normal
+
+    def rebuild(self):
+        """
+        Recomputes the model matrix from the current position, rotation and scale, writes it
+        and its normal matrix to the store row and clears the dirty flag. The glm normal
+        matrix is derived lazily from the new model matrix.
+        Returns:
+            glm.mat4: The new model matrix.
+        """
+
+        store, index = self.store, self.index
+        self._m_model = self.compose(self.pos, self.rotation, self.scale)
+        store.matrices[index] = np.frombuffer(self._m_model.to_bytes(), dtype='f4').reshape(4, 4)
+        store.normals[index] = store.compute_normals(store.matrices[index:index + 1], store.scales[index:index + 1])[0]
+        store.dirty[index] = False
+        self._m_normal = None
+        self._cached_version = store.versions[index]
+        return self._m_model
+
+    @staticmethod
+    def compose(pos, rotation, scale):
+        """
+        Builds a model matrix from a translation, a rotation and a scale.
+        Args:
+            pos (tuple): The translation of the object.
+            rotation (glm.vec3): The rotation of the object in radians for each axis.
+            scale (tuple): The scale of the object in each axis.
+        Returns:
+            glm.mat4: The translate * rotate(x, y, z) * scale model matrix.
+        """
+
+        m_model = glm.mat4()
+
+        m_model = glm.translate(m_model, glm.vec3(pos))
+
+        m_model = glm.rotate(m_model, rotation.x, glm.vec3(1, 0, 0))
+        m_model = glm.rotate(m_model, rotation.y, glm.vec3(0, 1, 0))
+        m_model = glm.rotate(m_model, rotation.z, glm.vec3(0, 0, 1))
+
+        m_model = glm.scale(m_model, glm.vec3(scale))
+        return m_model
@@ -0,0 +1,208 @@
+import numpy as np
+
+
+class TransformStore:
+    """
+    A structure-of-arrays store of transforms, computing many model matrices at once.
+    Positions, Euler rotations (radians) and scales are kept in (N, 3) float32 arrays and the
+    model matrices in an (N, 4, 4) float32 array laid out column-major, i.e. `matrices[i]` is the
+    transpose of the i-th model matrix, so the array can be uploaded to an instance buffer as is.
+    The normal matrices, the inverse transpose of the upper 3x3 of the model matrices, are kept
+    next to them in the same layout, for the instanced shaders that read them per instance.
+    Rows are marked dirty when they change and update() rebuilds all dirty matrices in a single
+    vectorized pass, without a per-object Python loop. Transform objects are thin views over
+    one row (see Transform and __getitem__).
+    Attributes:
+        count (int): The number of rows in use.
+        positions (np.ndarray): The (capacity, 3) positions.
+        rotations (np.ndarray): The (capacity, 3) rotations in radians around x, y and z.
+        scales (np.ndarray): The (capacity, 3) scales.
+        matrices (np.ndarray): The (capacity, 4, 4) column-major model matrices.
+        normals (np.ndarray): The (capacity, 3, 3) column-major normal matrices.
+        dirty (np.ndarray): The (capacity,) flags of the rows whose matrix is out of date.
+        versions (np.ndarray): The (capacity,) change counters of the rows.
+        on_change (callable): Optional callback called with the row index when a row changes.
+    Methods:
+        add(pos, rotation, scale):
+            Appends one transform and returns its row index.
+        extend(positions, rotations, scales):
+            Appends many transforms at once and returns their row indices.
+        mark_dirty(index):
+            Flags one row, or an array of rows, as changed.
+        update():
+            Rebuilds the model and normal matrices of all dirty rows.
+        compute_matrices(positions, rotations, scales):
+            Computes column-major model matrices for arrays of transforms.
+        compute_normals(matrices, scales):
+            Computes column-major normal matrices from model matrices and their scales.
+        is_uniform_scale(scales):
+            Returns whether every transform is scaled by the same factor along each axis.
+    """
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.positions = np.zeros((capacity, 3), dtype='f4')
+        self.rotations = np.zeros((capacity, 3), dtype='f4')
+        self.scales = np.ones((capacity, 3), dtype='f4')
+        self.matrices = np.zeros((capacity, 4, 4), dtype='f4')
+        self.normals = np.zeros((capacity, 3, 3), dtype='f4')
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.versions = np.zeros(capacity, dtype=np.int64)
+        self.on_change = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        from .transform import Transform
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return Transform.from_row(self, index)
+
+    def reserve(self, capacity):
+        """
+        Grows the arrays so that they can hold at least `capacity` rows.
+        """
+
+        old_capacity = len(self.positions)
+        if capacity <= old_capacity:
+            return
+        capacity = max(capacity, 2 * old_capacity)
+        for name in ('positions', 'rotations', 'scales', 'matrices', 'normals', 'dirty', 'versions'):
+            old = getattr(self, name)
+            new = np.ones((capacity, *old.shape[1:]), dtype=old.dtype) if name == 'scales' else \
+                np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, name, new)
+
+    def add(self, pos=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+        """
+        Appends one transform.
+        Args:
+            pos (tuple): The position.
+            rotation (tuple): The rotation in radians for each axis.
+            scale (tuple): The scale in each axis.
+        Returns:
+            int: The row index of the new transform.
+        """
+
+        return int(self.extend([pos], [rotation], [scale])[0])
+
+    def extend(self, positions, rotations=None, scales=None):
+        """
+        Appends many transforms at once. Their matrices are computed by the next update().
+        Args:
+            positions (array-like): The (N, 3) positions.
+            rotations (array-like, optional): The (N, 3) rotations in radians. Defaults to zero.
+            scales (array-like, optional): The (N, 3) scales. Defaults to one.
+        Returns:
+            np.ndarray: The row indices of the new transforms.
+        """
+
+        positions = np.asarray(positions, dtype='f4').reshape(-1, 3)
+        start, stop = self.count, self.count + len(positions)
+        self.reserve(stop)
+        self.positions[start:stop] = positions
+        self.rotations[start:stop] = 0 if rotations is None else np.asarray(rotations, dtype='f4').reshape(-1, 3)
+        self.scales[start:stop] = 1 if scales is None else np.asarray(scales, dtype='f4').reshape(-1, 3)
+        self.dirty[start:stop] = True
+        self.count = stop
+        return np.arange(start, stop)
+
+    def mark_dirty(self, index):
+        """
+        Flags rows as changed: their matrices are rebuilt by the next update() and their
+        version is incremented.
+        Args:
+            index (int or np.ndarray): The row index or indices.
+        """
+
+        self.dirty[index] = True
+        self.versions[index] += 1
+        if self.on_change is not None:
+            self.on_change(index)
+
+    def update(self):
+        """
+        Rebuilds the model and normal matrices of all dirty rows in one vectorized pass.
+        Returns:
+            int: The number of matrices rebuilt.
+        """
+
+        dirty = np.flatnonzero(self.dirty[:self.count])
+        if len(dirty) == 0:
+            return 0
+        rows = slice(0, self.count) if len(dirty) == self.count else dirty
+        self.matrices[rows] = self.compute_matrices(self.positions[rows], self.rotations[rows], self.scales[rows])
+        self.normals[rows] = self.compute_normals(self.matrices[rows], self.scales[rows])
+        self.dirty[dirty] = False
+        return len(dirty)
+
+    @staticmethod
+    def compute_matrices(positions, rotations, scales):
+        """
+        Computes translate * rotate(x) * rotate(y) * rotate(z) * scale for arrays of transforms,
+        the same chain as Transform.compose.
+        Args:
+            positions (np.ndarray): The (N, 3) positions.
+            rotations (np.ndarray): The (N, 3) rotations in radians.
+            scales (np.ndarray): The (N, 3) scales.
+        Returns:
+            np.ndarray: The (N, 4, 4) column-major model matrices.
+        """
+
+        n = len(positions)
+        cx, cy, cz = np.cos(rotations).T
+        sx, sy, sz = np.sin(rotations).T
+
+        # Rx * Ry * Rz expanded, as rows of the rotation matrix
+        rotation = np.empty((n, 3, 3), dtype='f4')
+        rotation[:, 0, 0] = cy * cz
+        rotation[:, 0, 1] = -cy * sz
+        rotation[:, 0, 2] = sy
+        rotation[:, 1, 0] = sx * sy * cz + cx * sz
+        rotation[:, 1, 1] = -sx * sy * sz + cx * cz
+        rotation[:, 1, 2] = -sx * cy
+        rotation[:, 2, 0] = -cx * sy * cz + sx * sz
+        rotation[:, 2, 1] = cx * sy * sz + sx * cz
+        rotation[:, 2, 2] = cx * cy
+
+        matrices = np.zeros((n, 4, 4), dtype='f4')
+        # column j of the model matrix is column j of the rotation scaled by scale[j]
+        matrices[:, :3, :3] = rotation.transpose(0, 2, 1) * scales[:, :, None]
+        matrices[:, 3, :3] = positions
+        matrices[:, 3, 3] = 1
+        return matrices
+
+    @staticmethod
+    def compute_normals(matrices, scales):
+        """
+        Computes the normal matrices of translate * rotate * scale model matrices without
+        inverting them: the upper 3x3 of such a matrix is R * S, whose inverse transpose is
+        R * S^-1, i.e. its columns divided by the squared scales. The squared scales are clamped
+        to the smallest positive float32, so that the column of a zero scale stays zero instead
+        of filling the normal buffer with NaN.
+        Args:
+            matrices (np.ndarray): The (N, 4, 4) column-major model matrices.
+            scales (np.ndarray): The (N, 3) scales they were built with.
+        Returns:
+            np.ndarray: The (N, 3, 3) column-major normal matrices.
+        """
+
+        return matrices[:, :3, :3] / np.maximum(np.square(scales), np.finfo('f4').tiny)[:, :, None]
+
+    @staticmethod
+    def is_uniform_scale(scales):
+        """
+        Returns whether every transform is scaled by the same factor along each axis, in which
+        case the upper 3x3 of its model matrix transforms normals up to a factor and the
+        normal matrices are not needed.
+        Args:
+            scales (np.ndarray): The (N, 3) scales.
+        Returns:
+            bool: Whether all scales are uniform.
+        """
+
+        scales = np.asarray(scales, dtype='f4').reshape(-1, 3)
+        spread = scales.max(axis=1) - scales.min(axis=1)
+        return bool((spread <= 1e-6 * np.abs(scales).max(axis=1)).all())
@@ -0,0 +1,81 @@
+import numpy as np
+
+# Uniform block binding point shared by every shader program declaring the Frame block
+FRAME_BINDING = 0
+
+
+class FrameUBO:
+    """
+    A class managing the std140 uniform buffer holding the per-frame camera and light state.
+    The buffer is declared in the shaders as the `Frame` uniform block:
+        mat4 m_proj    offset 0
+        mat4 m_view    offset 64
+        vec3 camPos    offset 128 (padded to 16 bytes)
+        Light light    offset 144 (position, Ia, Id, Is, each padded to 16 bytes)
+        mat4 m_view_proj offset 208
+    It is filled once per frame, so per-object updates only have to write the model and normal
+    matrices. The view-projection product is computed here once per frame rather than by the
+    vertex shaders for every vertex.
+    Attributes:
+        app (GraphicsEngine): The application instance providing ctx, camera and light.
+        data (np.ndarray): The CPU copy of the block, 68 float32 values (272 bytes).
+        ubo (moderngl.Buffer): The uniform buffer bound to FRAME_BINDING.
+    Methods:
+        pack(camera=None):
+            Writes the current camera and light state into the CPU copy of the block.
+        update(camera=None):
+            Packs the block and uploads it to the uniform buffer.
+        destroy():
+            Releases the uniform buffer.
+    """
+
+    SIZE = 272
+
+    def __init__(self, app):
+        self.app = app
+        self.data = np.zeros(self.SIZE // 4, dtype='f4')
+        self.ubo = app.ctx.buffer(reserve=self.SIZE, dynamic=True)
+        self.ubo.bind_to_uniform_block(FRAME_BINDING)
+        self.update()
+
+    def pack(self, camera=None):
+        """
+        Writes the camera matrices, their product, the camera position and the light
+        properties into the CPU copy of the block, following the std140 offsets.
+        Args:
+            camera (optional): The camera, or CameraState, to write. Defaults to the
+                               application's camera.
+        Returns:
+            np.ndarray: The packed block.
+        """
+
+        camera, light = self.app.camera if camera is None else camera, self.app.light
+        data = self.data
+        data[0:16] = np.frombuffer(camera.m_proj.to_bytes(), dtype='f4')
+        data[16:32] = np.frombuffer(camera.m_view.to_bytes(), dtype='f4')
+        data[32:35] = camera.view_position
+        data[36:39] = light.position
+        data[40:43] = light.Ia
+        data[44:47] = light.Id
+        data[48:51] = light.Is
+        data[52:68] = np.frombuffer((camera.m_proj * camera.m_view).to_bytes(), dtype='f4')
+        return data
+
+    def update(self, camera=None):
+        """
+        Packs the per-frame camera and light state and uploads it in a single buffer write,
+        counted as one of the application's 'uniform_writes'.
+        Args:
+            camera (optional): The camera, or CameraState, to write. Defaults to the
+                               application's camera.
+        """
+
+        self.ubo.write(self.pack(camera))
+        self.app.stats.add('uniform_writes')
+
+    def destroy(self):
+        """
+        Releases the uniform buffer.
+        """
+
+        self.ubo.release()
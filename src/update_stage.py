@@ -0,0 +1,322 @@
+import os
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import glm
+import numpy as np
+from .frustum import Frustum
+
+# A copy of the camera state a command list is built for, readable while the camera moves on
+CameraState = namedtuple('CameraState', ['m_proj', 'm_view', 'view_position'])
+
+
+class CommandList:
+    """
+    The draws of one frame produced by the UpdateStage: for each animated group, the matrices
+    of its visible instances sorted front to back, ready to be uploaded and drawn.
+    Two command lists are used in turn, and two fences hand each one back and forth between
+    the threads: `ready` is set by the builder once the list is complete and `free` by the
+    main thread once it has submitted the list, so that the builder may fill it again.
+    Attributes:
+        frame (int): The index of the frame the list was built for.
+        time (float): The animation time of the frame, in seconds.
+        camera (CameraState): The camera the instances were culled and sorted for.
+        draws (list): The (group, matrices, normals, layers) draws; matrices is an (n, 4, 4)
+                      array of the column-major matrices of the visible instances, normals
+                      their (n, 3, 3) normal matrices, or None when the group is scaled
+                      uniformly, and layers their (n,) texture array layers, or None when the
+                      group shares one texture.
+        culled (int): The number of instances outside the camera frustum.
+        buffers (dict): The arrays of each group the draws are gathered into, reused from
+                        one frame to the next.
+        error (Exception): The exception raised while building the list, or None.
+        ready (threading.Event): Set when the list can be submitted.
+        free (threading.Event): Set when the list can be rebuilt.
+    """
+
+    def __init__(self):
+        self.frame = -1
+        self.time = 0.0
+        self.camera = None
+        self.draws = []
+        self.culled = 0
+        self.buffers = {}
+        self.error = None
+        self.ready = threading.Event()
+        self.free = threading.Event()
+        self.free.set()
+
+
+class UpdateStage:
+    """
+    A scene update stage running on worker threads, feeding the single thread issuing GL calls.
+    The per-instance work of animated instance groups — animation, model matrices, frustum
+    culling and the depth sort keys — is split into chunks of rows processed by a pool of
+    worker threads, which fill the command list of frame N+1 while the main thread uploads and
+    draws the command list of frame N. The two command lists are handed over with explicit
+    fences (see CommandList), so only the main thread ever touches the GL context, and each
+    list carries the camera it was built for, so a frame is drawn with the camera it was culled
+    with, one frame behind the application's camera.
+    The chunks are NumPy operations on slices of the groups' TransformStore arrays, which
+    release the GIL, so the workers run in parallel on a multi-core machine. With no workers,
+    the lists are built on the main thread when they are requested, without overlap.
+    Attributes:
+        app (GraphicsEngine): The application instance providing the stats.
+        workers (int): The number of worker threads, 0 to build the lists on the main thread.
+        chunk_size (int): The number of instances processed by one task.
+        groups (list): The animated InstancedCube groups updated by the stage.
+        lists (list): The two command lists used in turn.
+        frame (int): The index of the next frame to build.
+        submitted (int): The index of the next frame to submit.
+        pool (ThreadPoolExecutor): The worker threads, or None without workers.
+        queue (queue.Queue): The (command list, camera, time) builds waiting for the builder.
+        builder (threading.Thread): The thread splitting the builds into chunk tasks and
+                                    gathering their results, or None without workers.
+    Methods:
+        add(group):
+            Adds an animated instance group to the stage.
+        get_camera_state(camera):
+            Copies the camera state a command list is built for.
+        kick(camera, time):
+            Queues the build of the command list of the next frame.
+        begin_frame(camera, time, delta_time):
+            Queues the build of the next frame and returns the command list of this one.
+        acquire():
+            Waits for the oldest queued command list to be ready and returns it.
+        build(commands, camera, time):
+            Fills a command list.
+        update_chunk(group, start, stop, time, planes, position):
+            Animates, transforms and culls a chunk of the instances of a group.
+        submit(commands):
+            Uploads and draws a command list, then hands it back to the builder.
+        destroy():
+            Stops the builder and the worker threads.
+    """
+
+    def __init__(self, app, workers=None, chunk_size=8192):
+        self.app = app
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.groups = []
+        self.lists = [CommandList(), CommandList()]
+        self.frame = self.submitted = 0
+        self.pool = self.builder = None
+        self.queue = queue.Queue()
+        if self.workers:
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='update-worker')
+            self.builder = threading.Thread(target=self.run_builder, name='update-stage', daemon=True)
+            self.builder.start()
+
+    def add(self, group):
+        """
+        Adds an animated instance group. Its instances are drawn from the next queued build on.
+        Args:
+            group (InstancedCube): The group, whose `animation` moves its instances.
+        """
+
+        self.groups.append(group)
+
+    @staticmethod
+    def get_camera_state(camera):
+        return CameraState(glm.mat4(camera.m_proj), glm.mat4(camera.m_view), glm.vec3(camera.view_position))
+
+    def kick(self, camera, time):
+        """
+        Queues the build of the command list of the next frame. The builder starts on it as
+        soon as the main thread has submitted the previous use of the list.
+        Args:
+            camera (Camera): The camera to cull and sort the instances for.
+            time (float): The animation time of the frame, in seconds.
+        """
+
+        commands = self.lists[self.frame % len(self.lists)]
+        commands.frame = self.frame
+        self.frame += 1
+        state = self.get_camera_state(camera)
+        if self.builder is None:
+            self.build(commands, state, time)
+        else:
+            self.queue.put((commands, state, time))
+
+    def begin_frame(self, camera, time, delta_time):
+        """
+        Starts a frame: queues the build of the next frame's command list, at the time one
+        frame step later, and returns the command list of this frame, built while the previous
+        frame was submitted. The first frame has no list in flight, so its own is built first.
+        Args:
+            camera (Camera): The application's camera.
+            time (float): The time of this frame, in seconds.
+            delta_time (float): The duration of a frame, in milliseconds.
+        Returns:
+            CommandList: The command list to submit for this frame.
+        """
+
+        if self.frame == self.submitted:
+            self.kick(camera, time)
+        self.kick(camera, time + delta_time * 0.001)
+        return self.acquire()
+
+    def acquire(self):
+        """
+        Waits for the command list of the oldest queued frame to be ready.
+        Returns:
+            CommandList: The command list.
+        Raises:
+            Exception: The exception raised by the build of the list.
+        """
+
+        commands = self.lists[self.submitted % len(self.lists)]
+        commands.ready.wait()
+        commands.ready.clear()
+        self.submitted += 1
+        if commands.error is not None:
+            error, commands.error = commands.error, None
+            commands.free.set()
+            raise error
+        return commands
+
+    def run_builder(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            self.build(*item)
+
+    def build(self, commands, camera, time):
+        """
+        Fills a command list for the given camera and time. The instances of every group are
+        split into chunks processed by the worker threads, then the visible ones are sorted
+        front to back and their matrices gathered into the list. Waits for the main thread to
+        have submitted the list first.
+        Args:
+            commands (CommandList): The command list to fill.
+            camera (CameraState): The camera to cull and sort the instances for.
+            time (float): The animation time, in seconds.
+        """
+
+        commands.free.wait()
+        commands.free.clear()
+        try:
+            planes = Frustum(camera.m_proj * camera.m_view).plane_array
+            position = np.array(camera.view_position, dtype='f4')
+            tasks = [(group, start, min(start + self.chunk_size, group.instances.count))
+                     for group in self.groups for start in range(0, group.instances.count, self.chunk_size)]
+            if self.pool is None:
+                results = [self.update_chunk(*task, time, planes, position) for task in tasks]
+            else:
+                results = list(self.pool.map(lambda task: self.update_chunk(*task, time, planes, position), tasks))
+
+            commands.draws, commands.culled = [], 0
+            for group in self.groups:
+                chunks = [result for task, result in zip(tasks, results) if task[0] is group]
+                indices = np.concatenate([chunk[0] for chunk in chunks])
+                depths = np.concatenate([chunk[1] for chunk in chunks])
+                indices = indices[np.argsort(depths, kind='stable')]
+                commands.draws.append(self.gather(commands, group, indices))
+                commands.culled += group.instances.count - len(indices)
+            commands.time, commands.camera = time, camera
+        except Exception as error:
+            commands.error = error
+        commands.ready.set()
+
+    def gather(self, commands, group, indices):
+        """
+        Copies the matrices, normal matrices and texture array layers, when the group has
+        them, of the given instances of a group into the buffers of a command list.
+        Returns:
+            tuple: The (group, matrices, normals, layers) draw.
+        """
+
+        count = group.instances.count
+        matrices, normals, layers = commands.buffers.get(group, (None, None, None))
+        if matrices is None or len(matrices) < count:
+            matrices = np.empty((count, 4, 4), dtype='f4')
+            normals = None if group.normal_vbo is None else np.empty((count, 3, 3), dtype='f4')
+            layers = None if group.layer_ids is None else np.empty(count, dtype='f4')
+            commands.buffers[group] = matrices, normals, layers
+        n = len(indices)
+        np.take(group.instances.matrices[:count], indices, axis=0, out=matrices[:n])
+        if normals is not None:
+            np.take(group.instances.normals[:count], indices, axis=0, out=normals[:n])
+            normals = normals[:n]
+        if layers is not None:
+            np.take(group.layers, indices, out=layers[:n])
+            layers = layers[:n]
+        return group, matrices[:n], normals, layers
+
+    @staticmethod
+    def update_chunk(group, start, stop, time, planes, position):
+        """
+        Animates the instances start:stop of a group, rebuilds their matrices, and normal matrices
+        when the group draws them, and tests their bounding spheres against the frustum. Chunks of a
+        group cover distinct rows of its TransformStore, so they can be processed concurrently.
+        Args:
+            group (InstancedCube): The group.
+            start (int): The first instance of the chunk.
+            stop (int): The instance after the last one of the chunk.
+            time (float): The animation time, in seconds.
+            planes (np.ndarray): The (6, 4) frustum planes.
+            position (np.ndarray): The camera position.
+        Returns:
+            tuple: The indices of the visible instances and their squared distances to the camera.
+        """
+
+        store = group.instances
+        if group.animation is not None:
+            group.animation(store, start, stop, time)
+        matrices = store.compute_matrices(store.positions[start:stop], store.rotations[start:stop],
+                                          store.scales[start:stop])
+        store.matrices[start:stop] = matrices
+        if group.normal_vbo is not None:
+            store.normals[start:stop] = store.compute_normals(matrices, store.scales[start:stop])
+
+        # rows of the column-major matrices are the columns of the model matrices
+        linear, translation = matrices[:, :3, :3], matrices[:, 3, :3]
+        centers = np.array(group.aabb.center(), dtype='f4') @ linear + translation
+        radii = group.aabb.radius() * np.sqrt((linear ** 2).sum(axis=2).max(axis=1))
+        distances = centers @ planes[:, :3].T + planes[:, 3]
+        visible = np.flatnonzero((distances >= -radii[:, None]).all(axis=1))
+        depths = ((centers[visible] - position) ** 2).sum(axis=1)
+        return visible + start, depths
+
+    def submit(self, commands):
+        """
+        Uploads the visible instance matrices of each group to its instance buffers and draws
+        them, then hands the command list back to the builder. Called on the main thread.
+        The draws are reported to the application's RenderStats as 'draw_calls', 'triangles'
+        and 'texture_binds', and the culled instances as 'objects_culled'.
+        Args:
+            commands (CommandList): The command list returned by begin_frame().
+        """
+
+        stats = self.app.stats
+        for group, matrices, normals, layers in commands.draws:
+            if not len(matrices):
+                continue
+            group.instance_vbo.write(matrices)
+            if normals is not None:
+                group.normal_vbo.write(normals)
+            if layers is not None:
+                group.layer_vbo.vbo.write(layers)
+            group.texture.use()
+            group.draw()
+            stats.add('texture_binds')
+            stats.add('draw_calls')
+            stats.add('triangles', group.triangle_count)
+        stats.add('objects_culled', commands.culled)
+        commands.free.set()
+
+    def destroy(self):
+        """
+        Stops the builder thread and the worker threads.
+        """
+
+        if self.builder is not None:
+            # release the lists so that a queued build does not wait for a submission
+            for commands in self.lists:
+                commands.free.set()
+            self.queue.put(None)
+            self.builder.join()
+            self.pool.shutdown()
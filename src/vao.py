@@ -1,5 +1,7 @@
-from .vbo import VBO
+from functools import partial
+from .vbo import VBO, LodVBO
 from .shader_program import ShaderProgram
+from .lod import simplify_mesh
 
 
 class VAO:
@@ -15,42 +17,217 @@ class VAO:
         The Shader Program associated with this VAO.
     vaos : dict
         A dictionary storing VAOs for different objects (e.g., 'cube', 'cat').
+    vao_vbos : dict
+        The VBO drawn by each VAO, the placeholder cube for meshes still loading.
+    lod_grids : tuple
+        The clustering grid of each simplified level of detail generated for the meshes loaded
+        from files, coarser and coarser, or () for no levels of detail.
+    lods : dict
+        The names of the VAOs of each level of detail of a mesh, the full mesh first, e.g.
+        {'cat': ['cat', 'cat_lod1', 'cat_lod2', 'cat_lod3']}.
+    depth_vaos : dict
+        The position-only VAOs of the depth pre-pass, created on first use for each named VAO.
     Methods
     -------
-    __init__(ctx)
+    __init__(ctx, loader=None, lod_grids=())
         Initializes the VAO with the given context, creates VBO and ShaderProgram instances, 
-        and sets up VAOs for predefined objects.
+        and sets up VAOs for predefined objects. With an AssetLoader, the meshes loaded from
+        files are read in the background and drawn as the cube until they are uploaded.
+        With LOD grids, simplified levels of detail of those meshes are generated as they load.
     get_vao(program, vbo)
         Creates and returns a VAO for the given shader program and VBO.
+    get_vbo(vao_name)
+        Returns the VBO currently drawn by a named VAO.
+    read_mesh_data(vbo)
+        Reads the mesh data of a VBO and generates its levels of detail.
+    on_mesh_loaded(vao_name, program, mesh_data, lod_data=())
+        Uploads a mesh loaded in the background, and its levels of detail, and replaces its
+        placeholder VAO.
+    get_lod_count(vao_name)
+        Returns the number of levels of detail of a mesh.
+    get_lod_name(vao_name, level)
+        Returns the name of the VAO of a level of detail of a mesh.
+    get_depth_vao(vao_name)
+        Returns the position-only VAO drawing the same mesh as a named VAO.
+    get_instanced_vao(vbo_name, instance_vbo, layer_vbo=None, normal_vbo=None, depth=False)
+        Creates and returns an instanced VAO combining a mesh VBO with per-instance VBOs.
     destroy()
         Destroys the VBO and ShaderProgram instances associated with this VAO.
     """
 
-    def __init__(self, ctx):
+    def __init__(self, ctx, loader=None, lod_grids=()):
         self.ctx = ctx
-        self.vbo = VBO(ctx)
+        self.vbo = VBO(ctx, deferred=loader is not None)
         self.program = ShaderProgram(ctx)
         self.vaos = {}
+        self.vao_vbos = {}
+        self.lod_grids = tuple(lod_grids)
+        self.lods = {}
+        self.depth_vaos = {}
 
         # Cube
         self.vaos['cube'] = self.get_vao(program=self.program.programs['default'],
                                          vbo=self.vbo.vbos['cube'])
+        self.vao_vbos['cube'] = self.vbo.vbos['cube']
 
-        self.vaos['cat'] = self.get_vao(program=self.program.programs['default'],
-                                        vbo=self.vbo.vbos['cat'])
+        for name in ('cat',):
+            vbo = self.vbo.vbos[name]
+            program = self.program.programs['default']
+            if vbo.ready:
+                lod_data = self.read_mesh_data(vbo)[1] if self.lod_grids else ()
+                self.on_mesh_loaded(name, program, None, lod_data)
+            else:
+                self.vaos[name] = self.vaos['cube']
+                self.vao_vbos[name] = self.vbo.vbos['cube']
+                loader.load(partial(self.read_mesh_data, vbo),
+                            lambda data, name=name, program=program: self.on_mesh_loaded(name, program, *data))
 
     def get_vao(self, program, vbo):
         """
-        Creates and returns a Vertex Array Object (VAO) using the provided program and Vertex Buffer Object (VBO).
+        Creates and returns an indexed Vertex Array Object (VAO) using the provided program and
+        Vertex Buffer Object (VBO).
         Args:
             program: The shader program to be used with the VAO.
-            vbo: An instance of a Vertex Buffer Object containing the vertex data, format, and attributes.
+            vbo: An instance of a Vertex Buffer Object containing the vertex data, format, attributes
+                 and index buffer.
         Returns:
             The created Vertex Array Object (VAO).
         """
 
         vao = self.ctx.vertex_array(
-            program, [(vbo.vbo, vbo.format, *vbo.attribs)], skip_errors=True)
+            program, [(vbo.vbo, vbo.format, *vbo.attribs)],
+            index_buffer=vbo.ibo, index_element_size=vbo.index_element_size, skip_errors=True)
+        return vao
+
+    def get_vbo(self, vao_name):
+        """
+        Returns the VBO drawn by a named VAO, i.e. the placeholder cube while the mesh loads.
+        Args:
+            vao_name (str): The name of the VAO (e.g., 'cat').
+        Returns:
+            BaseVBO: The VBO, whose `aabb` bounds what the VAO draws.
+        """
+
+        return self.vao_vbos[vao_name]
+
+    def read_mesh_data(self, vbo):
+        """
+        Reads the mesh data of a VBO and simplifies it into one mesh per LOD grid. Like
+        get_mesh_data(), this does not use the OpenGL context and can run on a loader thread.
+        Args:
+            vbo (BaseVBO): The VBO of the mesh.
+        Returns:
+            tuple: The mesh data and the list of the simplified meshes' data.
+        """
+
+        mesh_data = vbo.get_mesh_data()
+        return mesh_data, [simplify_mesh(*mesh_data, grid) for grid in self.lod_grids]
+
+    def on_mesh_loaded(self, vao_name, program, mesh_data, lod_data=()):
+        """
+        Creates the buffers of a mesh and its VAO, replacing the placeholder VAO, and the
+        buffers and VAOs of its levels of detail. Models pick the new VAO up when the scene
+        swaps the loaded assets in.
+        Args:
+            vao_name (str): The name of the VAO and of its VBO.
+            program: The shader program of the VAO.
+            mesh_data (tuple): The mesh data read by the AssetLoader, or None when the VBO
+                               already created its buffers.
+            lod_data (list): The simplified mesh data of each level of detail, finest first.
+        """
+
+        vbo = self.vbo.vbos[vao_name]
+        if mesh_data is not None:
+            vbo.upload(mesh_data)
+        self.vaos[vao_name] = self.get_vao(program=program, vbo=vbo)
+        self.vao_vbos[vao_name] = vbo
+        self.depth_vaos.pop(vao_name, None)
+
+        names = [vao_name]
+        for level, data in enumerate(lod_data, start=1):
+            name = f'{vao_name}_lod{level}'
+            self.vbo.vbos[name] = self.vao_vbos[name] = LodVBO(self.ctx, vbo, data)
+            self.vaos[name] = self.get_vao(program=program, vbo=self.vbo.vbos[name])
+            names.append(name)
+        if lod_data:
+            self.lods[vao_name] = names
+
+    def get_lod_count(self, vao_name):
+        """
+        Returns the number of levels of detail of a mesh, 1 for a mesh without simplified
+        levels or still loading.
+        """
+
+        return len(self.lods.get(vao_name, (vao_name,)))
+
+    def get_lod_name(self, vao_name, level):
+        """
+        Returns the name of the VAO drawing a level of detail of a mesh.
+        Args:
+            vao_name (str): The name of the full mesh's VAO.
+            level (int): The level of detail, 0 for the full mesh; levels beyond the last one
+                         give the last one.
+        Returns:
+            str: The VAO name, e.g. 'cat_lod2'.
+        """
+
+        names = self.lods.get(vao_name, (vao_name,))
+        return names[min(level, len(names) - 1)]
+
+    def get_depth_vao(self, vao_name):
+        """
+        Returns the VAO drawing the mesh of a named VAO with the position-only 'depth' program
+        of the depth pre-pass. It reads the same buffers; the attributes other than the
+        position are skipped. The VAO is created on first use and replaced when the mesh loads.
+        Args:
+            vao_name (str): The name of the VAO (e.g., 'cat' or 'cat_lod2').
+        Returns:
+            The depth-only Vertex Array Object (VAO).
+        """
+
+        vao = self.depth_vaos.get(vao_name)
+        if vao is None:
+            vao = self.depth_vaos[vao_name] = self.get_vao(self.program.programs['depth'], self.vao_vbos[vao_name])
+        return vao
+
+    def get_instanced_vao(self, vbo_name, instance_vbo, layer_vbo=None, normal_vbo=None, depth=False):
+        """
+        Creates and returns an indexed Vertex Array Object (VAO) that draws the named mesh once per instance.
+        The per-vertex attributes come from the mesh VBO and the model matrix of each instance
+        comes from the instance VBO, using the 'instanced' shader program. When a layer VBO is
+        given, each instance also reads its texture array layer from it and the VAO uses the
+        'instanced_array' program, which samples a sampler2DArray. The normal matrix of each
+        instance comes from the normal VBO; without one, the instances must be scaled uniformly
+        and the '_uniform_scale' variant of the program is used. With `depth`, the VAO only
+        reads the positions and model matrices, with the 'depth_instanced' program of the depth
+        pre-pass.
+        Args:
+            vbo_name (str): The name of the mesh VBO (e.g., 'cube').
+            instance_vbo (InstanceVBO): The buffer holding one model matrix per instance.
+            layer_vbo (LayerVBO): The buffer holding one texture array layer per instance, or None.
+            normal_vbo (NormalVBO): The buffer holding one normal matrix per instance, or None.
+            depth (bool): Whether to create the depth-only VAO instead.
+        Returns:
+            The created Vertex Array Object (VAO).
+        """
+
+        vbo = self.get_vbo(vbo_name)
+        buffers = [(vbo.vbo, vbo.format, *vbo.attribs),
+                   (instance_vbo.vbo, instance_vbo.format, *instance_vbo.attribs)]
+        if depth:
+            program_name = 'depth_instanced'
+        else:
+            program_name = 'instanced'
+            if layer_vbo is not None:
+                buffers.append((layer_vbo.vbo, layer_vbo.format, *layer_vbo.attribs))
+                program_name = 'instanced_array'
+            if normal_vbo is not None:
+                buffers.append((normal_vbo.vbo, normal_vbo.format, *normal_vbo.attribs))
+            else:
+                program_name += '_uniform_scale'
+        vao = self.ctx.vertex_array(
+            self.program.programs[program_name], buffers,
+            index_buffer=vbo.ibo, index_element_size=vbo.index_element_size, skip_errors=True)
         return vao
 
     def destroy(self):
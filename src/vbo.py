@@ -1,6 +1,8 @@
 import numpy as np
 import moderngl as mgl
-import pywavefront
+from .bounding_volume import AABB
+from .mesh_cache import MeshCache
+from .obj_loader import ObjLoader
 
 
 class VBO:
@@ -9,16 +11,18 @@ class VBO:
     Attributes:
         vbos (dict): A dictionary holding VBO instances for different models.
     Methods:
-        __init__(ctx):
+        __init__(ctx, deferred=False):
             Initializes the VBO class with a given context and creates VBOs for predefined models.
+            When deferred, the VBOs loaded from files are created empty and uploaded later
+            (see BaseVBO.upload), the cube is always built right away.
         destroy():
             Destroys all VBOs managed by this class to free up resources.
     """
 
-    def __init__(self, ctx):
+    def __init__(self, ctx, deferred=False):
         self.vbos = {}
         self.vbos['cube'] = CubeVBO(ctx)
-        self.vbos['cat'] = CatVBO(ctx)
+        self.vbos['cat'] = CatVBO(ctx, deferred)
 
     def destroy(self):
         """
@@ -35,51 +39,131 @@ class BaseVBO:
     BaseVBO is a base class for creating Vertex Buffer Objects (VBOs) in an OpenGL context.
     Attributes:
         ctx: The OpenGL context.
-        vbo: The vertex buffer object created from vertex data.
+        vbo: The vertex buffer object holding the unique interleaved vertices.
+        ibo: The index buffer object referencing the vertices of each triangle.
+        index_element_size (int): The size in bytes of an index, 2 (uint16) or 4 (uint32).
+        vertex_count (int): The number of unique vertices in the VBO.
+        index_count (int): The number of indices in the IBO.
+        aabb (AABB): The model-space bounding box of the vertex positions.
         format (str): The format of the vertex data.
         attribs (list): The list of vertex attributes.
+        ready (bool): Whether the buffers have been created.
     Methods:
-        __init__(ctx):
-            Initializes the BaseVBO with the given OpenGL context.
+        __init__(ctx, deferred=False):
+            Initializes the BaseVBO with the given OpenGL context. Unless deferred, the mesh data
+            is loaded and the buffers are created right away.
         get_vertex_data():
-            Abstract method to be implemented by subclasses to provide vertex data.
-        get_vbo():
-            Creates and returns a vertex buffer object from the vertex data.
+            Abstract method to be implemented by subclasses to provide unrolled vertex data.
+        get_indexed_data(vertex_data):
+            Deduplicates unrolled vertex data into unique vertices and an index array.
+        get_mesh_data():
+            Returns the unique vertices and indices of the mesh.
+        get_vbo(mesh_data=None):
+            Creates and returns a vertex buffer object, and its index buffer, from the vertex data.
+        upload(mesh_data):
+            Creates the buffers of a deferred VBO from mesh data loaded in the background.
         destroy():
-            Releases the vertex buffer object.
+            Releases the vertex and index buffer objects.
     """
 
-    def __init__(self, ctx):
+    format: str = None
+    attribs: list = None
+
+    def __init__(self, ctx, deferred=False):
         self.ctx = ctx
-        self.vbo = self.get_vbo()
-        self.format: str = None
-        self.attribs: list = None
+        self.vbo = self.ibo = None
+        if not deferred:
+            self.vbo = self.get_vbo()
+
+    @property
+    def ready(self):
+        return self.vbo is not None
 
     def get_vertex_data(self):
         pass
 
-    def get_vbo(self):
+    def get_mesh_data(self):
+        """
+        Returns the indexed mesh data of the VBO. Subclasses loading files override this
+        to cache the result.
+        Returns:
+            tuple: The unique vertices and the index array, see get_indexed_data.
+        """
+
+        return self.get_indexed_data(self.get_vertex_data())
+
+    @staticmethod
+    def get_indexed_data(vertex_data, stride=8):
+        """
+        Deduplicates unrolled vertex data, three vertices per triangle, into unique vertices
+        and an index array.
+        Each vertex is packed into a single fixed-size binary value so that `np.unique` can
+        compare whole rows at once. The unique vertices are kept in order of first use, which
+        preserves the locality of the original triangle order for the post-transform cache.
+        Args:
+            vertex_data (np.ndarray): The unrolled float32 vertex data.
+            stride (int): The number of floats per vertex.
+        Returns:
+            tuple: The (M, stride) float32 unique vertices and the index array, uint16 when
+                   the vertices fit in 16 bits and uint32 otherwise.
+        """
+
+        # adding 0.0 turns -0.0 into 0.0, so that both pack to the same bytes
+        rows = np.ascontiguousarray(vertex_data, dtype='f4').reshape(-1, stride) + np.float32(0)
+        packed = rows.view(np.dtype((np.void, rows.itemsize * stride))).ravel()
+        _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        vertices = rows[first[order]]
+        dtype = 'u2' if len(vertices) <= 0xFFFF else 'u4'
+        indices = rank[inverse.ravel()].astype(dtype)
+        return vertices, indices
+
+    def get_vbo(self, mesh_data=None):
         """
-        Creates and returns a Vertex Buffer Object (VBO) containing vertex data.
-        This method retrieves the vertex data using the `get_vertex_data` method,
-        creates a buffer object using the context's buffer method, and returns
-        the created VBO.
+        Creates and returns a Vertex Buffer Object (VBO) containing the unique vertices,
+        along with the Index Buffer Object (IBO) stored in `self.ibo`.
+        This method retrieves the unique vertices and indices using the `get_mesh_data` method,
+        unless they are given, computes the bounding box of the positions
+        (the last three floats of the '2f 3f 3f' vertex layout), creates both buffer objects
+        using the context's buffer method, and returns the created VBO.
+        Args:
+            mesh_data (tuple): The unique vertices and indices, as returned by get_mesh_data.
         Returns:
-            vbo: The created Vertex Buffer Object containing the vertex data.
+            vbo: The created Vertex Buffer Object containing the unique vertices.
         """
 
-        vertex_data = self.get_vertex_data()
-        vbo = self.ctx.buffer(vertex_data)
+        vertices, indices = self.get_mesh_data() if mesh_data is None else mesh_data
+        self.vertex_count, self.index_count = len(vertices), len(indices)
+        self.index_element_size = indices.itemsize
+        self.aabb = AABB.from_points(vertices[:, 5:8])
+        self.ibo = self.ctx.buffer(indices)
+        vbo = self.ctx.buffer(vertices)
         return vbo
 
+    def upload(self, mesh_data):
+        """
+        Creates the buffers of a deferred VBO.
+        get_mesh_data() does not use the OpenGL context, so an AssetLoader can run it on a
+        worker thread and call this method with its result on the GL thread.
+        Args:
+            mesh_data (tuple): The unique vertices and indices returned by get_mesh_data.
+        """
+
+        self.vbo = self.get_vbo(mesh_data)
+
     def destroy(self):
         """
-        Releases the Vertex Buffer Object (VBO) resources.
+        Releases the Vertex Buffer Object (VBO) and Index Buffer Object (IBO) resources.
         This method should be called to properly clean up and release the 
         resources associated with the VBO when it is no longer needed.
         """
 
-        self.vbo.release()
+        if self.ready:
+            self.vbo.release()
+            self.ibo.release()
 
 
 class CubeVBO(BaseVBO):
@@ -115,8 +199,7 @@ class CubeVBO(BaseVBO):
             np.ndarray: A flattened array of vertex data corresponding to the provided indices, with dtype 'f4'.
         """
 
-        data = [vertices[ind] for triangle in indices for ind in triangle]
-        return np.array(data, dtype='f4')
+        return np.array(vertices, dtype='f4')[np.array(indices).ravel()]
 
     def get_vertex_data(self):
         """
@@ -165,34 +248,271 @@ class CatVBO(BaseVBO):
     A class used to represent a Vertex Buffer Object (VBO) for a cat model.
     Attributes
     ----------
+    path : str
+        The path of the cat OBJ file.
+    cache : MeshCache
+        The binary cache of parsed meshes, shared by all instances.
     format : str
         The format of the vertex data.
     attribs : list
         The list of attribute names for the vertex data.
+    material : dict
+        The name and diffuse texture of the material the vertices belong to.
     Methods
     -------
     get_vertex_data():
         Loads and returns the vertex data from the cat model file.
+    get_mesh_data():
+        Returns the indexed mesh data from the mesh cache, parsing the OBJ file on a miss.
     """
 
-    def __init__(self, app):
-        super().__init__(app)
+    path = 'objects/cat/12221_Cat_v1_l3.obj'
+    cache = MeshCache()
+
+    def __init__(self, app, deferred=False):
         self.format = '2f 3f 3f'
         self.attribs = ['in_texcoord_0', 'in_normal', 'in_position']
+        self.material = None
+        super().__init__(app, deferred)
+
+    def get_mesh_data(self):
+        """
+        Returns the unique vertices and indices of the cat mesh.
+        On a cache hit, the arrays are memory-mapped from the cache file and handed to the
+        buffers without parsing the OBJ file. On a miss, the OBJ file is parsed and indexed
+        and the result is written to the cache with the format, attribs and material.
+        Returns:
+            tuple: The unique vertices and the index array.
+        """
+
+        entry = self.cache.load(self.path)
+        if entry is not None and entry['format'] == self.format:
+            self.material = entry['material']
+            return entry['arrays']['vertices'], entry['arrays']['indices']
+
+        vertices, indices = super().get_mesh_data()
+        self.cache.store(self.path, {'vertices': vertices, 'indices': indices},
+                         format=self.format, attribs=self.attribs, material=self.material)
+        return vertices, indices
 
     def get_vertex_data(self):
         """
         Loads vertex data from a Wavefront OBJ file and returns it as a NumPy array.
-        This method uses the pywavefront library to load an OBJ file located at 
-        'objects/cat/12221_Cat_v1_l3.obj'. It extracts the vertex data from the 
-        first material in the loaded Wavefront object and converts it into a 
-        NumPy array with a data type of float32 ('f4').
+        This method uses ObjLoader to parse the OBJ file located at `path` in bulk,
+        and returns the triangulated 'T2F_N3F_V3F' float32 vertex data of the last
+        material, the one the model is drawn with.
         Returns:
             numpy.ndarray: A NumPy array containing the vertex data from the OBJ file.
         """
 
-        objs = pywavefront.Wavefront('objects/cat/12221_Cat_v1_l3.obj')
-        obj = objs.materials.popitem()[1]
-        vertex_data = obj.vertices
-        vertex_data = np.array(vertex_data, dtype='f4')
-        return vertex_data
+        obj = ObjLoader(self.path).materials.popitem()[1]
+        self.material = {'name': obj.name, 'texture': obj.texture}
+        return obj.vertices
+
+
+class LodVBO(BaseVBO):
+    """
+    A class used to represent the VBO of a simplified level of detail of another VBO's mesh.
+    Attributes
+    ----------
+    format : str
+        The format of the vertex data, the one of the source VBO.
+    attribs : list
+        The attribute names of the vertex data, the ones of the source VBO.
+    mesh_data : tuple
+        The simplified vertices and indices, dropped once the buffers are created.
+    Methods
+    -------
+    get_mesh_data():
+        Returns the simplified mesh data.
+    """
+
+    def __init__(self, ctx, source, mesh_data):
+        self.format = source.format
+        self.attribs = source.attribs
+        self.mesh_data = mesh_data
+        super().__init__(ctx)
+        self.mesh_data = None
+
+    def get_mesh_data(self):
+        return self.mesh_data
+
+
+class InstanceVBO:
+    """
+    A class used to represent a per-instance Vertex Buffer Object holding one model matrix per instance.
+    Attributes
+    ----------
+    ctx : moderngl.Context
+        The OpenGL context.
+    vbo : moderngl.Buffer
+        The buffer containing the instance matrices, column-major, 64 bytes per instance.
+    format : str
+        The format of the instance data, advanced once per instance ('/i').
+    attribs : list
+        The list of attribute names for the instance data.
+    count : int
+        The number of instances currently stored in the buffer.
+    Methods
+    -------
+    write(matrices):
+        Uploads an array of model matrices, growing the buffer if needed.
+    write_range(matrices, start, stop):
+        Uploads the rows start:stop of an array of model matrices in place.
+    destroy():
+        Releases the instance buffer.
+    """
+
+    def __init__(self, ctx, matrices):
+        self.ctx = ctx
+        self.format = '16f/i'
+        self.attribs = ['in_model']
+        self.count = 0
+        self.vbo = None
+        self.write(matrices)
+
+    def write(self, matrices):
+        """
+        Uploads the given model matrices to the instance buffer.
+        The buffer is only reallocated when it is too small for the new data, otherwise
+        the existing storage is overwritten in place.
+        Args:
+            matrices (np.ndarray): An array of shape (N, 16) or (N, 4, 4) of column-major
+                                   float32 model matrices.
+        """
+
+        data = np.ascontiguousarray(matrices, dtype='f4').reshape(-1, 16)
+        if self.vbo is None or self.vbo.size < data.nbytes:
+            if self.vbo is not None:
+                self.vbo.release()
+            self.vbo = self.ctx.buffer(reserve=max(data.nbytes, 64), dynamic=True)
+        self.vbo.write(data)
+        self.count = len(data)
+
+    def write_range(self, matrices, start, stop):
+        """
+        Uploads a contiguous range of instance matrices without touching the rest of the buffer.
+        Args:
+            matrices (np.ndarray): The full (N, 16) or (N, 4, 4) array of column-major float32
+                                   model matrices.
+            start (int): The index of the first instance to upload.
+            stop (int): The index after the last instance to upload.
+        """
+
+        data = np.ascontiguousarray(matrices[start:stop], dtype='f4')
+        self.vbo.write(data, offset=start * 64)
+
+    def destroy(self):
+        """
+        Releases the instance buffer resources.
+        """
+
+        self.vbo.release()
+
+
+class NormalVBO:
+    """
+    A class used to represent a per-instance buffer of normal matrices, read by the instanced
+    programs alongside an InstanceVBO when the instances are not all scaled uniformly.
+    Attributes
+    ----------
+    ctx : moderngl.Context
+        The OpenGL context.
+    format : str
+        The per-instance format of the buffer ('9f/i', a column-major mat3).
+    attribs : list
+        The attribute name of the normal matrix ('in_normal_matrix').
+    count : int
+        The number of instances in the buffer.
+    vbo : moderngl.Buffer
+        The buffer object, 36 bytes per instance.
+    Methods
+    -------
+    write(normals):
+        Uploads an array of normal matrices, growing the buffer if needed.
+    write_range(normals, start, stop):
+        Uploads the rows start:stop of an array of normal matrices in place.
+    destroy():
+        Releases the buffer object.
+    """
+
+    def __init__(self, ctx, normals):
+        self.ctx = ctx
+        self.format = '9f/i'
+        self.attribs = ['in_normal_matrix']
+        self.count = 0
+        self.vbo = None
+        self.write(normals)
+
+    def write(self, normals):
+        """
+        Uploads the given normal matrices, reallocating the buffer only when it is too small.
+        Args:
+            normals (np.ndarray): An array of shape (N, 9) or (N, 3, 3) of column-major float32
+                                  normal matrices.
+        """
+
+        data = np.ascontiguousarray(normals, dtype='f4').reshape(-1, 9)
+        if self.vbo is None or self.vbo.size < data.nbytes:
+            if self.vbo is not None:
+                self.vbo.release()
+            self.vbo = self.ctx.buffer(reserve=max(data.nbytes, 36), dynamic=True)
+        self.vbo.write(data)
+        self.count = len(data)
+
+    def write_range(self, normals, start, stop):
+        """
+        Uploads a contiguous range of normal matrices without touching the rest of the buffer.
+        Args:
+            normals (np.ndarray): The full (N, 9) or (N, 3, 3) array of normal matrices.
+            start (int): The index of the first instance to upload.
+            stop (int): The index after the last instance to upload.
+        """
+
+        data = np.ascontiguousarray(normals[start:stop], dtype='f4')
+        self.vbo.write(data, offset=start * 36)
+
+    def destroy(self):
+        """
+        Releases the buffer object.
+        """
+
+        self.vbo.release()
+
+
+class LayerVBO:
+    """
+    A class used to represent a per-instance buffer of texture array layers, one float per
+    instance, read by the 'instanced_array' program alongside an InstanceVBO.
+    Attributes
+    ----------
+    ctx : moderngl.Context
+        The OpenGL context.
+    format : str
+        The per-instance format of the buffer ('1f/i').
+    attribs : list
+        The attribute name of the layer ('in_layer').
+    count : int
+        The number of instances in the buffer.
+    vbo : moderngl.Buffer
+        The buffer object.
+    Methods
+    -------
+    destroy():
+        Releases the buffer object.
+    """
+
+    def __init__(self, ctx, layers):
+        self.ctx = ctx
+        self.format = '1f/i'
+        self.attribs = ['in_layer']
+        data = np.asarray(layers, dtype='f4')
+        self.count = len(data)
+        self.vbo = ctx.buffer(data)
+
+    def destroy(self):
+        """
+        Releases the buffer object.
+        """
+
+        self.vbo.release()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from unittest.mock import Mock
+from src.asset_loader import AssetLoader
+
+
+class TestAssetLoader(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the application stats and create a loader with two workers
+        self.app = Mock()
+        self.loader = AssetLoader(self.app, workers=2, upload_budget_ms=0.0)
+
+    def tearDown(self):
+        self.loader.destroy()
+
+    def test_reads_on_workers_uploads_on_caller(self):
+        # Test that reads run on the pool and uploads on the thread calling finish()
+        threads = {}
+        upload = Mock(side_effect=lambda data: threads.setdefault('upload', threading.current_thread()))
+        read = lambda: threads.setdefault('read', threading.current_thread()) and 'data'
+        self.loader.load(read, upload)
+        self.loader.finish()
+
+        upload.assert_called_once_with('data')
+        self.assertIsNot(threads['read'], threading.main_thread())
+        self.assertIs(threads['upload'], threading.main_thread())
+        self.assertEqual(self.loader.version, 1)
+        self.assertFalse(self.loader.busy)
+
+    def test_update_respects_budget(self):
+        # Test that a zero budget uploads one ready asset per frame, in request order
+        uploaded = []
+        for name in 'abc':
+            future = self.loader.load(lambda name=name: name, uploaded.append)
+            future.result()
+
+        self.assertEqual(self.loader.update(), 1)
+        self.assertEqual(self.loader.update(), 1)
+        self.assertEqual(uploaded, ['a', 'b'])
+        self.app.stats.add.assert_called_with('assets_uploaded', 1)
+        self.assertTrue(self.loader.busy)
+
+    def test_pending_reads_are_not_waited(self):
+        # Test that update() skips the assets whose read has not finished
+        event = threading.Event()
+        upload = Mock()
+        self.loader.load(event.wait, upload)
+        self.assertEqual(self.loader.update(), 0)
+        upload.assert_not_called()
+
+        event.set()
+        self.loader.finish()
+        upload.assert_called_once_with(True)
+
+    def test_read_errors_raised_on_update(self):
+        # Test that an exception of a read is raised on the GL thread
+        def read():
+            raise OSError('missing file')
+
+        self.loader.load(read, Mock()).exception()
+        self.assertRaises(OSError, self.loader.update)
+
+    def test_submitted_tasks_run_on_workers(self):
+        # Test that a submitted function runs on the pool, is waited by finish() and its errors
+        # are raised on the GL thread
+        threads = []
+        self.loader.submit(lambda: threads.append(threading.current_thread()))
+        self.loader.finish()
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertEqual(self.loader.tasks, [])
+
+        def store():
+            raise OSError('disk full')
+
+        self.loader.submit(store).exception()
+        self.assertRaises(OSError, self.loader.update)
+
+
+if __name__ == '__main__':
+    unittest.main()
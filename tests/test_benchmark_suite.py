@@ -0,0 +1,23 @@
+import contextlib
+import io
+import unittest
+from benchmarks.suite import compare
+
+
+class TestBenchmarkComparison(unittest.TestCase):
+
+    def test_regressions_above_threshold(self):
+        # Test that only metrics worse than the baseline by more than the threshold are reported
+        baseline = {'floor': {'frame_ms_p50': 10.0, 'startup_ms': 100.0, 'peak_rss_mb': 50.0}}
+        results = {'floor': {'frame_ms_p50': 12.0, 'startup_ms': 105.0, 'peak_rss_mb': 40.0},
+                   'new_scenario': {'frame_ms_p50': 1.0}}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            regressions = compare(results, baseline, threshold=0.1)
+
+        self.assertEqual([(name, metric) for name, metric, *_ in regressions], [('floor', 'frame_ms_p50')])
+        self.assertAlmostEqual(regressions[0][4], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -94,6 +94,39 @@ class TestCamera(unittest.TestCase):
         self.assertAlmostEqual(self.camera.position.z,
                                expected_position.z, places=5)
 
+    @patch('pygame.key.get_pressed')
+    @patch('pygame.mouse.get_rel')
+    def test_update_follows_path(self, mock_get_rel, mock_get_pressed):
+        # Test that a camera with a scripted path ignores the mouse and keyboard
+        self.mock_app.time = 1.0
+        self.camera.path = Mock()
+        self.camera.path.get_pose.return_value = ((1, 2, 3), 0, 0)
+
+        self.camera.update()
+
+        mock_get_rel.assert_not_called()
+        mock_get_pressed.assert_not_called()
+        self.camera.path.get_pose.assert_called_once_with(1.0)
+        self.assertEqual(self.camera.position, glm.vec3(1, 2, 3))
+        self.assertAlmostEqual(self.camera.forward.x, 1, places=5)
+
+    def test_interpolate_between_updates(self):
+        # Test that the view matrix is interpolated between the last two poses, without moving the camera
+        self.camera.previous = (glm.vec3(0, 0, 0), 90, 0)
+        self.camera.position = glm.vec3(2, 0, 0)
+        self.camera.yaw, self.camera.pitch = 90, 0
+
+        self.camera.interpolate(0.5)
+
+        position = glm.vec3(1, 0, 0)
+        expected = glm.lookAt(position, position + glm.vec3(0, 0, 1), glm.vec3(0, 1, 0))
+        for column in range(4):
+            for row in range(4):
+                self.assertAlmostEqual(self.camera.m_view[column][row], expected[column][row], places=5)
+        self.assertEqual(self.camera.position, glm.vec3(2, 0, 0))
+        # the frame is lit and sorted from the interpolated position
+        self.assertEqual(self.camera.view_position, position)
+
     def test_get_view_matrix(self):
         # Check if get_view_matrix returns the correct matrix
         view_matrix = self.camera.get_view_matrix()
@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import unittest
+from src.camera_path import CameraPath
+
+
+class TestCameraPath(unittest.TestCase):
+
+    def setUp(self):
+        # Create a path moving along x while turning, over two seconds
+        self.path = CameraPath([(2.0, (4, 0, 0), 180, 10), (0.0, (0, 0, 0), 90, 0)])
+
+    def test_interpolates_between_keyframes(self):
+        # Test that the pose halfway between two keyframes is interpolated linearly
+        position, yaw, pitch = self.path.get_pose(1.0)
+        self.assertEqual(position, (2.0, 0.0, 0.0))
+        self.assertEqual((yaw, pitch), (135.0, 5.0))
+        self.assertEqual(self.path.duration, 2.0)
+
+    def test_holds_or_loops_after_last_keyframe(self):
+        # Test that the last pose is held, unless the path loops
+        self.assertEqual(self.path.get_pose(3.0)[0], (4.0, 0.0, 0.0))
+        self.path.loop = True
+        self.assertEqual(self.path.get_pose(3.0)[0], (2.0, 0.0, 0.0))
+
+    def test_load_script(self):
+        # Test that a path is loaded from a JSON script with default angles
+        script = {'loop': True, 'keyframes': [{'time': 0, 'position': [1, 2, 3]},
+                                              {'time': 1, 'position': [1, 2, 5], 'yaw': 0}]}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'path.json')
+            with open(path, 'w') as file:
+                json.dump(script, file)
+            camera_path = CameraPath.load(path)
+
+        self.assertTrue(camera_path.loop)
+        self.assertEqual(camera_path.get_pose(0.5), ((1.0, 2.0, 4.0), 45.0, 0.0))
+
+    def test_catmull_rom_passes_through_keyframes(self):
+        # Test that the spline hits the keyframes and curves between them
+        path = CameraPath([(0, (0, 0, 0), 0, 0), (1, (1, 0, 0), 10, 0), (2, (2, 2, 0), 20, 0),
+                           (3, (3, 2, 0), 30, 0)], interpolation='catmull-rom')
+
+        self.assertEqual(path.get_pose(1.0), ((1.0, 0.0, 0.0), 10.0, 0.0))
+        self.assertEqual(path.get_pose(3.0)[0], (3.0, 2.0, 0.0))
+        position, yaw, _ = path.get_pose(1.5)
+        self.assertEqual(position, (1.5, 1.0, 0.0))
+        self.assertLess(path.get_pose(0.5)[0][1], 0)
+        with self.assertRaises(ValueError):
+            CameraPath([(0, (0, 0, 0), 0, 0)], interpolation='cubic')
+
+    def test_empty_path(self):
+        # Test that a path without keyframes is rejected
+        with self.assertRaises(ValueError):
+            CameraPath([])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import glm
+import numpy as np
+from src.bounding_volume import AABB
+from src.bvh import BVH
+from src.frustum import Frustum, OUTSIDE, INTERSECT, INSIDE
+
+
+class TestAABB(unittest.TestCase):
+
+    def test_from_points(self):
+        # Test that the box encloses all points
+        aabb = AABB.from_points([(0, 1, 2), (-1, 5, 0), (3, -2, 1)])
+        self.assertEqual(aabb.min, glm.vec3(-1, -2, 0))
+        self.assertEqual(aabb.max, glm.vec3(3, 5, 2))
+
+    def test_distance2(self):
+        # Test that the squared distance is taken to the closest point of the box, 0 inside it
+        aabb = AABB((-1, -1, -1), (1, 1, 1))
+        self.assertEqual(aabb.distance2((0, 0, 0)), 0)
+        self.assertEqual(aabb.distance2((0, 3, 0)), 4)
+        self.assertEqual(aabb.distance2((2, 3, -1)), 5)
+
+    def test_transformed(self):
+        # Test that a rotated and translated box encloses the transformed corners
+        aabb = AABB((-1, -1, -1), (1, 1, 1))
+        m_model = glm.rotate(glm.translate(glm.mat4(), glm.vec3(10, 0, 0)), glm.radians(45), glm.vec3(0, 1, 0))
+        world = aabb.transformed(m_model)
+        half = 2 ** 0.5
+        for a, b in zip(world.min, (10 - half, -1, -half)):
+            self.assertAlmostEqual(a, b, places=5)
+        for a, b in zip(world.max, (10 + half, 1, half)):
+            self.assertAlmostEqual(a, b, places=5)
+
+
+class TestFrustum(unittest.TestCase):
+
+    def setUp(self):
+        # Camera at the origin looking down -z, like the default OpenGL view
+        m_proj = glm.perspective(glm.radians(50), 16 / 9, 0.1, 100)
+        m_view = glm.lookAt(glm.vec3(0, 0, 0), glm.vec3(0, 0, -1), glm.vec3(0, 1, 0))
+        self.frustum = Frustum(m_proj * m_view)
+
+    def test_classification(self):
+        # Test boxes in front of, behind, beyond and across the frustum
+        self.assertEqual(self.frustum.test_aabb(AABB((-1, -1, -11), (1, 1, -9))), INSIDE)
+        self.assertEqual(self.frustum.test_aabb(AABB((-1, -1, 9), (1, 1, 11))), OUTSIDE)
+        self.assertEqual(self.frustum.test_aabb(AABB((-1, -1, -110), (1, 1, -105))), OUTSIDE)
+        self.assertEqual(self.frustum.test_aabb(AABB((-1, -1, -1), (1, 1, 1))), INTERSECT)
+
+    def test_sphere(self):
+        # Test that a sphere straddling the near plane is visible but one behind is not
+        self.assertTrue(self.frustum.intersects_sphere(glm.vec3(0, 0, 0.5), 1))
+        self.assertFalse(self.frustum.intersects_sphere(glm.vec3(0, 0, 5), 1))
+
+    def test_vectorized_matches_scalar(self):
+        # Test that cull_aabbs agrees with test_aabb on random boxes
+        rng = np.random.default_rng(1)
+        centers = rng.uniform(-120, 120, (500, 3)).astype('f4')
+        mins, maxs = centers - 2, centers + 2
+        mask = self.frustum.cull_aabbs(mins, maxs)
+        expected = [self.frustum.test_aabb(AABB(a, b)) != OUTSIDE for a, b in zip(mins, maxs)]
+        np.testing.assert_array_equal(mask, expected)
+
+
+class TestBVH(unittest.TestCase):
+
+    def setUp(self):
+        m_proj = glm.perspective(glm.radians(50), 16 / 9, 0.1, 100)
+        m_view = glm.lookAt(glm.vec3(0, 0, 0), glm.vec3(0, 0, -1), glm.vec3(0, 1, 0))
+        self.frustum = Frustum(m_proj * m_view)
+
+        rng = np.random.default_rng(0)
+        centers = rng.uniform(-150, 150, (300, 3))
+        self.items = [(i, AABB(c - 1, c + 1)) for i, c in enumerate(centers)]
+        self.expected = {i for i, aabb in self.items if self.frustum.test_aabb(aabb.expanded(0.5)) != OUTSIDE}
+
+    def test_query_matches_brute_force(self):
+        # Test that incremental insertion and bulk building find the same visible objects
+        inserted = BVH()
+        for obj, aabb in self.items:
+            inserted.insert(obj, aabb)
+        built = BVH()
+        built.build(self.items)
+
+        self.assertEqual(set(inserted.query(self.frustum)), self.expected)
+        self.assertEqual(set(built.query(self.frustum)), self.expected)
+        self.assertEqual(len(built), len(self.items))
+
+    def test_update_small_move_keeps_leaf(self):
+        # Test that a move within the margin only checks containment
+        bvh = BVH(margin=0.5)
+        bvh.insert('a', AABB((0, 0, 0), (1, 1, 1)))
+        self.assertFalse(bvh.update('a', AABB((0.2, 0, 0), (1.2, 1, 1))))
+
+    def test_update_moves_object_into_view(self):
+        # Test that an object moved in front of the camera becomes visible
+        bvh = BVH()
+        bvh.build(self.items)
+        bvh.update(0, AABB((-1, -1, -11), (1, 1, -9)))
+        self.assertIn(0, bvh.query(self.frustum))
+
+        bvh.update(0, AABB((-1, -1, 9), (1, 1, 11)))
+        self.assertNotIn(0, bvh.query(self.frustum))
+
+    def test_remove(self):
+        # Test that removed objects are no longer returned
+        bvh = BVH()
+        bvh.build(self.items)
+        for obj in self.expected:
+            bvh.remove(obj)
+        self.assertEqual(bvh.query(self.frustum), [])
+        self.assertEqual(len(bvh), len(self.items) - len(self.expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
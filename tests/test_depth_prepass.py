@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import MagicMock, Mock
+import glm
+from src.bounding_volume import AABB
+from src.depth_prepass import DepthPrepass, OverdrawMeter
+from src.render_stats import RenderStats
+
+
+class TestDepthPrepass(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the application with a camera at the origin and real counters
+        self.app = Mock()
+        self.app.camera.view_position = glm.vec3(0, 0, 0)
+        self.app.stats = RenderStats()
+        self.prepass = DepthPrepass(self.app)
+
+    def make_object(self, min_corner, max_corner):
+        obj = Mock(triangle_count=12)
+        obj.get_world_aabb.return_value = AABB(min_corner, max_corner)
+        return obj
+
+    def test_sorted_by_box_distance(self):
+        # Test that a large box the camera is close to comes before smaller, farther ones
+        floor = self.make_object((-50, -2, -50), (50, -1, 50))
+        near = self.make_object((-1, -1, -4), (1, 1, -2))
+        far = self.make_object((-1, -1, -12), (1, 1, -10))
+        self.assertEqual(self.prepass.sort([far, near, floor]), [floor, near, far])
+
+    def test_render_masks_colors(self):
+        # Test that the objects are drawn front to back with the color writes masked, then restored
+        fbo = self.app.ctx.fbo
+        masks = []
+        near = self.make_object((-1, -1, -3), (1, 1, -2))
+        far = self.make_object((-1, -1, -8), (1, 1, -7))
+        near.draw_depth.side_effect = far.draw_depth.side_effect = lambda: masks.append(fbo.color_mask)
+
+        self.prepass.render([far, near])
+        self.assertEqual(self.prepass.items, [near, far])
+        self.assertEqual(masks, [(False, False, False, False)] * 2)
+        self.assertEqual(fbo.color_mask, (True, True, True, True))
+        self.assertEqual(fbo.use.call_count, 2)
+        counters = self.app.stats.end_frame()
+        self.assertEqual((counters['draw_calls'], counters['triangles']), (2, 24))
+
+    def test_color_pass_depth_state(self):
+        # Test that the color pass tests for equal depths without writing them, and that it is restored
+        self.prepass.begin_color_pass()
+        self.assertEqual(self.app.ctx.depth_func, '==')
+        self.assertFalse(self.app.ctx.fbo.depth_mask)
+        self.prepass.end_color_pass()
+        self.assertEqual(self.app.ctx.depth_func, '<')
+        self.assertTrue(self.app.ctx.fbo.depth_mask)
+
+
+class TestOverdrawMeter(unittest.TestCase):
+
+    def test_measure_counts_fragments(self):
+        # Test that the fragments counted by the query are reported and divided by the pixels
+        app = Mock(WIN_SIZE=(100, 50))
+        app.stats = RenderStats()
+        app.ctx.query.return_value = MagicMock(samples=7500)
+        meter = OverdrawMeter(app)
+        draw = Mock()
+
+        meter.measure(draw, 'queued', 'visible')
+        draw.assert_called_once_with('queued', 'visible')
+        self.assertEqual(app.stats.end_frame()['fragments_shaded'], 7500)
+        self.assertEqual(meter.get_overdraw(), 1.5)
+
+    def test_view_draws_depth_programs(self):
+        # Test that the heat map draws every object with its depth VAO
+        app = Mock()
+        objects = [Mock(), Mock()]
+        OverdrawMeter(app, view=True).draw(objects)
+        for obj in objects:
+            obj.draw_depth.assert_called_once()
+            obj.draw.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from src.frame_capture import FrameCapture
+
+
+class TestFrameCapture(unittest.TestCase):
+
+    def setUp(self):
+        # Mock a 2x1 framebuffer whose reads copy the current frame number into the buffer
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Mock()
+        self.app.WIN_SIZE = (2, 1)
+        self.app.ctx.buffer.side_effect = lambda reserve: Mock()
+        self.frame = 0
+
+        def read_into(buffer, components):
+            buffer.read.return_value = bytes([self.frame]) * 6
+        self.app.fbo.read_into.side_effect = read_into
+
+        self.capture = FrameCapture(self.app, self.directory.name, buffers=3, format='raw')
+
+    def tearDown(self):
+        self.capture.destroy()
+        self.directory.cleanup()
+
+    def render(self, count):
+        for _ in range(count):
+            self.capture.capture()
+            self.frame += 1
+
+    def test_oldest_frame_mapped_once_ring_is_full(self):
+        # Test that a frame is only mapped N-1 frames after its read was queued
+        self.render(2)
+        self.assertEqual(self.capture.pending, 0)
+        self.render(1)
+        self.assertEqual(self.capture.pending, 1)
+        self.capture.buffers[0].read.assert_called_once()
+        self.capture.buffers[1].read.assert_not_called()
+
+    def test_all_frames_written_in_order(self):
+        # Test that every frame ends up in its own file after finish()
+        self.render(5)
+        self.capture.finish()
+
+        for index in range(5):
+            with open(self.capture.get_path(index), 'rb') as file:
+                self.assertEqual(file.read(), bytes([index]) * 6)
+        self.assertEqual(len(os.listdir(self.directory.name)), 5)
+        self.assertEqual(self.app.ctx.buffer.call_count, 3)
+
+    def test_writer_error_raised_on_render_thread(self):
+        # Test that a failed write is raised on the render thread instead of blocking the flushes
+        self.capture.write_frame = Mock(side_effect=[OSError('disk full')] + [None] * 20)
+        with self.assertRaises(OSError):
+            self.render(10)
+            self.capture.finish()
+        self.capture.finish()
+        self.assertLess(self.capture.write_frame.call_count, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
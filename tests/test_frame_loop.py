@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+from src.frame_loop import FixedTimestep, FramePacer
+
+
+class TestFixedTimestep(unittest.TestCase):
+
+    def test_steps_and_alpha(self):
+        # Test that whole steps are consumed and the remainder gives the interpolation factor
+        timestep = FixedTimestep(tick_rate=10)
+        self.assertEqual(timestep.advance(0.25), 2)
+        self.assertAlmostEqual(timestep.alpha, 0.5)
+        self.assertEqual(timestep.advance(0.06), 1)
+        self.assertAlmostEqual(timestep.alpha, 0.1)
+
+    def test_backlog_dropped_after_slow_frame(self):
+        # Test that a very slow frame runs at most max_steps and does not carry its backlog over
+        timestep = FixedTimestep(tick_rate=10, max_steps=3)
+        self.assertEqual(timestep.advance(2.0), 3)
+        self.assertLessEqual(timestep.accumulator, timestep.step)
+        self.assertEqual(timestep.advance(0.0), 1)
+
+
+class TestFramePacer(unittest.TestCase):
+
+    def test_uncapped_does_not_wait(self):
+        # Test that an uncapped pacer never sleeps
+        with patch('src.frame_loop.time') as mock_time:
+            FramePacer(fps_limit=0).wait()
+        mock_time.sleep.assert_not_called()
+
+    @patch('src.frame_loop.time')
+    def test_sleeps_until_end_of_slot(self, mock_time):
+        # Test that frames wait for the end of their slot and slots follow each other
+        mock_time.perf_counter.return_value = 1.0
+        pacer = FramePacer(fps_limit=10, policy='sleep')
+        pacer.wait()
+        self.assertAlmostEqual(pacer.deadline, 1.1)
+
+        mock_time.perf_counter.return_value = 1.04
+        pacer.wait()
+        self.assertAlmostEqual(mock_time.sleep.call_args[0][0], 0.06)
+        self.assertAlmostEqual(pacer.deadline, 1.2)
+
+    @patch('src.frame_loop.time')
+    def test_late_frame_restarts_schedule(self, mock_time):
+        # Test that a frame late by more than a slot starts a new schedule without waiting
+        mock_time.perf_counter.return_value = 1.0
+        pacer = FramePacer(fps_limit=10, policy='sleep')
+        pacer.wait()
+        mock_time.perf_counter.return_value = 1.5
+        pacer.wait()
+
+        mock_time.sleep.assert_not_called()
+        self.assertAlmostEqual(pacer.deadline, 1.6)
+
+    def test_unknown_policy(self):
+        # Test that unknown pacing policies are rejected
+        with self.assertRaises(ValueError):
+            FramePacer(policy='yield')
+
+
+if __name__ == '__main__':
+    unittest.main()
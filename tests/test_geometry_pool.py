@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import Mock
+import numpy as np
+from src.geometry_pool import GeometryPool, IndirectRenderer, MeshRange
+from src.transform_store import TransformStore
+
+
+def create_vbo(vertex_count, indices):
+    # Mock a mesh VBO with uint16 indices and 32-byte vertices
+    vbo = Mock(vertex_count=vertex_count, index_element_size=2)
+    vbo.vbo.size = vertex_count * 32
+    vbo.ibo.read.return_value = np.array(indices, dtype='u2').tobytes()
+    return vbo
+
+
+def create_buffer(data=None, reserve=0, dynamic=False):
+    buffer = Mock()
+    buffer.size = reserve if data is None else len(data)
+    return buffer
+
+
+class TestGeometryPool(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = Mock()
+        self.ctx.buffer.side_effect = create_buffer
+        self.pool = GeometryPool(self.ctx)
+
+    def test_meshes_appended_with_offsets(self):
+        # Test that the second mesh starts after the indices and vertices of the first
+        cube, cat = create_vbo(24, [0, 1, 2] * 12), create_vbo(100, [0, 1, 2] * 50)
+        self.assertEqual(self.pool.get_range(cube), MeshRange(0, 36, 0))
+        self.assertEqual(self.pool.get_range(cat), MeshRange(36, 150, 24))
+        self.assertEqual((self.pool.vertex_count, self.pool.index_count), (124, 186))
+
+    def test_mesh_added_once(self):
+        # Test that asking for the range of a pooled VBO again does not copy it again
+        cube = create_vbo(24, [0, 1, 2] * 12)
+        self.pool.get_range(cube)
+        self.pool.get_range(cube)
+        cube.ibo.read.assert_called_once()
+
+    def test_growth_copies_content_and_bumps_version(self):
+        # Test that a reallocation keeps the pooled vertices and invalidates the VAOs
+        self.pool.get_range(create_vbo(24, [0, 1, 2]))
+        old, version = self.pool.vbo, self.pool.version
+        self.pool.get_range(create_vbo(100, [0, 1, 2]))
+        self.assertIsNot(self.pool.vbo, old)
+        self.assertGreater(self.pool.version, version)
+        self.ctx.copy_buffer.assert_any_call(self.pool.vbo, old, size=24 * 32)
+        old.release.assert_called_once()
+
+
+class TestIndirectRenderer(unittest.TestCase):
+
+    def setUp(self):
+        # Mock an OpenGL 4.5 application with two meshes and two textures
+        self.app = Mock()
+        self.app.ctx.version_code = 450
+        self.app.ctx.buffer.side_effect = create_buffer
+        self.app.transforms = TransformStore()
+        self.vbos = {'cube': create_vbo(24, [0, 1, 2] * 12), 'cat': create_vbo(100, [0, 1, 2] * 50)}
+        self.app.mesh.vao.get_vbo.side_effect = self.vbos.get
+        self.app.mesh.vao.get_lod_name.side_effect = lambda vao_name, level: vao_name
+        self.app.mesh.vao.program.programs = {'instanced': Mock(), 'instanced_uniform_scale': Mock()}
+        self.textures = [Mock(), Mock()]
+
+        self.objects = []
+        for vao_name, texture in [('cube', 0), ('cat', 1), ('cat', 0), ('cube', 1)]:
+            obj = Mock(indirect=True, vao_name=vao_name, texture=self.textures[texture], lod=0)
+            obj.transform.index = self.app.transforms.add()
+            self.objects.append(obj)
+        self.objects.append(Mock(indirect=False))
+        self.renderer = IndirectRenderer(self.app, culling='cpu')
+
+    def test_commands_grouped_by_texture(self):
+        # Test that one command is built per indirect object, in runs sharing a texture
+        self.renderer.build(self.objects)
+        self.assertEqual(len(self.renderer.commands), 4)
+        self.assertEqual([(texture, first, count) for texture, first, count in self.renderer.groups],
+                         [(self.textures[0], 0, 2), (self.textures[1], 2, 2)])
+        # cube (36 indices at 0) then cat (150 indices at 36, base vertex 24), base instance = row
+        np.testing.assert_array_equal(self.renderer.commands[:2], [[36, 1, 0, 0, 0], [150, 1, 36, 24, 1]])
+
+    def test_cpu_culling_draws_one_call_per_texture(self):
+        # Test that culled objects get an instance count of 0 and each texture run is one call;
+        # the commands are cube, cat with texture 0 then cube, cat with texture 1
+        self.renderer.render(self.objects, Mock(), visible={self.objects[0], self.objects[1]})
+        np.testing.assert_array_equal(self.renderer.commands[:, 1], [1, 0, 0, 1])
+        self.assertEqual(self.renderer.vao.render_indirect.call_count, 2)
+        self.renderer.vao.render_indirect.assert_called_with(self.renderer.command_buffer, count=2, first=2)
+        self.app.stats.add.assert_any_call('draw_calls', 2)
+
+    def test_matrices_uploaded_only_after_a_move(self):
+        # Test that unchanged transforms skip the instance buffer upload
+        self.renderer.render(self.objects, Mock())
+        self.renderer.render(self.objects, Mock())
+        self.app.stats.add.assert_any_call('uploads_skipped')
+
+    def test_needs_opengl_43(self):
+        # Test that an OpenGL 3.3 context is rejected
+        self.app.ctx.version_code = 330
+        with self.assertRaises(RuntimeError):
+            IndirectRenderer(self.app)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import Mock
+import numpy as np
+from src.lod import LodSelector, simplify_mesh
+from src.transform_store import TransformStore
+
+
+def create_grid_mesh(side):
+    # A flat (side x side) quad grid in the xz plane facing up, in the '2f 3f 3f' layout
+    x, z = np.meshgrid(np.linspace(0, 1, side + 1), np.linspace(0, 1, side + 1))
+    vertices = np.zeros(((side + 1) ** 2, 8), dtype='f4')
+    vertices[:, 0], vertices[:, 1] = x.ravel(), z.ravel()
+    vertices[:, 3] = 1
+    vertices[:, 5], vertices[:, 7] = x.ravel(), z.ravel()
+    corners = (np.arange(side)[:, None] * (side + 1) + np.arange(side)).ravel()
+    indices = np.stack([corners, corners + side + 1, corners + 1,
+                        corners + 1, corners + side + 1, corners + side + 2], axis=1)
+    return vertices, indices.ravel().astype('u4')
+
+
+class TestSimplifyMesh(unittest.TestCase):
+
+    def test_fewer_triangles_same_bounds(self):
+        # Test that clustering a fine grid into 8 cells per side removes triangles and keeps its
+        # extent within a cell
+        vertices, indices = create_grid_mesh(64)
+        merged, merged_indices = simplify_mesh(vertices, indices, grid=8)
+        self.assertLess(len(merged_indices), len(indices) // 16)
+        self.assertEqual(merged_indices.dtype, np.uint16)
+        np.testing.assert_allclose(merged[:, 5:8].min(axis=0), [0, 0, 0], atol=1 / 8)
+        np.testing.assert_allclose(merged[:, 5:8].max(axis=0), [1, 0, 1], atol=1 / 8)
+
+    def test_normals_stay_unit_length(self):
+        # Test that the averaged normals are renormalized
+        vertices, indices = create_grid_mesh(16)
+        merged, _ = simplify_mesh(vertices, indices, grid=4)
+        np.testing.assert_allclose(np.linalg.norm(merged[:, 2:5], axis=1), 1, rtol=1e-5)
+
+
+class TestLodSelector(unittest.TestCase):
+
+    def setUp(self):
+        # Mock a 1000 pixel high window whose camera sits at the origin
+        self.app = Mock(WIN_SIZE=(1600, 1000))
+        self.camera = Mock(view_position=(0, 0, 0))
+        self.app.transforms = TransformStore()
+        self.selector = LodSelector(self.app, sizes=(100, 10), hysteresis=0.2)
+
+    def test_levels_with_hysteresis(self):
+        # Test that a model only switches once its size is 20% past a threshold
+        sizes = np.array([500, 90, 90, 70, 115, 125, 5])
+        levels = np.array([0, 0, 1, 0, 1, 1, 0])
+        np.testing.assert_array_equal(self.selector.select_levels(sizes, levels), [0, 0, 1, 1, 1, 0, 2])
+
+    def test_update_switches_far_models(self):
+        # Test that a distant model with levels of detail switches to a coarser one
+        obj = Mock(lod=0, lod_levels=3)
+        obj.transform.index = self.app.transforms.add()
+        obj.aabb.center.return_value = (0, 0, 0)
+        obj.aabb.radius.return_value = 1.0
+        self.app.transforms.matrices[obj.transform.index, 3, :3] = (0, 0, -1000)
+
+        self.assertTrue(self.selector.update([obj, Mock(lod_levels=1)], self.camera))
+        obj.set_lod.assert_called_once_with(2)
+        self.app.stats.add.assert_called_with('lod_switches', 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
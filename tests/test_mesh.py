@@ -24,6 +24,19 @@ class TestMesh(unittest.TestCase):
         self.assertEqual(mesh.vao, MockVAO.return_value)
         self.assertEqual(mesh.texture, MockTexture.return_value)
 
+    @patch('src.mesh.VAO')
+    @patch('src.mesh.Texture')
+    def test_initialization_with_loader(self, MockTexture, MockVAO):
+        # Create instance of Mesh loading its assets in the background
+        loader = Mock(version=3)
+        mesh = Mesh(self.mock_app, loader=loader)
+
+        # Check that the loader is handed to VAO and Texture and drives the version
+        MockVAO.assert_called_once_with(self.mock_app.ctx, loader)
+        MockTexture.assert_called_once_with(self.mock_app.ctx, loader)
+        self.assertEqual(mesh.version, 3)
+        self.assertEqual(Mesh(self.mock_app).version, 0)
+
     @patch('src.mesh.VAO')
     @patch('src.mesh.Texture')
     def test_destroy(self, MockTexture, MockVAO):
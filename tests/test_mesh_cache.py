@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from src.mesh_cache import MeshCache
+
+
+class TestMeshCache(unittest.TestCase):
+
+    def setUp(self):
+        # Use a temporary directory for both the source file and the cache
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, 'model.obj')
+        with open(self.source, 'w') as file:
+            file.write('v 0 0 0\n')
+        self.cache = MeshCache(os.path.join(self.temp_dir.name, 'cache'))
+        self.vertices = np.arange(24 * 8, dtype='f4').reshape(24, 8)
+        self.indices = np.arange(36, dtype='u2') % 24
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        # Test that arrays and metadata come back memory-mapped and unchanged
+        self.assertIsNone(self.cache.load(self.source))
+        self.cache.store(self.source, {'vertices': self.vertices, 'indices': self.indices},
+                         format='2f 3f 3f', material={'name': 'Cat'})
+
+        entry = self.cache.load(self.source)
+        self.assertEqual(entry['format'], '2f 3f 3f')
+        self.assertEqual(entry['material'], {'name': 'Cat'})
+        vertices, indices = entry['arrays']['vertices'], entry['arrays']['indices']
+        self.assertIsInstance(vertices, np.memmap)
+        self.assertEqual(vertices.offset % MeshCache.ALIGNMENT, 0)
+        np.testing.assert_array_equal(vertices, self.vertices)
+        np.testing.assert_array_equal(indices, self.indices)
+        self.assertEqual(indices.dtype, np.uint16)
+
+    def test_modified_source_invalidates(self):
+        # Test that an entry is stale once the source content changes
+        self.cache.store(self.source, {'vertices': self.vertices})
+        with open(self.source, 'w') as file:
+            file.write('v 1 1 1\n')
+        self.assertIsNone(self.cache.load(self.source))
+
+    def test_touched_source_stays_valid(self):
+        # Test that a new mtime with the same content is accepted thanks to the content hash
+        self.cache.store(self.source, {'vertices': self.vertices})
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(self.cache.load(self.source))
+
+    def test_touched_source_hashed_once(self):
+        # Test that the new mtime is recorded after a hash match, so later loads skip the hash
+        self.cache.store(self.source, {'vertices': self.vertices})
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.cache.load(self.source)
+
+        with patch.object(MeshCache, 'file_hash') as file_hash:
+            entry = self.cache.load(self.source)
+        file_hash.assert_not_called()
+        self.assertEqual(entry['mtime_ns'], stat.st_mtime_ns + 10 ** 9)
+        np.testing.assert_array_equal(entry['arrays']['vertices'], self.vertices)
+
+    def test_corrupt_file_ignored(self):
+        # Test that a cache file without the magic number is treated as a miss
+        os.makedirs(self.cache.cache_dir)
+        with open(self.cache.get_cache_path(self.source), 'wb') as file:
+            file.write(b'garbage')
+        self.assertIsNone(self.cache.load(self.source))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import logging
+import os
+import tempfile
+import unittest
+import numpy as np
+import pywavefront
+from src.obj_loader import ObjLoader
+
+logging.getLogger('pywavefront').setLevel(logging.ERROR)
+
+MTL = """newmtl Fur
+\tKd 1.0 1.0 1.0
+\tmap_Kd -bm 0.5 -s 1 1 1 fur.jpg
+newmtl Eyes
+\tmap_Kd eyes.jpg
+"""
+
+OBJ = """mtllib test.mtl
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 0.5 1.5 0.1
+vt 0 0
+vt 1 0 0
+vt 1 1
+vt 0 1
+vn 0 0 1
+g group
+usemtl Fur
+f 1/1/1 2/2/1 3/3/1 4/4/1
+s off
+f 1/1/1 2/2/1 5/3/1
+usemtl Eyes
+f 1/1/1 2/2/1 3/3/1 5/4/1 4/4/1
+usemtl Fur
+f -5/-4/-1 -4/-3/-1 -3/-2/-1
+"""
+
+
+class TestObjLoader(unittest.TestCase):
+
+    def setUp(self):
+        # Write the test files in a temporary directory
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.write('test.mtl', MTL)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def assert_same_as_pywavefront(self, path):
+        loader = ObjLoader(path)
+        reference = pywavefront.Wavefront(path, create_materials=True)
+        self.assertEqual(list(loader.materials), list(reference.materials))
+        for name, material in reference.materials.items():
+            vertices = np.array(material.vertices, dtype='f4')
+            self.assertEqual(loader.materials[name].vertex_format, material.vertex_format)
+            np.testing.assert_array_equal(loader.materials[name].vertices.view('u4'), vertices.view('u4'))
+        return loader
+
+    def test_polygons_and_materials(self):
+        # Test triangulation, material switches, relative indices and 3D texture coordinates
+        loader = self.assert_same_as_pywavefront(self.write('test.obj', OBJ))
+        self.assertEqual(len(loader.materials['Fur'].vertices), (2 + 1 + 1) * 3 * 8)
+        self.assertEqual(len(loader.materials['Eyes'].vertices), 3 * 3 * 8)
+
+    def test_texture_paths(self):
+        # Test that the diffuse textures are resolved next to the MTL file, options skipped
+        loader = ObjLoader(self.write('test.obj', OBJ))
+        self.assertEqual(loader.materials['Fur'].texture, os.path.join(self.temp_dir.name, 'fur.jpg'))
+        self.assertEqual(loader.materials['Eyes'].texture, os.path.join(self.temp_dir.name, 'eyes.jpg'))
+
+    def test_default_material_and_normals_only(self):
+        # Test faces preceding any usemtl with the v//vn index format and CRLF line endings
+        text = 'v 0 0 0\r\nv 1 0 0\r\nv 1 1 0\r\nv 0 1 0\r\nvn 0 0 1\r\nf 1//1 2//1 3//1 4//1\r\n'
+        loader = self.assert_same_as_pywavefront(self.write('plain.obj', text))
+        self.assertEqual(loader.materials['default0'].vertex_format, 'N3F_V3F')
+
+    def test_vertex_colors(self):
+        # Test positions followed by colors with position only faces
+        text = 'v 0 0 0 1 0 0\nv 1 0 0 0 1 0\nv 1 1 0 0 0 1\nf 1 2 3\n'
+        loader = self.assert_same_as_pywavefront(self.write('colors.obj', text))
+        self.assertEqual(loader.materials['default0'].vertex_format, 'C3F_V3F')
+
+    def test_invalid_files(self):
+        # Test that mixed index formats and unknown materials are rejected
+        mixed = self.write('mixed.obj', 'v 0 0 0\nvn 0 0 1\nf 1//1 1//1 1//1\nf 1 1 1\n')
+        unknown = self.write('unknown.obj', 'mtllib test.mtl\nv 0 0 0\nusemtl Glass\nf 1 1 1\n')
+        self.assertRaises(ValueError, ObjLoader, mixed)
+        self.assertRaises(ValueError, ObjLoader, unknown)
+
+    def test_get_triangles(self):
+        # Test the fan order of a triangle followed by a pentagon
+        triangles = ObjLoader.get_triangles(np.array([3, 5]))
+        np.testing.assert_array_equal(triangles, [[0, 1, 2], [3, 4, 5], [6, 3, 5], [7, 3, 6]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock, Mock
+import glm
+from src.bounding_volume import AABB
+from src.occlusion import OcclusionCuller
+from src.render_stats import RenderStats
+
+
+class TestOcclusionCuller(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the application with a camera at the origin, a cube mesh spanning [-1, 1] and
+        # queries usable as context managers
+        self.app = Mock()
+        self.app.camera.view_position = glm.vec3(0, 0, 0)
+        self.app.stats = RenderStats()
+        self.app.mesh.vao.get_vbo.return_value.aabb = AABB((-1, -1, -1), (1, 1, 1))
+        self.app.ctx.query.side_effect = lambda **kwargs: MagicMock(samples=0)
+        self.app.mesh.vao.get_depth_vao.return_value.program = MagicMock()
+        self.culler = OcclusionCuller(self.app)
+
+    def make_object(self, z):
+        obj = Mock()
+        obj.get_world_aabb.return_value = AABB((-1, -1, z - 1), (1, 1, z + 1))
+        return obj
+
+    def test_results_read_one_frame_later(self):
+        # Test that an object is only retested with its box after its query found it hidden
+        front, behind = self.make_object(-5), self.make_object(-10)
+        objects = [front, behind]
+        self.assertEqual(self.culler.begin_frame(objects, set(objects)), {front, behind})
+        for obj in objects:
+            self.culler.draw(obj)
+            obj.draw.assert_called_once()
+        self.culler.queries[front].samples = 100
+
+        self.assertEqual(self.culler.begin_frame(objects, set(objects)), {front})
+        self.assertEqual(self.culler.occluded, [behind])
+        self.assertEqual(self.app.stats.end_frame()['objects_occluded'], 1)
+
+    def test_box_around_camera_drawn(self):
+        # Test that a hidden object whose box reaches the camera is drawn without a box test
+        obj = self.make_object(-1)
+        self.culler.hidden.add(obj)
+        self.assertEqual(self.culler.begin_frame([obj], {obj}), {obj})
+
+    def test_retested_objects_drawn_conditionally(self):
+        # Test that the box of a hidden object is queried and the object drawn on its result
+        obj = self.make_object(-10)
+        self.culler.hidden.add(obj)
+        self.culler.begin_frame([obj], {obj})
+        self.culler.test()
+
+        query = self.culler.queries[obj]
+        query.__enter__.assert_called_once()
+        query.crender.__enter__.assert_called_once()
+        obj.draw.assert_called_once()
+        self.assertEqual(self.culler.pending, [obj])
+        self.assertEqual(self.app.stats.end_frame()['occlusion_tests'], 1)
+
+    def test_box_matrix(self):
+        # Test that the cube mesh is mapped onto the corners of the world-space box
+        m_model = self.culler.get_box_matrix(AABB((2, 0, -4), (6, 1, 0)))
+        self.assertEqual(glm.vec3(m_model * glm.vec4(-1, -1, -1, 1)), glm.vec3(2, 0, -4))
+        self.assertEqual(glm.vec3(m_model * glm.vec4(1, 1, 1, 1)), glm.vec3(6, 1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
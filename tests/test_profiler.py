@@ -0,0 +1,89 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, Mock
+from src.profiler import Profiler, NULL_SCOPE
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        # Create an enabled profiler with a mocked context whose timer queries took 2 ms
+        self.ctx = Mock()
+        self.ctx.query.side_effect = lambda time: MagicMock(elapsed=2_000_000)
+        self.profiler = Profiler(self.ctx, capacity=3, enabled=True)
+
+    def profile_frame(self, counters=None):
+        self.profiler.begin_frame()
+        with self.profiler.scope('render'):
+            with self.profiler.scope('scene'):
+                pass
+            with self.profiler.gpu_scope('frame'):
+                pass
+        self.profiler.add_time('objects.draw', 5)
+        self.profiler.add_time('objects.draw', 7)
+        self.profiler.end_frame(counters)
+
+    def test_disabled_profiler_records_nothing(self):
+        # Test that a disabled profiler hands out the no-op scope and keeps no frame
+        self.profiler.enabled = False
+        self.assertIs(self.profiler.scope('render'), NULL_SCOPE)
+        self.assertIs(self.profiler.gpu_scope('frame'), NULL_SCOPE)
+        self.profiler.begin_frame()
+        self.profiler.end_frame()
+        self.assertEqual(len(self.profiler.frames), 0)
+        self.ctx.query.assert_not_called()
+
+    def test_nested_scopes_and_totals(self):
+        # Test that nested scopes are recorded with their depth, inner scopes first
+        self.profile_frame({'draw_calls': 4})
+        record = self.profiler.frames[-1]
+
+        self.assertEqual([(name, depth) for name, _, _, depth in record['scopes']],
+                         [('scene', 1), ('render', 0)])
+        self.assertEqual(record['totals'], {'objects.draw': 12})
+        self.assertEqual(record['counters'], {'draw_calls': 4})
+
+    def test_gpu_times_read_one_frame_late(self):
+        # Test that GPU times are read at the end of the next frame and queries are reused
+        self.profile_frame()
+        first = self.profiler.frames[-1]
+        self.assertEqual(first['gpu'], {})
+
+        self.profile_frame()
+        self.assertEqual(first['gpu'], {'frame': 2_000_000})
+        self.profile_frame()
+        self.assertEqual(self.ctx.query.call_count, 2)
+
+    def test_ring_buffer_capacity(self):
+        # Test that only the last frames are kept
+        for _ in range(5):
+            self.profile_frame()
+        self.assertEqual([record['index'] for record in self.profiler.frames], [2, 3, 4])
+
+    def test_dump_formats(self):
+        # Test that the frames are dumped as JSON, CSV and Chrome trace depending on the extension
+        self.profile_frame({'draw_calls': 4})
+        self.profile_frame({'draw_calls': 5})
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ('profile.json', 'profile.csv', 'profile.trace.json')]
+            for path in paths:
+                self.profiler.dump(path)
+            with open(paths[0]) as file:
+                frames = json.load(file)
+            with open(paths[1], newline='') as file:
+                rows = list(csv.DictReader(file))
+            with open(paths[2]) as file:
+                trace = json.load(file)
+
+        self.assertEqual(frames[0]['scopes'][0]['name'], 'scene')
+        self.assertEqual([row['draw_calls'] for row in rows], ['4', '5'])
+        self.assertEqual(float(rows[0]['gpu.frame_ms']), 2.0)
+        names = {event['name'] for event in trace['traceEvents']}
+        self.assertTrue({'frame', 'render', 'scene', 'counters'} <= names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import Mock
+import glm
+from src.render_queue import RenderQueue
+from src.render_stats import RenderStats
+
+
+class TestRenderQueue(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the application with a camera at the origin and real counters
+        self.mock_app = Mock()
+        self.mock_app.camera.view_position = glm.vec3(0, 0, 0)
+        self.mock_app.stats = RenderStats()
+        self.queue = RenderQueue(self.mock_app)
+
+        self.program = Mock()
+        self.vao = Mock()
+        self.textures = [Mock(), Mock()]
+
+    def make_object(self, texture, z):
+        obj = Mock()
+        obj.program, obj.vao, obj.texture = self.program, self.vao, texture
+        obj.triangle_count = 12
+        obj.pos = glm.vec3(0, 0, z)
+        return obj
+
+    def test_sorted_by_state_then_depth(self):
+        # Test that objects are grouped by texture and sorted front to back within a group
+        far_a = self.make_object(self.textures[0], -10)
+        near_b = self.make_object(self.textures[1], -1)
+        near_a = self.make_object(self.textures[0], -2)
+        self.queue.build([far_a, near_b, near_a])
+        self.assertEqual(self.queue.items, [near_a, far_a, near_b])
+
+    def test_front_to_back_ignores_state(self):
+        # Test that the depth comes before the render state with front_to_back
+        far_a = self.make_object(self.textures[0], -10)
+        near_b = self.make_object(self.textures[1], -1)
+        near_a = self.make_object(self.textures[0], -2)
+        self.queue.front_to_back = True
+        self.queue.build([far_a, near_b, near_a])
+        self.assertEqual(self.queue.items, [near_b, near_a, far_a])
+
+    def test_redundant_texture_binds_skipped(self):
+        # Test that interleaved textures are bound once per group instead of once per object
+        objects = [self.make_object(self.textures[i % 2], -i) for i in range(6)]
+        self.queue.render(objects)
+
+        self.textures[0].use.assert_called_once()
+        self.textures[1].use.assert_called_once()
+        for obj in objects:
+            obj.update.assert_called_once()
+            obj.draw.assert_called_once()
+
+        counters = self.mock_app.stats.end_frame()
+        self.assertEqual(counters['texture_binds'], 2)
+        self.assertEqual(counters['program_changes'], 1)
+        self.assertEqual(counters['texture_binds_saved'], 6 - 2)
+
+    def test_draw_hook(self):
+        # Test that a draw function replaces the objects' draw calls, e.g. to wrap them in queries
+        objects = [self.make_object(self.textures[0], -i) for i in range(3)]
+        draw = Mock()
+        self.queue.render(objects, draw=draw)
+        self.assertEqual(draw.call_count, 3)
+        for obj in objects:
+            obj.draw.assert_not_called()
+
+    def test_order_rebuilt_only_when_invalidated(self):
+        # Test that the order is cached between frames until the scene changes
+        objects = [self.make_object(self.textures[0], -1)]
+        self.queue.render(objects)
+        self.queue.get_sort_key = Mock()
+
+        self.queue.render(objects)
+        self.queue.get_sort_key.assert_not_called()
+
+        self.queue.invalidate()
+        self.queue.get_sort_key.return_value = (0, 0, 0, 0.0)
+        self.queue.render(objects)
+        self.queue.get_sort_key.assert_called_once()
+
+    def test_state_ids_released_on_invalidate(self):
+        # Test that the GL objects are keyed themselves and forgotten when the scene changes
+        objects = [self.make_object(self.textures[0], -1)]
+        self.queue.render(objects)
+        self.assertIn(self.textures[0], self.queue.state_ids)
+
+        self.queue.invalidate()
+        self.assertEqual(self.queue.state_ids, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
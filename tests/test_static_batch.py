@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import MagicMock, Mock
+import glm
+import numpy as np
+from src.bounding_volume import AABB
+from src.static_batch import StaticBatch, StaticBatcher, bake_indices, bake_vertices
+from src.transform import Transform
+from src.transform_store import TransformStore
+from src.update_stage import CameraState
+
+
+class TestBakeVertices(unittest.TestCase):
+
+    def test_matches_model_matrix(self):
+        # Test that the baked positions and normals match the model and normal matrices
+        vertices = np.array([[0.5, 0.25, 0, 0, 2, 1, 2, 3]], dtype='f4')
+        transform = Transform((4, 5, 6), glm.vec3(0.3, -0.7, 1.1), (2, 1, 0.5))
+        store, index = transform.store, transform.index
+        transform.rebuild()
+
+        baked = bake_vertices(vertices, store.matrices[index:index + 1], store.normals[index:index + 1])
+        position = glm.vec3(transform.m_model * glm.vec4(1, 2, 3, 1))
+        normal = transform.m_normal * glm.vec3(0, 0, 1)
+        np.testing.assert_allclose(baked[0, :2], (0.5, 0.25))
+        np.testing.assert_allclose(baked[0, 5:8], tuple(position), atol=1e-5)
+        np.testing.assert_allclose(baked[0, 2:5], tuple(normal), atol=1e-5)
+
+    def test_one_copy_per_instance(self):
+        # Test that each instance gets its own copy of the mesh, with repeated indices
+        store = TransformStore()
+        store.extend([(0, 0, 0), (10, 0, 0)])
+        store.update()
+        vertices = np.zeros((3, 8), dtype='f4')
+        vertices[:, 4] = 1
+        vertices[:, 5] = (0, 1, 2)
+
+        baked = bake_vertices(vertices, store.matrices[:2], store.normals[:2])
+        np.testing.assert_allclose(baked[:, 5], (0, 1, 2, 10, 11, 12))
+        np.testing.assert_array_equal(bake_indices([0, 1, 2], 3, 2, base_vertex=6), (6, 7, 8, 9, 10, 11))
+
+
+class TestStaticBatch(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the context with buffers of the reserved size
+        self.ctx = Mock()
+        self.ctx.buffer.side_effect = lambda reserve: Mock(size=reserve)
+        self.batch = StaticBatch(self.ctx, Mock(), Mock())
+
+    def test_grows_by_doubling(self):
+        # Test that a full buffer is reallocated with twice its size and written entirely
+        self.batch.add('a', np.zeros((4, 8), dtype='f4'), [0, 1, 2])
+        self.batch.upload()
+        vbo = self.batch.vbo
+        self.assertEqual(vbo.size, 4 * 32)
+
+        self.batch.add('b', np.ones((2, 8), dtype='f4'), [0, 1])
+        self.batch.upload()
+        self.assertIsNot(self.batch.vbo, vbo)
+        self.assertEqual(self.batch.vbo.size, 8 * 32)
+        self.batch.vbo.write.assert_called_once()
+        self.assertEqual(self.batch.vbo.write.call_args.kwargs['offset'], 0)
+        np.testing.assert_array_equal(self.batch.indices, (0, 1, 2, 4, 5))
+        self.assertEqual(self.ctx.vertex_array.call_count, 2)
+
+    def test_moved_object_uploads_its_range(self):
+        # Test that writing the vertices of a model uploads only its range
+        self.batch.add('a', np.zeros((4, 8), dtype='f4'), [0, 1, 2])
+        self.batch.add('b', np.zeros((2, 8), dtype='f4'), [0, 1])
+        self.batch.upload()
+        vbo = self.batch.vbo
+        vbo.write.reset_mock()
+
+        self.batch.write('b', np.ones((2, 8), dtype='f4'))
+        self.batch.upload()
+        self.assertIs(self.batch.vbo, vbo)
+        data = vbo.write.call_args.args[0]
+        self.assertEqual(data.shape, (2, 8))
+        self.assertEqual(vbo.write.call_args.kwargs['offset'], 4 * 32)
+        self.assertEqual(self.batch.aabb.max, glm.vec3(1, 1, 1))
+
+
+class TestStaticBatcher(unittest.TestCase):
+
+    def test_rejects_per_instance_textures(self):
+        # Test that instanced groups sampling a texture array cannot be batched
+        batcher = StaticBatcher(MagicMock())
+        with self.assertRaises(ValueError):
+            batcher.add(Mock(texture_ids=(0, 1)))
+
+    def test_instance_moves_tracked(self):
+        # Test that moving an instance of a batched group marks the group as moved
+        batcher = StaticBatcher(MagicMock())
+        group = Mock(texture_ids=None)
+        on_instance_change = group.instances.on_change
+        batcher.add(group)
+
+        group.instances.on_change(3)
+        on_instance_change.assert_called_once_with(3)
+        self.assertEqual(batcher.moved, {group})
+
+    def test_culled_with_given_camera(self):
+        # Test that the batches are culled with the camera the frame is rendered with, which
+        # lags behind the application's camera with an update stage
+        app = MagicMock()
+        app.camera.m_proj = glm.perspective(glm.radians(50), 16 / 9, 0.1, 100)
+        app.camera.m_view = glm.lookAt(glm.vec3(0, 0, 0), glm.vec3(0, 0, 1), glm.vec3(0, 1, 0))
+        camera = CameraState(app.camera.m_proj, glm.lookAt(glm.vec3(0, 0, 0), glm.vec3(0, 0, -1), glm.vec3(0, 1, 0)),
+                             glm.vec3(0, 0, 0))
+        batcher = StaticBatcher(app)
+        batch = Mock(aabb=AABB(glm.vec3(-1, -1, -11), glm.vec3(1, 1, -9)), radius=1, index_count=3)
+        batcher.batches = {0: batch}
+
+        batcher.render(camera)
+        batch.render.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+import numpy as np
+from src.srgb import GL_SRGB8, srgb_to_linear
+from src.texture import Texture
+from src.texture_cache import TextureCache
+
+
+class TestTexture(unittest.TestCase):
+
+    def setUp(self):
+        # Create a Texture without loading the predefined images, with a mocked context and cache
+        self.texture = Texture.__new__(Texture)
+        self.texture.ctx = Mock()
+        self.texture.cache = Mock()
+        self.texture.loader = None
+
+    def test_get_level_count(self):
+        # Test the length of full mipmap chains
+        self.assertEqual(Texture.get_level_count((1, 1)), 1)
+        self.assertEqual(Texture.get_level_count((1024, 1024)), 11)
+        self.assertEqual(Texture.get_level_count((4537, 3360)), 13)
+
+    @patch('src.texture.pg')
+    def test_cache_hit_skips_decoding(self, mock_pg):
+        # Test that cached levels are returned without decoding the image
+        levels = [np.zeros(12, dtype='u1'), np.zeros(6, dtype='u1')]
+        self.texture.cache.load.return_value = {
+            'image_size': [2, 2], 'components': 3, 'levels': 2,
+            'arrays': {'level0': levels[0], 'level1': levels[1]}}
+
+        image = self.texture.read_texture('image.jpg')
+        mock_pg.image.load.assert_not_called()
+        self.assertEqual(image['size'], (2, 2))
+        self.assertTrue(image['cached'])
+        self.assertIs(image['levels'][1], levels[1])
+
+    def test_create_from_cache_uploads_levels(self):
+        # Test that cached levels are written one by one into an empty texture
+        levels = [b'\0' * 12, b'\0' * 3]
+        gl_texture = self.texture.create_texture({'path': 'image.jpg', 'size': (2, 2),
+                                                  'levels': levels, 'cached': True})
+
+        self.texture.ctx.texture.assert_called_once_with(size=(2, 2), components=3, data=None,
+                                                         internal_format=GL_SRGB8)
+        gl_texture.write.assert_any_call(levels[0], level=0)
+        gl_texture.write.assert_any_call(levels[1], level=1)
+        self.texture.cache.store.assert_not_called()
+
+    def test_create_from_image_fills_cache(self):
+        # Test that a decoded image is mipmapped and its levels are read back into the cache
+        gl_texture = self.texture.ctx.texture.return_value
+        gl_texture.read.side_effect = [b'\1' * 48, b'\2' * 12, b'\3' * 3]
+        self.texture.create_texture({'path': 'image.jpg', 'size': (4, 4),
+                                     'levels': [b'\1' * 48], 'cached': False})
+
+        gl_texture.build_mipmaps.assert_called_once()
+        args, metadata = self.texture.cache.store.call_args
+        self.assertEqual(sorted(args[1]), ['level0', 'level1', 'level2'])
+        self.assertEqual(metadata, {'image_size': (4, 4), 'components': 3, 'levels': 3})
+
+    def test_cache_written_by_loader(self):
+        # Test that the levels are read back on the GL thread and written on the loader's pool
+        self.texture.loader = Mock()
+        gl_texture = self.texture.ctx.texture.return_value
+        gl_texture.read.side_effect = [b'\1' * 48, b'\2' * 12, b'\3' * 3]
+        self.texture.create_texture({'path': 'image.jpg', 'size': (4, 4),
+                                     'levels': [b'\1' * 48], 'cached': False})
+
+        self.assertEqual(gl_texture.read.call_count, 3)
+        self.texture.cache.store.assert_not_called()
+        self.texture.loader.submit.call_args.args[0]()
+        self.texture.cache.store.assert_called_once()
+
+    def test_texture_array_packs_layers(self):
+        # Test that the images are packed into one texture array, built once per set of IDs
+        self.texture.paths = {0: 'a.jpg', 1: 'b.jpg'}
+        self.texture.texture_arrays = {}
+        self.texture.read_texture = lambda path: {'path': path, 'size': (2, 2), 'cached': False,
+                                                  'levels': [path[0].encode() * 12]}
+
+        array = self.texture.get_texture_array([1, 0], layer_size=(2, 2))
+        self.assertIs(self.texture.get_texture_array([1, 0], layer_size=(2, 2)), array)
+
+        # the sRGB layers are decoded to linear half floats
+        kwargs = self.texture.ctx.texture_array.call_args.kwargs
+        self.assertEqual((kwargs['size'], kwargs['components'], kwargs['dtype']), ((2, 2, 2), 3, 'f2'))
+        expected = srgb_to_linear(np.frombuffer(b'b' * 12 + b'a' * 12, dtype='u1') / 255).astype('f2')
+        np.testing.assert_array_equal(kwargs['data'], expected)
+        array.build_mipmaps.assert_called_once()
+
+    def test_srgb_decoding(self):
+        # Test that the sRGB transfer function maps the ends to themselves and mid-grey to about 0.214
+        np.testing.assert_allclose(srgb_to_linear([0, 0.5, 1]), [0, 0.214, 1], atol=1e-3)
+        self.assertAlmostEqual(float(srgb_to_linear(0.04045)), 0.04045 / 12.92)
+
+    def test_texture_cache_files(self):
+        # Test that texture cache files are told apart from mesh cache files
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = TextureCache(cache_dir).get_cache_path('textures/img.jpg')
+        self.assertTrue(path.endswith('.tex'))
+        self.assertNotEqual(TextureCache.MAGIC, TextureCache.__mro__[1].MAGIC)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import Mock
+import glm
+from src.transform import Transform
+
+
+class TestTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.transform = Transform(pos=(1, 2, 3), rotation=(0.1, 0.2, 0.3), scale=(2, 1, 1))
+
+    def test_model_matrix(self):
+        # Test that the cached matrix matches the translate/rotate/scale chain
+        expected = glm.translate(glm.mat4(), glm.vec3(1, 2, 3))
+        expected = glm.rotate(expected, 0.1, glm.vec3(1, 0, 0))
+        expected = glm.rotate(expected, 0.2, glm.vec3(0, 1, 0))
+        expected = glm.rotate(expected, 0.3, glm.vec3(0, 0, 1))
+        expected = glm.scale(expected, glm.vec3(2, 1, 1))
+        self.assertEqual(self.transform.m_model, expected)
+
+    def test_matrix_cached_until_changed(self):
+        # Test that reading the matrix clears the dirty flag and does not rebuild it again
+        self.assertTrue(self.transform.dirty)
+        m_model = self.transform.m_model
+        self.assertFalse(self.transform.dirty)
+
+        self.transform.rebuild = Mock()
+        self.assertIs(self.transform.m_model, m_model)
+        self.transform.rebuild.assert_not_called()
+
+    def test_setters_invalidate(self):
+        # Test that each setter marks the transform dirty and bumps its version
+        for name, value in (('pos', (0, 0, 0)), ('rotation', (0, 1, 0)), ('scale', (3, 3, 3))):
+            self.transform.rebuild()
+            version = self.transform.version
+            setattr(self.transform, name, value)
+            self.assertTrue(self.transform.dirty)
+            self.assertEqual(self.transform.version, version + 1)
+            self.assertEqual(getattr(self.transform, name), glm.vec3(value))
+
+    def test_getters_return_copies(self):
+        # Test that mutating a returned vector does not change the transform silently
+        pos = self.transform.pos
+        pos.x = 100
+        self.assertEqual(self.transform.pos, glm.vec3(1, 2, 3))
+
+    def test_normal_matrix(self):
+        # Test that the normal matrix is the inverse transpose of the upper 3x3 model matrix
+        expected = glm.transpose(glm.inverse(glm.mat3(self.transform.m_model)))
+        self.assertEqual(self.transform.m_normal, expected)
+
+        self.transform.scale = (1, 1, 4)
+        expected = glm.transpose(glm.inverse(glm.mat3(self.transform.m_model)))
+        self.assertEqual(self.transform.m_normal, expected)
+
+    def test_on_change_callback(self):
+        # Test that the owner is notified when the transform becomes dirty
+        on_change = Mock()
+        transform = Transform(on_change=on_change)
+        transform.pos = (1, 0, 0)
+        on_change.assert_called_once_with(transform)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import Mock
+import glm
+import numpy as np
+from src.transform import Transform
+from src.transform_store import TransformStore
+
+
+class TestTransformStore(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.positions = rng.uniform(-10, 10, (40, 3)).astype('f4')
+        self.rotations = rng.uniform(-3, 3, (40, 3)).astype('f4')
+        self.scales = rng.uniform(0.5, 2, (40, 3)).astype('f4')
+        self.store = TransformStore(capacity=4)
+        self.store.extend(self.positions, self.rotations, self.scales)
+
+    def test_vectorized_matrices_match_glm(self):
+        # Test that the batch computation matches the scalar glm chain of Transform.compose
+        self.assertEqual(self.store.update(), 40)
+        for i in range(40):
+            expected = Transform.compose(glm.vec3(*self.positions[i]), glm.vec3(*self.rotations[i]),
+                                         glm.vec3(*self.scales[i]))
+            np.testing.assert_allclose(self.store.matrices[i],
+                                       np.array(expected.to_list(), dtype='f4'), atol=1e-5)
+
+    def test_normal_matrices_match_inverse_transpose(self):
+        # Test that the normal matrices computed without inversion match the glm inverse transpose
+        self.store.update()
+        for i in range(40):
+            expected = glm.transpose(glm.inverse(glm.mat3(glm.mat4.from_bytes(self.store.matrices[i].tobytes()))))
+            np.testing.assert_allclose(self.store.normals[i], np.array(expected.to_list(), dtype='f4'),
+                                       rtol=1e-4, atol=1e-5)
+
+    def test_zero_scale_normals_finite(self):
+        # Test that a zero scale gives a zero column in the normal matrix rather than NaN
+        index = self.store.add(scale=(0, 1, 1))
+        self.store.update()
+        self.assertTrue(np.isfinite(self.store.normals[index]).all())
+        np.testing.assert_array_equal(self.store.normals[index, 0], (0, 0, 0))
+
+    def test_uniform_scale(self):
+        # Test that only scales equal along every axis count as uniform
+        self.assertTrue(TransformStore.is_uniform_scale([(0.05, 0.05, 0.05), (2, 2, 2)]))
+        self.assertFalse(TransformStore.is_uniform_scale([(0.05, 0.05, 0.05), (4, 1, 4)]))
+
+    def test_growth_keeps_rows(self):
+        # Test that growing past the initial capacity keeps the existing rows
+        self.assertEqual(len(self.store), 40)
+        self.assertGreaterEqual(len(self.store.positions), 40)
+        np.testing.assert_array_equal(self.store.positions[:40], self.positions)
+        np.testing.assert_array_equal(self.store.scales[:40], self.scales)
+
+    def test_update_only_dirty_rows(self):
+        # Test that only rows marked dirty are rebuilt
+        self.store.update()
+        self.store.positions[[3, 7]] = 0
+        self.store.mark_dirty(np.array([3, 7]))
+        self.assertEqual(self.store.update(), 2)
+        self.assertEqual(self.store.update(), 0)
+        np.testing.assert_array_equal(self.store.matrices[3][3, :3], (0, 0, 0))
+
+    def test_row_view(self):
+        # Test that a Transform view reads and writes its row and sees batch rebuilds
+        self.store.update()
+        view = self.store[5]
+        self.assertEqual(view.pos, glm.vec3(*self.positions[5]))
+
+        view.pos = (1, 2, 3)
+        self.assertTrue(self.store.dirty[5])
+        self.store.update()
+        self.assertFalse(view.dirty)
+        self.assertEqual(view.m_model[3], glm.vec4(1, 2, 3, 1))
+
+    def test_on_change(self):
+        # Test that the store reports changed rows
+        self.store.on_change = Mock()
+        self.store[2].scale = (1, 1, 1)
+        self.store.on_change.assert_called_once_with(2)
+
+    def test_shared_store(self):
+        # Test that transforms created on a shared store each get their own row
+        store = TransformStore()
+        a = Transform(pos=(1, 0, 0), store=store)
+        b = Transform(pos=(0, 1, 0), store=store)
+        self.assertEqual((a.index, b.index), (0, 1))
+        self.assertEqual(store.update(), 2)
+        self.assertEqual(b.m_model[3], glm.vec4(0, 1, 0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import Mock
+import glm
+import numpy as np
+from src.camera import Camera
+from src.light import Light
+from src.uniform_buffer import FrameUBO, FRAME_BINDING
+
+
+class TestFrameUBO(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the application with a real camera and light but no OpenGL context
+        self.mock_app = Mock()
+        self.mock_app.WIN_SIZE = (800, 600)
+        self.mock_app.camera = Camera(self.mock_app)
+        self.mock_app.light = Light(position=(1, 2, 3), color=(0.5, 0.5, 0.5))
+        self.frame_ubo = FrameUBO(self.mock_app)
+
+    def test_buffer_bound_to_frame_binding(self):
+        # Test that the buffer is allocated with the std140 block size and bound once
+        self.mock_app.ctx.buffer.assert_called_once_with(reserve=FrameUBO.SIZE, dynamic=True)
+        self.frame_ubo.ubo.bind_to_uniform_block.assert_called_once_with(FRAME_BINDING)
+
+    def test_std140_layout(self):
+        # Test that every member is written at its std140 offset
+        data = self.frame_ubo.pack()
+        camera, light = self.mock_app.camera, self.mock_app.light
+
+        np.testing.assert_array_equal(data[0:16], np.array(camera.m_proj.to_list(), dtype='f4').reshape(16))
+        np.testing.assert_array_equal(data[16:32], np.array(camera.m_view.to_list(), dtype='f4').reshape(16))
+        np.testing.assert_array_equal(data[32:35], camera.view_position)
+        np.testing.assert_array_equal(data[36:39], light.position)
+        np.testing.assert_array_almost_equal(data[40:43], light.Ia)
+        np.testing.assert_array_almost_equal(data[44:47], light.Id)
+        np.testing.assert_array_almost_equal(data[48:51], light.Is)
+        np.testing.assert_array_equal(data[52:68], np.array((camera.m_proj * camera.m_view).to_list(),
+                                                            dtype='f4').reshape(16))
+        self.assertEqual(data.nbytes, FrameUBO.SIZE)
+
+    def test_update_uploads_current_camera(self):
+        # Test that update() packs the latest camera state into a single write
+        self.mock_app.camera.view_position = glm.vec3(7, 8, 9)
+        self.frame_ubo.update()
+
+        written = self.frame_ubo.ubo.write.call_args[0][0]
+        np.testing.assert_array_equal(written[32:35], (7, 8, 9))
+
+
+if __name__ == '__main__':
+    unittest.main()
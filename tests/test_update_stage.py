@@ -0,0 +1,69 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock
+import glm
+import numpy as np
+from src.bounding_volume import AABB
+from src.transform_store import TransformStore
+from src.update_stage import UpdateStage
+
+
+class TestUpdateStage(unittest.TestCase):
+
+    def setUp(self):
+        # Camera at the origin looking down -z, and a group of unit cubes along the z axis
+        self.camera = SimpleNamespace(m_proj=glm.perspective(glm.radians(50), 16 / 9, 0.1, 100),
+                                      m_view=glm.lookAt(glm.vec3(0), glm.vec3(0, 0, -1), glm.vec3(0, 1, 0)),
+                                      view_position=glm.vec3(0))
+        self.group = Mock(layer_ids=None, normal_vbo=None, aabb=AABB((-1, -1, -1), (1, 1, 1)))
+        self.group.instances = TransformStore()
+        self.group.instances.extend([(0, 0, -20), (0, 0, 10), (0, 0, -5), (0, 0, -50)])
+        self.group.animation = Mock()
+        self.app = Mock()
+
+    def create_stage(self, workers):
+        stage = UpdateStage(self.app, workers=workers, chunk_size=3)
+        stage.add(self.group)
+        self.addCleanup(stage.destroy)
+        return stage
+
+    def test_visible_instances_sorted_front_to_back(self):
+        # Test that the instance behind the camera is culled and the others drawn nearest first
+        commands = self.create_stage(0).begin_frame(self.camera, 0, 100)
+        (group, matrices, normals, layers), = commands.draws
+        np.testing.assert_allclose(matrices[:, 3, 2], [-5, -20, -50])
+        self.assertIsNone(normals)
+        self.assertIsNone(layers)
+        self.assertEqual(commands.culled, 1)
+
+    def test_animation_runs_on_every_chunk(self):
+        # Test that the animation covers all rows in chunks, at the time of the frame
+        self.create_stage(0).begin_frame(self.camera, 2.0, 100)
+        calls = [call.args[1:] for call in self.group.animation.call_args_list]
+        self.assertEqual(calls, [(0, 3, 2.0), (3, 4, 2.0), (0, 3, 2.1), (3, 4, 2.1)])
+
+    def test_next_frame_built_while_frame_is_submitted(self):
+        # Test that each frame hands out the list built the frame before and queues the next one
+        stage = self.create_stage(2)
+        first = stage.begin_frame(self.camera, 0, 100)
+        self.assertEqual((first.frame, first.time), (0, 0))
+        self.assertFalse(first.free.is_set())
+        stage.submit(first)
+        self.assertTrue(first.free.is_set())
+        self.group.instance_vbo.write.assert_called_once()
+        self.group.draw.assert_called_once()
+
+        second = stage.begin_frame(self.camera, 0.1, 100)
+        self.assertEqual(second.frame, 1)
+        self.assertAlmostEqual(second.time, 0.1)
+        self.assertEqual(stage.frame, 3)
+
+    def test_build_error_raised_on_main_thread(self):
+        # Test that an exception of a worker is raised by acquire() instead of hanging the frame
+        self.group.animation.side_effect = ValueError('bad animation')
+        with self.assertRaises(ValueError):
+            self.create_stage(2).begin_frame(self.camera, 0, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
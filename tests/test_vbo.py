@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import Mock
+import numpy as np
+from src.vbo import BaseVBO, CubeVBO, InstanceVBO, LayerVBO, NormalVBO
+
+
+class TestInstanceVBO(unittest.TestCase):
+
+    def setUp(self):
+        # Mock the OpenGL context so that buffers remember their reserved size
+        self.mock_ctx = Mock()
+        self.mock_ctx.buffer.side_effect = lambda reserve, dynamic: Mock(size=reserve)
+
+    def test_initial_upload(self):
+        # Test that the matrices are uploaded once and counted per instance
+        matrices = np.tile(np.eye(4, dtype='f4').reshape(16), (3, 1))
+        instance_vbo = InstanceVBO(self.mock_ctx, matrices)
+
+        self.assertEqual(instance_vbo.count, 3)
+        self.assertEqual(instance_vbo.format, '16f/i')
+        self.mock_ctx.buffer.assert_called_once_with(reserve=3 * 64, dynamic=True)
+        written = instance_vbo.vbo.write.call_args[0][0]
+        np.testing.assert_array_equal(written, matrices)
+
+    def test_write_reuses_buffer_when_large_enough(self):
+        # Test that a smaller upload overwrites the existing buffer in place
+        instance_vbo = InstanceVBO(self.mock_ctx, np.zeros((4, 4, 4), dtype='f4'))
+        buffer = instance_vbo.vbo
+
+        instance_vbo.write(np.zeros((2, 16), dtype='f4'))
+
+        self.assertIs(instance_vbo.vbo, buffer)
+        self.assertEqual(instance_vbo.count, 2)
+        self.assertEqual(self.mock_ctx.buffer.call_count, 1)
+
+    def test_write_grows_buffer(self):
+        # Test that a larger upload releases the old buffer and allocates a new one
+        instance_vbo = InstanceVBO(self.mock_ctx, np.zeros((1, 16), dtype='f4'))
+        buffer = instance_vbo.vbo
+
+        instance_vbo.write(np.zeros((10, 16), dtype='f4'))
+
+        buffer.release.assert_called_once()
+        self.assertIsNot(instance_vbo.vbo, buffer)
+        self.assertEqual(instance_vbo.vbo.size, 10 * 64)
+
+
+class TestNormalVBO(unittest.TestCase):
+
+    def test_write_range_offset(self):
+        # Test that a range of normal matrices is written at 36 bytes per instance
+        mock_ctx = Mock()
+        mock_ctx.buffer.side_effect = lambda reserve, dynamic: Mock(size=reserve)
+        normals = np.arange(4 * 9, dtype='f4').reshape(4, 3, 3)
+        normal_vbo = NormalVBO(mock_ctx, normals)
+
+        self.assertEqual((normal_vbo.count, normal_vbo.format), (4, '9f/i'))
+        normal_vbo.write_range(normals, 2, 4)
+        written, = normal_vbo.vbo.write.call_args[0]
+        np.testing.assert_array_equal(written, normals[2:4])
+        self.assertEqual(normal_vbo.vbo.write.call_args[1], {'offset': 72})
+
+
+class TestLayerVBO(unittest.TestCase):
+
+    def test_layers_uploaded_as_floats(self):
+        # Test that one float layer is uploaded per instance
+        mock_ctx = Mock()
+        layer_vbo = LayerVBO(mock_ctx, [0, 2, 1])
+
+        self.assertEqual(layer_vbo.count, 3)
+        self.assertEqual(layer_vbo.format, '1f/i')
+        written = mock_ctx.buffer.call_args[0][0]
+        np.testing.assert_array_equal(written, np.array([0, 2, 1], dtype='f4'))
+        self.assertEqual(written.dtype, np.float32)
+
+
+class TestIndexedData(unittest.TestCase):
+
+    def test_cube_deduplication(self):
+        # Test that the 36 unrolled cube vertices collapse to 4 vertices per face
+        # Build the vertex data without creating the OpenGL buffers
+        unrolled = CubeVBO.__new__(CubeVBO).get_vertex_data()
+        vertices, indices = BaseVBO.get_indexed_data(unrolled)
+
+        self.assertEqual(unrolled.shape, (36, 8))
+        self.assertEqual(vertices.shape, (24, 8))
+        self.assertEqual(indices.dtype, np.uint16)
+        np.testing.assert_array_equal(vertices[indices], unrolled)
+
+    def test_first_use_order(self):
+        # Test that unique vertices keep the order in which they are first referenced
+        data = np.array([[2] * 8, [1] * 8, [2] * 8, [0] * 8, [1] * 8, [0] * 8], dtype='f4')
+        vertices, indices = BaseVBO.get_indexed_data(data)
+        np.testing.assert_array_equal(vertices[:, 0], (2, 1, 0))
+        np.testing.assert_array_equal(indices, (0, 1, 0, 2, 1, 2))
+
+    def test_negative_zero_merged(self):
+        # Test that -0.0 and 0.0 are treated as the same value
+        data = np.zeros((3, 8), dtype='f4')
+        data[1, 3] = -0.0
+        vertices, indices = BaseVBO.get_indexed_data(data)
+        self.assertEqual(len(vertices), 1)
+
+    def test_uint32_indices_for_large_meshes(self):
+        # Test that meshes with more than 65535 unique vertices use 32-bit indices
+        data = np.zeros((70000, 8), dtype='f4')
+        data[:, 5] = np.arange(70000)
+        vertices, indices = BaseVBO.get_indexed_data(data)
+        self.assertEqual(indices.dtype, np.uint32)
+        np.testing.assert_array_equal(vertices[indices], data)
+
+
+if __name__ == '__main__':
+    unittest.main()